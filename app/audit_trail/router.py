@@ -5,6 +5,7 @@ from typing import Optional
 
 # Third party imports
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
@@ -27,7 +28,7 @@ logger = get_logger(__name__)
 
 
 @router.post("/manual", status_code=status.HTTP_201_CREATED)
-async def create_manual_audit_trail(
+def create_manual_audit_trail(
     entry: AuditTrailCreate,
     db: Session = Depends(get_db_with_current_user),
     get_current_user: User = Depends(get_current_user),
@@ -95,11 +96,16 @@ async def get_case_audit(
     Get the audit trail for a given case.
     """
     try:
-        case_info = bpm_service.get_cases(db, case_no=case_no, multiple=True)
+        # Case and audit lookups use the synchronous session; keep them off the event loop
+        case_info = await run_in_threadpool(
+            bpm_service.get_cases, db, case_no=case_no, multiple=True
+        )
         if not case_info:
             return {}
         case_ids = [case.id for case in case_info]
-        audits = audit_trail_service.get_audit_trail_by_case_ids(db, case_ids)
+        audits = await run_in_threadpool(
+            audit_trail_service.get_audit_trail_by_case_ids, db, case_ids
+        )
 
         results = []
 
@@ -152,7 +158,7 @@ async def get_case_audit(
 
 
 @router.get("/related-view", status_code=status.HTTP_200_OK)
-async def get_related_view(
+def get_related_view(
     medallion_id: Optional[int] = None,
     driver_id: Optional[int] = None,
     vehicle_id: Optional[int] = None,
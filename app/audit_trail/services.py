@@ -1,7 +1,7 @@
 ## app/audit_trail/services.py
 
 # Standard library imports
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from fastapi import HTTPException
 
@@ -214,6 +214,27 @@ class AuditTrailService:
             logger.error("Error creating audit trail: %s", e)
             raise e
 
+    def create_automated_audit_trails(
+        self, db: Session, entries: Iterable[Tuple[str, Dict]]
+    ) -> List[AuditTrail]:
+        """Create AUTOMATED audit entries (description, meta_data) without a case or user in one flush"""
+        try:
+            new_audit_logs = [
+                AuditTrail(
+                    description=description,
+                    audit_trail_type=AuditTrailType.AUTOMATED,
+                    meta_data=meta_data,
+                )
+                for description, meta_data in entries
+            ]
+            if new_audit_logs:
+                db.add_all(new_audit_logs)
+                db.flush()
+            return new_audit_logs
+        except Exception as e:
+            logger.error("Error creating audit trails: %s", e)
+            raise e
+
     def update_audit_trail(
         self, db: Session, audit_id: int, update_data: Dict
     ) -> AuditTrail:
@@ -7,6 +7,7 @@ from datetime import date
 
 # Third party imports
 from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from jsonschema import ValidationError, validate
 from sqlalchemy.orm import Session
@@ -33,7 +34,7 @@ logger = get_logger(__name__)
 
 
 @router.post("/case", tags=["BPM"])
-async def create_new_case(
+def create_new_case(
     request: Request,
     case_request: CreateCaseRequest,
     db: Session = Depends(get_db_with_current_user),
@@ -80,16 +81,10 @@ async def create_new_case(
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
-@router.post("/case/{case_no}", tags=["BPM"])
-async def process_case_step(
-    request: Request,
-    case_no: str = Path(..., description="The case number"),
-    step_data: StepDataRequest = Body(..., description="The JSON data to validate"),
-    db: Session = Depends(get_db_with_current_user),
-    logged_in_user: User = Depends(get_current_user),
+def _validate_case_step(
+    db: Session, case_no: str, step_data: StepDataRequest, logged_in_user: User
 ):
-    """Validate JSON data with the schema configured for this step id. Then process the step."""
-
+    """Validate the case, step, role and step data. Returns the case and the step function."""
     # Step 1: Validate the case_no
     result = bpm_service.get_cases(db, case_no=case_no, sort_order="desc")
 
@@ -166,16 +161,33 @@ async def process_case_step(
                 status_code=400, detail=f"JSON validation error: {e.message}"
             ) from e
 
+    return result, STEP_REGISTRY[f"{step_data.step_id}-process"]
+
+
+@router.post("/case/{case_no}", tags=["BPM"])
+async def process_case_step(
+    request: Request,
+    case_no: str = Path(..., description="The case number"),
+    step_data: StepDataRequest = Body(..., description="The JSON data to validate"),
+    db: Session = Depends(get_db_with_current_user),
+    logged_in_user: User = Depends(get_current_user),
+):
+    """Validate JSON data with the schema configured for this step id. Then process the step."""
+
+    # Validation reads the database and S3 synchronously; keep it off the event loop
+    result, step_function = await run_in_threadpool(
+        _validate_case_step, db, case_no, step_data, logged_in_user
+    )
+
     # Step 6: Call the step-specific function from the registry
     try:
-        step_function = STEP_REGISTRY[f"{step_data.step_id}-process"]
         import inspect
 
         func = step_function["function"]
         if inspect.iscoroutinefunction(func):
             function_result = await func(db, case_no, step_data.data)
         else:
-            function_result = func(db, case_no, step_data.data)
+            function_result = await run_in_threadpool(func, db, case_no, step_data.data)
     except ValueError as e:
         logger.error(e)
         raise HTTPException(status_code=400, detail=str(e)) from e
@@ -184,7 +196,8 @@ async def process_case_step(
         raise HTTPException(status_code=500, detail=str(e)) from e
 
     # Create audit trail for the step
-    audit_trail_service.create_audit_trail(
+    await run_in_threadpool(
+        audit_trail_service.create_audit_trail,
         db,
         case=result,
         user=logged_in_user,
@@ -196,7 +209,7 @@ async def process_case_step(
 
 
 @router.post("/case/{case_no}/move", tags=["BPM"])
-async def move_case_to_next_step(
+def move_case_to_next_step(
     request: Request,
     case_no: str,
     step_id: str = "",
@@ -257,7 +270,7 @@ async def move_case_to_next_step(
 
 
 @router.get("/case-history/{case_no}", tags=["BPM"])
-async def get_case_history(
+def get_case_history(
     case_no: str,
     db: Session = Depends(get_db),
     logged_in_user: User = Depends(get_current_user),
@@ -288,7 +301,7 @@ async def get_case_history(
 
 
 @router.get("/cases/by-type/{case_type}", tags=["BPM"])
-async def get_cases_by_type(
+def get_cases_by_type(
     case_type: str,
     db: Session = Depends(get_db),
     logged_in_user: User = Depends(get_current_user),
@@ -321,7 +334,7 @@ async def get_cases_by_type(
 
 
 @router.get("/case/{case_no}", tags=["BPM"])
-async def get_case_steps(
+def get_case_steps(
     request: Request,
     case_no: str,
     db: Session = Depends(get_db),
@@ -380,7 +393,7 @@ async def get_case_steps(
 
 
 @router.get("/case/{case_no}/{step_id}", tags=["BPM"])
-async def get_case_step_information(
+def get_case_step_information(
     request: Request,
     case_no: str,
     step_id: str,
@@ -416,7 +429,7 @@ async def get_case_step_information(
 
 
 @router.get("/cases/workbasket/", tags=["BPM"])
-async def get_workbasket(
+def get_workbasket(
     from_date: date = None,
     to_date: date = None,
     page: int = Query(1, ge=1),
@@ -484,7 +497,7 @@ async def get_workbasket(
 
 
 @router.put("/reassign-case", tags=["BPM"])
-async def reassign_case(
+def reassign_case(
     case_no: str,
     role_id: int = None,
     user_id: int = None,
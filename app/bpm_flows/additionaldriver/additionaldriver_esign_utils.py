@@ -10,7 +10,7 @@ from app.utils.logger import get_logger
 logger = get_logger(__name__)
 
 
-async def additionaldriver_recipient_completed(db: Session, ctx: dict, payload: dict):
+def additionaldriver_recipient_completed(db: Session, ctx: dict, payload: dict):
     """
     Handle recipient-completed event for additional driver signatures.
     Updates LeaseDriverDocument signoff status when driver completes signature.
@@ -108,7 +108,7 @@ async def additionaldriver_recipient_completed(db: Session, ctx: dict, payload:
         return {"ok": False, "error": str(e), "envelope_id": ctx.get("envelope_id")}
 
 
-async def additionaldriver_recipient_delivered(db: Session, ctx: dict, payload: dict):
+def additionaldriver_recipient_delivered(db: Session, ctx: dict, payload: dict):
     """
     Handle recipient-delivered event for additional driver signatures.
     Logs when signature request is delivered to the driver.
@@ -116,7 +116,7 @@ async def additionaldriver_recipient_delivered(db: Session, ctx: dict, payload:
     logger.info("[additionaldriver] recipient-delivered: %s", ctx)
 
 
-async def additionaldriver_recipient_declined(db: Session, ctx: dict, payload: dict):
+def additionaldriver_recipient_declined(db: Session, ctx: dict, payload: dict):
     """
     Handle recipient-declined event for additional driver signatures.
     Logs when driver declines to sign the document.
@@ -124,7 +124,7 @@ async def additionaldriver_recipient_declined(db: Session, ctx: dict, payload: d
     logger.info("[additionaldriver] recipient-declined: %s", ctx)
 
 
-async def additionaldriver_envelope_sent(db: Session, ctx: dict, payload: dict):
+def additionaldriver_envelope_sent(db: Session, ctx: dict, payload: dict):
     """
     Handle envelope-sent event for additional driver signatures.
     Updates envelope status in the database when envelope is sent.
@@ -209,7 +209,7 @@ async def additionaldriver_envelope_sent(db: Session, ctx: dict, payload: dict):
     }
 
 
-async def additionaldriver_envelope_completed(db: Session, ctx: dict, payload: dict):
+def additionaldriver_envelope_completed(db: Session, ctx: dict, payload: dict):
     """
     Handle envelope-completed event for additional driver signatures.
     Updates envelope status when all signatures are completed.
@@ -12,7 +12,7 @@ from app.utils.logger import get_logger
 logger = get_logger(__name__)
 
 
-async def driverlease_recipient_completed(db: Session, ctx: dict, payload: dict):
+def driverlease_recipient_completed(db: Session, ctx: dict, payload: dict):
     logger.info("[driverlease] recipient-completed: %s", ctx)
     try:
         summary = lease_service.update_lease_driver_document_signoff_latest(db, ctx=ctx)
@@ -83,15 +83,15 @@ async def driverlease_recipient_completed(db: Session, ctx: dict, payload: dict)
         return {"ok": False, "error": str(e), "envelope_id": ctx.get("envelope_id")}
 
 
-async def driverlease_recipient_delivered(db: Session, ctx: dict, payload: dict):
+def driverlease_recipient_delivered(db: Session, ctx: dict, payload: dict):
     logger.info("[driverlease] recipient-delivered: %s", ctx)
 
 
-async def driverlease_recipient_declined(db: Session, ctx: dict, payload: dict):
+def driverlease_recipient_declined(db: Session, ctx: dict, payload: dict):
     logger.info("[driverlease] recipient-declined: %s", ctx)
 
 
-async def driverlease_envelope_sent(db: Session, ctx: dict, payload: dict):
+def driverlease_envelope_sent(db: Session, ctx: dict, payload: dict):
     logger.info("[driverlease] envelope-sent: %s", ctx)
     rows = esign_utils.update_envelope_status(db, ctx=ctx, status="envelope-sent")
     # Ensure pending UPDATE is pushed to the DB connection without committing
@@ -154,7 +154,7 @@ async def driverlease_envelope_sent(db: Session, ctx: dict, payload: dict):
     }
 
 
-async def driverlease_envelope_completed(db: Session, ctx: dict, payload: dict):
+def driverlease_envelope_completed(db: Session, ctx: dict, payload: dict):
     logger.info("[driverlease] envelope-completed: %s", ctx)
     rows = esign_utils.update_envelope_status(db, ctx=ctx, status="envelope-completed")
     db.flush()
@@ -15,7 +15,9 @@ from app.drivers.services import driver_service
 
 # Docusign imports and tracking
 from app.esign.models import ESignEnvelope
+from app.leases.availability import LeaseAvailabilityService
 from app.leases.schemas import (
+    LeaseAvailabilityEntity,
     LeaseStatus,
     LeaseType,
     LongTermLease,
@@ -74,7 +76,10 @@ def search_vehicle_information(db: Session, case_no, case_params=None):
             plate_number=case_params["plate_number"],
         )
 
-        if not vehicle or vehicle.vehicle_status != VehicleStatus.HACKED_UP:
+        # Same eligibility as the can_lease candidate list
+        if not vehicle or not LeaseAvailabilityService(db).can_lease(
+            LeaseAvailabilityEntity.VEHICLE, vehicle.id
+        ):
             return {}
 
         hackup = vehicle_service.get_vehicle_hackup(
@@ -748,9 +753,8 @@ def choose_driver(db, case_no, case_params=None):
                 "selected_driver_info": selected_driver_info,
             }
 
-        if (
-            driver.driver_status != DriverStatus.REGISTERED
-            and driver.driver_status != DriverStatus.ACTIVE
+        if not LeaseAvailabilityService(db).can_lease(
+            LeaseAvailabilityEntity.DRIVER, driver.id
         ):
             return {
                 "lease_case_details": lease_case_details,
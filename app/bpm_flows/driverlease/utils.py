@@ -14,10 +14,10 @@ from sqlalchemy import delete, desc
 # Local imports
 from app.vehicles.models import Vehicle, VehicleHackUp, VehicleRegistration
 from app.medallions.models import Medallion
+from app.leases.availability import LeaseAvailabilityService
 from app.leases.models import Lease, LeaseConfiguration, LeaseDriver, LeaseDriverDocument
 from app.drivers.models import Driver, TLCLicense, DMVLicense
-from app.vehicles.schemas import VehicleStatus
-from app.leases.schemas import LeaseStatus, LeaseType, LongTermLease, ShiftLease, ShortTermLease, MedallionOnlyLease
+from app.leases.schemas import LeaseAvailabilityEntity, LeaseStatus, LeaseType, LongTermLease, ShiftLease, ShortTermLease, MedallionOnlyLease
 from app.drivers.schemas import DOVLease
 from app.bat import utils as bat_utils
 from app.vehicles.services import vehicle_service
@@ -68,7 +68,7 @@ def choose_vehicle_search_details(
     if not vehicle:
         return {}
 
-    if vehicle.vehicle_status != VehicleStatus.HACKED_UP :
+    if not LeaseAvailabilityService(db).can_lease(LeaseAvailabilityEntity.VEHICLE, vehicle.id):
         return {}
 
     # Check if the vehicle has an active or in-progress hackup
@@ -0,0 +1,419 @@
+## app/core/cache.py
+
+"""
+Result cache backed by Redis with an in-process fallback.
+
+Values are stored as JSON under `<namespace>:v<version>:<key>`. Bumping a
+namespace's version invalidates every key in it in O(1), which is how
+callers drop all cached variants (filters, pages, date ranges) at once.
+If Redis is unreachable the cache degrades to a per-process LRU/TTL store
+and retries Redis after a short back-off, so callers never fail on caching.
+`get_or_set_coalesced` lets concurrent misses for one key share a single
+computation (per-process lock plus a Redis lock across processes).
+`DistributedLock` is a named, token-owned lock on the same Redis, used to
+keep jobs such as CSV imports from running twice across workers. Unlike the
+cache it has no in-process fallback: a per-process lock would let every
+worker take it, so it raises LockUnavailableError while Redis is down.
+"""
+
+# Standard library imports
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+# Third party imports
+import redis
+
+# Local imports
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds to wait before retrying Redis after a connection failure
+REDIS_RETRY_BACKOFF_SECONDS = 30
+# Upper bound on entries held by the in-process fallback
+LOCAL_CACHE_MAX_ENTRIES = 2048
+# Seconds between checks while waiting on another process's computation
+COALESCE_POLL_SECONDS = 0.1
+
+_redis_client: Optional[redis.Redis] = None
+_redis_down_until: float = 0.0
+_redis_lock = threading.Lock()
+
+# Striped per-key locks used to coalesce computations within a process
+_key_locks = [threading.Lock() for _ in range(64)]
+
+
+def _get_redis_client() -> Optional[redis.Redis]:
+    """Return a shared Redis client, or None while Redis is backing off"""
+    global _redis_client
+
+    if time.monotonic() < _redis_down_until:
+        return None
+
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                _redis_client = redis.Redis.from_url(
+                    settings.cache_manager,
+                    decode_responses=True,
+                    socket_timeout=2,
+                    socket_connect_timeout=2,
+                )
+    return _redis_client
+
+
+def _mark_redis_down(error: Exception) -> None:
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + REDIS_RETRY_BACKOFF_SECONDS
+    logger.warning(
+        "Redis cache unavailable, using in-process cache",
+        error=str(error), retry_in_seconds=REDIS_RETRY_BACKOFF_SECONDS,
+    )
+
+
+class LocalTTLCache:
+    """Thread-safe in-process LRU/TTL store used when Redis is unavailable"""
+
+    def __init__(self, max_entries: int = LOCAL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_entries:
+                self._evict()
+
+    def add(self, key: str, value: str, ttl: int) -> bool:
+        """Set key only if absent (or expired); returns whether it was set"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] >= time.monotonic():
+                return False
+            self._data[key] = (time.monotonic() + ttl, value)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            _, value = self._data.get(key, (0.0, "0"))
+            new_value = int(value) + 1
+            # Version counters never expire
+            self._data[key] = (float("inf"), str(new_value))
+            self._data.move_to_end(key)
+            return new_value
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        expired = [k for k, (exp, _) in self._data.items() if exp < now]
+        for key in expired:
+            del self._data[key]
+        # Drop least recently used entries
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+
+_local_cache = LocalTTLCache()
+
+
+def make_cache_key(*parts: Any, **filters: Any) -> str:
+    """
+    Build a stable cache key from positional parts and keyword filters.
+
+    Filters are sorted and hashed so the key length stays bounded regardless
+    of how many filters a screen sends.
+    """
+    prefix = ":".join(str(p) for p in parts)
+    if not filters:
+        return prefix
+    payload = json.dumps(filters, sort_keys=True, default=str)
+    digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+    return f"{prefix}:{digest}" if prefix else digest
+
+
+class ResultCache:
+    """
+    Namespaced JSON result cache.
+
+    Usage:
+        cache = ResultCache("dtr_summary", ttl_seconds=300)
+        value = cache.get_or_set(key, lambda: compute())
+        cache.invalidate_all()
+    """
+
+    def __init__(self, namespace: str, ttl_seconds: int):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+
+    # ---- Public API ----
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        raw = self._backend_get(self._full_key(key))
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except (TypeError, ValueError):
+            return None
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        """Store a JSON-serializable value (Decimals/dates are stored as strings)"""
+        raw = json.dumps(value, default=str)
+        self._backend_set(self._full_key(key), raw, ttl_seconds or self.ttl_seconds)
+
+    def delete(self, key: str) -> None:
+        """Remove a single key"""
+        full_key = self._full_key(key)
+        client = _get_redis_client()
+        if client is not None:
+            try:
+                client.delete(full_key)
+            except redis.RedisError as e:
+                _mark_redis_down(e)
+        _local_cache.delete(full_key)
+
+    def invalidate_all(self) -> None:
+        """Invalidate every key in the namespace by bumping its version"""
+        version_key = self._version_key()
+        client = _get_redis_client()
+        if client is not None:
+            try:
+                client.incr(version_key)
+            except redis.RedisError as e:
+                _mark_redis_down(e)
+        _local_cache.incr(version_key)
+
+    def get_or_set(self, key: str, factory: Callable[[], Any]) -> Any:
+        """Return the cached value, computing and storing it on a miss"""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        value = factory()
+        self.set(key, value)
+        return value
+
+    def get_or_set_coalesced(
+        self,
+        key: str,
+        factory: Callable[[], Any],
+        lock_ttl_seconds: int = 60,
+        wait_seconds: float = 30.0
+    ) -> Any:
+        """
+        Like get_or_set, but concurrent misses for the same key share one
+        computation: other callers wait for the value instead of stampeding.
+
+        Args:
+            key: Cache key
+            factory: Computes the value on a miss
+            lock_ttl_seconds: Lifetime of the cross-process compute lock
+            wait_seconds: How long to wait for another process before
+                computing anyway
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        full_key = self._full_key(key)
+        with _key_locks[hash(full_key) % len(_key_locks)]:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+
+            lock_key = f"{full_key}:lock"
+            if self._acquire_lock(lock_key, lock_ttl_seconds):
+                try:
+                    value = factory()
+                    self.set(key, value)
+                    return value
+                finally:
+                    self._release_lock(lock_key)
+
+            # Another process is computing; wait for its result
+            deadline = time.monotonic() + wait_seconds
+            while time.monotonic() < deadline:
+                time.sleep(COALESCE_POLL_SECONDS)
+                cached = self.get(key)
+                if cached is not None:
+                    return cached
+
+            logger.warning("Timed out waiting for cached result", key=full_key)
+            value = factory()
+            self.set(key, value)
+            return value
+
+    # ---- Internal helpers ----
+
+    def _acquire_lock(self, lock_key: str, ttl: int) -> bool:
+        client = _get_redis_client()
+        if client is not None:
+            try:
+                return bool(client.set(lock_key, "1", nx=True, ex=ttl))
+            except redis.RedisError as e:
+                _mark_redis_down(e)
+        return _local_cache.add(lock_key, "1", ttl)
+
+    def _release_lock(self, lock_key: str) -> None:
+        client = _get_redis_client()
+        if client is not None:
+            try:
+                client.delete(lock_key)
+            except redis.RedisError as e:
+                _mark_redis_down(e)
+        _local_cache.delete(lock_key)
+
+    def _version_key(self) -> str:
+        return f"{self.namespace}:version"
+
+    def _version(self) -> str:
+        version_key = self._version_key()
+        client = _get_redis_client()
+        if client is not None:
+            try:
+                return client.get(version_key) or "0"
+            except redis.RedisError as e:
+                _mark_redis_down(e)
+        return _local_cache.get(version_key) or "0"
+
+    def _full_key(self, key: str) -> str:
+        return f"{self.namespace}:v{self._version()}:{key}"
+
+    def _backend_get(self, full_key: str) -> Optional[str]:
+        client = _get_redis_client()
+        if client is not None:
+            try:
+                return client.get(full_key)
+            except redis.RedisError as e:
+                _mark_redis_down(e)
+        return _local_cache.get(full_key)
+
+    def _backend_set(self, full_key: str, raw: str, ttl: int) -> None:
+        client = _get_redis_client()
+        if client is not None:
+            try:
+                client.set(full_key, raw, ex=ttl)
+                return
+            except redis.RedisError as e:
+                _mark_redis_down(e)
+        _local_cache.set(full_key, raw, ttl)
+
+
+class LockUnavailableError(Exception):
+    """Raised when a DistributedLock cannot reach Redis"""
+
+    def __init__(self, key: str):
+        self.key = key
+        super().__init__(f"Lock '{key}' is unavailable: Redis cannot be reached.")
+
+
+class DistributedLock:
+    """
+    Named lock shared by every process through Redis (SET NX EX).
+
+    `acquire` returns a token and only the holder of that token can release
+    the lock, so a job that outlives the TTL cannot release a lock that was
+    since taken by someone else. The TTL bounds how long a crashed holder
+    blocks others. While Redis is unreachable the lock fails closed:
+    `acquire` raises LockUnavailableError rather than falling back to
+    in-process state that other workers cannot see.
+
+    Usage:
+        lock = DistributedLock("ezpass_import", ttl_seconds=3600)
+        token = lock.acquire()
+        if token is None:
+            ...  # already held
+        try:
+            ...
+        finally:
+            lock.release(token)
+    """
+
+    # Delete the key only if it still holds our token
+    _RELEASE_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(self, name: str, ttl_seconds: int):
+        self.key = f"lock:{name}"
+        self.ttl_seconds = ttl_seconds
+
+    def _client(self) -> redis.Redis:
+        client = _get_redis_client()
+        if client is None:
+            raise LockUnavailableError(self.key)
+        return client
+
+    def acquire(self) -> Optional[str]:
+        """
+        Take the lock; returns the owner token, or None if already held.
+
+        Raises:
+            LockUnavailableError: Redis cannot be reached
+        """
+        token = uuid.uuid4().hex
+        client = self._client()
+        try:
+            if client.set(self.key, token, nx=True, ex=self.ttl_seconds):
+                return token
+            return None
+        except redis.RedisError as e:
+            _mark_redis_down(e)
+            raise LockUnavailableError(self.key) from e
+
+    def release(self, token: Optional[str]) -> None:
+        """
+        Release the lock if it is still held with this token. If Redis cannot
+        be reached the lock is left to expire after its TTL.
+        """
+        if not token:
+            return
+        client = _get_redis_client()
+        if client is not None:
+            try:
+                client.eval(self._RELEASE_SCRIPT, 1, self.key, token)
+                return
+            except redis.RedisError as e:
+                _mark_redis_down(e)
+        logger.warning(
+            "Could not release lock, it expires after its TTL",
+            key=self.key, ttl_seconds=self.ttl_seconds,
+        )
+
+    def is_locked(self) -> bool:
+        """
+        Whether anyone holds the lock.
+
+        Raises:
+            LockUnavailableError: Redis cannot be reached
+        """
+        client = self._client()
+        try:
+            return bool(client.exists(self.key))
+        except redis.RedisError as e:
+            _mark_redis_down(e)
+            raise LockUnavailableError(self.key) from e
@@ -89,6 +89,9 @@ class Settings(BaseSettings):
     db_password: str
     db_database: str
     db_port: int = 3360
+    # Optional read replica (same credentials/database as the primary)
+    db_replica_host: str = None
+    db_replica_port: int = None
 
     json_config: str = None
 
@@ -212,6 +215,9 @@ class Settings(BaseSettings):
     )
     lease_renewal_sms_template_key: str = "email_sms_templates/lease_renewal_sms.txt"
 
+    # Seconds an S3 email/SMS template is used before it is revalidated
+    email_template_cache_ttl_seconds: int = 300
+
     super_admin_email_id: str = "superadmin@bat.com"
 
     tlc_service_fee: int = 10
@@ -250,6 +256,15 @@ class Settings(BaseSettings):
         host, user, password, database, port = self._db_tuple
         return f"mysql+pymysql://{user}:{password}@{host}:{port}/{database}"
 
+    @property
+    def replica_db_url(self) -> str | None:
+        """Read replica URL, or None when no replica is configured"""
+        if not self.db_replica_host:
+            return None
+        _, user, password, database, port = self._db_tuple
+        port = self.db_replica_port or port
+        return f"mysql+pymysql://{user}:{password}@{self.db_replica_host}:{port}/{database}"
+
     @property
     def async_db_url(self) -> str:
         host, user, password, database, port = self._db_tuple
@@ -17,6 +17,11 @@ engine = create_engine(settings.db_url)
 # --- Create sessionmaker ---
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# --- Read replica (falls back to the primary when not configured) ---
+_replica_url = settings.replica_db_url
+replica_engine = create_engine(_replica_url, pool_pre_ping=True) if _replica_url else engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
 # --- Create declarative base ---
 Base = declarative_base()
 
@@ -90,6 +95,21 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """
+    Method for obtaining a read-only database session.
+
+    Bound to the read replica when one is configured, otherwise to the
+    primary. Nothing is ever committed; the transaction is rolled back.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+
+
 def generate_schema_description() -> str:
     """
     Generate a schema description for the database
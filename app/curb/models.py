@@ -9,6 +9,7 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
@@ -29,6 +30,14 @@ class CurbTripStatus(str, PyEnum):
     ERROR = "ERROR"
 
 
+class AssociationFailureCode(str, PyEnum):
+    """Why a toll or violation could not be associated to a CURB trip."""
+
+    NO_PLATE_MATCH = "NO_PLATE_MATCH"
+    NO_TRIP_IN_WINDOW = "NO_TRIP_IN_WINDOW"
+    TRIP_WITHOUT_DRIVER = "TRIP_WITHOUT_DRIVER"
+
+
 class PaymentType(str, PyEnum):
     """Enumeration for the trip's payment type."""
 
@@ -172,6 +181,11 @@ class CurbTrip(Base, AuditMixin):
     vehicle: Mapped[Optional["Vehicle"]] = relationship()
     medallion: Mapped[Optional["Medallion"]] = relationship()
 
+    __table_args__ = (
+        # Finds trips mapped to a vehicle since a failed association was checked
+        Index("ix_curb_trips_vehicle_updated", "vehicle_id", "updated_on"),
+    )
+
     def to_dict(self):
         """Converts the CurbTrip object to a dictionary."""
         return {
@@ -124,7 +124,7 @@ def map_reconciled_curb_trips(
     summary="Post Mapped CURB Earnings to Ledger",
     status_code=status.HTTP_200_OK,
 )
-async def post_earnings_to_ledger(
+def post_earnings_to_ledger(
     start_date: date = Query(
         ..., description="Start date of the period to post earnings for (YYYY-MM-DD)."
     ),
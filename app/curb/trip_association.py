@@ -0,0 +1,259 @@
+### app/curb/trip_association.py
+
+"""
+Batch association of time-stamped charges (EZPass tolls, PVB violations)
+to the CURB trip that was running on the vehicle at the time.
+
+Instead of one plate scan and one or two trip queries per record, a batch:
+1. resolves every plate to the vehicle that carried it on the day, through
+   the normalized plate index (app.vehicles.plate_index),
+2. loads the trips of all resolved vehicles for the batch's time span in
+   one projected query,
+3. matches each record to its trip with a sorted sweep per vehicle.
+
+The caller writes the results back in bulk.
+"""
+
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.curb.models import AssociationFailureCode, CurbTrip
+from app.utils.logger import get_logger
+from app.vehicles.plate_index import PlateResolver
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class AssociationRequest:
+    """A record to associate: caller key, plate as received, event time and plate state if known"""
+    key: Hashable
+    plate: str
+    occurred_at: datetime
+    state: Optional[str] = None
+
+
+@dataclass
+class TripAssociation:
+    """Outcome for one request; failure_reason and failure_code are None on success"""
+    vehicle_id: Optional[int] = None
+    driver_id: Optional[int] = None
+    lease_id: Optional[int] = None
+    medallion_id: Optional[int] = None
+    failure_reason: Optional[str] = None
+    failure_code: Optional[AssociationFailureCode] = None
+
+    @property
+    def is_associated(self) -> bool:
+        return self.failure_reason is None
+
+
+class _VehicleTrips:
+    """Trips of one vehicle sorted by start, with running max of end times"""
+
+    def __init__(self, trips: List[tuple]):
+        trips.sort(key=lambda trip: trip.start_time)
+        self.trips = trips
+        self.starts = [trip.start_time for trip in trips]
+        self.max_end = []
+        running = None
+        for trip in trips:
+            end = trip.end_time or trip.start_time
+            running = end if running is None or end > running else running
+            self.max_end.append(running)
+
+    def latest_overlapping(self, lower: datetime, upper: datetime):
+        """
+        Trip with the latest start among those with start <= upper and
+        end >= lower (same pick as ORDER BY start_time DESC LIMIT 1).
+        """
+        index = bisect_right(self.starts, upper) - 1
+        while index >= 0 and self.max_end[index] >= lower:
+            trip = self.trips[index]
+            if (trip.end_time or trip.start_time) >= lower:
+                return trip
+            index -= 1
+        return None
+
+
+class TripAssociationEngine:
+    """Associate a batch of plate/time records to CURB trips"""
+
+    def __init__(
+        self,
+        db: Session,
+        window: timedelta,
+        fallback_to_latest_trip: bool = False
+    ):
+        """
+        Args:
+            db: Database session
+            window: Tolerance around the event time when matching trips
+            fallback_to_latest_trip: When no trip with a driver covers the
+                event, use the vehicle's latest trip (EZPass behaviour)
+        """
+        self.db = db
+        self.window = window
+        self.fallback_to_latest_trip = fallback_to_latest_trip
+
+    def associate(self, requests: Iterable[AssociationRequest]) -> Dict[Hashable, TripAssociation]:
+        """
+        Match every request to a vehicle and trip.
+
+        Returns:
+            Dictionary of request key -> TripAssociation
+        """
+        requests = list(requests)
+        if not requests:
+            return {}
+
+        plates = PlateResolver(self.db).load(r.plate for r in requests)
+
+        results: Dict[Hashable, TripAssociation] = {}
+        by_vehicle: Dict[int, List[Tuple[AssociationRequest, datetime]]] = defaultdict(list)
+
+        for request in requests:
+            vehicle_id = plates.vehicle_for(request.plate, request.state, request.occurred_at)
+            if vehicle_id is None:
+                results[request.key] = TripAssociation(
+                    failure_reason=f"No vehicle found for plate '{request.plate}'",
+                    failure_code=AssociationFailureCode.NO_PLATE_MATCH,
+                )
+                continue
+            by_vehicle[vehicle_id].append((request, self._naive(request.occurred_at)))
+
+        if not by_vehicle:
+            return results
+
+        trips_by_vehicle = self._load_trips(by_vehicle)
+        latest_trips = {}
+        unmatched: List[Tuple[int, AssociationRequest, datetime, bool]] = []
+
+        for vehicle_id, vehicle_requests in by_vehicle.items():
+            vehicle_trips = trips_by_vehicle.get(vehicle_id)
+            for request, occurred_at in vehicle_requests:
+                trip = None
+                if vehicle_trips:
+                    trip = vehicle_trips.latest_overlapping(
+                        occurred_at - self.window, occurred_at + self.window
+                    )
+                if trip is not None and trip.driver_id:
+                    results[request.key] = self._matched(vehicle_id, trip)
+                else:
+                    unmatched.append((vehicle_id, request, occurred_at, trip is not None))
+
+        if unmatched and self.fallback_to_latest_trip:
+            latest_trips = self._load_latest_trips({vehicle_id for vehicle_id, _, _, _ in unmatched})
+
+        for vehicle_id, request, occurred_at, found_trip in unmatched:
+            trip = latest_trips.get(vehicle_id)
+            if trip is not None and trip.driver_id:
+                results[request.key] = self._matched(vehicle_id, trip)
+                continue
+            found_trip = found_trip or trip is not None
+            results[request.key] = TripAssociation(
+                vehicle_id=vehicle_id,
+                failure_reason=f"No active CURB trip found for vehicle {vehicle_id} around {occurred_at}",
+                failure_code=(
+                    AssociationFailureCode.TRIP_WITHOUT_DRIVER if found_trip
+                    else AssociationFailureCode.NO_TRIP_IN_WINDOW
+                ),
+            )
+
+        return results
+
+    # ==========================================
+    # Loaders
+    # ==========================================
+
+    def _load_trips(
+        self,
+        by_vehicle: Dict[int, List[Tuple[AssociationRequest, datetime]]]
+    ) -> Dict[int, _VehicleTrips]:
+        """One projected query for all vehicles over the batch's time span"""
+        times = [occurred_at for items in by_vehicle.values() for _, occurred_at in items]
+        span_start = min(times) - self.window
+        span_end = max(times) + self.window
+
+        rows = (
+            self.db.query(
+                CurbTrip.vehicle_id,
+                CurbTrip.start_time,
+                CurbTrip.end_time,
+                CurbTrip.driver_id,
+                CurbTrip.lease_id,
+                CurbTrip.medallion_id,
+            )
+            .filter(
+                CurbTrip.vehicle_id.in_(list(by_vehicle.keys())),
+                CurbTrip.start_time <= span_end,
+                CurbTrip.end_time >= span_start,
+            )
+            .all()
+        )
+
+        grouped: Dict[int, List[tuple]] = defaultdict(list)
+        for row in rows:
+            grouped[row.vehicle_id].append(row)
+
+        logger.info(
+            "Loaded CURB trips for association",
+            vehicles=len(by_vehicle), trips=len(rows)
+        )
+        return {vehicle_id: _VehicleTrips(trips) for vehicle_id, trips in grouped.items()}
+
+    def _load_latest_trips(self, vehicle_ids: set) -> Dict[int, tuple]:
+        """Latest trip per vehicle (any time), in one grouped query"""
+        latest = (
+            self.db.query(
+                CurbTrip.vehicle_id.label("vehicle_id"),
+                func.max(CurbTrip.start_time).label("start_time"),
+            )
+            .filter(CurbTrip.vehicle_id.in_(list(vehicle_ids)))
+            .group_by(CurbTrip.vehicle_id)
+            .subquery()
+        )
+        rows = (
+            self.db.query(
+                CurbTrip.id,
+                CurbTrip.vehicle_id,
+                CurbTrip.driver_id,
+                CurbTrip.lease_id,
+                CurbTrip.medallion_id,
+            )
+            .join(
+                latest,
+                (CurbTrip.vehicle_id == latest.c.vehicle_id)
+                & (CurbTrip.start_time == latest.c.start_time),
+            )
+            .order_by(CurbTrip.id.desc())
+            .all()
+        )
+        trips = {}
+        for row in rows:
+            trips.setdefault(row.vehicle_id, row)
+        return trips
+
+    # ==========================================
+    # Helpers
+    # ==========================================
+
+    @staticmethod
+    def _matched(vehicle_id: int, trip) -> TripAssociation:
+        return TripAssociation(
+            vehicle_id=vehicle_id,
+            driver_id=trip.driver_id,
+            lease_id=trip.lease_id,
+            medallion_id=trip.medallion_id,
+        )
+
+    @staticmethod
+    def _naive(value: datetime) -> datetime:
+        """Trip times are stored naive; compare on the same wall clock"""
+        return value.replace(tzinfo=None) if value.tzinfo else value
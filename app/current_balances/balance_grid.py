@@ -0,0 +1,527 @@
+# app/current_balances/balance_grid.py
+
+"""
+Weekly Balance Grid maintenance.
+
+The `weekly_balance_grid` table holds one precomputed current-balances row
+per lease per week, so the `/current-balances` screen can filter, sort and
+paginate in SQL instead of computing the whole fleet for every page.
+
+An `after_flush` listener records which leases were touched by ledger
+postings/balances, CURB trips, EZPass tolls, PVB/TLC violations, repair and
+loan installments, lease schedules or DTRs (a record moved to another lease
+marks both). Writers that bypass the flush
+with Core UPDATEs report their leases through `mark_leases_changed`.
+Once the transaction commits,
+those leases are recomputed for the current week by a Celery task and the
+short-TTL live balance cache is invalidated.
+`BalanceGridService.rebuild` recomputes a whole week and is scheduled to
+reconcile the grid and seed each new week.
+"""
+
+from datetime import date, timezone
+from decimal import Decimal
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import case, event, func, or_, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.current_balances.models import WeeklyBalanceGrid
+from app.current_balances.schemas import (
+    CurrentBalancesFilter,
+    DTRStatusEnum,
+    DriverStatusEnum,
+    LeaseStatusEnum,
+    PaymentTypeEnum,
+    WeeklyBalanceRow,
+)
+from app.current_balances.services_optimized import (
+    DEDUCTION_FIELDS,
+    DRIVER_STATUS_MAPPING,
+    LEASE_STATUS_MAPPING,
+    CurrentBalancesServiceOptimized,
+    build_balances_summary,
+    invalidate_live_balances,
+)
+from app.curb.models import CurbTrip
+from app.drivers.models import Driver
+from app.dtr.models import DTR
+from app.ezpass.models import EZPassTransaction
+from app.leases.models import Lease, LeaseDriver, LeaseSchedule
+from app.leases.schemas import LeaseStatus
+from app.ledger.models import LedgerBalance, LedgerPosting
+from app.loans.models import DriverLoan, LoanInstallment
+from app.pvb.models import PVBViolation
+from app.repairs.models import RepairInstallment, RepairInvoice
+from app.tlc.models import TLCViolation
+from app.vehicles.models import Vehicle, VehicleRegistration
+from app.vehicles.plate_index import plate_key_matches
+from app.utils.flush_tracking import attribute_values, track_previous_values
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Leases shown on the current-balances screen
+GRID_LEASE_STATUSES = [LeaseStatus.ACTIVE, LeaseStatus.TERMINATED]
+
+# Leases recomputed per batch during a rebuild
+REBUILD_CHUNK_SIZE = 500
+
+# Models whose changes affect a lease's balance row via a `lease_id` column
+LEASE_KEYED_MODELS = (
+    LedgerPosting, LedgerBalance, CurbTrip, EZPassTransaction, PVBViolation,
+    TLCViolation, LeaseSchedule, LeaseDriver, RepairInvoice, DriverLoan, DTR,
+)
+track_previous_values(
+    *(model.lease_id for model in LEASE_KEYED_MODELS),
+    RepairInstallment.invoice_id, LoanInstallment.loan_id,
+)
+
+# Columns that can be sorted on directly in the grid
+GRID_SORT_COLUMNS = {
+    "lease_id", "driver_name", "tlc_license", "ssn", "medallion_number",
+    "plate_number", "vin_number", "cc_earnings", "weekly_lease_fee", "mta_tif",
+    "ezpass_tolls", "pvb_violations", "tlc_tickets", "repairs_wtd", "loans_wtd",
+    "misc_charges", "subtotal_deductions", "prior_balance", "deposit_amount",
+    "net_earnings", "last_updated",
+}
+
+FINANCIAL_FIELDS = (
+    "cc_earnings", "weekly_lease_fee", "mta_tif", "ezpass_tolls", "pvb_violations",
+    "tlc_tickets", "repairs_wtd", "loans_wtd", "misc_charges", "subtotal_deductions",
+    "prior_balance", "deposit_amount", "net_earnings",
+)
+
+_PENDING_KEY = "balance_grid_pending"
+
+
+def _split_terms(value: str) -> List[str]:
+    return [term.strip() for term in value.split(',') if term.strip()]
+
+
+class BalanceGridService:
+    """Service for maintaining and querying the weekly balance grid"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.balances = CurrentBalancesServiceOptimized(db)
+
+    # ==========================================
+    # Maintenance
+    # ==========================================
+
+    def has_week(self, week_start: date) -> bool:
+        """Whether the grid has been built for the given week"""
+        return self.db.query(
+            self.db.query(WeeklyBalanceGrid.id)
+            .filter(WeeklyBalanceGrid.week_start == week_start)
+            .exists()
+        ).scalar()
+
+    def refresh_leases(
+        self,
+        lease_ids: Iterable[int],
+        week_start: Optional[date] = None,
+        week_end: Optional[date] = None
+    ) -> int:
+        """
+        Recompute grid rows for the given leases.
+
+        Leases that are no longer shown on the screen lose their row. Does
+        nothing until the week has been built by `rebuild`.
+
+        Returns:
+            Number of rows written.
+        """
+        lease_ids = {lease_id for lease_id in lease_ids if lease_id is not None}
+        week_start, week_end = self._resolve_week(week_start, week_end)
+        if not lease_ids or not self.has_week(week_start):
+            return 0
+
+        leases = self._load_leases(lease_ids)
+        stale_ids = lease_ids - {lease.id for lease in leases}
+        if stale_ids:
+            self.db.query(WeeklyBalanceGrid).filter(
+                WeeklyBalanceGrid.week_start == week_start,
+                WeeklyBalanceGrid.lease_pk.in_(stale_ids),
+            ).delete(synchronize_session=False)
+
+        written = self._write_rows(leases, week_start, week_end)
+        self.db.commit()
+
+        logger.info(
+            "Refreshed balance grid rows",
+            week_start=str(week_start), refreshed=written, removed=len(stale_ids)
+        )
+        return written
+
+    def rebuild(
+        self,
+        week_start: Optional[date] = None,
+        week_end: Optional[date] = None
+    ) -> Dict[str, int]:
+        """
+        Recompute every grid row for a week (default: current week).
+
+        Returns:
+            Dictionary with the number of rows written.
+        """
+        week_start, week_end = self._resolve_week(week_start, week_end)
+        logger.info("Rebuilding weekly balance grid", week_start=str(week_start))
+
+        lease_ids = [
+            row.id for row in self.db.query(Lease.id)
+            .filter(Lease.lease_status.in_(GRID_LEASE_STATUSES))
+            .order_by(Lease.id)
+            .all()
+        ]
+
+        self.db.query(WeeklyBalanceGrid).filter(
+            WeeklyBalanceGrid.week_start == week_start
+        ).delete(synchronize_session=False)
+
+        written = 0
+        for offset in range(0, len(lease_ids), REBUILD_CHUNK_SIZE):
+            leases = self._load_leases(lease_ids[offset:offset + REBUILD_CHUNK_SIZE])
+            written += self._write_rows(leases, week_start, week_end, existing={})
+            self.db.flush()
+            self.db.expunge_all()
+
+        self.db.commit()
+
+        logger.info("Weekly balance grid rebuilt", week_start=str(week_start), rows=written)
+        return {"rows": written}
+
+    def resolve_lease_ids(
+        self,
+        lease_ids: Iterable[int],
+        repair_invoice_ids: Iterable[int] = (),
+        loan_ids: Iterable[int] = ()
+    ) -> Set[int]:
+        """Map changed installments' parent invoices/loans to their leases"""
+        resolved = {lease_id for lease_id in lease_ids if lease_id is not None}
+
+        repair_invoice_ids = list(set(repair_invoice_ids))
+        if repair_invoice_ids:
+            resolved.update(
+                row.lease_id for row in self.db.query(RepairInvoice.lease_id)
+                .filter(RepairInvoice.id.in_(repair_invoice_ids))
+                .all()
+            )
+
+        loan_ids = list(set(loan_ids))
+        if loan_ids:
+            resolved.update(
+                row.lease_id for row in self.db.query(DriverLoan.lease_id)
+                .filter(DriverLoan.id.in_(loan_ids))
+                .all()
+            )
+
+        resolved.discard(None)
+        return resolved
+
+    # ==========================================
+    # Query
+    # ==========================================
+
+    def list_balances(
+        self,
+        week_start: date,
+        page: int,
+        per_page: int,
+        filters: Optional[CurrentBalancesFilter]
+    ) -> Tuple[List[WeeklyBalanceRow], int]:
+        """Filter, sort and paginate a week of the grid in SQL"""
+        grid = WeeklyBalanceGrid
+        query = self.db.query(grid).filter(grid.week_start == week_start)
+
+        if filters:
+            query = self._apply_filters(query, filters)
+
+        order_by = []
+        if filters and filters.sort_by in GRID_SORT_COLUMNS:
+            column = getattr(grid, filters.sort_by)
+            order_by.append(column.desc() if filters.sort_order == "desc" else column.asc())
+        order_by.append(grid.id.asc())
+
+        total_items = query.count()
+        entries = (
+            query.order_by(*order_by)
+            .offset((page - 1) * per_page)
+            .limit(per_page)
+            .all()
+        )
+        return [self._to_balance_row(entry) for entry in entries], total_items
+
+    def summarize(self, week_start: date) -> Dict:
+        """Fleet totals for a week of the grid in one aggregate query"""
+        grid = WeeklyBalanceGrid
+        fields = ("cc_earnings", "subtotal_deductions", "net_earnings") + DEDUCTION_FIELDS
+
+        result = (
+            self.db.query(
+                func.count(grid.id),
+                func.coalesce(func.sum(case((grid.dtr_status == DTRStatusEnum.GENERATED.value, 1), else_=0)), 0),
+                func.coalesce(func.sum(case((grid.payment_type == PaymentTypeEnum.ACH.value, 1), else_=0)), 0),
+                *[func.coalesce(func.sum(getattr(grid, field)), 0) for field in fields]
+            )
+            .filter(grid.week_start == week_start)
+            .one()
+        )
+
+        total_leases, dtrs_generated, ach_count, *sums = result
+        totals = {field: Decimal(str(value)) for field, value in zip(fields, sums)}
+        return build_balances_summary(total_leases, totals, dtrs_generated, ach_count)
+
+    # ==========================================
+    # Internal Helpers
+    # ==========================================
+
+    def _resolve_week(
+        self,
+        week_start: Optional[date],
+        week_end: Optional[date]
+    ) -> Tuple[date, date]:
+        if week_start is None:
+            return self.balances.get_current_week()
+        if week_end is None:
+            _, week_end = self.balances.get_week_for_date(week_start)
+        return week_start, week_end
+
+    def _load_leases(self, lease_ids: Iterable[int]) -> List[Lease]:
+        return (
+            self.db.query(Lease)
+            .options(
+                joinedload(Lease.lease_driver).joinedload(LeaseDriver.driver).joinedload(Driver.tlc_license),
+                joinedload(Lease.vehicle).joinedload(Vehicle.registrations),
+                joinedload(Lease.medallion),
+            )
+            .filter(
+                Lease.id.in_(list(lease_ids)),
+                Lease.lease_status.in_(GRID_LEASE_STATUSES),
+            )
+            .all()
+        )
+
+    def _write_rows(
+        self,
+        leases: List[Lease],
+        week_start: date,
+        week_end: date,
+        existing: Optional[Dict[int, WeeklyBalanceGrid]] = None
+    ) -> int:
+        """Compute rows for the leases and insert/update their grid entries"""
+        if not leases:
+            return 0
+
+        if existing is None:
+            existing = {
+                entry.lease_pk: entry
+                for entry in self.db.query(WeeklyBalanceGrid)
+                .filter(
+                    WeeklyBalanceGrid.week_start == week_start,
+                    WeeklyBalanceGrid.lease_pk.in_([lease.id for lease in leases]),
+                )
+                .all()
+            }
+
+        rows = self.balances.compute_balance_rows(leases, week_start, week_end)
+        for lease, row in zip(leases, rows):
+            entry = existing.get(lease.id)
+            if entry is None:
+                entry = WeeklyBalanceGrid(lease_pk=lease.id, week_start=week_start)
+                self.db.add(entry)
+
+            driver = self._primary_driver(lease)
+            entry.week_end = week_end
+            entry.driver_pk = driver.id if driver else None
+            entry.vehicle_id = lease.vehicle_id
+
+            entry.lease_id = row.lease_id
+            entry.driver_name = row.driver_name
+            entry.tlc_license = row.tlc_license
+            entry.ssn = row.ssn
+            entry.medallion_number = row.medallion_number
+            entry.plate_number = row.plate_number
+            entry.vin_number = row.vin_number
+
+            entry.lease_status = lease.lease_status
+            entry.driver_status = driver.driver_status if driver else None
+            entry.dtr_status = row.dtr_status.value
+            entry.payment_type = row.payment_type.value
+
+            for field in FINANCIAL_FIELDS:
+                setattr(entry, field, getattr(row, field))
+            entry.last_updated = row.last_updated.replace(tzinfo=None)
+
+        return len(rows)
+
+    def _primary_driver(self, lease: Lease) -> Optional[Driver]:
+        """Primary driver, as chosen by the current-balances calculation"""
+        if not lease.lease_driver:
+            return None
+        primary_drivers = [ld.driver for ld in lease.lease_driver if not ld.is_additional_driver]
+        return primary_drivers[0] if primary_drivers else lease.lease_driver[0].driver
+
+    def _apply_filters(self, query, filters: CurrentBalancesFilter):
+        grid = WeeklyBalanceGrid
+
+        def plate_matches(term: str):
+            return grid.vehicle_id.in_(
+                select(VehicleRegistration.vehicle_id).where(plate_key_matches(term))
+            )
+
+        def ssn_matches(condition):
+            return grid.driver_pk.in_(select(Driver.id).where(condition))
+
+        if filters.search:
+            search_term = f"%{filters.search}%"
+            query = query.filter(
+                or_(
+                    grid.lease_id.ilike(search_term),
+                    grid.driver_name.ilike(search_term),
+                    plate_matches(filters.search),
+                    grid.medallion_number.ilike(search_term),
+                    grid.tlc_license.ilike(search_term),
+                    ssn_matches(Driver.ssn.ilike(search_term)),
+                )
+            )
+
+        if filters.lease_id_search:
+            query = query.filter(or_(*[grid.lease_id.ilike(f"%{t}%") for t in _split_terms(filters.lease_id_search)]))
+
+        if filters.driver_name_search:
+            query = query.filter(or_(*[grid.driver_name.ilike(f"%{t}%") for t in _split_terms(filters.driver_name_search)]))
+
+        if filters.tlc_license_search:
+            query = query.filter(or_(*[grid.tlc_license.ilike(f"%{t}%") for t in _split_terms(filters.tlc_license_search)]))
+
+        if filters.medallion_search:
+            query = query.filter(or_(*[grid.medallion_number.ilike(f"%{t}%") for t in _split_terms(filters.medallion_search)]))
+
+        if filters.plate_search:
+            query = query.filter(or_(*[plate_matches(t) for t in _split_terms(filters.plate_search)]))
+
+        if filters.vin_search:
+            query = query.filter(or_(*[grid.vin_number.ilike(f"%{t}%") for t in _split_terms(filters.vin_search)]))
+
+        if filters.ssn_search:
+            # Support both full SSN and last 4 digits
+            conditions = [
+                ssn_matches(Driver.ssn.like(f"%{t}") if len(t) <= 4 else Driver.ssn.ilike(f"%{t}%"))
+                for t in _split_terms(filters.ssn_search)
+            ]
+            query = query.filter(or_(*conditions))
+
+        # Status filters compare the raw lease/driver values like the live query
+        if filters.lease_status:
+            query = query.filter(grid.lease_status == filters.lease_status.value)
+
+        if filters.driver_status:
+            query = query.filter(grid.driver_status == filters.driver_status.value)
+
+        if filters.payment_type:
+            query = query.filter(grid.payment_type == filters.payment_type.value)
+
+        if filters.dtr_status:
+            query = query.filter(grid.dtr_status == filters.dtr_status.value)
+
+        return query
+
+    def _to_balance_row(self, entry: WeeklyBalanceGrid) -> WeeklyBalanceRow:
+        return WeeklyBalanceRow(
+            lease_id=entry.lease_id or "N/A",
+            driver_name=entry.driver_name or "N/A",
+            tlc_license=entry.tlc_license,
+            ssn=entry.ssn,
+            medallion_number=entry.medallion_number or "N/A",
+            plate_number=entry.plate_number,
+            vin_number=entry.vin_number,
+            lease_status=LEASE_STATUS_MAPPING.get(entry.lease_status, LeaseStatusEnum.ACTIVE),
+            driver_status=DRIVER_STATUS_MAPPING.get(entry.driver_status, DriverStatusEnum.ACTIVE),
+            dtr_status=DTRStatusEnum(entry.dtr_status),
+            payment_type=PaymentTypeEnum(entry.payment_type),
+            **{field: getattr(entry, field) for field in FINANCIAL_FIELDS},
+            last_updated=entry.last_updated.replace(tzinfo=timezone.utc),
+        )
+
+
+# ==========================================
+# Change Tracking
+# ==========================================
+
+def _pending(session: Session) -> Dict[str, Set[int]]:
+    return session.info.setdefault(
+        _PENDING_KEY, {"lease_ids": set(), "repair_invoice_ids": set(), "loan_ids": set()}
+    )
+
+
+def mark_leases_changed(session: Session, lease_ids: Iterable[Optional[int]]) -> None:
+    """
+    Record leases whose balance inputs were changed by Core UPDATEs, which
+    never reach the flush listener (bulk association and posting writers).
+    Pass both the previous and the new lease ids of the updated rows; the
+    leases are refreshed once the transaction commits.
+    """
+    lease_ids = {lease_id for lease_id in lease_ids if lease_id is not None}
+    if lease_ids:
+        _pending(session)["lease_ids"].update(lease_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def track_balance_grid_changes(session, flush_context):
+    """Record leases whose balance inputs were written in this flush"""
+    changed = list(chain(session.new, session.dirty, session.deleted))
+    if not changed:
+        return
+
+    pending = None
+    for obj in changed:
+        # Both the current and the previous owner: a record moved to
+        # another lease leaves the old lease's row stale otherwise
+        if isinstance(obj, LEASE_KEYED_MODELS):
+            key, values = "lease_ids", attribute_values(obj, "lease_id")
+        elif isinstance(obj, Lease):
+            key, values = "lease_ids", {obj.id}
+        elif isinstance(obj, RepairInstallment):
+            key, values = "repair_invoice_ids", attribute_values(obj, "invoice_id")
+        elif isinstance(obj, LoanInstallment):
+            key, values = "loan_ids", attribute_values(obj, "loan_id")
+        else:
+            continue
+
+        if values:
+            pending = pending or _pending(session)
+            pending[key].update(values)
+
+
+@event.listens_for(Session, "after_commit")
+def dispatch_balance_grid_refresh(session):
+    """
+    Queue a grid refresh for the leases changed by the committed transaction
+    and drop the cached live balance sets they appear in.
+    """
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending or not any(pending.values()):
+        return
+
+    invalidate_live_balances()
+
+    from app.current_balances.tasks import refresh_balance_grid_task
+
+    try:
+        refresh_balance_grid_task.delay(
+            lease_ids=sorted(pending["lease_ids"]),
+            repair_invoice_ids=sorted(pending["repair_invoice_ids"]),
+            loan_ids=sorted(pending["loan_ids"]),
+        )
+    except Exception as e:
+        # The scheduled rebuild reconciles anything missed here
+        logger.warning("Failed to queue balance grid refresh", error=str(e))
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_balance_grid_changes(session):
+    """Forget changes that were rolled back"""
+    session.info.pop(_PENDING_KEY, None)
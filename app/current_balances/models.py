@@ -0,0 +1,73 @@
+# app/current_balances/models.py
+
+from decimal import Decimal
+from datetime import datetime
+from sqlalchemy import (
+    Column, Integer, String, Numeric, Date, DateTime,
+    ForeignKey, Index, UniqueConstraint
+)
+from app.core.db import Base
+
+
+class WeeklyBalanceGrid(Base):
+    """
+    Precomputed current-balances row for one lease in one week
+
+    Rows are recomputed per lease when postings, trips, tolls, violations or
+    installments for that lease change (see app.current_balances.balance_grid)
+    and rebuilt in full by a scheduled job. Column names match the fields of
+    WeeklyBalanceRow so the screen can filter, sort and paginate in SQL.
+    """
+    __tablename__ = "weekly_balance_grid"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    lease_pk = Column(Integer, ForeignKey("leases.id", ondelete="CASCADE"), nullable=False)
+    week_start = Column(Date, nullable=False)
+    week_end = Column(Date, nullable=False)
+
+    # Keys used by searches that need the live tables (SSN, any plate)
+    driver_pk = Column(Integer, ForeignKey("drivers.id"), nullable=True, index=True)
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=True)
+
+    # Identity fields
+    lease_id = Column(String(255), nullable=True, index=True)
+    driver_name = Column(String(255), nullable=True)
+    tlc_license = Column(String(255), nullable=True)
+    ssn = Column(String(16), nullable=True, comment="Masked SSN (XXX-XX-####)")
+    medallion_number = Column(String(255), nullable=True)
+    plate_number = Column(String(255), nullable=True)
+    vin_number = Column(String(255), nullable=True)
+
+    # Status fields (raw lease/driver values, filterable like the live query)
+    lease_status = Column(String(64), nullable=True)
+    driver_status = Column(String(64), nullable=True)
+    dtr_status = Column(String(32), nullable=False)
+    payment_type = Column(String(16), nullable=False)
+
+    # Financial fields
+    cc_earnings = Column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
+    weekly_lease_fee = Column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
+    mta_tif = Column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
+    ezpass_tolls = Column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
+    pvb_violations = Column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
+    tlc_tickets = Column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
+    repairs_wtd = Column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
+    loans_wtd = Column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
+    misc_charges = Column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
+    subtotal_deductions = Column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
+    prior_balance = Column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
+    deposit_amount = Column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
+    net_earnings = Column(Numeric(10, 2), nullable=False, default=Decimal("0.00"))
+
+    # Metadata
+    last_updated = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("lease_pk", "week_start", name="uq_weekly_balance_grid_lease_week"),
+        Index("ix_weekly_balance_grid_week_net", "week_start", "net_earnings"),
+        Index("ix_weekly_balance_grid_week_driver", "week_start", "driver_name"),
+    )
+
+    def __repr__(self):
+        return f"<WeeklyBalanceGrid lease {self.lease_pk} week {self.week_start}>"
@@ -57,7 +57,7 @@ def get_service(db: Session = Depends(get_db)) -> CurrentBalancesServiceOptimize
     - For past weeks: Shows finalized data from generated DTRs
     """
 )
-async def get_current_balances(
+def get_current_balances(
     week_start: Optional[date] = Query(
         None,
         description="Week start date (Sunday). If not provided, defaults to current week."
@@ -192,7 +192,7 @@ async def get_current_balances(
     summary="Get detailed balance for a specific lease",
     description="Returns detailed balance with daily breakdown and delayed charges for a specific lease"
 )
-async def get_lease_balance_detail(
+def get_lease_balance_detail(
     lease_id: str,
     week_start: Optional[date] = Query(
         None,
@@ -221,11 +221,8 @@ async def get_lease_balance_detail(
                 )
             week_end = week_start + timedelta(days=6)
         
-        # Get lease detail (from original service - already efficient for single lease)
-        from app.current_balances.services import CurrentBalancesService
-        original_service = CurrentBalancesService(service.db)
-        
-        detail = original_service.get_lease_detail_with_daily_breakdown(
+        # Get lease detail (batched loaders shared with the list and weekly grid)
+        detail = service.get_lease_detail_with_daily_breakdown(
             lease_id=lease_id,
             week_start=week_start,
             week_end=week_end
@@ -258,7 +255,7 @@ async def get_lease_balance_detail(
     summary="Get list of available weeks",
     description="Returns a list of weeks that can be queried (current week and past finalized weeks)"
 )
-async def get_available_weeks(
+def get_available_weeks(
     limit: int = Query(12, ge=1, le=52, description="Number of past weeks to include"),
     service: CurrentBalancesService = Depends(get_service),
     current_user: User = Depends(get_current_user)
@@ -299,9 +296,9 @@ async def get_available_weeks(
     summary="Get summary statistics for current balances",
     description="Returns aggregate statistics for the current week"
 )
-async def get_balances_summary(
+def get_balances_summary(
     week_start: Optional[date] = Query(None, description="Week start date (Sunday)"),
-    service: CurrentBalancesService = Depends(get_service),
+    service: CurrentBalancesServiceOptimized = Depends(get_service),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -310,7 +307,7 @@ async def get_balances_summary(
     Returns aggregated data like:
     - Total number of active leases
     - Total CC earnings
-    - Total deductions
+    - Total deductions (and per category)
     - Total net earnings
     - Number of leases by DTR status
     """
@@ -326,27 +323,8 @@ async def get_balances_summary(
                 )
             week_end = week_start + timedelta(days=6)
         
-        # Get all balances (no pagination)
-        balance_rows, total_items = service.get_lease_balances(
-            week_start=week_start,
-            week_end=week_end,
-            page=1,
-            per_page=10000,  # Get all
-            filters=None
-        )
-        
-        # Calculate summary statistics
-        from decimal import Decimal
-        
-        total_cc_earnings = sum(row.cc_earnings for row in balance_rows)
-        total_deductions = sum(row.subtotal_deductions for row in balance_rows)
-        total_net_earnings = sum(row.net_earnings for row in balance_rows)
-        
-        dtrs_generated = sum(1 for row in balance_rows if row.dtr_status == DTRStatusEnum.GENERATED)
-        dtrs_not_generated = sum(1 for row in balance_rows if row.dtr_status == DTRStatusEnum.NOT_GENERATED)
-        
-        ach_count = sum(1 for row in balance_rows if row.payment_type == PaymentTypeEnum.ACH)
-        cash_count = sum(1 for row in balance_rows if row.payment_type == PaymentTypeEnum.CASH)
+        # Aggregate in SQL (weekly grid or finalized DTRs) instead of building every row
+        summary = service.get_balances_summary(week_start, week_end)
         
         week_period = service.create_week_period(week_start, week_end)
         
@@ -357,16 +335,17 @@ async def get_balances_summary(
         
         return {
             "week_period": week_period,
-            "total_leases": total_items,
-            "total_cc_earnings": float(total_cc_earnings),
-            "total_deductions": float(total_deductions),
-            "total_net_earnings": float(total_net_earnings),
-            "dtrs_generated": dtrs_generated,
-            "dtrs_not_generated": dtrs_not_generated,
-            "payment_breakdown": {
-                "ach": ach_count,
-                "cash": cash_count
+            "total_leases": summary["total_leases"],
+            "total_cc_earnings": float(summary["total_cc_earnings"]),
+            "total_deductions": float(summary["total_deductions"]),
+            "deductions_by_category": {
+                category: float(amount)
+                for category, amount in summary["deductions_by_category"].items()
             },
+            "total_net_earnings": float(summary["total_net_earnings"]),
+            "dtrs_generated": summary["dtrs_generated"],
+            "dtrs_not_generated": summary["dtrs_not_generated"],
+            "payment_breakdown": summary["payment_breakdown"],
             "generated_at": datetime.utcnow()
         }
     
@@ -385,7 +364,7 @@ async def get_balances_summary(
     summary="Export current balances data",
     description="Export current balances to Excel, CSV, PDF, or JSON format"
 )
-async def export_current_balances(
+def export_current_balances(
     week_start: Optional[date] = Query(None, description="Week start date (Sunday)"),
     export_format: str = Query("excel", regex="^(excel|csv|pdf|json)$", description="Export format"),
     
@@ -13,20 +13,16 @@ from sqlalchemy import or_, func
 from app.leases.models import Lease, LeaseDriver
 from app.leases.schemas import LeaseStatus
 from app.drivers.models import Driver, TLCLicense
-from app.vehicles.models import Vehicle, VehicleRegistration
+from app.vehicles.models import Vehicle
+from app.vehicles.plate_index import plate_key_matches
 from app.medallions.models import Medallion
 from app.dtr.models import DTR, DTRStatus as DTRStatusModel
 from app.curb.models import CurbTrip
-from app.ezpass.models import EZPassTransaction
-from app.pvb.models import PVBViolation
-from app.tlc.models import TLCViolation
 from app.ledger.models import LedgerBalance, BalanceStatus, PostingCategory
 
 from app.current_balances.schemas import (
     WeeklyBalanceRow,
     WeekPeriod,
-    DailyBreakdown,
-    DelayedCharge,
     CurrentBalancesFilter,
     DTRStatusEnum,
     PaymentTypeEnum,
@@ -129,7 +125,7 @@ class CurrentBalancesService:
                     or_(
                         Lease.lease_id.ilike(search_term),
                         Driver.full_name.ilike(search_term),
-                        Vehicle.registrations.any(VehicleRegistration.plate_number.ilike(search_term)),
+                        Vehicle.registrations.any(plate_key_matches(filters.search)),
                         Medallion.medallion_number.ilike(search_term)
                     )
                 )
@@ -183,7 +179,7 @@ class CurrentBalancesService:
             if filters.plate_search:
                 plates = [term.strip() for term in filters.plate_search.split(',') if term.strip()]
                 if plates:
-                    plate_conditions = [Vehicle.registrations.any(VehicleRegistration.plate_number.ilike(f"%{term}%")) for term in plates]
+                    plate_conditions = [Vehicle.registrations.any(plate_key_matches(term)) for term in plates]
                     query = query.filter(or_(*plate_conditions))
             
             if filters.vin_search:
@@ -454,7 +450,7 @@ class CurrentBalancesService:
             if filters.plate_search:
                 plates = [term.strip() for term in filters.plate_search.split(',') if term.strip()]
                 if plates:
-                    plate_conditions = [Vehicle.registrations.any(VehicleRegistration.plate_number.ilike(f"%{term}%")) for term in plates]
+                    plate_conditions = [Vehicle.registrations.any(plate_key_matches(term)) for term in plates]
                     query = query.filter(or_(*plate_conditions))
             
             if filters.vin_search:
@@ -731,182 +727,14 @@ class CurrentBalancesService:
         week_start: date,
         week_end: date
     ) -> Optional[dict]:
-        """Get detailed balance for a lease including daily breakdown"""
-        
-        lease = self.db.query(Lease).filter(Lease.lease_id == lease_id).first()
-        if not lease:
-            return None
-        
-        # Get base balance row
-        balance_row = self._calculate_live_balance_for_lease(lease, week_start, week_end)
-        
-        # Calculate daily breakdown
-        daily_breakdown = self._get_daily_breakdown(lease.id, week_start, week_end)
-        
-        # Get delayed charges
-        delayed_charges = self._get_delayed_charges(lease.id, week_start, week_end)
-        
-        return {
-            **balance_row.model_dump(),
-            'daily_breakdown': daily_breakdown,
-            'delayed_charges': delayed_charges
-        }
-    
-    def _get_daily_breakdown(
-        self,
-        lease_id: int,
-        week_start: date,
-        week_end: date
-    ) -> List[DailyBreakdown]:
-        """Get daily breakdown of earnings and charges"""
-        
-        days = []
-        current_date = week_start
-        day_names = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
-        
-        while current_date <= week_end:
-            day_name = day_names[current_date.weekday() if current_date.weekday() != 6 else 0]
-            
-            # Get daily CURB earnings
-            cc_earnings = self._get_curb_earnings(lease_id, current_date, current_date)
-            
-            # Get daily charges
-            mta_tif = self._get_mta_tif_charges(lease_id, current_date, current_date)
-            
-            # Get daily EZPass (if any with specific dates)
-            ezpass = self._get_daily_ezpass(lease_id, current_date)
-            
-            # Get daily PVB
-            pvb = self._get_daily_pvb(lease_id, current_date)
-            
-            # Get daily TLC
-            tlc = self._get_daily_tlc(lease_id, current_date)
-            
-            net_daily = cc_earnings - (mta_tif + ezpass + pvb + tlc)
-            
-            days.append(DailyBreakdown(
-                date=current_date,
-                day_of_week=day_name,
-                breakdown_date=current_date,
-                cc_earnings=cc_earnings,
-                mta_tif=mta_tif,
-                ezpass=ezpass,
-                violations=pvb,
-                tlc_tickets=tlc,
-                net_daily=net_daily
-            ))
-            
-            current_date += timedelta(days=1)
-        
-        return days
-    
-    def _get_daily_ezpass(self, lease_id: int, date_param: date) -> Decimal:
-        """Get EZPass charges for a specific day"""
-        result = (
-            self.db.query(func.coalesce(func.sum(EZPassTransaction.amount), 0))
-            .filter(
-                EZPassTransaction.lease_id == lease_id,
-                EZPassTransaction.posting_date == date_param
-            )
-            .scalar()
-        )
-        return Decimal(str(result))
-    
-    def _get_daily_pvb(self, lease_id: int, date_param: date) -> Decimal:
-        """Get PVB violations for a specific day"""
-        result = (
-            self.db.query(func.coalesce(func.sum(PVBViolation.fine), 0))
-            .filter(
-                PVBViolation.lease_id == lease_id,
-                PVBViolation.posting_date == date_param
-            )
-            .scalar()
-        )
-        return Decimal(str(result))
-    
-    def _get_daily_tlc(self, lease_id: int, date_param: date) -> Decimal:
-        """Get TLC tickets for a specific day"""
-        result = (
-            self.db.query(func.coalesce(func.sum(TLCViolation.total_payable), 0))
-            .filter(
-                TLCViolation.lease_id == lease_id,
-                TLCViolation.issue_date == date_param
-            )
-            .scalar()
-        )
-        return Decimal(str(result))
-    
-    def _get_delayed_charges(
-        self,
-        lease_id: int,
-        week_start: date,
-        week_end: date
-    ) -> List[DelayedCharge]:
-        """Get charges entered this week but belonging to previous weeks"""
-        
-        delayed = []
-        
-        # Get delayed EZPass charges
-        ezpass_charges = (
-            self.db.query(EZPassTransaction)
-            .filter(
-                EZPassTransaction.lease_id == lease_id,
-                EZPassTransaction.created_on >= week_start,
-                EZPassTransaction.created_on <= week_end,
-                EZPassTransaction.posting_date < week_start
-            )
-            .all()
-        )
+        """
+        Get detailed balance for a lease including daily breakdown.
         
-        for charge in ezpass_charges:
-            delayed.append(DelayedCharge(
-                category="EZPass",
-                amount=charge.amount,
-                original_date=charge.posting_date,
-                system_entry_date=charge.created_on.date(),
-                description=f"Toll: {charge.exit_plaza or 'Unknown'}"
-            ))
-        
-        # Get delayed PVB violations
-        pvb_charges = (
-            self.db.query(PVBViolation)
-            .filter(
-                PVBViolation.lease_id == lease_id,
-                PVBViolation.created_on >= week_start,
-                PVBViolation.created_on <= week_end,
-                PVBViolation.posting_date < week_start
-            )
-            .all()
-        )
+        Delegates to the batched loaders of CurrentBalancesServiceOptimized so
+        the detail view matches the list and weekly grid.
+        """
+        from app.current_balances.services_optimized import CurrentBalancesServiceOptimized
         
-        for charge in pvb_charges:
-            delayed.append(DelayedCharge(
-                category="PVB",
-                amount=charge.fine,
-                original_date=charge.posting_date,
-                system_entry_date=charge.created_on.date(),
-                description=f"Violation: 'Unknown'"
-            ))
-        
-        # Get delayed TLC tickets
-        tlc_charges = (
-            self.db.query(TLCViolation)
-            .filter(
-                TLCViolation.lease_id == lease_id,
-                TLCViolation.created_on >= week_start,
-                TLCViolation.created_on <= week_end,
-                TLCViolation.issue_date < week_start
-            )
-            .all()
+        return CurrentBalancesServiceOptimized(self.db).get_lease_detail_with_daily_breakdown(
+            lease_id, week_start, week_end
         )
-        
-        for charge in tlc_charges:
-            delayed.append(DelayedCharge(
-                category="TLC",
-                amount=charge.total_payable,
-                original_date=charge.issue_date,
-                system_entry_date=charge.created_on.date(),
-                description=f"Ticket: {charge.violation_type.value or 'Unknown'}"
-            ))
-        
-        return delayed
\ No newline at end of file
@@ -27,12 +27,13 @@ from typing import List, Optional, Tuple, Dict
 from collections import defaultdict
 
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, func, and_
+from sqlalchemy import or_, func, and_, case, false, select
 
 from app.leases.models import Lease, LeaseDriver, LeaseSchedule
 from app.leases.schemas import LeaseStatus
 from app.drivers.models import Driver, TLCLicense
 from app.vehicles.models import Vehicle, VehicleRegistration
+from app.vehicles.plate_index import plate_key_matches
 from app.medallions.models import Medallion
 from app.dtr.models import DTR, DTRStatus as DTRStatusModel
 from app.curb.models import CurbTrip
@@ -43,6 +44,7 @@ from app.ledger.models import LedgerBalance, BalanceStatus, PostingCategory
 from app.repairs.models import RepairInstallment, RepairInvoice, RepairInstallmentStatus
 from app.loans.models import LoanInstallment, DriverLoan, LoanInstallmentStatus
 
+from app.core.cache import ResultCache, make_cache_key
 from app.current_balances.schemas import (
     WeeklyBalanceRow,
     WeekPeriod,
@@ -58,6 +60,85 @@ from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Live rows reflect postings within seconds; keep cached sets short-lived
+LIVE_BALANCES_TTL_SECONDS = 60
+
+live_balances_cache = ResultCache("current_balances:live", ttl_seconds=LIVE_BALANCES_TTL_SECONDS)
+
+LEASE_STATUS_MAPPING = {
+    "Active": LeaseStatusEnum.ACTIVE,
+    "Terminated": LeaseStatusEnum.TERMINATED,
+    "Termination Requested": LeaseStatusEnum.TERMINATION_REQUESTED,
+}
+
+DRIVER_STATUS_MAPPING = {
+    "Active": DriverStatusEnum.ACTIVE,
+    "Inactive": DriverStatusEnum.BLACKLISTED,
+    "Suspended": DriverStatusEnum.SUSPENDED,
+}
+
+# Row fields that make up subtotal_deductions (reported per category in the summary)
+DEDUCTION_FIELDS = (
+    "weekly_lease_fee", "mta_tif", "ezpass_tolls", "pvb_violations",
+    "tlc_tickets", "repairs_wtd", "loans_wtd", "misc_charges",
+)
+
+# Balance row financial field -> finalized DTR column
+DTR_FINANCIAL_COLUMNS = {
+    "cc_earnings": DTR.credit_card_earnings,
+    "weekly_lease_fee": DTR.lease_amount,
+    "mta_tif": DTR.mta_fees_total,
+    "ezpass_tolls": DTR.ezpass_tolls,
+    "pvb_violations": DTR.pvb_violations,
+    "tlc_tickets": DTR.tlc_tickets,
+    "repairs_wtd": DTR.repairs,
+    "loans_wtd": DTR.driver_loans,
+    "misc_charges": DTR.misc_charges,
+    "subtotal_deductions": DTR.subtotal_deductions,
+    "prior_balance": DTR.prior_balance,
+    "net_earnings": DTR.net_earnings,
+}
+
+
+def build_balances_summary(
+    total_leases: int,
+    totals: Dict[str, Decimal],
+    dtrs_generated: int,
+    ach_count: int
+) -> Dict:
+    """
+    Shape fleet totals into the summary returned by /current-balances/summary.
+    
+    Args:
+        total_leases: Number of balance rows in the week
+        totals: Sum per financial field (cc_earnings, subtotal_deductions,
+            net_earnings and every DEDUCTION_FIELDS entry)
+        dtrs_generated: Rows whose DTR has been generated
+        ach_count: Rows paid by ACH
+    """
+    total_leases = int(total_leases or 0)
+    dtrs_generated = int(dtrs_generated or 0)
+    ach_count = int(ach_count or 0)
+    
+    return {
+        "total_leases": total_leases,
+        "total_cc_earnings": totals["cc_earnings"],
+        "total_deductions": totals["subtotal_deductions"],
+        "total_net_earnings": totals["net_earnings"],
+        "deductions_by_category": {field: totals[field] for field in DEDUCTION_FIELDS},
+        "dtrs_generated": dtrs_generated,
+        "dtrs_not_generated": total_leases - dtrs_generated,
+        "payment_breakdown": {
+            "ach": ach_count,
+            "cash": total_leases - ach_count,
+        },
+    }
+
+
+def invalidate_live_balances() -> None:
+    """Drop every cached live balance set (all weeks and filters)"""
+    live_balances_cache.invalidate_all()
+
 
 class CurrentBalancesServiceOptimized:
     """
@@ -140,6 +221,13 @@ class CurrentBalancesServiceOptimized:
         is_current_week = week_start == current_week_start
         
         if is_current_week:
+            # Serve from the precomputed grid once it has been built for the week
+            from app.current_balances.balance_grid import BalanceGridService
+            
+            grid = BalanceGridService(self.db)
+            if grid.has_week(week_start):
+                return grid.list_balances(week_start, page, per_page, filters)
+            
             return self._get_live_balances_optimized(week_start, week_end, page, per_page, filters)
         else:
             return self._get_historical_balances(week_start, week_end, page, per_page, filters)
@@ -155,8 +243,62 @@ class CurrentBalancesServiceOptimized:
         """
         OPTIMIZED: Get live balances for current week using batch queries
         
-        Performance improvement: ~10-100x faster
-        Query count: Reduced from 1000+ to ~15 queries
+        The computed rows for a week and filter set are cached for a short
+        TTL (concurrent misses share one computation), so paging and
+        re-sorting are in-memory slices of the cached list.
+        """
+        cached_rows = self._get_cached_live_rows(week_start, week_end, filters)
+        all_balance_rows = [WeeklyBalanceRow.model_validate(row) for row in cached_rows]
+        
+        # Sort in memory (None values last)
+        if filters and filters.sort_by and filters.sort_by in WeeklyBalanceRow.model_fields:
+            reverse_order = filters.sort_order == "desc"
+            present = [r for r in all_balance_rows if getattr(r, filters.sort_by) is not None]
+            missing = [r for r in all_balance_rows if getattr(r, filters.sort_by) is None]
+            present.sort(key=lambda x: getattr(x, filters.sort_by), reverse=reverse_order)
+            all_balance_rows = present + missing
+        
+        # Apply pagination
+        total_items = len(all_balance_rows)
+        start_idx = (page - 1) * per_page
+        end_idx = start_idx + per_page
+        balance_rows = all_balance_rows[start_idx:end_idx]
+        
+        logger.info(f"Completed balances calculation for {len(balance_rows)}/{total_items} leases")
+        
+        return balance_rows, total_items
+    
+    def _get_cached_live_rows(
+        self,
+        week_start: date,
+        week_end: date,
+        filters: Optional[CurrentBalancesFilter]
+    ) -> List[dict]:
+        """Live rows for a week and filter set as JSON dicts, from the short-TTL cache"""
+        cache_filters = (
+            filters.model_dump(mode="json", exclude={"sort_by", "sort_order"})
+            if filters else {}
+        )
+        cache_key = make_cache_key("rows", week_start.isoformat(), **cache_filters)
+        
+        return live_balances_cache.get_or_set_coalesced(
+            cache_key,
+            lambda: [
+                row.model_dump(mode="json")
+                for row in self._compute_live_rows(week_start, week_end, filters)
+            ]
+        )
+    
+    def _compute_live_rows(
+        self,
+        week_start: date,
+        week_end: date,
+        filters: Optional[CurrentBalancesFilter]
+    ) -> List[WeeklyBalanceRow]:
+        """
+        Compute live balance rows for every lease matching the filters.
+        
+        Query count: ~15 batch queries regardless of fleet size.
         """
         
         # Step 1: Build base lease query with filters
@@ -184,7 +326,7 @@ class CurrentBalancesServiceOptimized:
                     or_(
                         Lease.lease_id.ilike(search_term),
                         Driver.full_name.ilike(search_term),
-                        Vehicle.registrations.any(VehicleRegistration.plate_number.ilike(search_term)),
+                        Vehicle.registrations.any(plate_key_matches(filters.search)),
                         Medallion.medallion_number.ilike(search_term),
                         TLCLicense.tlc_license_number.ilike(search_term),
                         Driver.ssn.ilike(search_term)  # NEW: SSN search
@@ -214,7 +356,7 @@ class CurrentBalancesServiceOptimized:
             
             if filters.plate_search:
                 plates = [plate.strip() for plate in filters.plate_search.split(',') if plate.strip()]
-                or_conditions = [Vehicle.registrations.any(VehicleRegistration.plate_number.ilike(f"%{plate}%")) for plate in plates]
+                or_conditions = [Vehicle.registrations.any(plate_key_matches(plate)) for plate in plates]
                 query = query.filter(or_(*or_conditions))
             
             if filters.vin_search:
@@ -248,38 +390,44 @@ class CurrentBalancesServiceOptimized:
                     query = query.filter(Driver.pay_to_mode == 'ACH')
                 else:
                     query = query.filter(or_(Driver.pay_to_mode != 'ACH', Driver.pay_to_mode.is_(None)))
-            
-            # Apply database-level sorting for non-financial columns
-            if filters.sort_by and filters.sort_by not in [
-                "cc_earnings", "weekly_lease_fee", "mta_tif", "ezpass_tolls", "pvb_violations",
-                "tlc_tickets", "repairs_wtd", "loans_wtd", "misc_charges", "subtotal_deductions",
-                "prior_balance", "net_earnings"
-            ]:
-                sort_column_map = {
-                    "lease_id": Lease.lease_id,
-                    "driver_name": Driver.full_name,
-                    "tlc_license": TLCLicense.tlc_license_number,
-                    "medallion_number": Medallion.medallion_number,
-                    "plate_number": Vehicle.plate_number,
-                    "vin_number": Vehicle.vin,
-                }
-                
-                sort_column = sort_column_map.get(filters.sort_by)
-                if sort_column is not None:
-                    if filters.sort_order == "desc":
-                        query = query.order_by(sort_column.desc())
-                    else:
-                        query = query.order_by(sort_column.asc())
         
         # Fetch ALL leases that match filters
         all_leases = query.all()
         
         if not all_leases:
-            return [], 0
+            return []
+        
+        # Step 2: Calculate balance rows using batch-fetched data
+        all_balance_rows = []
+        for row in self.compute_balance_rows(all_leases, week_start, week_end):
+            # Apply DTR status filter
+            if filters and filters.dtr_status:
+                if row.dtr_status != filters.dtr_status:
+                    continue
+            
+            all_balance_rows.append(row)
+        
+        return all_balance_rows
+    
+    def compute_balance_rows(
+        self,
+        leases: List[Lease],
+        week_start: date,
+        week_end: date
+    ) -> List[WeeklyBalanceRow]:
+        """
+        Compute live balance rows for the given leases (same order).
+        
+        Runs the batch queries once for all leases, then builds each row
+        from the pre-fetched maps. Leases must have lease_driver/driver,
+        vehicle and medallion loaded (or loadable).
+        """
+        if not leases:
+            return []
         
         # Extract lease IDs and medallion IDs for batch queries
-        lease_ids = [lease.id for lease in all_leases]
-        medallion_ids = [lease.medallion_id for lease in all_leases if lease.medallion_id]
+        lease_ids = [lease.id for lease in leases]
+        medallion_ids = [lease.medallion_id for lease in leases if lease.medallion_id]
         
         # OPTIMIZATION: Batch fetch all financial data at once
         logger.info(f"Fetching financial data for {len(lease_ids)} leases in batch")
@@ -314,43 +462,14 @@ class CurrentBalancesServiceOptimized:
         # Batch query 9: Prior balances
         prior_balance_map = self._batch_get_prior_balances(lease_ids, week_start)
         
-        # Step 2: Calculate balance rows using pre-fetched data
-        all_balance_rows = []
-        for lease in all_leases:
-            row = self._calculate_balance_from_prefetched_data(
+        return [
+            self._calculate_balance_from_prefetched_data(
                 lease, week_start, week_end,
                 lease_fee_map, curb_earnings_map, mta_tif_map, ezpass_map, pvb_map, tlc_map,
                 repairs_map, loans_map, misc_map, prior_balance_map
             )
-            
-            # Apply DTR status filter
-            if filters and filters.dtr_status:
-                if row.dtr_status != filters.dtr_status:
-                    continue
-            
-            all_balance_rows.append(row)
-        
-        # Step 3: Sort by financial columns if needed
-        if filters and filters.sort_by and filters.sort_by in [
-            "cc_earnings", "weekly_lease_fee", "mta_tif", "ezpass_tolls", "pvb_violations",
-            "tlc_tickets", "repairs_wtd", "loans_wtd", "misc_charges", "subtotal_deductions",
-            "prior_balance", "net_earnings"
-        ]:
-            reverse_order = filters.sort_order == "desc"
-            all_balance_rows.sort(
-                key=lambda x: getattr(x, filters.sort_by, Decimal("0")),
-                reverse=reverse_order
-            )
-        
-        # Step 4: Apply pagination
-        total_items = len(all_balance_rows)
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        balance_rows = all_balance_rows[start_idx:end_idx]
-        
-        logger.info(f"Completed balances calculation for {len(balance_rows)}/{total_items} leases")
-        
-        return balance_rows, total_items
+            for lease in leases
+        ]
     
     # ========== BATCH QUERY METHODS ==========
     
@@ -438,12 +557,7 @@ class CurrentBalancesServiceOptimized:
                 CurbTrip.lease_id,
                 func.coalesce(func.sum(CurbTrip.total_amount), 0).label('total_earnings')
             )
-            .filter(
-                CurbTrip.lease_id.in_(lease_ids),
-                CurbTrip.transaction_date >= week_start,
-                CurbTrip.transaction_date <= week_end,
-                CurbTrip.payment_type == "CREDIT_CARD"
-            )
+            .filter(*self._curb_earnings_criteria(lease_ids, week_start, week_end))
             .group_by(CurbTrip.lease_id)
             .all()
         )
@@ -468,35 +582,51 @@ class CurrentBalancesServiceOptimized:
         
         These are NOT ledger postings - they come directly from trip data!
         """
-        # Convert dates to datetime for comparison with start_time
-        week_start_dt = datetime.combine(week_start, datetime.min.time())
-        week_end_dt = datetime.combine(week_end, datetime.max.time())
-        
         results = (
             self.db.query(
                 CurbTrip.lease_id,
-                func.coalesce(
-                    func.sum(
-                        func.coalesce(CurbTrip.surcharge, 0) +
-                        func.coalesce(CurbTrip.improvement_surcharge, 0) +
-                        func.coalesce(CurbTrip.congestion_fee, 0) +
-                        func.coalesce(CurbTrip.cbdt_fee, 0) +
-                        func.coalesce(CurbTrip.airport_fee, 0)
-                    ),
-                    0
-                ).label('total_fees')
-            )
-            .filter(
-                CurbTrip.lease_id.in_(lease_ids),
-                CurbTrip.start_time >= week_start_dt,
-                CurbTrip.start_time <= week_end_dt
+                func.coalesce(func.sum(self._curb_trip_fees_expr()), 0).label('total_fees')
             )
+            .filter(*self._curb_fees_criteria(lease_ids, week_start, week_end))
             .group_by(CurbTrip.lease_id)
             .all()
         )
         
         return {lease_id: Decimal(str(total_fees)) for lease_id, total_fees in results}
     
+    @staticmethod
+    def _curb_earnings_criteria(lease_ids: List[int], week_start: date, week_end: date) -> list:
+        """Trips counted as credit card earnings (shared by weekly and daily loaders)"""
+        return [
+            CurbTrip.lease_id.in_(lease_ids),
+            CurbTrip.transaction_date >= week_start,
+            CurbTrip.transaction_date <= week_end,
+            CurbTrip.payment_type == "CREDIT_CARD"
+        ]
+    
+    @staticmethod
+    def _curb_fees_criteria(lease_ids: List[int], week_start: date, week_end: date) -> list:
+        """Trips whose fees count as MTA/TIF charges (shared by weekly and daily loaders)"""
+        # Convert dates to datetime for comparison with start_time
+        week_start_dt = datetime.combine(week_start, datetime.min.time())
+        week_end_dt = datetime.combine(week_end, datetime.max.time())
+        return [
+            CurbTrip.lease_id.in_(lease_ids),
+            CurbTrip.start_time >= week_start_dt,
+            CurbTrip.start_time <= week_end_dt
+        ]
+    
+    @staticmethod
+    def _curb_trip_fees_expr():
+        """Per-trip sum of MTA, TIF, CPS, CBDT and AAF"""
+        return (
+            func.coalesce(CurbTrip.surcharge, 0) +
+            func.coalesce(CurbTrip.improvement_surcharge, 0) +
+            func.coalesce(CurbTrip.congestion_fee, 0) +
+            func.coalesce(CurbTrip.cbdt_fee, 0) +
+            func.coalesce(CurbTrip.airport_fee, 0)
+        )
+    
     def _batch_get_ezpass_outstanding(
         self, 
         lease_ids: List[int],
@@ -679,6 +809,305 @@ class CurrentBalancesServiceOptimized:
         
         return prior_balance_map
     
+    # ========== SUMMARY ==========
+    
+    def get_balances_summary(self, week_start: date, week_end: date) -> Dict:
+        """
+        Get fleet totals for a week without building a row per lease.
+        
+        Current week: one aggregate query over the weekly grid (or the cached
+        live rows until the grid is built). Past weeks: one aggregate query
+        over the finalized DTRs.
+        
+        Returns:
+            Dictionary shaped by build_balances_summary
+        """
+        current_week_start, _ = self.get_current_week()
+        
+        if week_start != current_week_start:
+            return self._summarize_historical(week_start, week_end)
+        
+        from app.current_balances.balance_grid import BalanceGridService
+        
+        grid = BalanceGridService(self.db)
+        if grid.has_week(week_start):
+            return grid.summarize(week_start)
+        
+        return self._summarize_live(week_start, week_end)
+    
+    def _summarize_historical(self, week_start: date, week_end: date) -> Dict:
+        """Aggregate finalized DTRs for the week in SQL"""
+        fields = ("cc_earnings", "subtotal_deductions", "net_earnings") + DEDUCTION_FIELDS
+        
+        result = (
+            self.db.query(
+                func.count(DTR.id),
+                func.coalesce(func.sum(case((Driver.pay_to_mode == 'ACH', 1), else_=0)), 0),
+                *[func.coalesce(func.sum(DTR_FINANCIAL_COLUMNS[field]), 0) for field in fields]
+            )
+            .select_from(DTR)
+            .outerjoin(Driver, Driver.id == DTR.primary_driver_id)
+            .filter(
+                DTR.week_start_date == week_start,
+                DTR.week_end_date == week_end,
+                DTR.status == DTRStatusModel.FINALIZED
+            )
+            .one()
+        )
+        
+        total_leases, ach_count, *sums = result
+        totals = {field: Decimal(str(value)) for field, value in zip(fields, sums)}
+        
+        # Every finalized DTR counts as generated
+        return build_balances_summary(total_leases, totals, total_leases, ach_count)
+    
+    def _summarize_live(self, week_start: date, week_end: date) -> Dict:
+        """Fold the cached live rows (plain dicts) until the week's grid exists"""
+        fields = ("cc_earnings", "subtotal_deductions", "net_earnings") + DEDUCTION_FIELDS
+        rows = self._get_cached_live_rows(week_start, week_end, None)
+        
+        totals = {
+            field: sum((Decimal(str(row[field])) for row in rows), Decimal("0"))
+            for field in fields
+        }
+        dtrs_generated = sum(1 for row in rows if row["dtr_status"] == DTRStatusEnum.GENERATED.value)
+        ach_count = sum(1 for row in rows if row["payment_type"] == PaymentTypeEnum.ACH.value)
+        
+        return build_balances_summary(len(rows), totals, dtrs_generated, ach_count)
+    
+    # ========== LEASE DETAIL (DAILY BREAKDOWN) ==========
+    
+    def get_lease_detail_with_daily_breakdown(
+        self,
+        lease_id: str,
+        week_start: date,
+        week_end: date
+    ) -> Optional[dict]:
+        """
+        Get detailed balance for a lease including daily breakdown and delayed charges.
+        
+        The balance row comes from compute_balance_rows (the same loaders that
+        build the list and the weekly grid) and each daily/delayed source is
+        one grouped query for the whole week, so the view costs a fixed number
+        of queries instead of several per day.
+        """
+        lease = (
+            self.db.query(Lease)
+            .options(
+                joinedload(Lease.lease_driver).joinedload(LeaseDriver.driver).joinedload(Driver.tlc_license),
+                joinedload(Lease.vehicle),
+                joinedload(Lease.medallion)
+            )
+            .filter(Lease.lease_id == lease_id)
+            .first()
+        )
+        if not lease:
+            return None
+        
+        balance_row = self.compute_balance_rows([lease], week_start, week_end)[0]
+        daily_map = self._batch_get_daily_breakdown([lease.id], week_start, week_end)
+        delayed_map = self._batch_get_delayed_charges([lease.id], week_start, week_end)
+        
+        return {
+            **balance_row.model_dump(),
+            'daily_breakdown': daily_map[lease.id],
+            'delayed_charges': delayed_map.get(lease.id, [])
+        }
+    
+    def _batch_get_daily_breakdown(
+        self,
+        lease_ids: List[int],
+        week_start: date,
+        week_end: date
+    ) -> Dict[int, List[DailyBreakdown]]:
+        """
+        Batch query per-day earnings and charges for all leases
+        
+        One GROUP BY (lease, day) query per source. CURB earnings and fees use
+        the same criteria as the weekly loaders, so the days add up to the
+        week's cc_earnings and mta_tif.
+        """
+        earnings_day = func.date(CurbTrip.transaction_date)
+        curb_earnings = self._sum_by_lease_and_day(
+            CurbTrip.lease_id, earnings_day, CurbTrip.total_amount,
+            self._curb_earnings_criteria(lease_ids, week_start, week_end)
+        )
+        
+        fees_day = func.date(CurbTrip.start_time)
+        mta_tif = self._sum_by_lease_and_day(
+            CurbTrip.lease_id, fees_day, self._curb_trip_fees_expr(),
+            self._curb_fees_criteria(lease_ids, week_start, week_end)
+        )
+        
+        ezpass_day = func.date(EZPassTransaction.posting_date)
+        ezpass = self._sum_by_lease_and_day(
+            EZPassTransaction.lease_id, ezpass_day, EZPassTransaction.amount,
+            [
+                EZPassTransaction.lease_id.in_(lease_ids),
+                ezpass_day >= week_start,
+                ezpass_day <= week_end
+            ]
+        )
+        
+        pvb_day = func.date(PVBViolation.posting_date)
+        pvb = self._sum_by_lease_and_day(
+            PVBViolation.lease_id, pvb_day, PVBViolation.fine,
+            [
+                PVBViolation.lease_id.in_(lease_ids),
+                pvb_day >= week_start,
+                pvb_day <= week_end
+            ]
+        )
+        
+        tlc = self._sum_by_lease_and_day(
+            TLCViolation.lease_id, TLCViolation.issue_date, TLCViolation.total_payable,
+            [
+                TLCViolation.lease_id.in_(lease_ids),
+                TLCViolation.issue_date >= week_start,
+                TLCViolation.issue_date <= week_end
+            ]
+        )
+        
+        zero = Decimal("0")
+        days = [week_start + timedelta(days=offset) for offset in range((week_end - week_start).days + 1)]
+        
+        breakdown_map = {}
+        for lease_id in lease_ids:
+            breakdown = []
+            for day in days:
+                key = (lease_id, day)
+                day_earnings = curb_earnings.get(key, zero)
+                day_mta_tif = mta_tif.get(key, zero)
+                day_ezpass = ezpass.get(key, zero)
+                day_pvb = pvb.get(key, zero)
+                day_tlc = tlc.get(key, zero)
+                
+                breakdown.append(DailyBreakdown(
+                    date=day,
+                    cc_earnings=day_earnings,
+                    mta_tif=day_mta_tif,
+                    ezpass=day_ezpass,
+                    violations=day_pvb,
+                    tlc_tickets=day_tlc,
+                    net_daily=day_earnings - (day_mta_tif + day_ezpass + day_pvb + day_tlc)
+                ))
+            breakdown_map[lease_id] = breakdown
+        
+        return breakdown_map
+    
+    def _sum_by_lease_and_day(self, lease_column, day_expr, amount_expr, criteria: list) -> Dict[Tuple[int, date], Decimal]:
+        """Sum amount_expr grouped by lease and day, keyed by (lease_id, date)"""
+        day_label = day_expr.label('day')
+        results = (
+            self.db.query(
+                lease_column,
+                day_label,
+                func.coalesce(func.sum(amount_expr), 0).label('total')
+            )
+            .filter(*criteria)
+            .group_by(lease_column, day_label)
+            .all()
+        )
+        
+        totals = {}
+        for lease_id, day, total in results:
+            # DATE() comes back as a string on some drivers
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            elif isinstance(day, datetime):
+                day = day.date()
+            totals[(lease_id, day)] = Decimal(str(total))
+        return totals
+    
+    def _batch_get_delayed_charges(
+        self,
+        lease_ids: List[int],
+        week_start: date,
+        week_end: date
+    ) -> Dict[int, List[DelayedCharge]]:
+        """
+        Batch query charges entered this week but belonging to previous weeks
+        
+        One column-projected query per source for all leases.
+        """
+        delayed_map = defaultdict(list)
+        
+        ezpass_rows = (
+            self.db.query(
+                EZPassTransaction.lease_id,
+                EZPassTransaction.amount,
+                EZPassTransaction.posting_date,
+                EZPassTransaction.created_on,
+                EZPassTransaction.exit_plaza
+            )
+            .filter(
+                EZPassTransaction.lease_id.in_(lease_ids),
+                EZPassTransaction.created_on >= week_start,
+                EZPassTransaction.created_on <= week_end,
+                EZPassTransaction.posting_date < week_start
+            )
+            .all()
+        )
+        for lease_id, amount, posting_date, created_on, exit_plaza in ezpass_rows:
+            delayed_map[lease_id].append(DelayedCharge(
+                category="EZPass",
+                amount=amount,
+                original_date=posting_date,
+                system_entry_date=created_on,
+                description=f"Toll: {exit_plaza or 'Unknown'}"
+            ))
+        
+        pvb_rows = (
+            self.db.query(
+                PVBViolation.lease_id,
+                PVBViolation.fine,
+                PVBViolation.posting_date,
+                PVBViolation.created_on
+            )
+            .filter(
+                PVBViolation.lease_id.in_(lease_ids),
+                PVBViolation.created_on >= week_start,
+                PVBViolation.created_on <= week_end,
+                PVBViolation.posting_date < week_start
+            )
+            .all()
+        )
+        for lease_id, fine, posting_date, created_on in pvb_rows:
+            delayed_map[lease_id].append(DelayedCharge(
+                category="PVB",
+                amount=fine,
+                original_date=posting_date,
+                system_entry_date=created_on,
+                description="Violation: 'Unknown'"
+            ))
+        
+        tlc_rows = (
+            self.db.query(
+                TLCViolation.lease_id,
+                TLCViolation.total_payable,
+                TLCViolation.issue_date,
+                TLCViolation.created_on,
+                TLCViolation.violation_type
+            )
+            .filter(
+                TLCViolation.lease_id.in_(lease_ids),
+                TLCViolation.created_on >= week_start,
+                TLCViolation.created_on <= week_end,
+                TLCViolation.issue_date < week_start
+            )
+            .all()
+        )
+        for lease_id, total_payable, issue_date, created_on, violation_type in tlc_rows:
+            delayed_map[lease_id].append(DelayedCharge(
+                category="TLC",
+                amount=total_payable,
+                original_date=issue_date,
+                system_entry_date=created_on,
+                description=f"Ticket: {violation_type.value if violation_type else 'Unknown'}"
+            ))
+        
+        return delayed_map
+    
     def _calculate_balance_from_prefetched_data(
         self,
         lease: Lease,
@@ -737,19 +1166,8 @@ class CurrentBalancesServiceOptimized:
         payment_type = PaymentTypeEnum.ACH if driver and driver.pay_to_mode == 'ACH' else PaymentTypeEnum.CASH
         
         # Convert statuses
-        lease_status_mapping = {
-            "Active": LeaseStatusEnum.ACTIVE,
-            "Terminated": LeaseStatusEnum.TERMINATED,
-            "Termination Requested": LeaseStatusEnum.TERMINATION_REQUESTED,
-        }
-        lease_status = lease_status_mapping.get(lease.lease_status, LeaseStatusEnum.ACTIVE)
-        
-        driver_status_mapping = {
-            "Active": DriverStatusEnum.ACTIVE,
-            "Inactive": DriverStatusEnum.BLACKLISTED,
-            "Suspended": DriverStatusEnum.SUSPENDED,
-        }
-        driver_status = driver_status_mapping.get(driver.driver_status if driver else None, DriverStatusEnum.ACTIVE)
+        lease_status = LEASE_STATUS_MAPPING.get(lease.lease_status, LeaseStatusEnum.ACTIVE)
+        driver_status = DRIVER_STATUS_MAPPING.get(driver.driver_status if driver else None, DriverStatusEnum.ACTIVE)
         
         # DTR status is always NOT_GENERATED for current week
         dtr_status = DTRStatusEnum.NOT_GENERATED
@@ -793,16 +1211,38 @@ class CurrentBalancesServiceOptimized:
         per_page: int,
         filters: Optional[CurrentBalancesFilter]
     ) -> Tuple[List[WeeklyBalanceRow], int]:
-        """Get historical balances from finalized DTRs"""
+        """
+        Get historical balances from finalized DTRs
+        
+        Reads the DTR snapshot columns plus identity columns in one projected
+        query (no ORM entities) driven by ix_dtrs_week_lease_status. Filters,
+        sorting and pagination run in SQL with the same options as the live
+        path.
+        """
+        plate_number = self._historical_plate_expr()
         
         query = (
-            self.db.query(DTR)
-            .options(
-                joinedload(DTR.driver).joinedload(Driver.tlc_license),
-                joinedload(DTR.lease),
-                joinedload(DTR.vehicle),
-                joinedload(DTR.medallion)
+            self.db.query(
+                DTR.generation_date,
+                Lease.lease_id,
+                Lease.lease_status,
+                Lease.deposit_amount_paid,
+                Driver.full_name,
+                Driver.ssn,
+                Driver.pay_to_mode,
+                TLCLicense.tlc_license_number,
+                TLCLicense.tlc_license_expiry_date,
+                Medallion.medallion_number,
+                Vehicle.vin,
+                plate_number.label("plate_number"),
+                *[column.label(field) for field, column in DTR_FINANCIAL_COLUMNS.items()]
             )
+            .select_from(DTR)
+            .outerjoin(Lease, Lease.id == DTR.lease_id)
+            .outerjoin(Driver, Driver.id == DTR.primary_driver_id)
+            .outerjoin(TLCLicense, TLCLicense.id == Driver.tlc_license_number_id)
+            .outerjoin(Vehicle, Vehicle.id == DTR.vehicle_id)
+            .outerjoin(Medallion, Medallion.id == DTR.medallion_id)
             .filter(
                 DTR.week_start_date == week_start,
                 DTR.week_end_date == week_end,
@@ -810,163 +1250,163 @@ class CurrentBalancesServiceOptimized:
             )
         )
         
-        # Apply filters
         if filters:
-            # General search
-            if filters.search:
-                search_term = f"%{filters.search}%"
-                query = query.outerjoin(Driver).outerjoin(Vehicle).outerjoin(Medallion).filter(
-                    or_(
-                        DTR.lease.has(Lease.lease_id.ilike(search_term)),
-                        Driver.full_name.ilike(search_term),
-                        # Note: plate_number search removed as it requires VehicleRegistration join
-                        Medallion.medallion_number.ilike(search_term),
-                        Vehicle.vin.ilike(search_term)  # Added VIN search
-                    )
-                )
-            
-            # Individual column searches with comma-separated support
-            if filters.lease_id_search:
-                lease_ids = [term.strip() for term in filters.lease_id_search.split(',') if term.strip()]
-                if lease_ids:
-                    lease_id_conditions = [DTR.lease.has(Lease.lease_id.ilike(f"%{term}%")) for term in lease_ids]
-                    query = query.filter(or_(*lease_id_conditions))
-            
-            if filters.driver_name_search:
-                driver_names = [term.strip() for term in filters.driver_name_search.split(',') if term.strip()]
-                if driver_names:
-                    driver_name_conditions = [Driver.full_name.ilike(f"%{term}%") for term in driver_names]
-                    query = query.filter(or_(*driver_name_conditions))
-            
-            if filters.tlc_license_search:
-                tlc_licenses = [term.strip() for term in filters.tlc_license_search.split(',') if term.strip()]
-                if tlc_licenses:
-                    tlc_conditions = [TLCLicense.tlc_license_number.ilike(f"%{term}%") for term in tlc_licenses]
-                    query = query.join(Driver).join(TLCLicense).filter(or_(*tlc_conditions))
-            
-            if filters.medallion_search:
-                medallions = [term.strip() for term in filters.medallion_search.split(',') if term.strip()]
-                if medallions:
-                    medallion_conditions = [Medallion.medallion_number.ilike(f"%{term}%") for term in medallions]
-                    query = query.filter(or_(*medallion_conditions))
-            
-            if filters.plate_search:
-                plates = [term.strip() for term in filters.plate_search.split(',') if term.strip()]
-                if plates:
-                    plate_conditions = [Vehicle.registrations.any(VehicleRegistration.plate_number.ilike(f"%{term}%")) for term in plates]
-                    query = query.filter(or_(*plate_conditions))
-            
-            if filters.vin_search:
-                vins = [term.strip() for term in filters.vin_search.split(',') if term.strip()]
-                if vins:
-                    vin_conditions = [Vehicle.vin.ilike(f"%{term}%") for term in vins]
-                    query = query.filter(or_(*vin_conditions))
-            
-            # Driver status filter
-            if filters.driver_status:
-                if filters.driver_status == DriverStatusEnum.ACTIVE:
-                    # Filter for active drivers (drivers with active TLC licenses)
-                    query = query.filter(
-                        Driver.tlc_license.has(
-                            TLCLicense.tlc_license_expiry_date >= func.current_date()
-                        )
-                    )
-                elif filters.driver_status == DriverStatusEnum.SUSPENDED:
-                    # Filter for inactive drivers (drivers with expired or no TLC licenses)
-                    query = query.filter(
-                        or_(
-                            Driver.tlc_license_id.is_(None),
-                            Driver.tlc_license.has(
-                                TLCLicense.tlc_license_expiry_date < func.current_date()
-                            )
-                        )
-                    )
+            query = self._apply_historical_filters(query, filters, plate_number)
         
-        # Apply sorting for database columns
+        # Sort in SQL (None values last, like the live path)
+        order_by = []
         if filters and filters.sort_by:
-            sort_column = None
-            if filters.sort_by == "lease_id":
-                sort_column = Lease.lease_id
-            elif filters.sort_by == "driver_name":
-                sort_column = Driver.full_name
-            elif filters.sort_by == "medallion_number":
-                sort_column = Medallion.medallion_number
-            elif filters.sort_by == "plate_number":
-                # Can't sort by plate_number at database level due to relationship
-                sort_column = None
-            elif filters.sort_by == "vin_number":
-                sort_column = Vehicle.vin
-            elif filters.sort_by == "cc_earnings":
-                sort_column = DTR.credit_card_earnings
-            elif filters.sort_by == "net_earnings":
-                sort_column = DTR.net_earnings
-            # Add other DTR financial columns as needed
-            
+            sort_column = self._historical_sort_columns(plate_number).get(filters.sort_by)
             if sort_column is not None:
-                if filters.sort_order == "desc":
-                    query = query.order_by(sort_column.desc())
-                else:
-                    query = query.order_by(sort_column.asc())
-        
-        total_items = query.count()
-        dtrs = query.offset((page - 1) * per_page).limit(per_page).all()
+                order_by.append(sort_column.is_(None))
+                order_by.append(sort_column.desc() if filters.sort_order == "desc" else sort_column.asc())
+        order_by.append(DTR.id.asc())
         
-        balance_rows = []
-        for dtr in dtrs:
-            row = self._convert_dtr_to_balance_row(dtr)
-            balance_rows.append(row)
+        total_items = query.with_entities(func.count(DTR.id)).scalar() or 0
+        results = (
+            query.order_by(*order_by)
+            .offset((page - 1) * per_page)
+            .limit(per_page)
+            .all()
+        )
         
-        return balance_rows, total_items
+        return [self._convert_dtr_to_balance_row(row) for row in results], total_items
     
-    def _convert_dtr_to_balance_row(self, dtr: DTR) -> WeeklyBalanceRow:
-        """Convert a finalized DTR to a balance row"""
+    @staticmethod
+    def _historical_plate_expr():
+        """Plate of the DTR's vehicle: the active registration, else the first one"""
+        return (
+            select(VehicleRegistration.plate_number)
+            .where(VehicleRegistration.vehicle_id == DTR.vehicle_id)
+            .order_by((VehicleRegistration.status == "Active").desc(), VehicleRegistration.id.asc())
+            .limit(1)
+            .correlate(DTR)
+            .scalar_subquery()
+        )
+    
+    @staticmethod
+    def _historical_driver_active_expr():
+        """A driver shows as ACTIVE when their TLC license was valid when the DTR was generated"""
+        return TLCLicense.tlc_license_expiry_date >= func.date(DTR.generation_date)
+    
+    def _historical_sort_columns(self, plate_number) -> Dict:
+        """Balance row field -> SQL expression for historical sorting"""
+        return {
+            "lease_id": Lease.lease_id,
+            "driver_name": Driver.full_name,
+            "tlc_license": TLCLicense.tlc_license_number,
+            "ssn": func.right(Driver.ssn, 4),
+            "medallion_number": Medallion.medallion_number,
+            "plate_number": plate_number,
+            "vin_number": Vehicle.vin,
+            "deposit_amount": Lease.deposit_amount_paid,
+            "last_updated": DTR.generation_date,
+            **DTR_FINANCIAL_COLUMNS,
+        }
+    
+    def _apply_historical_filters(self, query, filters: CurrentBalancesFilter, plate_number):
+        """Apply the live-path filter options to the historical DTR query"""
         
-        driver = dtr.driver
-        lease = dtr.lease
-        vehicle = dtr.vehicle
-        medallion = dtr.medallion
+        def split_terms(value: str) -> List[str]:
+            return [term.strip() for term in value.split(',') if term.strip()]
         
-        payment_type = PaymentTypeEnum.ACH if driver and driver.pay_to_mode == 'ACH' else PaymentTypeEnum.CASH
+        def plate_matches(term: str):
+            return DTR.vehicle_id.in_(
+                select(VehicleRegistration.vehicle_id).where(plate_key_matches(term))
+            )
         
-        # Convert lease status from database enum to current balances enum
-        lease_status_mapping = {
-            "Active": LeaseStatusEnum.ACTIVE,
-            "Terminated": LeaseStatusEnum.TERMINATED,
-            "Termination Requested": LeaseStatusEnum.TERMINATION_REQUESTED,
-        }
-        lease_status = lease_status_mapping.get(lease.lease_status, LeaseStatusEnum.ACTIVE) if lease else LeaseStatusEnum.TERMINATED
+        if filters.search:
+            search_term = f"%{filters.search}%"
+            query = query.filter(
+                or_(
+                    Lease.lease_id.ilike(search_term),
+                    Driver.full_name.ilike(search_term),
+                    plate_matches(filters.search),
+                    Medallion.medallion_number.ilike(search_term),
+                    TLCLicense.tlc_license_number.ilike(search_term),
+                    Driver.ssn.ilike(search_term)
+                )
+            )
+        
+        if filters.lease_id_search:
+            query = query.filter(or_(*[Lease.lease_id.ilike(f"%{t}%") for t in split_terms(filters.lease_id_search)]))
+        
+        if filters.driver_name_search:
+            query = query.filter(or_(*[Driver.full_name.ilike(f"%{t}%") for t in split_terms(filters.driver_name_search)]))
+        
+        if filters.tlc_license_search:
+            query = query.filter(or_(*[TLCLicense.tlc_license_number.ilike(f"%{t}%") for t in split_terms(filters.tlc_license_search)]))
+        
+        if filters.medallion_search:
+            query = query.filter(or_(*[Medallion.medallion_number.ilike(f"%{t}%") for t in split_terms(filters.medallion_search)]))
+        
+        if filters.plate_search:
+            query = query.filter(or_(*[plate_matches(t) for t in split_terms(filters.plate_search)]))
+        
+        if filters.vin_search:
+            query = query.filter(or_(*[Vehicle.vin.ilike(f"%{t}%") for t in split_terms(filters.vin_search)]))
         
-        # Determine driver status based on TLC license expiration
+        if filters.ssn_search:
+            # Support both full SSN and last 4 digits
+            query = query.filter(or_(*[
+                Driver.ssn.like(f"%{t}") if len(t) <= 4 else Driver.ssn.ilike(f"%{t}%")
+                for t in split_terms(filters.ssn_search)
+            ]))
+        
+        if filters.lease_status:
+            query = query.filter(Lease.lease_status == filters.lease_status.value)
+        
+        # Historical rows derive driver status from the TLC license (see _convert_dtr_to_balance_row)
+        if filters.driver_status == DriverStatusEnum.ACTIVE:
+            query = query.filter(self._historical_driver_active_expr())
+        elif filters.driver_status == DriverStatusEnum.SUSPENDED:
+            query = query.filter(
+                or_(
+                    TLCLicense.tlc_license_expiry_date.is_(None),
+                    ~self._historical_driver_active_expr()
+                )
+            )
+        elif filters.driver_status:
+            query = query.filter(false())
+        
+        if filters.payment_type:
+            if filters.payment_type == PaymentTypeEnum.ACH:
+                query = query.filter(Driver.pay_to_mode == 'ACH')
+            else:
+                query = query.filter(or_(Driver.pay_to_mode != 'ACH', Driver.pay_to_mode.is_(None)))
+        
+        # Every finalized DTR is GENERATED
+        if filters.dtr_status and filters.dtr_status != DTRStatusEnum.GENERATED:
+            query = query.filter(false())
+        
+        return query
+    
+    def _convert_dtr_to_balance_row(self, row) -> WeeklyBalanceRow:
+        """Convert a projected finalized-DTR tuple to a balance row"""
+        
+        # Determine driver status based on TLC license expiration at generation
         driver_status = DriverStatusEnum.SUSPENDED
-        if driver and driver.tlc_license and driver.tlc_license.tlc_license_expiry_date:
-            # Use the DTR date or current date for historical comparison
-            comparison_date = dtr.generation_date.date() if dtr.generation_date else date.today()
-            if driver.tlc_license.tlc_license_expiry_date >= comparison_date:
+        if row.tlc_license_expiry_date:
+            comparison_date = row.generation_date.date() if row.generation_date else date.today()
+            if row.tlc_license_expiry_date >= comparison_date:
                 driver_status = DriverStatusEnum.ACTIVE
         
         return WeeklyBalanceRow(
-            lease_id=lease.lease_id if lease else "N/A",
-            driver_name=driver.full_name if driver else "Unknown",
-            tlc_license=driver.tlc_license.tlc_license_number if driver and driver.tlc_license else None,
-            medallion_number=medallion.medallion_number if medallion else "N/A",
-            plate_number=vehicle.get_active_plate_number() if vehicle else "N/A",
-            vin_number=vehicle.vin if vehicle else None,
-            lease_status=lease_status,
+            lease_id=row.lease_id or "N/A",
+            driver_name=row.full_name or "Unknown",
+            tlc_license=row.tlc_license_number,
+            ssn=self.mask_ssn(row.ssn),
+            medallion_number=row.medallion_number or "N/A",
+            plate_number=row.plate_number or "N/A",
+            vin_number=row.vin,
+            lease_status=(
+                LEASE_STATUS_MAPPING.get(row.lease_status, LeaseStatusEnum.ACTIVE)
+                if row.lease_id else LeaseStatusEnum.TERMINATED
+            ),
             driver_status=driver_status,
             dtr_status=DTRStatusEnum.GENERATED,
-            payment_type=payment_type,
-            cc_earnings=dtr.credit_card_earnings or Decimal("0"),
-            weekly_lease_fee=dtr.lease_amount or Decimal("0"),
-            mta_tif=dtr.mta_fees_total or Decimal("0"),
-            ezpass_tolls=dtr.ezpass_tolls or Decimal("0"),
-            pvb_violations=dtr.pvb_violations or Decimal("0"),
-            tlc_tickets=dtr.tlc_tickets or Decimal("0"),
-            repairs_wtd=dtr.repairs or Decimal("0"),
-            loans_wtd=dtr.driver_loans or Decimal("0"),
-            misc_charges=dtr.misc_charges or Decimal("0"),
-            subtotal_deductions=dtr.subtotal_deductions or Decimal("0"),
-            prior_balance=dtr.prior_balance or Decimal("0"),
-            deposit_amount=lease.deposit_amount_paid if lease else Decimal("0"),
-            net_earnings=dtr.net_earnings or Decimal("0"),
-            last_updated=dtr.generation_date or datetime.now(timezone.utc)
-        )
\ No newline at end of file
+            payment_type=PaymentTypeEnum.ACH if row.pay_to_mode == 'ACH' else PaymentTypeEnum.CASH,
+            **{field: getattr(row, field) or Decimal("0") for field in DTR_FINANCIAL_COLUMNS},
+            deposit_amount=row.deposit_amount_paid or Decimal("0"),
+            last_updated=row.generation_date or datetime.now(timezone.utc)
+        )
@@ -0,0 +1,74 @@
+# app/current_balances/tasks.py
+
+"""
+Celery Task Definitions for the Current Balances Module.
+
+Keeps the weekly balance grid in step with balance inputs: per-lease
+refreshes queued after commits, plus a scheduled full rebuild.
+"""
+
+from typing import List, Optional
+
+from celery import shared_task
+
+from app.core.db import SessionLocal
+from app.current_balances.balance_grid import BalanceGridService
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@shared_task(name="current_balances.refresh_balance_grid")
+def refresh_balance_grid_task(
+    lease_ids: Optional[List[int]] = None,
+    repair_invoice_ids: Optional[List[int]] = None,
+    loan_ids: Optional[List[int]] = None,
+):
+    """
+    Recompute current-week grid rows for leases whose inputs changed.
+
+    Queued automatically after commits that touch ledger postings, trips,
+    tolls, violations, installments, lease schedules or DTRs.
+    """
+    db = SessionLocal()
+
+    try:
+        service = BalanceGridService(db)
+        affected = service.resolve_lease_ids(
+            lease_ids or [], repair_invoice_ids or [], loan_ids or []
+        )
+        refreshed = service.refresh_leases(affected)
+        return {"leases": len(affected), "refreshed": refreshed}
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Balance grid refresh failed: {str(e)}", exc_info=True)
+        raise
+
+    finally:
+        db.close()
+
+
+@shared_task(name="current_balances.rebuild_balance_grid")
+def rebuild_balance_grid_task():
+    """
+    Rebuild the current week of the balance grid.
+
+    Schedule: Sunday just after midnight (seeds the new week) and nightly
+    (reconciles any missed refreshes).
+    """
+    logger.info("Starting balance grid rebuild task")
+    db = SessionLocal()
+
+    try:
+        result = BalanceGridService(db).rebuild()
+        logger.info("Balance grid rebuild completed", **result)
+        return result
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Balance grid rebuild failed: {str(e)}", exc_info=True)
+        raise
+
+    finally:
+        db.close()
@@ -1,36 +1,49 @@
 # app/driver_payments/ach_service.py
 
-import math
+import io
+import tempfile
 from datetime import date, datetime, timedelta
-from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from sqlalchemy import desc
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from app.driver_payments.models import (
     ACHBatch,
     ACHBatchStatus,
     CompanyBankConfiguration,
 )
+from app.driver_payments.nacha_builder import (
+    NACHABatch,
+    NACHAEntry,
+    NACHAFileBuilder,
+    validate_account_number,
+    validate_routing_number,
+)
+from app.dtr.exceptions import NACHAGenerationError, NACHAValidationError
 from app.dtr.models import DTR, DTRStatus, PaymentMethod
+from app.dtr.summary_cache import invalidate_dtr_summary
 from app.drivers.models import Driver
 from app.utils.logger import get_logger
+from app.utils.s3_utils import s3_utils
 
 logger = get_logger(__name__)
 
+NACHA_S3_PREFIX = "nacha_files"
+# Keep NACHA files in memory up to this size before spilling to disk
+NACHA_SPOOL_MAX_BYTES = 5 * 1024 * 1024
+# Standard Entry Class used for driver payouts (consumer credits)
+DEFAULT_SEC_CODE = "PPD"
+
 
 class ACHBatchService:
     """
     Service for ACH batch processing and NACHA file generation.
-    Handles local file storage, database tracking, and strict NACHA file formatting.
+    Handles S3 file storage, database tracking, and strict NACHA file formatting.
     """
 
     def __init__(self, db: Session):
         self.db = db
-        # Ensure local directory exists for NACHA files
-        self.nacha_directory = Path("nacha_files")
-        self.nacha_directory.mkdir(exist_ok=True)
 
     # ==========================================
     # Public Methods
@@ -43,20 +56,24 @@ class ACHBatchService:
     ) -> ACHBatch:
         """
         Create an ACH batch from selected DTRs, generate the NACHA file, 
-        save it locally, and update DTR statuses.
+        upload it to S3, and update DTR statuses.
         
         Args:
             dtr_ids: List of DTR IDs to include in the batch.
             effective_date: The date funds are intended to settle.
             
         Returns:
-            The created ACHBatch object with the local file path populated.
+            The created ACHBatch object with the NACHA S3 key populated.
+
+        Raises:
+            NACHAValidationError: If any DTR fails validation. All errors for
+                the batch are reported together.
         """
         logger.info(f"Initiating ACH batch creation for {len(dtr_ids)} DTRs")
         
         try:
             # 1. Validation: Ensure DTRs exist, are finalized, and eligible for ACH
-            dtrs = self._get_and_validate_dtrs(dtr_ids)
+            dtrs, entries = self._get_and_validate_dtrs(dtr_ids)
             
             # 2. Configuration: Get company bank details (Seeds default if missing)
             company_config = self._get_company_bank_config()
@@ -93,22 +110,24 @@ class ACHBatchService:
                 dtr.payment_date = datetime.utcnow()
                 # Note: We don't set check_number for ACH
             
-            # 8. Generate NACHA File and Save to Disk
-            # Returns the Path object
+            # 8. Generate NACHA File and Upload to S3
+            # Returns the S3 key
             file_path = self._generate_nacha_file(
                 ach_batch=ach_batch,
-                dtrs=dtrs,
+                entries=entries,
                 company_config=company_config
             )
             
             # 9. Finalize Batch Record
-            ach_batch.nacha_file_path = str(file_path)
+            ach_batch.nacha_file_path = file_path
             ach_batch.nacha_generated_at = datetime.utcnow()
             ach_batch.status = ACHBatchStatus.NACHA_GENERATED
             
             self.db.commit()
             self.db.refresh(ach_batch)
             
+            invalidate_dtr_summary(dtr.week_start_date for dtr in dtrs)
+            
             logger.info(
                 f"Successfully created ACH Batch {batch_number}. "
                 f"Total: ${total_amount}. File: {file_path}"
@@ -159,6 +178,8 @@ class ACHBatchService:
             self.db.commit()
             self.db.refresh(batch)
             
+            invalidate_dtr_summary(dtr.week_start_date for dtr in dtrs)
+            
             logger.info(f"Reversed ACH batch {batch.batch_number}, reverted {len(dtrs)} DTRs")
             
             return batch
@@ -210,130 +231,163 @@ class ACHBatchService:
         )
 
     # ==========================================
-    # NACHA File Generation (Local Disk)
+    # NACHA File Generation (Streamed to S3)
     # ==========================================
 
     def _generate_nacha_file(
         self,
         ach_batch: ACHBatch,
-        dtrs: List[DTR],
+        entries: List[Tuple[NACHAEntry, str]],
         company_config: CompanyBankConfiguration
-    ) -> Path:
+    ) -> str:
         """
-        Generates NACHA content strings, writes to local disk, and returns the Path.
+        Streams NACHA records into a spooled temp file and uploads it to S3.
         Strict 94-character fixed width lines.
+
+        Returns:
+            The S3 key of the uploaded NACHA file.
         """
         logger.info(f"Generating NACHA content for batch {ach_batch.batch_number}")
-        
-        # Pre-calculate entry hash and totals
-        entry_hash = 0
-        total_credit_amount = 0
-        entry_records = []
-        trace_sequence = 1
-        odfi_prefix = company_config.bank_routing_number[:8]
-
-        # --- Generate Entry Details (Type 6) ---
+
+        batches = self._group_entries_into_batches(ach_batch, entries, company_config)
+        s3_key = f"{NACHA_S3_PREFIX}/{ach_batch.batch_number}.ach"
+
+        with tempfile.SpooledTemporaryFile(max_size=NACHA_SPOOL_MAX_BYTES) as raw:
+            stream = io.TextIOWrapper(raw, encoding="ascii", newline="")
+            summary = NACHAFileBuilder(stream, company_config).build(batches)
+            stream.flush()
+            raw.seek(0)
+
+            logger.info(
+                f"Uploading NACHA file to S3: {s3_key} "
+                f"({summary.batch_count} batches, {summary.entry_count} entries, "
+                f"{summary.block_count} blocks)"
+            )
+
+            uploaded = s3_utils.upload_file(raw, s3_key, content_type="text/plain")
+            stream.detach()
+
+        if not uploaded:
+            raise NACHAGenerationError(f"Failed to upload NACHA file {s3_key} to S3")
+
+        return s3_key
+
+    def _group_entries_into_batches(
+        self,
+        ach_batch: ACHBatch,
+        entries: List[Tuple[NACHAEntry, str]],
+        company_config: CompanyBankConfiguration
+    ) -> List[NACHABatch]:
+        """
+        Groups entries into NACHA batches by company and SEC code.
+        Batch numbers start from the ACH batch ID to stay unique within 7 digits.
+        """
+        groups: Dict[Tuple[int, str], NACHABatch] = {}
+
+        for entry, sec_code in entries:
+            key = (company_config.id, sec_code)
+            if key not in groups:
+                groups[key] = NACHABatch(
+                    company_config=company_config,
+                    sec_code=sec_code,
+                    effective_date=ach_batch.effective_date,
+                    batch_number=(ach_batch.id + len(groups)) % 10000000,
+                )
+            groups[key].entries.append(entry)
+
+        return list(groups.values())
+
+    def _build_nacha_entries(
+        self,
+        dtrs: List[DTR],
+        drivers: Dict[int, Driver]
+    ) -> Tuple[List[Tuple[NACHAEntry, str]], List[str]]:
+        """
+        Builds NACHA entries for all DTRs from prefetched drivers.
+        Collects every validation error instead of failing on the first.
+
+        Returns:
+            (list of (entry, sec_code) pairs, list of validation errors)
+        """
+        entries = []
+        errors = []
+
         for dtr in dtrs:
-            driver = self.db.query(Driver).filter(Driver.id == dtr.primary_driver_id).first()
-            bank = getattr(driver, 'driver_bank_account', None)
-            
+            driver = drivers.get(dtr.primary_driver_id)
+            bank = driver.driver_bank_account if driver else None
+
             if not bank:
-                raise ValueError(f"Missing bank info for driver {dtr.primary_driver_id}")
-            
-            routing = str(getattr(bank, 'bank_routing_number', '')).strip()
-            if len(routing) != 9 or not routing.isdigit():
-                raise ValueError(f"Invalid routing number '{routing}' for driver {driver.id}")
-            
-            account = str(getattr(bank, 'bank_account_number', '')).strip()
-            # Amount in Cents
+                errors.append(
+                    f"DTR {dtr.receipt_number}: missing bank info for driver {dtr.primary_driver_id}"
+                )
+                continue
+
+            routing = str(bank.bank_routing_number or '').strip()
+            account = str(bank.bank_account_number or '').strip()
             amount_cents = int(dtr.total_due_to_driver * 100)
-            
-            # Entry Hash Calculation (Sum of first 8 digits)
-            entry_hash += int(routing[:8])
-            total_credit_amount += amount_cents
-            
+
+            entry_errors = [
+                err for err in (
+                    validate_routing_number(routing),
+                    validate_account_number(account),
+                    "Amount due must be greater than zero" if amount_cents <= 0 else None,
+                ) if err
+            ]
+            if entry_errors:
+                errors.extend(
+                    f"DTR {dtr.receipt_number} (driver {driver.id}): {err}"
+                    for err in entry_errors
+                )
+                continue
+
             # Determine Transaction Code (22=Checking Credit, 32=Savings Credit)
-            acct_type = getattr(bank, 'bank_account_type', 'Checking')
-            # Assuming 'S' or 'Savings' indicates savings
+            acct_type = bank.bank_account_type or 'C'
             is_savings = str(acct_type).strip().upper() in ['S', 'SAVINGS']
             txn_code = '32' if is_savings else '22'
 
-            entry_record = self._generate_entry_detail(
+            entry = NACHAEntry(
                 txn_code=txn_code,
                 routing=routing,
                 account=account,
-                amount=amount_cents,
+                amount_cents=amount_cents,
                 driver_id=str(driver.id),
                 receipt_number=str(dtr.receipt_number),
                 driver_name=f"{driver.first_name} {driver.last_name}",
-                trace_seq=trace_sequence,
-                odfi_prefix=odfi_prefix
             )
-            entry_records.append(entry_record)
-            trace_sequence += 1
+            entries.append((entry, DEFAULT_SEC_CODE))
 
-        # --- Build File Content ---
-        lines = []
-        
-        # 1. File Header (Type 1)
-        lines.append(self._generate_file_header(ach_batch, company_config))
-        
-        # 2. Batch Header (Type 5)
-        # Batch number typically increments, using ID for uniqueness within 7 digits
-        batch_num = ach_batch.id % 10000000 
-        lines.append(self._generate_batch_header(ach_batch, company_config, batch_num, odfi_prefix))
-        
-        # 3. Entries (Type 6)
-        lines.extend(entry_records)
-        
-        # 4. Batch Control (Type 8)
-        lines.append(self._generate_batch_control(
-            len(entry_records), 
-            entry_hash, 
-            total_credit_amount, 
-            company_config, 
-            batch_num,
-            odfi_prefix
-        ))
-        
-        # 5. File Control (Type 9)
-        # Calculate blocks (10 records per block)
-        # Total lines so far + 1 for the File Control line itself
-        total_records = len(lines) + 1 
-        block_count = math.ceil(total_records / 10)
-        
-        lines.append(self._generate_file_control(
-            1, # Batch count (system does 1 batch per file usually)
-            block_count,
-            len(entry_records),
-            entry_hash,
-            total_credit_amount
-        ))
-        
-        # 6. Padding (94 chars of '9')
-        final_line_count = len(lines)
-        lines_needed = block_count * 10
-        padding_lines = lines_needed - final_line_count
-        
-        for _ in range(padding_lines):
-            lines.append('9' * 94)
-            
-        # --- Write to Local Disk ---
-        file_path = self.nacha_directory / f"{ach_batch.batch_number}.ach"
-        
-        logger.info(f"Writing NACHA file to disk: {file_path}")
-        
-        with open(file_path, 'w', newline='\r\n') as f:
-             f.write('\n'.join(lines))
-             
-        return file_path
+        return entries, errors
+
+    def _prefetch_drivers(self, driver_ids: List[int]) -> Dict[int, Driver]:
+        """Loads all drivers and their bank accounts for a batch in one joined query"""
+        if not driver_ids:
+            return {}
+
+        drivers = (
+            self.db.query(Driver)
+            .options(joinedload(Driver.driver_bank_account))
+            .filter(Driver.id.in_(set(driver_ids)))
+            .all()
+        )
+        return {driver.id: driver for driver in drivers}
 
     # ==========================================
     # Validation & Calculation Helpers
     # ==========================================
 
-    def _get_and_validate_dtrs(self, dtr_ids: List[int]) -> List[DTR]:
-        """Validates that DTRs exist, are finalized, are ACH payment method, and are not already paid."""
+    def _get_and_validate_dtrs(
+        self, dtr_ids: List[int]
+    ) -> Tuple[List[DTR], List[Tuple[NACHAEntry, str]]]:
+        """
+        Validates that DTRs exist, are finalized, are ACH payment method, are not
+        already paid, and that every driver has usable bank details.
+
+        Drivers and bank accounts are prefetched in one query, and all validation
+        errors for the batch are collected and raised together.
+
+        Returns:
+            (validated DTRs, NACHA entries built for them)
+        """
         dtrs = (
             self.db.query(DTR)
             .filter(DTR.id.in_(dtr_ids))
@@ -348,30 +402,33 @@ class ACHBatchService:
             missing = set(dtr_ids) - found_ids
             raise ValueError(f"DTRs not found: {missing}")
 
+        errors = []
+        eligible = []
         for dtr in dtrs:
             if dtr.status != DTRStatus.FINALIZED:
-                raise ValueError(
+                errors.append(
                     f"DTR {dtr.receipt_number} is not in FINALIZED status (Current: {dtr.status})."
                 )
-            
-            if dtr.payment_method != PaymentMethod.ACH:
-                raise ValueError(
+            elif dtr.payment_method != PaymentMethod.ACH:
+                errors.append(
                     f"DTR {dtr.receipt_number} is not marked for ACH payment."
                 )
-            
-            if dtr.ach_batch_id or dtr.ach_batch_number:
-                raise ValueError(
+            elif dtr.ach_batch_id or dtr.ach_batch_number:
+                errors.append(
                     f"DTR {dtr.receipt_number} is already assigned to batch {dtr.ach_batch_number}."
                 )
-                
-            # Validate Driver Bank Info existence
-            driver = self.db.query(Driver).filter(Driver.id == dtr.primary_driver_id).first()
-            if not driver or not driver.driver_bank_account:
-                raise ValueError(
-                    f"Driver for DTR {dtr.receipt_number} has no bank account configuration."
-                )
-                
-        return dtrs
+            else:
+                eligible.append(dtr)
+
+        # Validate Driver Bank Info for the whole batch
+        drivers = self._prefetch_drivers([dtr.primary_driver_id for dtr in eligible])
+        entries, bank_errors = self._build_nacha_entries(eligible, drivers)
+        errors.extend(bank_errors)
+
+        if errors:
+            raise NACHAValidationError(errors)
+
+        return dtrs, entries
 
     def _get_company_bank_config(self) -> CompanyBankConfiguration:
         """
@@ -449,135 +506,3 @@ class ACHBatchService:
             dt += timedelta(days=1)
             
         return dt
-
-    # ==========================================
-    # NACHA Record Generators (94 Char Fixed)
-    # ==========================================
-
-    def _generate_file_header(self, batch: ACHBatch, config: CompanyBankConfiguration) -> str:
-        """Record Type 1"""
-        now = datetime.now()
-        # Dest: " 021213944" (space + 9 digits)
-        dest = f" {config.bank_routing_number}"[:10]
-        # Origin: "P963014763"
-        origin = (config.immediate_origin or "P963014763")[:10].ljust(10)
-        
-        line = "1"                              # 01: Record Type
-        line += "01"                            # 02-03: Priority
-        line += dest                            # 04-13: Immediate Dest
-        line += origin                          # 14-23: Immediate Origin
-        line += now.strftime('%y%m%d')          # 24-29: File Date
-        line += now.strftime('%H%M')            # 30-33: File Time
-        line += "A"                             # 34: File ID Modifier
-        line += "094"                           # 35-37: Record Size
-        line += "10"                            # 38-39: Blocking Factor
-        line += "1"                             # 40: Format Code
-        line += f"{config.bank_name[:23]:<23}"  # 41-63: Dest Name
-        line += f"{config.company_name[:23]:<23}" # 64-86: Origin Name
-        line += " " * 8                         # 87-94: Ref Code
-        return line
-
-    def _generate_batch_header(
-        self, 
-        batch: ACHBatch, 
-        config: CompanyBankConfiguration, 
-        batch_num: int, 
-        odfi_prefix: str
-    ) -> str:
-        """Record Type 5"""
-        cid = (config.company_tax_id or "0103214763")[:10]
-        eff = batch.effective_date.strftime('%y%m%d')
-        
-        line = "5"                              # 01: Record Type
-        line += "220"                           # 02-04: Service Class (Credits)
-        line += f"{config.company_name[:16]:<16}" # 05-20: Company Name
-        line += " " * 20                        # 21-40: Discretionary
-        line += f"{cid:<10}"                    # 41-50: Company ID
-        line += "PPD"                           # 51-53: SEC Code
-        line += f"{config.company_entry_description[:10]:<10}" # 54-63: Entry Desc
-        line += eff                             # 64-69: Descriptive Date
-        line += eff                             # 70-75: Effective Entry Date
-        line += "   "                           # 76-78: Settlement Date
-        line += "1"                             # 79: Originator Status
-        line += f"{odfi_prefix[:8]:<8}"         # 80-87: Originating DFI
-        line += f"{batch_num:07d}"              # 88-94: Batch Number
-        return line
-
-    def _generate_entry_detail(
-        self, 
-        txn_code: str, 
-        routing: str, 
-        account: str, 
-        amount: int, 
-        driver_id: str, 
-        receipt_number: str, 
-        driver_name: str, 
-        trace_seq: int, 
-        odfi_prefix: str
-    ) -> str:
-        """Record Type 6"""
-        # Individual ID: DRV<ID>-R<RCPT>
-        ind_id = f"DRV{driver_id}-R{receipt_number}"[:15]
-        
-        line = "6"                              # 01: Record Type
-        line += txn_code                        # 02-03: Txn Code
-        line += f"{routing[:8]}"                # 04-11: Receiving DFI
-        line += f"{routing[-1]}"                # 12: Check Digit
-        line += f"{account:<17}"                # 13-29: DFI Account
-        line += f"{amount:010d}"                # 30-39: Amount
-        line += f"{ind_id:<15}"                 # 40-54: Individual ID
-        line += f"{driver_name.upper()[:22]:<22}" # 55-76: Individual Name
-        line += "  "                            # 77-78: Discretionary
-        line += "0"                             # 79: Addenda Indicator
-        line += f"{odfi_prefix[:8]}"            # 80-87: Trace (ODFI)
-        line += f"{trace_seq:07d}"              # 88-94: Trace (Seq)
-        return line
-
-    def _generate_batch_control(
-        self, 
-        entry_count: int, 
-        entry_hash: int, 
-        total_credit: int, 
-        config: CompanyBankConfiguration, 
-        batch_num: int, 
-        odfi_prefix: str
-    ) -> str:
-        """Record Type 8"""
-        # Use alternate Tax ID for control if specified, or fallback to hardcoded 9083733001 per docs
-        company_id = "9083733001"
-        # Entry Hash: Sum of routing numbers, mod 10^10
-        hash_str = str(entry_hash)[-10:].zfill(10)
-
-        line = "8"                              # 01: Record Type
-        line += "220"                           # 02-04: Service Class
-        line += f"{entry_count:06d}"            # 05-10: Entry Count
-        line += hash_str                        # 11-20: Entry Hash
-        line += f"{0:012d}"                     # 21-32: Total Debit (0)
-        line += f"{total_credit:012d}"          # 33-44: Total Credit
-        line += f"{company_id:<10}"             # 45-54: Company ID
-        line += " " * 19                        # 55-73: Message Auth
-        line += " " * 6                         # 74-79: Reserved
-        line += f"{odfi_prefix[:8]:<8}"         # 80-87: Originating DFI
-        line += f"{batch_num:07d}"              # 88-94: Batch Number
-        return line
-
-    def _generate_file_control(
-        self, 
-        batch_count: int, 
-        block_count: int, 
-        entry_count: int, 
-        entry_hash: int, 
-        total_credit: int
-    ) -> str:
-        """Record Type 9"""
-        hash_str = str(entry_hash)[-10:].zfill(10)
-
-        line = "9"                              # 01: Record Type
-        line += f"{batch_count:06d}"            # 02-07: Batch Count
-        line += f"{block_count:06d}"            # 08-13: Block Count
-        line += f"{entry_count:08d}"            # 14-21: Entry Count
-        line += hash_str                        # 22-31: Entry Hash
-        line += f"{0:012d}"                     # 32-43: Total Debit (0)
-        line += f"{total_credit:012d}"          # 44-55: Total Credit
-        line += " " * 39                        # 56-94: Reserved
-        return line
\ No newline at end of file
@@ -5,7 +5,7 @@ from decimal import Decimal
 from datetime import datetime
 from sqlalchemy import (
     Column, Integer, String, Numeric, Date, DateTime,
-    Enum, Boolean, Text
+    Enum, Boolean, Text, ForeignKey, Index
 )
 from sqlalchemy.orm import relationship
 from app.core.db import Base
@@ -96,4 +96,48 @@ class CompanyBankConfiguration(Base):
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __repr__(self):
-        return f"<CompanyBankConfig {self.company_name} - {self.bank_name}>"
\ No newline at end of file
+        return f"<CompanyBankConfig {self.company_name} - {self.bank_name}>"
+
+
+class ACHPayableQueue(Base):
+    """
+    Maintained queue of DTRs payable by ACH
+
+    A row exists while its DTR is FINALIZED, marked for ACH, not assigned to a
+    batch and unpaid. Rows are inserted/removed on flush by
+    app.driver_payments.payable_queue, so the eligibility screen and batch
+    building are an indexed read instead of a scan of the DTR table.
+    """
+    __tablename__ = "ach_payable_queue"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    dtr_id = Column(
+        Integer, ForeignKey("dtrs.id", ondelete="CASCADE"),
+        nullable=False, unique=True
+    )
+    driver_id = Column(Integer, ForeignKey("drivers.id"), nullable=False, index=True)
+
+    # Denormalized display fields for the eligibility screen
+    receipt_number = Column(String(50), nullable=False)
+    week_start_date = Column(Date, nullable=False)
+    medallion_number = Column(String(255), nullable=True)
+    driver_name = Column(String(255), nullable=True)
+    total_due = Column(Numeric(10, 2), nullable=False, default=Decimal('0.00'))
+
+    # Whether the driver currently has usable bank details for NACHA
+    has_bank_info = Column(Boolean, nullable=False, default=False)
+
+    # Audit
+    enqueued_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    dtr = relationship("DTR")
+
+    __table_args__ = (
+        Index("ix_ach_payable_queue_bank_week", "has_bank_info", "week_start_date"),
+    )
+
+    def __repr__(self):
+        return f"<ACHPayableQueue DTR {self.dtr_id} - ${self.total_due}>"
@@ -0,0 +1,287 @@
+# app/driver_payments/nacha_builder.py
+
+"""
+Streaming NACHA file builder.
+
+Records are written to a text stream as they are produced instead of being
+accumulated in memory, so a batch of any size can be spooled straight to S3.
+A single file may carry several batches (one per company / SEC code pair).
+"""
+
+import math
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import List, Optional, TextIO
+
+from app.driver_payments.models import CompanyBankConfiguration
+
+RECORD_SIZE = 94
+BLOCKING_FACTOR = 10
+RECORD_TERMINATOR = "\r\n"
+
+# Company ID used on batch control records (per bank documentation)
+BATCH_CONTROL_COMPANY_ID = "9083733001"
+
+# ABA routing number checksum weights
+ROUTING_WEIGHTS = (3, 7, 1, 3, 7, 1, 3, 7, 1)
+
+
+@dataclass
+class NACHAEntry:
+    """A single credit entry (Record Type 6) before formatting"""
+    txn_code: str
+    routing: str
+    account: str
+    amount_cents: int
+    driver_id: str
+    receipt_number: str
+    driver_name: str
+
+
+@dataclass
+class NACHABatch:
+    """A group of entries sharing a company and SEC code (Record Types 5/8)"""
+    company_config: CompanyBankConfiguration
+    sec_code: str
+    effective_date: date
+    batch_number: int
+    entries: List[NACHAEntry] = field(default_factory=list)
+
+
+@dataclass
+class NACHAFileSummary:
+    """Control totals of a written NACHA file"""
+    batch_count: int = 0
+    entry_count: int = 0
+    entry_hash: int = 0
+    total_credit_amount: int = 0
+    record_count: int = 0
+    block_count: int = 0
+
+
+def to_nacha_text(value: str) -> str:
+    """
+    Transliterate a value to the printable ASCII NACHA files are written in.
+    Accents are dropped ("Muñoz" -> "Munoz"); characters with no ASCII base
+    are removed.
+    """
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    return "".join(ch for ch in decomposed if " " <= ch <= "~")
+
+
+def validate_routing_number(routing: str) -> Optional[str]:
+    """
+    Validate a 9-digit ABA routing number including its check digit.
+
+    Returns:
+        An error message if invalid, None otherwise.
+    """
+    if len(routing) != 9 or not routing.isdigit():
+        return f"Invalid routing number '{routing}'"
+
+    checksum = sum(int(d) * w for d, w in zip(routing, ROUTING_WEIGHTS))
+    if checksum % 10 != 0:
+        return f"Routing number '{routing}' fails check digit validation"
+
+    return None
+
+
+def validate_account_number(account: str) -> Optional[str]:
+    """
+    Validate a DFI account number is ASCII letters and digits that fit the
+    17-character NACHA field.
+
+    Returns:
+        An error message if invalid, None otherwise.
+    """
+    if not account:
+        return "Missing bank account number"
+    if len(account) > 17:
+        return f"Bank account number '{account}' exceeds 17 characters"
+    if not (account.isascii() and account.isalnum()):
+        return f"Bank account number '{account}' must contain only letters and digits"
+    return None
+
+
+class NACHAFileBuilder:
+    """
+    Writes a NACHA file record-by-record to a text stream.
+
+    Usage:
+        builder = NACHAFileBuilder(stream, origin_config)
+        summary = builder.build(batches)
+    """
+
+    def __init__(
+        self,
+        stream: TextIO,
+        origin_config: CompanyBankConfiguration,
+        file_id_modifier: str = "A",
+    ):
+        self.stream = stream
+        self.origin_config = origin_config
+        self.file_id_modifier = file_id_modifier
+        self.summary = NACHAFileSummary()
+        self._trace_sequence = 1
+
+    def build(self, batches: List[NACHABatch]) -> NACHAFileSummary:
+        """Write the complete file (header, batches, control, padding)"""
+        self._write(self._file_header(datetime.now()))
+
+        for batch in batches:
+            self._write_batch(batch)
+
+        # File control counts itself towards the block total
+        self.summary.block_count = math.ceil(
+            (self.summary.record_count + 1) / BLOCKING_FACTOR
+        )
+        self._write(self._file_control())
+
+        padding_lines = self.summary.block_count * BLOCKING_FACTOR - self.summary.record_count
+        for _ in range(padding_lines):
+            self._write("9" * RECORD_SIZE)
+
+        return self.summary
+
+    # ==========================================
+    # Internal Helpers
+    # ==========================================
+
+    def _write(self, record: str) -> None:
+        if len(record) != RECORD_SIZE:
+            raise ValueError(
+                f"NACHA record must be {RECORD_SIZE} characters, got {len(record)}: '{record}'"
+            )
+        self.stream.write(record)
+        self.stream.write(RECORD_TERMINATOR)
+        self.summary.record_count += 1
+
+    def _write_batch(self, batch: NACHABatch) -> None:
+        odfi_prefix = batch.company_config.bank_routing_number[:8]
+        entry_hash = 0
+        total_credit = 0
+
+        self._write(self._batch_header(batch, odfi_prefix))
+
+        for entry in batch.entries:
+            self._write(self._entry_detail(entry, self._trace_sequence, odfi_prefix))
+            self._trace_sequence += 1
+            entry_hash += int(entry.routing[:8])
+            total_credit += entry.amount_cents
+
+        self._write(self._batch_control(batch, len(batch.entries), entry_hash, total_credit, odfi_prefix))
+
+        self.summary.batch_count += 1
+        self.summary.entry_count += len(batch.entries)
+        self.summary.entry_hash += entry_hash
+        self.summary.total_credit_amount += total_credit
+
+    # ==========================================
+    # NACHA Record Generators (94 Char Fixed)
+    # ==========================================
+
+    def _file_header(self, now: datetime) -> str:
+        """Record Type 1"""
+        config = self.origin_config
+        # Dest: " 021213944" (space + 9 digits)
+        dest = f" {config.bank_routing_number}"[:10]
+        # Origin: "P963014763"
+        origin = (config.immediate_origin or "P963014763")[:10].ljust(10)
+
+        line = "1"                              # 01: Record Type
+        line += "01"                            # 02-03: Priority
+        line += dest                            # 04-13: Immediate Dest
+        line += origin                          # 14-23: Immediate Origin
+        line += now.strftime('%y%m%d')          # 24-29: File Date
+        line += now.strftime('%H%M')            # 30-33: File Time
+        line += self.file_id_modifier[:1]       # 34: File ID Modifier
+        line += "094"                           # 35-37: Record Size
+        line += "10"                            # 38-39: Blocking Factor
+        line += "1"                             # 40: Format Code
+        line += f"{to_nacha_text(config.bank_name)[:23]:<23}"     # 41-63: Dest Name
+        line += f"{to_nacha_text(config.company_name)[:23]:<23}"  # 64-86: Origin Name
+        line += " " * 8                         # 87-94: Ref Code
+        return line
+
+    def _batch_header(self, batch: NACHABatch, odfi_prefix: str) -> str:
+        """Record Type 5"""
+        config = batch.company_config
+        cid = (config.company_tax_id or "0103214763")[:10]
+        eff = batch.effective_date.strftime('%y%m%d')
+
+        line = "5"                              # 01: Record Type
+        line += "220"                           # 02-04: Service Class (Credits)
+        line += f"{to_nacha_text(config.company_name)[:16]:<16}"  # 05-20: Company Name
+        line += " " * 20                        # 21-40: Discretionary
+        line += f"{cid:<10}"                    # 41-50: Company ID
+        line += f"{batch.sec_code[:3]:<3}"      # 51-53: SEC Code
+        line += f"{to_nacha_text(config.company_entry_description)[:10]:<10}"  # 54-63: Entry Desc
+        line += eff                             # 64-69: Descriptive Date
+        line += eff                             # 70-75: Effective Entry Date
+        line += "   "                           # 76-78: Settlement Date
+        line += "1"                             # 79: Originator Status
+        line += f"{odfi_prefix[:8]:<8}"         # 80-87: Originating DFI
+        line += f"{batch.batch_number:07d}"     # 88-94: Batch Number
+        return line
+
+    def _entry_detail(self, entry: NACHAEntry, trace_seq: int, odfi_prefix: str) -> str:
+        """Record Type 6"""
+        # Individual ID: DRV<ID>-R<RCPT>
+        ind_id = to_nacha_text(f"DRV{entry.driver_id}-R{entry.receipt_number}")[:15]
+        name = to_nacha_text(entry.driver_name).upper()[:22]
+        account = to_nacha_text(entry.account)[:17]
+
+        line = "6"                              # 01: Record Type
+        line += entry.txn_code                  # 02-03: Txn Code
+        line += f"{entry.routing[:8]}"          # 04-11: Receiving DFI
+        line += f"{entry.routing[-1]}"          # 12: Check Digit
+        line += f"{account:<17}"                # 13-29: DFI Account
+        line += f"{entry.amount_cents:010d}"    # 30-39: Amount
+        line += f"{ind_id:<15}"                 # 40-54: Individual ID
+        line += f"{name:<22}"                   # 55-76: Individual Name
+        line += "  "                            # 77-78: Discretionary
+        line += "0"                             # 79: Addenda Indicator
+        line += f"{odfi_prefix[:8]}"            # 80-87: Trace (ODFI)
+        line += f"{trace_seq % 10000000:07d}"   # 88-94: Trace (Seq)
+        return line
+
+    def _batch_control(
+        self,
+        batch: NACHABatch,
+        entry_count: int,
+        entry_hash: int,
+        total_credit: int,
+        odfi_prefix: str
+    ) -> str:
+        """Record Type 8"""
+        # Entry Hash: Sum of routing numbers, mod 10^10
+        hash_str = str(entry_hash)[-10:].zfill(10)
+
+        line = "8"                              # 01: Record Type
+        line += "220"                           # 02-04: Service Class
+        line += f"{entry_count:06d}"            # 05-10: Entry Count
+        line += hash_str                        # 11-20: Entry Hash
+        line += f"{0:012d}"                     # 21-32: Total Debit (0)
+        line += f"{total_credit:012d}"          # 33-44: Total Credit
+        line += f"{BATCH_CONTROL_COMPANY_ID:<10}" # 45-54: Company ID
+        line += " " * 19                        # 55-73: Message Auth
+        line += " " * 6                         # 74-79: Reserved
+        line += f"{odfi_prefix[:8]:<8}"         # 80-87: Originating DFI
+        line += f"{batch.batch_number:07d}"     # 88-94: Batch Number
+        return line
+
+    def _file_control(self) -> str:
+        """Record Type 9"""
+        summary = self.summary
+        hash_str = str(summary.entry_hash)[-10:].zfill(10)
+
+        line = "9"                              # 01: Record Type
+        line += f"{summary.batch_count:06d}"    # 02-07: Batch Count
+        line += f"{summary.block_count:06d}"    # 08-13: Block Count
+        line += f"{summary.entry_count:08d}"    # 14-21: Entry Count
+        line += hash_str                        # 22-31: Entry Hash
+        line += f"{0:012d}"                     # 32-43: Total Debit (0)
+        line += f"{summary.total_credit_amount:012d}" # 44-55: Total Credit
+        line += " " * 39                        # 56-94: Reserved
+        return line
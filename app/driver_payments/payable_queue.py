@@ -0,0 +1,305 @@
+# app/driver_payments/payable_queue.py
+
+"""
+ACH Payable Queue maintenance.
+
+The `ach_payable_queue` table holds one row per DTR that can currently be
+paid by ACH. It is kept in sync by a `before_flush` listener that reacts to
+DTRs being generated, finalized, paid, batched or reversed and to drivers'
+bank details changing or being deleted, so no caller has to remember to
+update it.
+`PayableQueueService.rebuild` re-derives the whole queue in SQL and is used
+for the initial backfill and periodic reconciliation.
+"""
+
+from itertools import chain
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import and_, case, delete, event, func, inspect, select
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import Session
+
+from app.driver_payments.models import ACHPayableQueue
+from app.drivers.models import Driver
+from app.dtr.models import DTR, DTRStatus, PaymentMethod
+from app.entities.models import BankAccount
+from app.medallions.models import Medallion
+from app.utils.flush_tracking import has_changes
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# DTR attributes that affect ACH eligibility or the queued display values
+DTR_QUEUE_FIELDS = (
+    "status", "payment_method", "ach_batch_id", "payment_date",
+    "total_due_to_driver", "primary_driver_id", "medallion_id",
+)
+DRIVER_BANK_FIELDS = ("bank_account_id", "driver_bank_account")
+BANK_ACCOUNT_FIELDS = ("bank_routing_number", "bank_account_number")
+
+
+def is_ach_payable(dtr: DTR) -> bool:
+    """Whether a DTR is FINALIZED, marked for ACH, unbatched and unpaid"""
+    return (
+        dtr.status == DTRStatus.FINALIZED
+        and dtr.payment_method == PaymentMethod.ACH
+        and dtr.ach_batch_id is None
+        and dtr.payment_date is None
+    )
+
+
+def has_usable_bank_info(bank: BankAccount) -> bool:
+    """Whether a bank account has the details required for a NACHA entry"""
+    return bool(
+        bank
+        and str(bank.bank_routing_number or "").strip()
+        and str(bank.bank_account_number or "").strip()
+    )
+
+
+class PayableQueueService:
+    """Service for reading and maintaining the ACH payable queue"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_payable(self, include_missing_bank_info: bool = False) -> List[ACHPayableQueue]:
+        """
+        List queued DTRs, oldest week first.
+
+        Args:
+            include_missing_bank_info: Also return DTRs whose driver has no
+                usable bank details (they cannot be batched until fixed).
+        """
+        query = self.db.query(ACHPayableQueue)
+        if not include_missing_bank_info:
+            query = query.filter(ACHPayableQueue.has_bank_info.is_(True))
+        return query.order_by(
+            ACHPayableQueue.week_start_date, ACHPayableQueue.id
+        ).all()
+
+    def sync_dtrs(self, dtrs: List[DTR]) -> None:
+        """Insert, refresh or remove queue rows for the given DTRs"""
+        if not dtrs:
+            return
+
+        persisted_ids = [dtr.id for dtr in dtrs if dtr.id is not None]
+        existing: Dict[int, ACHPayableQueue] = {}
+        if persisted_ids:
+            existing = {
+                entry.dtr_id: entry
+                for entry in self.db.query(ACHPayableQueue)
+                .filter(ACHPayableQueue.dtr_id.in_(persisted_ids))
+                .all()
+            }
+
+        payable = [dtr for dtr in dtrs if is_ach_payable(dtr)]
+        drivers = self._load_drivers({dtr.primary_driver_id for dtr in payable})
+        banks = self._load_bank_accounts(drivers.values())
+        medallions = self._load_medallion_numbers({dtr.medallion_id for dtr in payable})
+
+        for dtr in dtrs:
+            entry = existing.get(dtr.id)
+
+            if not is_ach_payable(dtr):
+                if entry is not None:
+                    self.db.delete(entry)
+                continue
+
+            if entry is None:
+                entry = ACHPayableQueue(dtr=dtr)
+                self.db.add(entry)
+
+            driver = drivers.get(dtr.primary_driver_id)
+            entry.driver_id = dtr.primary_driver_id
+            entry.receipt_number = dtr.receipt_number
+            entry.week_start_date = dtr.week_start_date
+            entry.medallion_number = medallions.get(dtr.medallion_id)
+            entry.driver_name = f"{driver.first_name} {driver.last_name}" if driver else None
+            entry.total_due = dtr.total_due_to_driver
+            entry.has_bank_info = has_usable_bank_info(banks.get(dtr.primary_driver_id))
+
+    def sync_drivers(self, driver_ids: Set[int]) -> None:
+        """Refresh the bank-info flag of queued DTRs for the given drivers"""
+        if not driver_ids:
+            return
+
+        entries = (
+            self.db.query(ACHPayableQueue)
+            .filter(ACHPayableQueue.driver_id.in_(driver_ids))
+            .all()
+        )
+        if not entries:
+            return
+
+        banks = self._load_bank_accounts(self._load_drivers(driver_ids).values())
+        for entry in entries:
+            entry.has_bank_info = has_usable_bank_info(banks.get(entry.driver_id))
+
+    def rebuild(self) -> Dict[str, int]:
+        """
+        Re-derive the whole queue from the DTR table in two set-based statements.
+
+        Payable DTRs are upserted on dtr_id rather than deleted and re-inserted,
+        so rows the flush listener queues meanwhile do not collide with the
+        rebuild; rows of DTRs that are no longer payable are deleted after.
+
+        Returns:
+            Dictionary with the number of queued and bank-ready DTRs.
+        """
+        logger.info("Rebuilding ACH payable queue")
+
+        # Same test as has_usable_bank_info: present and not blank
+        bank_ready = and_(
+            BankAccount.id.isnot(None),
+            BankAccount.bank_routing_number.isnot(None),
+            func.trim(BankAccount.bank_routing_number) != "",
+            BankAccount.bank_account_number.isnot(None),
+            func.trim(BankAccount.bank_account_number) != "",
+        )
+        payable = and_(
+            DTR.status == DTRStatus.FINALIZED,
+            DTR.payment_method == PaymentMethod.ACH,
+            DTR.ach_batch_id.is_(None),
+            DTR.payment_date.is_(None),
+        )
+        source = (
+            select(
+                DTR.id,
+                DTR.primary_driver_id,
+                DTR.receipt_number,
+                DTR.week_start_date,
+                Medallion.medallion_number,
+                func.concat(Driver.first_name, " ", Driver.last_name),
+                DTR.total_due_to_driver,
+                case((bank_ready, True), else_=False),
+                func.now(),
+                func.now(),
+            )
+            .join(Driver, Driver.id == DTR.primary_driver_id)
+            .outerjoin(BankAccount, BankAccount.id == Driver.bank_account_id)
+            .outerjoin(Medallion, Medallion.id == DTR.medallion_id)
+            .where(payable)
+        )
+
+        upsert = insert(ACHPayableQueue).from_select(
+            [
+                "dtr_id", "driver_id", "receipt_number", "week_start_date",
+                "medallion_number", "driver_name", "total_due", "has_bank_info",
+                "enqueued_at", "updated_at",
+            ],
+            source,
+        )
+        # enqueued_at keeps the time the DTR first became payable
+        self.db.execute(upsert.on_duplicate_key_update(
+            **{
+                column: upsert.inserted[column]
+                for column in (
+                    "driver_id", "receipt_number", "week_start_date", "medallion_number",
+                    "driver_name", "total_due", "has_bank_info", "updated_at",
+                )
+            }
+        ))
+        self.db.execute(
+            delete(ACHPayableQueue).where(
+                ACHPayableQueue.dtr_id.not_in(select(DTR.id).where(payable))
+            )
+        )
+        self.db.commit()
+
+        queued = self.db.query(func.count(ACHPayableQueue.id)).scalar() or 0
+        ready = (
+            self.db.query(func.count(ACHPayableQueue.id))
+            .filter(ACHPayableQueue.has_bank_info.is_(True))
+            .scalar() or 0
+        )
+
+        logger.info("ACH payable queue rebuilt", queued=queued, bank_ready=ready)
+        return {"queued": queued, "bank_ready": ready}
+
+    # ==========================================
+    # Internal Helpers
+    # ==========================================
+
+    def _load_drivers(self, driver_ids: Set[int]) -> Dict[int, Driver]:
+        driver_ids = {d for d in driver_ids if d is not None}
+        if not driver_ids:
+            return {}
+        drivers = self.db.query(Driver).filter(Driver.id.in_(driver_ids)).all()
+        return {driver.id: driver for driver in drivers}
+
+    def _load_bank_accounts(self, drivers) -> Dict[int, Optional[BankAccount]]:
+        """
+        Bank account of each driver as it will be after the current flush.
+
+        An already loaded driver_bank_account may be stale (the driver's
+        bank_account_id changed, or the account was deleted), so accounts are
+        resolved by bank_account_id unless the relationship itself was set.
+        """
+        drivers = list(drivers)
+        account_ids = {driver.bank_account_id for driver in drivers} - {None}
+        accounts = {}
+        if account_ids:
+            accounts = {
+                bank.id: bank
+                for bank in self.db.query(BankAccount)
+                .filter(BankAccount.id.in_(account_ids))
+                .all()
+            }
+
+        banks = {}
+        for driver in drivers:
+            if inspect(driver).attrs.driver_bank_account.history.has_changes():
+                bank = driver.driver_bank_account
+            else:
+                bank = accounts.get(driver.bank_account_id)
+            banks[driver.id] = None if bank is not None and bank in self.db.deleted else bank
+        return banks
+
+    def _load_medallion_numbers(self, medallion_ids: Set[int]) -> Dict[int, str]:
+        medallion_ids = {m for m in medallion_ids if m is not None}
+        if not medallion_ids:
+            return {}
+        rows = (
+            self.db.query(Medallion.id, Medallion.medallion_number)
+            .filter(Medallion.id.in_(medallion_ids))
+            .all()
+        )
+        return {row.id: row.medallion_number for row in rows}
+
+
+@event.listens_for(Session, "before_flush")
+def maintain_payable_queue(session, flush_context, instances):
+    """
+    Keep the ACH payable queue in step with DTR and bank-detail changes
+    that are about to be flushed.
+    """
+    changed_dtrs = [
+        obj for obj in chain(session.new, session.dirty)
+        if isinstance(obj, DTR)
+        and has_changes(session, obj, DTR_QUEUE_FIELDS)
+    ]
+
+    driver_ids = {
+        obj.id for obj in session.dirty
+        if isinstance(obj, Driver) and has_changes(session, obj, DRIVER_BANK_FIELDS)
+    }
+    changed_bank_ids = [
+        obj.id for obj in chain(session.dirty, session.deleted)
+        if isinstance(obj, BankAccount) and has_changes(session, obj, BANK_ACCOUNT_FIELDS)
+    ]
+
+    if not changed_dtrs and not driver_ids and not changed_bank_ids:
+        return
+
+    service = PayableQueueService(session)
+    with session.no_autoflush:
+        if changed_bank_ids:
+            driver_ids.update(
+                row.id for row in session.query(Driver.id)
+                .filter(Driver.bank_account_id.in_(changed_bank_ids))
+                .all()
+            )
+
+        service.sync_dtrs(changed_dtrs)
+        service.sync_drivers(driver_ids)
@@ -21,6 +21,8 @@ from app.dtr.schemas import DTRListResponse, DTRListItemResponse
 from app.dtr.models import DTRStatus, PaymentMethod
 from app.driver_payments.ach_service import ACHBatchService
 from app.driver_payments.models import ACHBatchStatus
+from app.driver_payments.payable_queue import PayableQueueService
+from app.dtr.exceptions import NACHAValidationError
 from app.utils.logger import get_logger
 from app.utils.s3_utils import s3_utils
 
@@ -190,31 +192,36 @@ def list_driver_payments(
 
 @router.get("/ach-batch-mode")
 def get_ach_eligible_payments(
+    include_missing_bank_info: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get DTRs eligible for ACH batch processing.
     
-    Returns only FINALIZED, unpaid DTRs with ACH payment method.
+    Returns only FINALIZED, unpaid DTRs with ACH payment method whose driver
+    has bank details. Served from the maintained ACH payable queue, so it is
+    cheap to refresh repeatedly.
     """
     try:
-        repo = DTRRepository(db)
-        dtrs = repo.get_unpaid_dtrs_for_ach()
+        entries = PayableQueueService(db).list_payable(
+            include_missing_bank_info=include_missing_bank_info
+        )
         
         # Map to response
         items = []
-        for dtr in dtrs:
+        for entry in entries:
             items.append({
-                'id': dtr.id,
-                'receipt_number': dtr.receipt_number,
-                'week_start_date': str(dtr.week_start_date),
-                'medallion_number': dtr.medallion.medallion_number if dtr.medallion else None,
-                'driver_name': f"{dtr.primary_driver.first_name} {dtr.primary_driver.last_name}" if dtr.primary_driver else None,
-                'total_due': float(dtr.total_due_to_driver)
+                'id': entry.dtr_id,
+                'receipt_number': entry.receipt_number,
+                'week_start_date': str(entry.week_start_date),
+                'medallion_number': entry.medallion_number,
+                'driver_name': entry.driver_name,
+                'total_due': float(entry.total_due),
+                'has_bank_info': entry.has_bank_info
             })
         
-        total_amount = sum(dtr.total_due_to_driver for dtr in dtrs)
+        total_amount = sum(entry.total_due for entry in entries)
         
         return {
             'eligible_dtrs': items,
@@ -261,6 +268,11 @@ def create_ach_batch(
             reversal_reason=batch.reversal_reason
         )
         
+    except NACHAValidationError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "ACH batch validation failed", "errors": e.errors}
+        ) from e
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
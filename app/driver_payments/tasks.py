@@ -3,7 +3,8 @@
 """
 Celery Task Definitions for the Driver Payments Module.
 
-This file contains weekly automation tasks for DTR generation.
+This file contains weekly automation tasks for DTR generation and the
+nightly ACH payable queue reconciliation.
 """
 
 from celery import shared_task
@@ -13,6 +14,7 @@ from decimal import Decimal
 from sqlalchemy.orm import Session
 
 from app.core.db import SessionLocal
+from app.driver_payments.payable_queue import PayableQueueService
 from app.dtr.services import DTRService
 from app.leases.models import Lease
 from app.leases.schemas import LeaseStatus
@@ -140,6 +142,31 @@ def generate_weekly_dtrs_task():
         db.close()
 
 
+@shared_task(name="driver_payments.rebuild_ach_payable_queue")
+def rebuild_ach_payable_queue_task():
+    """
+    Nightly reconciliation of the ACH payable queue.
+
+    The queue is maintained incrementally on flush; this re-derives it from
+    the DTR table to pick up any rows changed outside the ORM.
+
+    Returns:
+        Dictionary with the number of queued and bank-ready DTRs.
+    """
+    logger.info("Starting ACH payable queue rebuild task")
+    db = SessionLocal()
+
+    try:
+        return PayableQueueService(db).rebuild()
+    except Exception:
+        logger.error("ACH payable queue rebuild failed", exc_info=True)
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
 __all__ = [
-    'generate_weekly_dtrs_task'
+    'generate_weekly_dtrs_task',
+    'rebuild_ach_payable_queue_task'
 ]
\ No newline at end of file
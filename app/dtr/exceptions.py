@@ -77,6 +77,16 @@ class NACHAGenerationError(ACHBatchError):
     pass
 
 
+class NACHAValidationError(NACHAGenerationError):
+    """Raised when one or more entries of a NACHA batch fail validation"""
+
+    def __init__(self, errors: list):
+        self.errors = errors
+        super().__init__(
+            f"{len(errors)} payment(s) failed NACHA validation: " + "; ".join(errors)
+        )
+
+
 class ACHBatchNotFoundError(ACHBatchError):
     """Raised when ACH batch is not found"""
     pass
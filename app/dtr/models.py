@@ -5,7 +5,7 @@ from decimal import Decimal
 from datetime import datetime
 from sqlalchemy import (
     Column, Integer, String, Numeric, Date, DateTime, 
-    ForeignKey, Enum, Boolean, JSON
+    ForeignKey, Enum, Boolean, JSON, Index
 )
 from sqlalchemy.orm import relationship
 from app.core.db import Base
@@ -131,5 +131,12 @@ class DTR(Base):
     medallion = relationship("Medallion", back_populates="dtrs")
     ach_batch = relationship("app.driver_payments.models.ACHBatch", back_populates="dtrs")
     
+    __table_args__ = (
+        # ACH eligibility: FINALIZED + ACH + not yet batched
+        Index("ix_dtrs_ach_eligibility", "status", "payment_method", "ach_batch_id"),
+        # Week browsing (current balances history, summaries): covers the lookup
+        Index("ix_dtrs_week_lease_status", "week_start_date", "lease_id", "status"),
+    )
+    
     def __repr__(self):
         return f"<DTR {self.dtr_number} - Lease {self.lease_id} - {self.status}>"
\ No newline at end of file
@@ -0,0 +1,215 @@
+# app/dtr/preview.py
+
+"""
+DTR Preview - read-only projection of a week's DTRs for the whole fleet.
+
+Runs the same calculation path as DTR generation (`DTRService.
+project_dtr_for_lease`) against live CURB and ledger data, but never
+writes, never allocates DTR/receipt numbers and does not fail on leases
+that already have a DTR for the week. The projected fleet is cached for a
+short TTL so paging through the preview does not recompute it.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.cache import ResultCache, make_cache_key
+from app.dtr.models import DTR, DTRStatus, PaymentMethod
+from app.dtr.services import DTRService
+from app.leases.models import Lease, LeaseDriver
+from app.leases.schemas import LeaseStatus
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Preview reflects live data; keep entries short-lived
+DTR_PREVIEW_TTL_SECONDS = 5 * 60
+
+preview_cache = ResultCache("dtr_preview", ttl_seconds=DTR_PREVIEW_TTL_SECONDS)
+
+
+class DTRPreviewService:
+    """Service for projecting DTRs without persisting them"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dtr_service = DTRService(db)
+
+    def preview_fleet(
+        self,
+        week_start: date,
+        week_end: date,
+        page: int = 1,
+        per_page: int = 50,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Get one page of projected DTRs for every lease billable in the week.
+
+        Args:
+            week_start: Sunday date (start of week)
+            week_end: Saturday date (end of week)
+            page: Page number (1-based)
+            per_page: Items per page
+            refresh: Recompute instead of serving the cached projection
+
+        Returns:
+            Dictionary with items, total, page, per_page, generated_at and
+            fleet totals.
+        """
+        key = make_cache_key("fleet", week_start.isoformat(), week_end.isoformat())
+
+        preview = None if refresh else preview_cache.get(key)
+        if preview is None:
+            preview = self._build_fleet_preview(week_start, week_end)
+            preview_cache.set(key, preview)
+
+        items = preview["items"]
+        offset = (page - 1) * per_page
+
+        return {
+            "items": items[offset:offset + per_page],
+            "total": len(items),
+            "page": page,
+            "per_page": per_page,
+            "generated_at": preview["generated_at"],
+            "totals": preview["totals"],
+        }
+
+    # ==========================================
+    # Internal Helpers
+    # ==========================================
+
+    def _build_fleet_preview(self, week_start: date, week_end: date) -> Dict[str, Any]:
+        """Project every lease in the week and fold fleet totals"""
+        logger.info("Building DTR fleet preview", week_start=str(week_start))
+
+        leases = self._get_billable_leases(week_start, week_end)
+        existing = self._get_existing_dtr_ids([lease.id for lease in leases], week_start)
+
+        items = [
+            self._project_lease(lease, week_start, week_end, existing.get(lease.id))
+            for lease in leases
+        ]
+
+        zero = Decimal("0.00")
+        projected = [item for item in items if item["error"] is None]
+        totals = {
+            "lease_count": len(items),
+            "error_count": len(items) - len(projected),
+            "existing_dtr_count": sum(1 for item in items if item["existing_dtr_id"]),
+            "credit_card_earnings": sum((Decimal(item["credit_card_earnings"]) for item in projected), zero),
+            "subtotal_deductions": sum((Decimal(item["subtotal_deductions"]) for item in projected), zero),
+            "total_due_to_driver": sum((Decimal(item["total_due_to_driver"]) for item in projected), zero),
+        }
+
+        logger.info(
+            "DTR fleet preview built",
+            week_start=str(week_start), leases=len(items), errors=totals["error_count"]
+        )
+        return {
+            "generated_at": datetime.now().isoformat(),
+            "items": items,
+            "totals": totals,
+        }
+
+    def _get_billable_leases(self, week_start: date, week_end: date) -> List[Lease]:
+        """Active leases plus leases that end within the week (final DTRs)"""
+        return (
+            self.db.query(Lease)
+            .options(
+                joinedload(Lease.lease_driver).joinedload(LeaseDriver.driver),
+                joinedload(Lease.medallion),
+            )
+            .filter(
+                or_(
+                    Lease.lease_status == LeaseStatus.ACTIVE,
+                    and_(
+                        Lease.lease_status.in_([LeaseStatus.TERMINATED, LeaseStatus.EXPIRED]),
+                        Lease.lease_end_date >= week_start,
+                        Lease.lease_end_date <= week_end,
+                    ),
+                )
+            )
+            .order_by(Lease.id)
+            .all()
+        )
+
+    def _get_existing_dtr_ids(self, lease_ids: List[int], week_start: date) -> Dict[int, int]:
+        if not lease_ids:
+            return {}
+        rows = (
+            self.db.query(DTR.lease_id, DTR.id)
+            .filter(
+                and_(
+                    DTR.lease_id.in_(lease_ids),
+                    DTR.week_start_date == week_start,
+                )
+            )
+            .all()
+        )
+        return {row.lease_id: row.id for row in rows}
+
+    def _project_lease(
+        self,
+        lease: Lease,
+        week_start: date,
+        week_end: date,
+        existing_dtr_id: Optional[int]
+    ) -> Dict[str, Any]:
+        """Project one lease; calculation errors are reported per row"""
+        item = {
+            "lease_id": lease.id,
+            "lease_number": lease.lease_id,
+            "medallion_number": lease.medallion.medallion_number if lease.medallion else None,
+            "week_start_date": week_start.isoformat(),
+            "week_end_date": week_end.isoformat(),
+            "existing_dtr_id": existing_dtr_id,
+            "error": None,
+        }
+
+        try:
+            projection = self.dtr_service.project_dtr_for_lease(lease, week_start, week_end)
+        except Exception as e:
+            logger.warning(f"DTR preview failed for lease {lease.id}: {str(e)}")
+            item["error"] = str(e)
+            return item
+
+        amounts = projection["amounts"]
+        driver = projection["primary_driver"]
+        force_final = projection["is_terminated"]
+
+        item.update({
+            "primary_driver_id": driver.id,
+            "driver_name": f"{driver.first_name} {driver.last_name}",
+            "week_end_date": projection["week_end"].isoformat(),
+            "credit_card_earnings": str(amounts["earnings"]),
+            "taxes_total": str(amounts["taxes"]["total"]),
+            "ezpass_tolls": str(amounts["ezpass"]),
+            "lease_amount": str(amounts["lease"]["amount"]),
+            "is_lease_prorated": amounts["lease"]["is_prorated"],
+            "pvb_violations": str(amounts["pvb"]),
+            "tlc_tickets": str(amounts["tlc"]),
+            "repairs": str(amounts["repairs"]),
+            "driver_loans": str(amounts["loans"]),
+            "misc_charges": str(amounts["misc"]),
+            "prior_balance": str(amounts["prior_balance"]),
+            "cancellation_fee": str(amounts["cancellation_fee"]) if force_final else None,
+            "subtotal_deductions": str(amounts["subtotal_deductions"]),
+            "net_earnings": str(amounts["net_earnings"]),
+            "total_due_to_driver": str(amounts["total_due_to_driver"]),
+            "projected_status": (
+                DTRStatus.FINALIZED.value if (force_final and not amounts["has_pending"])
+                else DTRStatus.DRAFT.value
+            ),
+            "pending_charge_categories": amounts["pending_categories"],
+            "is_final_dtr": force_final,
+            "payment_method": (
+                PaymentMethod.ACH.value if driver.pay_to_mode == "ACH" else PaymentMethod.CHECK.value
+            ),
+        })
+        return item
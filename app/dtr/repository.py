@@ -1,13 +1,23 @@
 # app/dtr/repository.py
 
-from datetime import date
+from datetime import date, timedelta
 from typing import List, Optional, Tuple, Dict, Any
 from decimal import Decimal
 
-from sqlalchemy import and_, or_, desc, asc, func, case
+from sqlalchemy import and_, or_, desc, asc, func
 from sqlalchemy.orm import Session, joinedload
 
+from app.driver_payments.models import ACHPayableQueue
 from app.dtr.models import DTR, DTRStatus, PaymentMethod
+from app.dtr.summary_cache import (
+    invalidate_dtr_summary,
+    is_single_week,
+    range_cache_key,
+    range_summary_cache,
+    summarize_breakdown,
+    week_cache_key,
+    week_summary_cache,
+)
 from app.drivers.models import Driver, TLCLicense
 from app.vehicles.models import Vehicle, VehicleRegistration
 from app.medallions.models import Medallion
@@ -199,17 +209,17 @@ class DTRRepository:
         return dtrs, total
     
     def get_unpaid_dtrs_for_ach(self) -> List[DTR]:
-        """Get all unpaid DTRs eligible for ACH payment"""
+        """
+        Get all unpaid DTRs eligible for ACH payment.
+
+        Reads the maintained ACH payable queue rather than re-evaluating
+        eligibility across the whole DTR table.
+        """
         return (
             self.db.query(DTR)
-            .filter(
-                and_(
-                    DTR.status == DTRStatus.FINALIZED,
-                    DTR.payment_method == PaymentMethod.ACH,
-                    DTR.ach_batch_id.is_(None),
-                    DTR.payment_date.is_(None)
-                )
-            )
+            .join(ACHPayableQueue, ACHPayableQueue.dtr_id == DTR.id)
+            .filter(ACHPayableQueue.has_bank_info.is_(True))
+            .order_by(ACHPayableQueue.week_start_date, ACHPayableQueue.id)
             .all()
         )
     
@@ -244,6 +254,8 @@ class DTRRepository:
         self.db.commit()
         self.db.refresh(dtr)
         
+        invalidate_dtr_summary([dtr.week_start_date])
+        
         return dtr
     
     def finalize_dtr(self, dtr_id: int, user_id: int) -> DTR:
@@ -265,6 +277,8 @@ class DTRRepository:
         self.db.commit()
         self.db.refresh(dtr)
         
+        invalidate_dtr_summary([dtr.week_start_date])
+        
         return dtr
     
     def get_summary_stats(
@@ -272,16 +286,36 @@ class DTRRepository:
         week_start: Optional[date] = None,
         week_end: Optional[date] = None
     ) -> Dict[str, Any]:
-        """Get summary statistics for DTRs"""
+        """
+        Get summary statistics for DTRs.
+
+        Served from the week-scoped summary cache; single-week requests read
+        that week's cached breakdown, other ranges are cached per range.
+        """
+        if is_single_week(week_start, week_end):
+            breakdown = week_summary_cache.get_or_set(
+                week_cache_key(week_start),
+                lambda: self._get_summary_breakdown(week_start, week_start + timedelta(days=6))
+            )
+        else:
+            breakdown = range_summary_cache.get_or_set(
+                range_cache_key(week_start, week_end),
+                lambda: self._get_summary_breakdown(week_start, week_end)
+            )
+
+        return summarize_breakdown(breakdown)
+
+    def _get_summary_breakdown(
+        self,
+        week_start: Optional[date] = None,
+        week_end: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """Count and total due grouped by status and payment method"""
         query = self.db.query(
-            func.count(DTR.id).label('total_count'),
-            func.sum(DTR.total_due_to_driver).label('total_amount'),
-            func.sum(
-                case((DTR.status == DTRStatus.PAID, DTR.total_due_to_driver), else_=Decimal('0.00'))
-            ).label('paid_amount'),
-            func.sum(
-                case((DTR.status != DTRStatus.PAID, DTR.total_due_to_driver), else_=Decimal('0.00'))
-            ).label('unpaid_amount')
+            DTR.status,
+            DTR.payment_method,
+            func.count(DTR.id).label('count'),
+            func.sum(DTR.total_due_to_driver).label('total_amount')
         )
         
         if week_start:
@@ -290,11 +324,14 @@ class DTRRepository:
         if week_end:
             query = query.filter(DTR.week_end_date <= week_end)
         
-        result = query.first()
-        
-        return {
-            'total_count': result.total_count or 0,
-            'total_amount': result.total_amount or Decimal('0.00'),
-            'paid_amount': result.paid_amount or Decimal('0.00'),
-            'unpaid_amount': result.unpaid_amount or Decimal('0.00')
-        }
\ No newline at end of file
+        rows = query.group_by(DTR.status, DTR.payment_method).all()
+        
+        return [
+            {
+                'status': row.status.value if row.status else None,
+                'payment_method': row.payment_method.value if row.payment_method else None,
+                'count': row.count or 0,
+                'total_amount': str(row.total_amount or Decimal('0.00'))
+            }
+            for row in rows
+        ]
@@ -11,16 +11,17 @@ import json
 import decimal
 from sqlalchemy.orm import Session
 
-from app.core.db import get_db
+from app.core.db import get_db, get_read_db
 from app.users.models import User
 from app.users.utils import get_current_user
 from app.dtr.services import DTRService
+from app.dtr.preview import DTRPreviewService
 from app.dtr.repository import DTRRepository
 from app.dtr.schemas import (
     DTRResponse, DTRListResponse, DTRListItemResponse,
     DTRGenerationRequest, BatchDTRGenerationRequest,
     CheckNumberUpdateRequest, FinalizeDTRRequest,
-    DTRSummaryResponse
+    DTRSummaryResponse, DTRPreviewResponse
 )
 from app.dtr.models import DTRStatus, PaymentMethod
 from app.dtr.pdf_service import DTRPdfService
@@ -229,6 +230,47 @@ def list_dtrs(
         raise HTTPException(status_code=500, detail="Failed to list DTRs") from e
 
 
+@router.get("/preview", response_model=DTRPreviewResponse)
+def preview_dtrs(
+    week_start: date = Query(..., description="Sunday - start of week"),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=200),
+    refresh: bool = Query(False, description="Recompute instead of using the cached preview"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Preview projected DTRs for all active leases without generating them.
+    
+    Uses the same calculation as DTR generation against live data. Nothing
+    is written; runs on the read replica when one is configured.
+    """
+    try:
+        if week_start.weekday() != 6:
+            raise ValueError("week_start must be a Sunday")
+        
+        service = DTRPreviewService(db)
+        preview = service.preview_fleet(
+            week_start=week_start,
+            week_end=week_start + timedelta(days=6),
+            page=page,
+            per_page=per_page,
+            refresh=refresh
+        )
+        
+        total = preview['total']
+        return DTRPreviewResponse(
+            **preview,
+            total_pages=math.ceil(total / per_page) if total > 0 else 0
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except Exception as e:
+        logger.error(f"Error previewing DTRs: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to preview DTRs") from e
+
+
 @router.get("/{dtr_id}", response_model=DTRResponse)
 def get_dtr(
     dtr_id: int,
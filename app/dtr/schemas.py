@@ -2,7 +2,7 @@
 
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 from pydantic import BaseModel, Field, field_validator
 
@@ -216,4 +216,55 @@ class DTRSummaryResponse(BaseModel):
     # By status breakdown
     draft_count: Optional[int] = 0
     finalized_count: Optional[int] = 0
-    paid_count: Optional[int] = 0
\ No newline at end of file
+    paid_count: Optional[int] = 0
+    
+    # Total due by payment method (ACH / CHECK)
+    by_payment_method: Optional[Dict[str, Decimal]] = None
+
+class DTRPreviewItemResponse(BaseModel):
+    """Projected (not persisted) DTR for one lease"""
+    lease_id: int
+    lease_number: Optional[str] = None
+    medallion_number: Optional[str] = None
+    primary_driver_id: Optional[int] = None
+    driver_name: Optional[str] = None
+    week_start_date: date
+    week_end_date: date
+    
+    # Projected amounts
+    credit_card_earnings: Optional[Decimal] = None
+    taxes_total: Optional[Decimal] = None
+    ezpass_tolls: Optional[Decimal] = None
+    lease_amount: Optional[Decimal] = None
+    is_lease_prorated: Optional[bool] = None
+    pvb_violations: Optional[Decimal] = None
+    tlc_tickets: Optional[Decimal] = None
+    repairs: Optional[Decimal] = None
+    driver_loans: Optional[Decimal] = None
+    misc_charges: Optional[Decimal] = None
+    prior_balance: Optional[Decimal] = None
+    cancellation_fee: Optional[Decimal] = None
+    subtotal_deductions: Optional[Decimal] = None
+    net_earnings: Optional[Decimal] = None
+    total_due_to_driver: Optional[Decimal] = None
+    
+    # Projected status
+    projected_status: Optional[DTRStatus] = None
+    pending_charge_categories: Optional[List[str]] = None
+    is_final_dtr: Optional[bool] = None
+    payment_method: Optional[PaymentMethod] = None
+    
+    # DTR already generated for this lease/week, if any
+    existing_dtr_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class DTRPreviewResponse(BaseModel):
+    """Paginated fleet DTR preview"""
+    items: List[DTRPreviewItemResponse]
+    total: int
+    page: int
+    per_page: int
+    total_pages: int
+    generated_at: datetime
+    totals: Dict[str, Decimal]
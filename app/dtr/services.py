@@ -19,6 +19,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
 
 from app.dtr.models import DTR, DTRStatus, PaymentMethod
+from app.dtr.summary_cache import invalidate_dtr_summary
 from app.leases.models import Lease, LeaseSchedule
 from app.leases.schemas import LeaseStatus
 from app.drivers.models import Driver
@@ -71,35 +72,18 @@ class DTRService:
         if existing:
             raise ValueError(f"DTR already exists for lease {lease_id} for week {week_start}")
         
-        # 3. Get all drivers on this lease
-        drivers_info = self._get_lease_drivers(lease)
-        primary_driver = drivers_info['primary']
-        additional_drivers = drivers_info['additional']
-        
-        logger.info(
-            f"Lease {lease_id}: Primary driver {primary_driver.id}, "
-            f"{len(additional_drivers)} additional drivers"
-        )
-        
-        # 4. Check for mid-week termination
-        is_terminated, termination_date, active_days = self._check_mid_week_termination(
-            lease, week_start, week_end
-        )
+        # 3-5. Drivers, mid-week termination and all charges/earnings
+        projection = self.project_dtr_for_lease(lease, week_start, week_end)
+        primary_driver = projection['primary_driver']
+        additional_drivers = projection['additional_drivers']
+        is_terminated = projection['is_terminated']
+        termination_date = projection['termination_date']
+        active_days = projection['active_days']
+        week_end = projection['week_end']
+        dtr_data = projection['amounts']
         
         if is_terminated:
-            logger.info(f"Lease {lease_id} terminated on {termination_date}, active days: {active_days}")
             force_final = True
-            week_end = termination_date
-        
-        # 5. Calculate all charges and earnings
-        dtr_data = self._calculate_dtr_amounts(
-            lease=lease,
-            primary_driver=primary_driver,
-            additional_drivers=additional_drivers,
-            week_start=week_start,
-            week_end=week_end,
-            active_days=active_days
-        )
         
         # 6. Generate DTR and receipt numbers
         dtr_number = self._generate_dtr_number()
@@ -166,10 +150,76 @@ class DTRService:
         self.db.commit()
         self.db.refresh(dtr)
         
+        invalidate_dtr_summary([dtr.week_start_date])
+        
         logger.info(f"Created DTR {dtr_number} for lease {lease_id}, status: {dtr.status}")
         
         return dtr
     
+    def project_dtr_for_lease(
+        self,
+        lease: Lease,
+        week_start: date,
+        week_end: date
+    ) -> Dict:
+        """
+        Compute a lease's DTR amounts for a week without writing anything.
+        
+        Shared by DTR generation and the fleet preview.
+        
+        Returns:
+            {
+                'primary_driver', 'additional_drivers',
+                'is_terminated', 'termination_date', 'active_days',
+                'week_end' (termination date for mid-week terminations),
+                'amounts' (see _calculate_dtr_amounts)
+            }
+            
+        Raises:
+            ValueError: If the lease has no primary driver
+        """
+        # Get all drivers on this lease
+        drivers_info = self._get_lease_drivers(lease)
+        primary_driver = drivers_info['primary']
+        additional_drivers = drivers_info['additional']
+        
+        if primary_driver is None:
+            raise ValueError(f"Lease {lease.id} has no primary driver")
+        
+        logger.info(
+            f"Lease {lease.id}: Primary driver {primary_driver.id}, "
+            f"{len(additional_drivers)} additional drivers"
+        )
+        
+        # Check for mid-week termination
+        is_terminated, termination_date, active_days = self._check_mid_week_termination(
+            lease, week_start, week_end
+        )
+        
+        if is_terminated:
+            logger.info(f"Lease {lease.id} terminated on {termination_date}, active days: {active_days}")
+            week_end = termination_date
+        
+        # Calculate all charges and earnings
+        amounts = self._calculate_dtr_amounts(
+            lease=lease,
+            primary_driver=primary_driver,
+            additional_drivers=additional_drivers,
+            week_start=week_start,
+            week_end=week_end,
+            active_days=active_days
+        )
+        
+        return {
+            'primary_driver': primary_driver,
+            'additional_drivers': additional_drivers,
+            'is_terminated': is_terminated,
+            'termination_date': termination_date,
+            'active_days': active_days,
+            'week_end': week_end,
+            'amounts': amounts
+        }
+    
     def _get_and_validate_lease(self, lease_id: int) -> Lease:
         """Get and validate lease"""
         lease = self.db.query(Lease).filter(Lease.id == lease_id).first()
@@ -330,14 +380,15 @@ class DTRService:
             cancellation_fee = self._calculate_cancellation_fee(lease, active_days)
         
         # 13. Calculate totals
-        subtotal_deductions = (
-            taxes['total'] + ezpass + lease_charge['amount'] +
-            pvb + tlc + repairs + loans + misc + cancellation_fee
+        subtotal_deductions, net_earnings, total_due_to_driver = self._calculate_totals(
+            earnings=earnings,
+            deductions=[
+                taxes['total'], ezpass, lease_charge['amount'],
+                pvb, tlc, repairs, loans, misc, cancellation_fee
+            ],
+            prior_balance=prior_balance
         )
         
-        net_earnings = earnings - subtotal_deductions - prior_balance
-        total_due_to_driver = max(net_earnings, Decimal('0.00'))
-        
         return {
             'earnings': earnings,
             'taxes': taxes,
@@ -357,6 +408,24 @@ class DTRService:
             'pending_categories': pending_categories if has_pending else None
         }
     
+    @staticmethod
+    def _calculate_totals(
+        earnings: Decimal,
+        deductions: List[Decimal],
+        prior_balance: Decimal
+    ) -> Tuple[Decimal, Decimal, Decimal]:
+        """
+        Combine earnings, deductions and prior balance.
+        
+        Returns:
+            (subtotal_deductions, net_earnings, total_due_to_driver)
+        """
+        subtotal_deductions = sum(deductions, Decimal('0.00'))
+        net_earnings = earnings - subtotal_deductions - prior_balance
+        total_due_to_driver = max(net_earnings, Decimal('0.00'))
+        
+        return subtotal_deductions, net_earnings, total_due_to_driver
+    
     def _calculate_consolidated_earnings(
         self,
         driver_ids: List[int],
@@ -529,6 +598,17 @@ class DTRService:
                 logger.warning(f"No lease schedule or preset rate for lease {lease.id}; defaulting to 0")
                 weekly_amount = Decimal('0.00')
         
+        return self._prorate_lease_charge(weekly_amount, active_days)
+    
+    @staticmethod
+    def _prorate_lease_charge(
+        weekly_amount: Decimal,
+        active_days: Optional[int] = None
+    ) -> Dict:
+        """
+        Build the lease charge from the weekly amount, pro-rating by active
+        days when the lease terminated mid-week (active_days < 7).
+        """
         # Pro-rate if terminated mid-week
         if active_days is not None and active_days < 7:
             daily_rate = (weekly_amount / Decimal('7')).quantize(Decimal('0.0001'))
@@ -756,7 +836,8 @@ class DTRService:
         
         return len(pending_categories) > 0, pending_categories if pending_categories else None
     
-    def _calculate_cancellation_fee(self, lease: Lease, active_days: int) -> Decimal:
+    @staticmethod
+    def _calculate_cancellation_fee(lease: Lease, active_days: int) -> Decimal:
         """
         Calculate cancellation fee for mid-week termination.
         
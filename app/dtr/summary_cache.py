@@ -0,0 +1,110 @@
+# app/dtr/summary_cache.py
+
+"""
+Week-scoped cache for DTR summary statistics.
+
+Each week's breakdown (DTR count and total due, grouped by status and
+payment method) is cached under its week start date. Arbitrary date-range
+summaries requested by the finance dashboard are cached in a second
+namespace. Any write that changes DTR status or amounts drops the affected
+weeks and every cached range, so dashboard polling is served from cache
+between writes.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.cache import ResultCache, make_cache_key
+from app.dtr.models import DTRStatus, PaymentMethod
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Safety TTL; entries are normally replaced on invalidation long before this
+DTR_SUMMARY_TTL_SECONDS = 15 * 60
+
+week_summary_cache = ResultCache("dtr_summary:week", ttl_seconds=DTR_SUMMARY_TTL_SECONDS)
+range_summary_cache = ResultCache("dtr_summary:range", ttl_seconds=DTR_SUMMARY_TTL_SECONDS)
+
+
+def week_cache_key(week_start: date) -> str:
+    """Cache key for a single week's breakdown"""
+    return week_start.isoformat()
+
+
+def range_cache_key(week_start: Optional[date], week_end: Optional[date]) -> str:
+    """Cache key for a date-range summary"""
+    return make_cache_key("range", week_start=week_start, week_end=week_end)
+
+
+def is_single_week(week_start: Optional[date], week_end: Optional[date]) -> bool:
+    """
+    Whether the filters select exactly one Sunday-Saturday week. A start
+    without an end selects every week from the start on, not one week.
+    """
+    return (
+        week_start is not None
+        and week_end is not None
+        and week_end == week_start + timedelta(days=6)
+    )
+
+
+def summarize_breakdown(breakdown: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Fold grouped (status, payment_method) rows into summary statistics.
+
+    Each breakdown row has: status, payment_method, count, total_amount.
+    """
+    zero = Decimal('0.00')
+    stats = {
+        'total_count': 0,
+        'total_amount': zero,
+        'paid_amount': zero,
+        'unpaid_amount': zero,
+        'draft_count': 0,
+        'finalized_count': 0,
+        'paid_count': 0,
+        'by_payment_method': {m.value: zero for m in PaymentMethod},
+    }
+
+    for row in breakdown:
+        count = int(row['count'] or 0)
+        amount = Decimal(str(row['total_amount'] or '0.00'))
+        status = row['status']
+
+        stats['total_count'] += count
+        stats['total_amount'] += amount
+
+        if status == DTRStatus.PAID.value:
+            stats['paid_amount'] += amount
+            stats['paid_count'] += count
+        else:
+            stats['unpaid_amount'] += amount
+            if status == DTRStatus.DRAFT.value:
+                stats['draft_count'] += count
+            elif status == DTRStatus.FINALIZED.value:
+                stats['finalized_count'] += count
+
+        method = row['payment_method']
+        if method:
+            stats['by_payment_method'][method] = (
+                stats['by_payment_method'].get(method, zero) + amount
+            )
+
+    return stats
+
+
+def invalidate_dtr_summary(week_starts: Iterable[Optional[date]]) -> None:
+    """
+    Drop cached summaries affected by changes to DTRs in the given weeks.
+
+    Called after DTR generation, finalization, check payment and ACH batch
+    creation/reversal have committed.
+    """
+    weeks = {w for w in week_starts if w is not None}
+    for week_start in weeks:
+        week_summary_cache.delete(week_cache_key(week_start))
+    range_summary_cache.invalidate_all()
+
+    logger.debug("Invalidated DTR summary cache", weeks=sorted(str(w) for w in weeks))
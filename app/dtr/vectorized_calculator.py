@@ -0,0 +1,699 @@
+# app/dtr/vectorized_calculator.py
+
+"""
+Vectorized DTR amount calculation over columnar week data.
+
+`WeekColumnLoader` pulls every input of the DTR calculation for all leases
+of a week with one grouped query per source (CURB, EZPass, PVB, TLC,
+repairs, loans, misc, lease schedules, prior DTRs) into a pandas frame.
+`compute_dtr_amounts` then derives lease proration, cancellation fees,
+taxes, deductions and net/total due for the whole frame at once.
+
+All money is carried as exact int64 cents (app.utils.money). Divisions
+round like the Decimal default (ROUND_HALF_EVEN) used by `DTRService`, so
+results match the per-lease path to the cent; `cross_check_with_per_lease` verifies that
+against live data.
+
+Typical use is a fleet-wide what-if recompute, e.g.:
+
+    frame = WeekColumnLoader(db).load(week_start, week_end)
+    current = compute_dtr_amounts(frame)
+    proposed = compute_dtr_amounts(frame, CancellationFeeRule(fee_cents=25000))
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session
+
+from app.dtr.models import DTR, DTRStatus
+from app.drivers.models import Driver
+from app.leases.models import Lease, LeaseDriver, LeaseSchedule
+from app.leases.schemas import LeaseStatus
+from app.utils.logger import get_logger
+from app.utils.money import round_half_even, to_cents
+
+logger = get_logger(__name__)
+
+TAX_COLUMNS = ["mta_cents", "tif_cents", "congestion_cents", "cbdt_cents", "airport_cents"]
+
+CHARGE_COLUMNS = [
+    "ezpass_cents", "pvb_cents", "tlc_cents", "repairs_cents", "loans_cents", "misc_cents",
+]
+
+# Columns expected by compute_dtr_amounts
+INPUT_COLUMNS = [
+    "lease_id",
+    "active_days",
+    "weekly_lease_cents",
+    "earnings_cents",
+    *TAX_COLUMNS,
+    *CHARGE_COLUMNS,
+    "prior_balance_cents",
+    "lease_duration_days",
+    "termination_reason",
+]
+
+
+@dataclass(frozen=True)
+class CancellationFeeRule:
+    """
+    Cancellation fee applied to mid-week terminations.
+
+    Default mirrors DTRService._calculate_cancellation_fee: $500 when the
+    lease lasted at most 4 weeks, waived for emergency terminations.
+    """
+    fee_cents: int = 50000
+    max_lease_days: int = 28
+    exempt_reasons: Tuple[str, ...] = ("EMERGENCY",)
+
+
+DEFAULT_CANCELLATION_FEE_RULE = CancellationFeeRule()
+
+
+# ==========================================
+# Calculation Kernel
+# ==========================================
+
+def compute_dtr_amounts(
+    week: pd.DataFrame,
+    fee_rule: CancellationFeeRule = DEFAULT_CANCELLATION_FEE_RULE
+) -> pd.DataFrame:
+    """
+    Compute DTR amounts for every lease in a columnar week frame.
+
+    Args:
+        week: Frame with INPUT_COLUMNS. `active_days` is NaN for a full week.
+        fee_rule: Cancellation fee rule to apply (override for what-ifs).
+
+    Returns:
+        Frame indexed like `week` with lease_id, lease_amount_cents,
+        is_lease_prorated, cancellation_fee_cents, taxes_total_cents,
+        subtotal_deductions_cents, net_earnings_cents and total_due_cents.
+    """
+    active_days = week["active_days"].to_numpy(dtype=float)
+    weekly = week["weekly_lease_cents"].to_numpy(dtype=np.int64)
+
+    # Lease charge: daily rate quantized to 0.0001, then days quantized to 0.01
+    is_prorated = ~np.isnan(active_days) & (active_days < 7)
+    days = np.where(is_prorated, active_days, 0).astype(np.int64)
+    daily_rate_units = round_half_even(weekly * 100, 7)
+    prorated = round_half_even(daily_rate_units * days, 100)
+    lease_amount = np.where(is_prorated, prorated, weekly)
+
+    # Cancellation fee on mid-week terminations
+    duration = week["lease_duration_days"].to_numpy(dtype=float)
+    reasons = week["termination_reason"].astype(object).to_numpy()
+    exempt = np.isin(reasons, list(fee_rule.exempt_reasons))
+    within_window = ~np.isnan(duration) & (duration <= fee_rule.max_lease_days)
+    cancellation_fee = np.where(
+        is_prorated & ~exempt & within_window, fee_rule.fee_cents, 0
+    ).astype(np.int64)
+
+    taxes_total = week[TAX_COLUMNS].to_numpy(dtype=np.int64).sum(axis=1)
+    charges_total = week[CHARGE_COLUMNS].to_numpy(dtype=np.int64).sum(axis=1)
+
+    subtotal_deductions = taxes_total + charges_total + lease_amount + cancellation_fee
+    net_earnings = (
+        week["earnings_cents"].to_numpy(dtype=np.int64)
+        - subtotal_deductions
+        - week["prior_balance_cents"].to_numpy(dtype=np.int64)
+    )
+    total_due = np.maximum(net_earnings, 0)
+
+    return pd.DataFrame(
+        {
+            "lease_id": week["lease_id"].to_numpy(),
+            "lease_amount_cents": lease_amount,
+            "is_lease_prorated": is_prorated,
+            "cancellation_fee_cents": cancellation_fee,
+            "taxes_total_cents": taxes_total,
+            "subtotal_deductions_cents": subtotal_deductions,
+            "net_earnings_cents": net_earnings,
+            "total_due_cents": total_due,
+        },
+        index=week.index,
+    )
+
+
+# ==========================================
+# Columnar Loader
+# ==========================================
+
+class WeekColumnLoader:
+    """
+    Loads all DTR calculation inputs for a week into one frame.
+
+    Each source is read with a single grouped query; rows are attributed to
+    leases with pandas merges, applying each lease's own cutoff (the
+    termination date for leases ending mid-week) exactly as the per-lease
+    path does.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def load(
+        self,
+        week_start: date,
+        week_end: date,
+        lease_ids: Optional[Iterable[int]] = None
+    ) -> pd.DataFrame:
+        """
+        Build the columnar frame for a week.
+
+        Args:
+            week_start: Sunday date (start of week)
+            week_end: Saturday date (end of week)
+            lease_ids: Restrict to these leases (default: all ACTIVE leases)
+        """
+        leases = self._load_leases(week_start, week_end, lease_ids)
+        if leases.empty:
+            return pd.DataFrame(columns=INPUT_COLUMNS + ["primary_driver_id", "period_end"])
+
+        drivers = self._load_lease_drivers(leases["lease_id"].tolist())
+        leases = leases.merge(
+            drivers[~drivers["is_additional_driver"]]
+            .drop_duplicates("lease_id", keep="last")[["lease_id", "driver_pk"]]
+            .rename(columns={"driver_pk": "primary_driver_id"}),
+            on="lease_id", how="left",
+        )
+
+        frame = leases[["lease_id"]].copy()
+        frame = frame.merge(self._curb_columns(leases, drivers, week_start, week_end), on="lease_id", how="left")
+        frame = frame.merge(self._ezpass_column(leases, drivers, week_end), on="lease_id", how="left")
+        frame = frame.merge(self._pvb_column(leases, drivers, week_end), on="lease_id", how="left")
+        frame = frame.merge(self._tlc_column(leases, drivers, week_end), on="lease_id", how="left")
+        frame = frame.merge(self._repairs_column(leases, week_start, week_end), on="lease_id", how="left")
+        frame = frame.merge(self._loans_column(leases, week_start, week_end), on="lease_id", how="left")
+        frame = frame.merge(self._misc_column(leases, drivers, week_start, week_end), on="lease_id", how="left")
+        frame = frame.merge(self._weekly_lease_column(leases, week_start), on="lease_id", how="left")
+        frame = frame.merge(self._prior_balance_column(leases, week_start), on="lease_id", how="left")
+
+        money_columns = ["earnings_cents", *TAX_COLUMNS, *CHARGE_COLUMNS, "weekly_lease_cents", "prior_balance_cents"]
+        frame[money_columns] = frame[money_columns].fillna(0).astype(np.int64)
+
+        frame = frame.merge(
+            leases[["lease_id", "active_days", "lease_duration_days", "termination_reason",
+                    "primary_driver_id", "period_end"]],
+            on="lease_id", how="left",
+        )
+        return frame
+
+    # ---- Leases and drivers ----
+
+    def _load_leases(
+        self,
+        week_start: date,
+        week_end: date,
+        lease_ids: Optional[Iterable[int]]
+    ) -> pd.DataFrame:
+        query = self.db.query(
+            Lease.id.label("lease_id"),
+            Lease.medallion_id,
+            Lease.vehicle_id,
+            Lease.lease_status,
+            Lease.lease_start_date,
+            Lease.lease_end_date,
+            Lease.termination_reason,
+            Lease.preset_weekly_rate,
+            Lease.overridden_weekly_rate,
+        )
+        if lease_ids is not None:
+            query = query.filter(Lease.id.in_(list(lease_ids)))
+        else:
+            query = query.filter(Lease.lease_status == LeaseStatus.ACTIVE)
+
+        leases = pd.DataFrame(query.all(), columns=[
+            "lease_id", "medallion_id", "vehicle_id", "lease_status", "lease_start_date",
+            "lease_end_date", "termination_reason", "preset_weekly_rate", "overridden_weekly_rate",
+        ])
+        if leases.empty:
+            return leases
+
+        # Mid-week termination: cutoff moves to the lease end date
+        ended = leases["lease_status"].isin([LeaseStatus.TERMINATED, LeaseStatus.EXPIRED])
+        end_dates = leases["lease_end_date"]
+        in_week = end_dates.notna() & end_dates.apply(
+            lambda d: d is not None and week_start <= d <= week_end
+        )
+        terminated = ended & in_week
+
+        leases["period_end"] = np.where(terminated, end_dates, week_end)
+        leases["active_days"] = [
+            float((d - week_start).days + 1) if t else np.nan
+            for d, t in zip(end_dates, terminated)
+        ]
+        leases["lease_duration_days"] = [
+            float((e - s).days) if (e is not None and s is not None and not pd.isna(e) and not pd.isna(s)) else np.nan
+            for s, e in zip(leases["lease_start_date"], end_dates)
+        ]
+        return leases
+
+    def _load_lease_drivers(self, lease_ids: List[int]) -> pd.DataFrame:
+        rows = (
+            self.db.query(
+                LeaseDriver.lease_id,
+                Driver.id.label("driver_pk"),
+                LeaseDriver.is_additional_driver,
+            )
+            .join(Driver, Driver.driver_id == LeaseDriver.driver_id)
+            .filter(LeaseDriver.lease_id.in_(lease_ids))
+            .order_by(LeaseDriver.lease_id, LeaseDriver.id)
+            .all()
+        )
+        drivers = pd.DataFrame(rows, columns=["lease_id", "driver_pk", "is_additional_driver"])
+        drivers["is_additional_driver"] = drivers["is_additional_driver"].fillna(False).astype(bool)
+        return drivers
+
+    # ---- Per-source columns ----
+
+    def _curb_columns(
+        self,
+        leases: pd.DataFrame,
+        drivers: pd.DataFrame,
+        week_start: date,
+        week_end: date
+    ) -> pd.DataFrame:
+        from app.curb.models import CurbTrip as Trip, PaymentType
+
+        driver_ids = drivers["driver_pk"].dropna().unique().tolist()
+        columns = ["lease_id", "earnings_cents", *TAX_COLUMNS]
+        if not driver_ids:
+            return pd.DataFrame(columns=columns)
+
+        trip_day = func.date(Trip.transaction_date)
+        rows = (
+            self.db.query(
+                Trip.driver_id,
+                trip_day.label("day"),
+                func.sum(
+                    case((Trip.payment_type == PaymentType.CREDIT_CARD, Trip.total_amount), else_=0)
+                ).label("earnings"),
+                func.sum(func.coalesce(Trip.surcharge, 0)).label("mta"),
+                func.sum(func.coalesce(Trip.improvement_surcharge, 0)).label("tif"),
+                func.sum(func.coalesce(Trip.congestion_fee, 0)).label("congestion"),
+                func.sum(func.coalesce(Trip.cbdt_fee, 0)).label("cbdt"),
+                func.sum(func.coalesce(Trip.airport_fee, 0)).label("airport"),
+            )
+            .filter(
+                and_(
+                    Trip.driver_id.in_(driver_ids),
+                    Trip.transaction_date >= datetime.combine(week_start, datetime.min.time()),
+                    Trip.transaction_date <= datetime.combine(week_end, datetime.max.time()),
+                )
+            )
+            .group_by(Trip.driver_id, trip_day)
+            .all()
+        )
+        daily = pd.DataFrame(rows, columns=["driver_pk", "day", "earnings", "mta", "tif", "congestion", "cbdt", "airport"])
+        if daily.empty:
+            return pd.DataFrame(columns=columns)
+
+        for source, target in [("earnings", "earnings_cents"), ("mta", "mta_cents"), ("tif", "tif_cents"),
+                               ("congestion", "congestion_cents"), ("cbdt", "cbdt_cents"), ("airport", "airport_cents")]:
+            daily[target] = daily[source].map(to_cents)
+
+        attributed = (
+            drivers[["lease_id", "driver_pk"]].drop_duplicates()
+            .merge(daily, on="driver_pk")
+            .merge(leases[["lease_id", "period_end"]], on="lease_id")
+        )
+        attributed = attributed[pd.to_datetime(attributed["day"]) <= pd.to_datetime(attributed["period_end"])]
+        return attributed.groupby("lease_id", as_index=False)[columns[1:]].sum()
+
+    def _ezpass_column(self, leases: pd.DataFrame, drivers: pd.DataFrame, week_end: date) -> pd.DataFrame:
+        from app.ezpass.models import EZPassTransaction as Txn, EZPassTransactionStatus
+
+        rows = self._outstanding_rows(
+            Txn, Txn.amount, Txn.transaction_datetime,
+            asset_column=Txn.medallion_id,
+            asset_ids=leases["medallion_id"].dropna().unique().tolist(),
+            driver_ids=drivers["driver_pk"].dropna().unique().tolist(),
+            extra_filter=Txn.status != EZPassTransactionStatus.POSTED_TO_LEDGER,
+            cutoff=datetime.combine(week_end, datetime.max.time()),
+        )
+        return self._attribute_outstanding(rows, leases, drivers, "medallion_id", "ezpass_cents")
+
+    def _pvb_column(self, leases: pd.DataFrame, drivers: pd.DataFrame, week_end: date) -> pd.DataFrame:
+        from app.pvb.models import PVBViolation, PVBViolationStatus
+
+        rows = self._outstanding_rows(
+            PVBViolation, PVBViolation.amount_due, PVBViolation.issue_date,
+            asset_column=PVBViolation.vehicle_id,
+            asset_ids=leases["vehicle_id"].dropna().unique().tolist(),
+            driver_ids=drivers["driver_pk"].dropna().unique().tolist(),
+            extra_filter=PVBViolation.status != PVBViolationStatus.POSTED_TO_LEDGER,
+            cutoff=week_end,
+        )
+        return self._attribute_outstanding(rows, leases, drivers, "vehicle_id", "pvb_cents")
+
+    def _tlc_column(self, leases: pd.DataFrame, drivers: pd.DataFrame, week_end: date) -> pd.DataFrame:
+        from app.tlc.models import TLCViolation, TLCViolationStatus
+
+        rows = self._outstanding_rows(
+            TLCViolation, TLCViolation.total_payable, TLCViolation.issue_date,
+            asset_column=None,
+            asset_ids=[],
+            driver_ids=drivers["driver_pk"].dropna().unique().tolist(),
+            extra_filter=TLCViolation.status != TLCViolationStatus.REVERSED,
+            cutoff=week_end,
+        )
+        return self._attribute_outstanding(rows, leases, drivers, None, "tlc_cents")
+
+    def _repairs_column(self, leases: pd.DataFrame, week_start: date, week_end: date) -> pd.DataFrame:
+        from app.repairs.models import RepairInstallment, RepairInvoice, RepairInstallmentStatus
+
+        vehicle_ids = leases["vehicle_id"].dropna().unique().tolist()
+        if not vehicle_ids:
+            return pd.DataFrame(columns=["lease_id", "repairs_cents"])
+
+        rows = (
+            self.db.query(
+                RepairInvoice.vehicle_id,
+                RepairInstallment.week_start_date,
+                func.sum(RepairInstallment.principal_amount),
+            )
+            .join(RepairInvoice, RepairInstallment.invoice_id == RepairInvoice.id)
+            .filter(
+                and_(
+                    RepairInvoice.vehicle_id.in_(vehicle_ids),
+                    RepairInstallment.week_start_date >= week_start,
+                    RepairInstallment.week_start_date <= week_end,
+                    RepairInstallment.status != RepairInstallmentStatus.PAID,
+                )
+            )
+            .group_by(RepairInvoice.vehicle_id, RepairInstallment.week_start_date)
+            .all()
+        )
+        return self._attribute_dated(
+            pd.DataFrame(rows, columns=["vehicle_id", "day", "amount"]),
+            leases, "vehicle_id", "repairs_cents",
+        )
+
+    def _loans_column(self, leases: pd.DataFrame, week_start: date, week_end: date) -> pd.DataFrame:
+        from app.loans.models import LoanInstallment, DriverLoan, LoanInstallmentStatus
+
+        driver_ids = leases["primary_driver_id"].dropna().unique().tolist()
+        if not driver_ids:
+            return pd.DataFrame(columns=["lease_id", "loans_cents"])
+
+        rows = (
+            self.db.query(
+                DriverLoan.driver_id,
+                LoanInstallment.week_start_date,
+                func.sum(LoanInstallment.total_due),
+            )
+            .join(DriverLoan, LoanInstallment.loan_id == DriverLoan.id)
+            .filter(
+                and_(
+                    DriverLoan.driver_id.in_(driver_ids),
+                    LoanInstallment.week_start_date >= week_start,
+                    LoanInstallment.week_start_date <= week_end,
+                    LoanInstallment.status != LoanInstallmentStatus.PAID,
+                )
+            )
+            .group_by(DriverLoan.driver_id, LoanInstallment.week_start_date)
+            .all()
+        )
+        return self._attribute_dated(
+            pd.DataFrame(rows, columns=["primary_driver_id", "day", "amount"]),
+            leases, "primary_driver_id", "loans_cents",
+        )
+
+    def _misc_column(
+        self,
+        leases: pd.DataFrame,
+        drivers: pd.DataFrame,
+        week_start: date,
+        week_end: date
+    ) -> pd.DataFrame:
+        from app.misc_expenses.models import (
+            MiscellaneousExpense as MiscExpense, MiscellaneousExpenseStatus
+        )
+
+        lease_ids = leases["lease_id"].tolist()
+        driver_ids = drivers["driver_pk"].dropna().unique().tolist()
+        rows = (
+            self.db.query(
+                MiscExpense.id, MiscExpense.lease_id, MiscExpense.driver_id,
+                MiscExpense.expense_date, MiscExpense.amount,
+            )
+            .filter(
+                and_(
+                    or_(
+                        MiscExpense.lease_id.in_(lease_ids),
+                        MiscExpense.driver_id.in_(driver_ids or [-1]),
+                    ),
+                    MiscExpense.expense_date >= week_start,
+                    MiscExpense.expense_date <= week_end,
+                    MiscExpense.status == MiscellaneousExpenseStatus.OPEN,
+                )
+            )
+            .all()
+        )
+        items = pd.DataFrame(rows, columns=["id", "item_lease_id", "driver_pk", "day", "amount"])
+        if items.empty:
+            return pd.DataFrame(columns=["lease_id", "misc_cents"])
+
+        by_lease = items.dropna(subset=["item_lease_id"]).assign(lease_id=lambda df: df["item_lease_id"].astype(int))
+        by_driver = drivers[["lease_id", "driver_pk"]].drop_duplicates().merge(
+            items.dropna(subset=["driver_pk"]), on="driver_pk"
+        )
+        matched = pd.concat([by_lease, by_driver], ignore_index=True).drop_duplicates(["lease_id", "id"])
+        matched = matched[matched["lease_id"].isin(lease_ids)].merge(leases[["lease_id", "period_end"]], on="lease_id")
+        matched = matched[pd.to_datetime(matched["day"]) <= pd.to_datetime(matched["period_end"])]
+        matched["misc_cents"] = matched["amount"].map(to_cents)
+        return matched.groupby("lease_id", as_index=False)["misc_cents"].sum()
+
+    def _weekly_lease_column(self, leases: pd.DataFrame, week_start: date) -> pd.DataFrame:
+        schedules = pd.DataFrame(
+            self.db.query(
+                LeaseSchedule.id,
+                LeaseSchedule.lease_id,
+                LeaseSchedule.period_start_date,
+                LeaseSchedule.period_end_date,
+                LeaseSchedule.installment_amount,
+            )
+            .filter(
+                and_(
+                    LeaseSchedule.lease_id.in_(leases["lease_id"].tolist()),
+                    LeaseSchedule.period_start_date <= week_start,
+                )
+            )
+            .order_by(LeaseSchedule.id)
+            .all(),
+            columns=["id", "lease_id", "period_start_date", "period_end_date", "installment_amount"],
+        )
+
+        weekly = leases[["lease_id", "period_end", "preset_weekly_rate", "overridden_weekly_rate"]].copy()
+        if not schedules.empty:
+            schedules = schedules.merge(leases[["lease_id", "period_end"]], on="lease_id")
+            schedules = schedules[
+                pd.to_datetime(schedules["period_end_date"]) >= pd.to_datetime(schedules["period_end"])
+            ].drop_duplicates("lease_id", keep="first")
+            weekly = weekly.merge(schedules[["lease_id", "installment_amount"]], on="lease_id", how="left")
+        else:
+            weekly["installment_amount"] = np.nan
+
+        def _weekly_amount(row) -> int:
+            # Fallback order: schedule -> overridden_weekly_rate -> preset_weekly_rate -> 0
+            if not pd.isna(row["installment_amount"]):
+                return to_cents(row["installment_amount"])
+            for rate in (row["overridden_weekly_rate"], row["preset_weekly_rate"]):
+                if rate is not None and not pd.isna(rate) and rate:
+                    return to_cents(rate)
+            return 0
+
+        weekly["weekly_lease_cents"] = weekly.apply(_weekly_amount, axis=1)
+        return weekly[["lease_id", "weekly_lease_cents"]]
+
+    def _prior_balance_column(self, leases: pd.DataFrame, week_start: date) -> pd.DataFrame:
+        latest = (
+            self.db.query(
+                DTR.lease_id.label("lease_id"),
+                func.max(DTR.week_start_date).label("week_start_date"),
+            )
+            .filter(
+                and_(
+                    DTR.lease_id.in_(leases["lease_id"].tolist()),
+                    DTR.week_start_date < week_start,
+                )
+            )
+            .group_by(DTR.lease_id)
+            .subquery()
+        )
+        rows = (
+            self.db.query(DTR.lease_id, DTR.status, DTR.total_due_to_driver)
+            .join(
+                latest,
+                and_(
+                    DTR.lease_id == latest.c.lease_id,
+                    DTR.week_start_date == latest.c.week_start_date,
+                ),
+            )
+            .all()
+        )
+        prior = pd.DataFrame(rows, columns=["lease_id", "status", "total_due"])
+        if prior.empty:
+            return pd.DataFrame(columns=["lease_id", "prior_balance_cents"])
+
+        prior = prior.drop_duplicates("lease_id", keep="last")
+        prior["prior_balance_cents"] = [
+            0 if status == DTRStatus.PAID else to_cents(total)
+            for status, total in zip(prior["status"], prior["total_due"])
+        ]
+        return prior[["lease_id", "prior_balance_cents"]]
+
+    # ---- Attribution helpers ----
+
+    def _outstanding_rows(
+        self,
+        model,
+        amount_column,
+        date_column,
+        asset_column,
+        asset_ids: List[int],
+        driver_ids: List[int],
+        extra_filter,
+        cutoff,
+    ) -> pd.DataFrame:
+        """Fetch outstanding items matching any lease asset or driver"""
+        matches = []
+        if asset_column is not None and asset_ids:
+            matches.append(asset_column.in_(asset_ids))
+        if driver_ids:
+            matches.append(model.driver_id.in_(driver_ids))
+        if not matches:
+            return pd.DataFrame(columns=["id", "asset_id", "driver_pk", "day", "amount"])
+
+        asset_select = asset_column if asset_column is not None else model.id.is_(None)
+        rows = (
+            self.db.query(model.id, asset_select, model.driver_id, date_column, amount_column)
+            .filter(and_(or_(*matches), date_column <= cutoff, extra_filter))
+            .all()
+        )
+        return pd.DataFrame(rows, columns=["id", "asset_id", "driver_pk", "day", "amount"])
+
+    def _attribute_outstanding(
+        self,
+        items: pd.DataFrame,
+        leases: pd.DataFrame,
+        drivers: pd.DataFrame,
+        asset_key: Optional[str],
+        target: str
+    ) -> pd.DataFrame:
+        """
+        Attribute items matching a lease's asset OR any of its drivers,
+        counting each item once per lease and honouring the lease cutoff.
+        """
+        if items.empty:
+            return pd.DataFrame(columns=["lease_id", target])
+
+        parts = []
+        if asset_key is not None:
+            parts.append(
+                leases[["lease_id", asset_key]].dropna(subset=[asset_key])
+                .rename(columns={asset_key: "asset_id"})
+                .merge(items.dropna(subset=["asset_id"]), on="asset_id")
+            )
+        parts.append(
+            drivers[["lease_id", "driver_pk"]].drop_duplicates()
+            .merge(items.dropna(subset=["driver_pk"]), on="driver_pk")
+        )
+
+        matched = pd.concat(parts, ignore_index=True).drop_duplicates(["lease_id", "id"])
+        matched = matched.merge(leases[["lease_id", "period_end"]], on="lease_id")
+
+        item_day = pd.to_datetime(matched["day"]).dt.normalize()
+        matched = matched[item_day <= pd.to_datetime(matched["period_end"])]
+
+        matched[target] = matched["amount"].map(to_cents)
+        return matched.groupby("lease_id", as_index=False)[target].sum()
+
+    def _attribute_dated(
+        self,
+        grouped: pd.DataFrame,
+        leases: pd.DataFrame,
+        key: str,
+        target: str
+    ) -> pd.DataFrame:
+        """Attribute (key, day, amount) sums to leases up to each lease cutoff"""
+        if grouped.empty:
+            return pd.DataFrame(columns=["lease_id", target])
+
+        matched = leases[["lease_id", key, "period_end"]].dropna(subset=[key]).merge(grouped, on=key)
+        matched = matched[pd.to_datetime(matched["day"]) <= pd.to_datetime(matched["period_end"])]
+        matched[target] = matched["amount"].map(to_cents)
+        return matched.groupby("lease_id", as_index=False)[target].sum()
+
+
+# ==========================================
+# Cross-check Harness
+# ==========================================
+
+def cross_check_with_per_lease(
+    db: Session,
+    week_start: date,
+    week_end: date,
+    lease_ids: Optional[Iterable[int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Compare the vectorized result with DTRService._calculate_dtr_amounts for
+    each lease of a week.
+
+    Returns:
+        One dict per mismatching lease with both values per field; an empty
+        list means the two paths agree to the cent.
+    """
+    from app.dtr.services import DTRService
+
+    frame = WeekColumnLoader(db).load(week_start, week_end, lease_ids)
+    vectorized = compute_dtr_amounts(frame).set_index("lease_id")
+    service = DTRService(db)
+    mismatches = []
+
+    for lease_id in vectorized.index:
+        lease = service._get_and_validate_lease(int(lease_id))
+        drivers_info = service._get_lease_drivers(lease)
+        if drivers_info["primary"] is None:
+            continue
+
+        is_terminated, termination_date, active_days = service._check_mid_week_termination(
+            lease, week_start, week_end
+        )
+        expected = service._calculate_dtr_amounts(
+            lease=lease,
+            primary_driver=drivers_info["primary"],
+            additional_drivers=drivers_info["additional"],
+            week_start=week_start,
+            week_end=termination_date if is_terminated else week_end,
+            active_days=active_days,
+        )
+        expected_cents = {
+            "lease_amount_cents": to_cents(expected["lease"]["amount"]),
+            "cancellation_fee_cents": to_cents(expected["cancellation_fee"]),
+            "taxes_total_cents": to_cents(expected["taxes"]["total"]),
+            "subtotal_deductions_cents": to_cents(expected["subtotal_deductions"]),
+            "net_earnings_cents": to_cents(expected["net_earnings"]),
+            "total_due_cents": to_cents(expected["total_due_to_driver"]),
+        }
+
+        row = vectorized.loc[lease_id]
+        diffs = {
+            field: {"per_lease": value, "vectorized": int(row[field])}
+            for field, value in expected_cents.items()
+            if int(row[field]) != value
+        }
+        if diffs:
+            mismatches.append({"lease_id": int(lease_id), "fields": diffs})
+
+    logger.info(
+        "Vectorized DTR cross-check completed",
+        week_start=str(week_start), leases=len(vectorized), mismatches=len(mismatches)
+    )
+    return mismatches
@@ -7,6 +7,7 @@ from typing import Any, Dict
 
 from aiohttp import ClientResponseError
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
@@ -39,8 +40,9 @@ SUPPORTED_EVENTS = {
 }
 
 
-# Default no-op handlers
-async def default_handler(db: Session, ctx: dict, payload: dict):
+# Default no-op handlers. Handlers use the synchronous session, so they are
+# plain functions and the webhook runs them in the threadpool.
+def default_handler(db: Session, ctx: dict, payload: dict):
     logger.info("[default] %s: %s", ctx.get("event"), ctx)
 
 
@@ -96,7 +98,7 @@ async def send_for_signature(
             created_by=current_user.id,
         )
         db.add(new_envelope)
-        db.commit()
+        await run_in_threadpool(db.commit)
 
         return EnvelopeCreateResponse(**response)
     except HTTPException as e:
@@ -185,17 +187,17 @@ async def docusign_webhooks(
             {"status": "no-handler", "module": module, "event": event}, status_code=202
         )
 
-    # Call handler (supports async or sync)
+    # Call handler (supports async or sync; sync handlers run off the event loop)
     if inspect.iscoroutinefunction(handler):
         await handler(db, ctx, payload)
     else:
-        handler(db, ctx, payload)
+        await run_in_threadpool(handler, db, ctx, payload)
 
     return {"status": "ok"}
 
 
 @router.get("/envelope/{envelope_id}/status")
-async def get_envelope_status(envelope_id: str, db: Session = Depends(get_db)):
+def get_envelope_status(envelope_id: str, db: Session = Depends(get_db)):
     """Manually check the status of an envelope being tracked by the system."""
     envelope = (
         db.query(ESignEnvelope).filter(ESignEnvelope.envelope_id == envelope_id).first()
@@ -30,4 +30,9 @@ class LedgerPostingError(EZPassError):
 class ImportInProgressError(EZPassError):
     """Raised when an attempt is made to start a new import while one is already running."""
     def __init__(self):
-        super().__init__("An EZPass import is already in progress. Please wait for it to complete.")
\ No newline at end of file
+        super().__init__("An EZPass import is already in progress. Please wait for it to complete.")
+
+class ImportLockUnavailableError(EZPassError):
+    """Raised when the import lock cannot be checked, so an import cannot safely start."""
+    def __init__(self):
+        super().__init__("EZPass imports are temporarily unavailable. Please try again shortly.")
@@ -9,6 +9,7 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
@@ -17,6 +18,7 @@ from sqlalchemy import (
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db import Base
+from app.curb.models import AssociationFailureCode
 from app.users.models import AuditMixin
 
 
@@ -105,6 +107,12 @@ class EZPassTransaction(Base, AuditMixin):
         Enum(EZPassTransactionStatus), default=EZPassTransactionStatus.IMPORTED, index=True
     )
     failure_reason: Mapped[Optional[str]] = mapped_column(Text, comment="Stores the reason for an association or posting failure.")
+    failure_code: Mapped[Optional[AssociationFailureCode]] = mapped_column(
+        Enum(AssociationFailureCode), nullable=True, comment="Why the last association attempt failed."
+    )
+    association_checked_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True, comment="Database time of the last association attempt."
+    )
     posting_date: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), comment="The date the transaction was posted to the ledger.")
 
     # --- Mapped Foreign Keys ---
@@ -120,6 +128,11 @@ class EZPassTransaction(Base, AuditMixin):
     medallion: Mapped[Optional["Medallion"]] = relationship()
     lease: Mapped[Optional["Lease"]] = relationship()
 
+    __table_args__ = (
+        # Re-association worklist: failed records by blocking condition and vehicle
+        Index("ix_ezpass_transactions_status_failure_vehicle", "status", "failure_code", "vehicle_id"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -134,6 +147,7 @@ class EZPassTransaction(Base, AuditMixin):
             "med_from_csv": self.med_from_csv,
             "status": self.status.value,
             "failure_reason": self.failure_reason,
+            "failure_code": self.failure_code.value if self.failure_code else None,
             "posting_date": self.posting_date.isoformat() if self.posting_date else None,
             "driver_id": self.driver_id,
             "vehicle_id": self.vehicle_id,
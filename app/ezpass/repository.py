@@ -1,10 +1,12 @@
 ### app/ezpass/repository.py
 
 from datetime import date, datetime , time
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import update , or_ , func, asc, desc
+from sqlalchemy import and_, exists, update , or_ , func, asc, desc
 from sqlalchemy.orm import Session, joinedload
+from app.curb.models import AssociationFailureCode, CurbTrip
+from app.current_balances.balance_grid import mark_leases_changed
 from app.drivers.models import Driver
 from app.ezpass.models import (
     EZPassImport,
@@ -13,7 +15,9 @@ from app.ezpass.models import (
     EZPassTransactionStatus,
 )
 from app.medallions.models import Medallion
-from app.vehicles.models import Vehicle
+from app.vehicles.models import Vehicle, VehiclePlateHistory
+from app.vehicles.plate_index import normalize_plate, split_tag_or_plate
+from app.utils.csv_import import insert_chunk
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -38,69 +42,78 @@ class EZPassRepository:
         self.db.flush()  # Flush to get the ID for the transactions
         return import_record
 
+    def get_import_record(self, import_id: int) -> Optional[EZPassImport]:
+        """Fetches a single import record by its ID."""
+        return self.db.query(EZPassImport).filter(EZPassImport.id == import_id).first()
+
     def update_import_record_status(
-        self, import_id: int, status: EZPassImportStatus, successful: int, failed: int
+        self,
+        import_id: int,
+        status: EZPassImportStatus,
+        successful: int,
+        failed: int,
+        total_records: Optional[int] = None,
     ):
-        """Updates the status and counts of an import record upon completion."""
+        """
+        Updates the status and counts of an import record. Called after each
+        chunk of a streaming import (status PROCESSING) and upon completion.
+        """
+        values = {
+            "status": status,
+            "successful_records": successful,
+            "failed_records": failed,
+            "updated_on": datetime.utcnow(),
+        }
+        if total_records is not None:
+            values["total_records"] = total_records
+
         stmt = (
             update(EZPassImport)
             .where(EZPassImport.id == import_id)
-            .values(
-                status=status,
-                successful_records=successful,
-                failed_records=failed,
-                updated_on=datetime.utcnow(),
-            )
+            .values(**values)
         )
         self.db.execute(stmt)
 
-    def bulk_insert_transactions(self, transactions_data: List[dict]):
+    def insert_transaction_chunk(
+        self, transactions_data: List[dict]
+    ) -> Tuple[List[str], List[Tuple[dict, str]]]:
         """
-        Performs a bulk insert of new EZPassTransaction records with individual error handling.
-        Returns the number of successfully inserted transactions.
+        Inserts a chunk of new EZPassTransaction records with a single bulk
+        INSERT, skipping transaction IDs that already exist or repeat within
+        the chunk. If the database rejects the chunk, its rows are inserted
+        one by one and only the bad rows are lost.
+
+        Returns:
+            The skipped transaction IDs, and (transaction data, error) for
+            rows the database rejected.
         """
         if not transactions_data:
-            return 0
-        
-        successful_count = 0
-        
-        # Process each transaction individually to handle constraint violations
+            return [], []
+
+        incoming_ids = {t["transaction_id"] for t in transactions_data}
+        existing_ids = {
+            row[0] for row in self.db.query(EZPassTransaction.transaction_id)
+            .filter(EZPassTransaction.transaction_id.in_(incoming_ids))
+        }
+
+        new_transactions = []
+        skipped = []
+        seen = set(existing_ids)
         for transaction_data in transactions_data:
-            try:
-                # Use a savepoint for each transaction
-                savepoint = self.db.begin_nested()
-                
-                # Check if transaction already exists
-                existing = self.db.query(EZPassTransaction).filter(
-                    EZPassTransaction.transaction_id == transaction_data['transaction_id']
-                ).first()
-                
-                if existing:
-                    savepoint.rollback()
-                    logger.debug(f"Skipping duplicate transaction: {transaction_data['transaction_id']}")
-                    continue
-                
-                # Create new transaction
-                new_transaction = EZPassTransaction(**transaction_data)
-                self.db.add(new_transaction)
-                
-                # Flush to trigger any constraint violations
-                self.db.flush()
-                
-                # Commit the savepoint if successful
-                savepoint.commit()
-                successful_count += 1
-                
-            except Exception as e:
-                # Rollback only this savepoint, not the entire session
-                savepoint.rollback()
-                logger.debug(f"Failed to insert transaction {transaction_data.get('transaction_id', 'unknown')}: {e}")
-                # Don't re-raise - let the caller handle the error tracking
+            transaction_id = transaction_data["transaction_id"]
+            if transaction_id in seen:
+                skipped.append(transaction_id)
                 continue
-        
-        logger.info(f"Successfully inserted {successful_count} out of {len(transactions_data)} transactions.")
-        return successful_count
+            seen.add(transaction_id)
+            new_transactions.append(transaction_data)
 
+        failed = insert_chunk(self.db, EZPassTransaction, new_transactions)
+
+        logger.debug(
+            f"Inserted {len(new_transactions) - len(failed)} EZPass transactions, "
+            f"skipped {len(skipped)} duplicates, {len(failed)} rejected."
+        )
+        return skipped, failed
 
     def get_transactions_by_status(
         self, status: EZPassTransactionStatus
@@ -112,8 +125,72 @@ class EZPassRepository:
             .all()
         )
 
+    def get_association_worklist(self) -> List[EZPassTransaction]:
+        """
+        Retrieves the failed transactions whose blocking condition may have changed
+        since their last association attempt:
+        - failures recorded before failure codes existed (no code or check time),
+        - NO_PLATE_MATCH where the plate has since been registered or moved,
+        - NO_TRIP_IN_WINDOW / TRIP_WITHOUT_DRIVER where CURB trips have since
+          been mapped to the transaction's vehicle.
+        """
+        failed = EZPassTransaction.status == EZPassTransactionStatus.ASSOCIATION_FAILED
+        trip_mapped_since = exists().where(
+            CurbTrip.vehicle_id == EZPassTransaction.vehicle_id,
+            CurbTrip.updated_on >= EZPassTransaction.association_checked_at,
+        )
+        ids = {
+            row.id for row in self.db.query(EZPassTransaction.id).filter(
+                failed,
+                or_(
+                    EZPassTransaction.failure_code.is_(None),
+                    EZPassTransaction.association_checked_at.is_(None),
+                    and_(
+                        EZPassTransaction.failure_code.in_([
+                            AssociationFailureCode.NO_TRIP_IN_WINDOW,
+                            AssociationFailureCode.TRIP_WITHOUT_DRIVER,
+                        ]),
+                        trip_mapped_since,
+                    ),
+                ),
+            )
+        }
+
+        no_plate = and_(failed, EZPassTransaction.failure_code == AssociationFailureCode.NO_PLATE_MATCH)
+        oldest_check = self.db.query(func.min(EZPassTransaction.association_checked_at)).filter(no_plate).scalar()
+        if oldest_check is not None:
+            registered = dict(
+                self.db.query(VehiclePlateHistory.plate_key, func.max(VehiclePlateHistory.recorded_at))
+                .filter(VehiclePlateHistory.recorded_at >= oldest_check)
+                .group_by(VehiclePlateHistory.plate_key)
+                .all()
+            )
+            if registered:
+                rows = self.db.query(
+                    EZPassTransaction.id, EZPassTransaction.tag_or_plate, EZPassTransaction.association_checked_at
+                ).filter(no_plate).all()
+                for row in rows:
+                    recorded_at = registered.get(normalize_plate(split_tag_or_plate(row.tag_or_plate)[1]))
+                    if recorded_at and _naive(recorded_at) >= _naive(row.association_checked_at):
+                        ids.add(row.id)
+
+        if not ids:
+            return []
+        return self.db.query(EZPassTransaction).filter(EZPassTransaction.id.in_(ids)).all()
+
+    def _mark_balance_grid_leases(self, ids: List[int], new_values: List[dict]) -> None:
+        """Reports the current and new leases of rows about to be updated to the balance grid."""
+        lease_ids = {values["lease_id"] for values in new_values if "lease_id" in values}
+        if ids:
+            lease_ids.update(
+                lease_id for (lease_id,) in
+                self.db.query(EZPassTransaction.lease_id).filter(EZPassTransaction.id.in_(ids))
+            )
+        mark_leases_changed(self.db, lease_ids)
+
     def update_transaction(self, transaction_id: int, updates: dict):
         """Updates specific fields of a single transaction record."""
+        self._mark_balance_grid_leases([transaction_id], [updates])
         updates["updated_on"] = datetime.utcnow()
         stmt = (
             update(EZPassTransaction)
@@ -122,6 +199,31 @@ class EZPassRepository:
         )
         self.db.execute(stmt)
 
+    def bulk_update_transactions(self, updates: List[dict]):
+        """
+        Updates many transactions in one executemany UPDATE by primary key.
+        Each dict must contain "id" plus the fields to change.
+        """
+        if not updates:
+            return
+        self._mark_balance_grid_leases([values["id"] for values in updates], updates)
+        now = datetime.utcnow()
+        self.db.execute(
+            update(EZPassTransaction),
+            [{**values, "updated_on": now} for values in updates],
+        )
+
+    def update_transactions_by_ids(self, transaction_ids: List[int], values: dict):
+        """Sets the same field values on many transactions in one UPDATE."""
+        if not transaction_ids:
+            return
+        self._mark_balance_grid_leases(transaction_ids, [values])
+        self.db.execute(
+            update(EZPassTransaction)
+            .where(EZPassTransaction.id.in_(transaction_ids))
+            .values(**values, updated_on=datetime.utcnow())
+        )
+
     def list_transactions(
         self,
         page: int,
@@ -265,6 +367,17 @@ class EZPassRepository:
 
         return query.all(), total_items
     
+    def get_transactions_by_ids(self, transaction_ids: List[int]) -> Dict[int, EZPassTransaction]:
+        """Retrieves many transactions by internal ID in one query, keyed by ID."""
+        if not transaction_ids:
+            return {}
+        transactions = (
+            self.db.query(EZPassTransaction)
+            .filter(EZPassTransaction.id.in_(set(transaction_ids)))
+            .all()
+        )
+        return {transaction.id: transaction for transaction in transactions}
+
     def get_transaction_by_id(self, transaction_id: int) -> Optional[EZPassTransaction]:
         """Retrieves a single EZPass transaction by its internal ID."""
         return (
@@ -362,4 +475,9 @@ class EZPassRepository:
             ]
             total_items = len(import_logs)  # Recalculate total after filtering
         
-        return import_logs, total_items
\ No newline at end of file
+        return import_logs, total_items
+
+
+def _naive(value: datetime) -> datetime:
+    """Compare database timestamps on the same wall clock"""
+    return value.replace(tzinfo=None) if value.tzinfo else value
@@ -2,16 +2,16 @@
 
 import math
 from datetime import date , time
-from io import BytesIO
 from typing import Optional
 
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from fastapi import status as fast_status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
-from app.ezpass.exceptions import EZPassError
+from app.ezpass.exceptions import EZPassError, ImportLockUnavailableError
 from app.ezpass.models import EZPassImportStatus
 from app.ezpass.schemas import (
     EZPassTransactionResponse,
@@ -43,18 +43,21 @@ async def upload_ezpass_csv(
     current_user: User = Depends(get_current_user),
 ):
     """
-    Accepts a CSV file of EZPass transactions, performs initial validation and parsing,
-    stores the raw data, and triggers a background task for processing and association.
+    Accepts a CSV file of EZPass transactions, stages it and queues a background
+    job that parses, stores and associates the transactions. Responds immediately
+    with the import ID; poll `/imports/{import_id}` for progress.
     """
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="Invalid file type. Please upload a CSV file.")
 
     try:
-        file_stream = BytesIO(await file.read())
-        result = ezpass_service.process_uploaded_csv(
-            file_stream, file.filename, current_user.id
+        result = await run_in_threadpool(
+            ezpass_service.queue_csv_import,
+            file.file, file.filename, current_user.id
         )
         return JSONResponse(content=result, status_code=fast_status.HTTP_202_ACCEPTED)
+    except ImportLockUnavailableError as e:
+        raise HTTPException(status_code=fast_status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)) from e
     except EZPassError as e:
         logger.warning("Business logic error during EZPass CSV upload: %s", e)
         raise HTTPException(status_code=fast_status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -62,6 +65,23 @@ async def upload_ezpass_csv(
         logger.error("Error processing EZPass CSV: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="An unexpected error occurred during file processing.")
 
+@router.get("/imports/{import_id}", summary="Get EZPass Import Status")
+def get_ezpass_import_status(
+    import_id: int,
+    ezpass_service: EZPassService = Depends(get_ezpass_service),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Returns the status and running counts of a queued or running CSV import.
+    """
+    try:
+        return ezpass_service.get_import_status(import_id)
+    except EZPassError as e:
+        raise HTTPException(status_code=fast_status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+    except Exception as e:
+        logger.error("Error fetching EZPass import status: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail="An unexpected error occurred while fetching import status.") from e
+
 @router.get("", response_model=PaginatedEZPassTransactionResponse, summary="List EZPass Transactions")
 def list_ezpass_transactions(
     use_stubs: bool = Query(False, description="Return stubbed data for testing."),
@@ -366,13 +386,14 @@ def retry_association_with_batm(
     automatic association logic (plate → vehicle → CURB trip → driver/lease).
     
     **Use Cases:**
-    - Retry all ASSOCIATION_FAILED transactions (send empty request)
+    - Retry failed transactions that could now match (send empty request)
     - Retry specific transactions that failed (provide transaction_ids)
     - Re-run association after CURB data updates
     
     **Request Body:**
     - transaction_ids: Optional list of transaction IDs to retry
-    - If null/empty: Retries ALL transactions with ASSOCIATION_FAILED status
+    - If null/empty: Retries ASSOCIATION_FAILED transactions whose plate was
+      registered or whose vehicle had CURB trips mapped since the last attempt
     
     **Association Logic:**
     1. Extract plate number from tag_or_plate field
@@ -1,38 +1,77 @@
 ### app/ezpass/services.py
 
-import csv
-import io
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-from typing import List, Optional
+from collections import defaultdict
+from itertools import chain
+from typing import BinaryIO, Dict, List, Optional, Tuple
 
+import numpy as np
 from celery import shared_task
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
+from app.core.cache import DistributedLock, LockUnavailableError
 from app.core.db import SessionLocal
-from app.curb.models import CurbTrip
+from app.curb.trip_association import AssociationRequest, TripAssociationEngine
 from app.ezpass.exceptions import (
-    AssociationError,
     CSVParseError,
     EZPassError,
     ImportInProgressError,
+    ImportLockUnavailableError,
     LedgerPostingError,
 )
 from app.ezpass.models import (
     EZPassImportStatus,
+    EZPassTransaction,
     EZPassTransactionStatus,
 )
 from app.ezpass.repository import EZPassRepository
 from app.ledger.models import PostingCategory
-from app.ledger.services import LedgerService
+from app.ledger.repository import LedgerRepository
+from app.ledger.services import LedgerService, ObligationRequest
+from app.utils.csv_columnar import (
+    RowErrors, datetime_values, parse_cents, parse_datetimes, rows_to_cells, text_values,
+)
+from app.utils.csv_import import DateFormatCache, iter_csv_chunks, open_csv_reader
+from app.utils.import_staging import discard_staged_upload, open_staged_upload, stage_upload
 from app.utils.logger import get_logger
-from app.vehicles.models import VehicleRegistration
+from app.utils.money import cents_to_decimals
+from app.vehicles.plate_index import split_tag_or_plate
 
 logger = get_logger(__name__)
 
-# A simple in-memory flag to prevent concurrent imports. For a multi-worker setup,
-# a distributed lock (e.g., using Redis) would be more robust.
-IMPORT_IN_PROGRESS_FLAG = False
+# Tolerance around the toll time when looking for the CURB trip on the vehicle
+ASSOCIATION_TIME_WINDOW = timedelta(minutes=30)
+
+# Upper bound on how long a queued or running import holds the import lock;
+# the job releases it when done, the TTL only matters if a worker dies
+IMPORT_LOCK_TTL_SECONDS = 2 * 60 * 60
+
+# Prevents concurrent imports across all API and worker processes
+import_lock = DistributedLock("ezpass_csv_import", ttl_seconds=IMPORT_LOCK_TTL_SECONDS)
+
+# Rows parsed and inserted per bulk statement / progress update
+IMPORT_CHUNK_SIZE = 1000
+
+# Per-row failure details returned to the caller; the count is always exact
+MAX_FAILED_ROW_DETAILS = 500
+
+TRANSACTION_DATETIME_FORMATS = [
+    "%m/%d/%Y %I:%M:%S %p",  # 10/28/2025 11:29:22 AM
+    "%m/%d/%Y %I:%M %p",     # 10/28/2025 11:29 AM
+    "%Y-%m-%d %H:%M:%S",     # 2025-10-28 11:29:22
+    "%Y-%m-%d %H:%M",        # 2025-10-28 11:29
+    "%m/%d/%Y %H:%M:%S",     # 10/28/2025 23:29:22
+    "%m/%d/%Y %H:%M",        # 10/28/2025 23:29
+]
+
+POSTING_DATE_FORMATS = [
+    "%m/%d/%Y",  # 10/28/2025
+    "%Y-%m-%d",  # 2025-10-28
+    "%m-%d-%Y",  # 10-28-2025
+    "%d/%m/%Y",  # 28/10/2025
+]
 
 # Available log types for filtering
 AVAILABLE_LOG_TYPES = [
@@ -102,31 +141,114 @@ class EZPassService:
         
         return field_indices
 
-    def process_uploaded_csv(self, file_stream: io.BytesIO, file_name: str, user_id: int):
+    def queue_csv_import(self, file_obj: BinaryIO, file_name: str, user_id: int) -> dict:
         """
-        Main entry point for processing a new CSV file. It validates, parses,
-        and saves the raw transaction data, then triggers the background association task.
+        Stages an uploaded CSV and enqueues process_ezpass_csv_import_task for it.
+
+        Takes the import lock so that only one EZPass import is queued or
+        running at a time across all workers; the job releases it when done.
+        Returns immediately with the PENDING import record.
         """
-        global IMPORT_IN_PROGRESS_FLAG
-        if IMPORT_IN_PROGRESS_FLAG:
+        try:
+            lock_token = import_lock.acquire()
+        except LockUnavailableError as e:
+            logger.error(f"Cannot queue import of {file_name}: {e}")
+            raise ImportLockUnavailableError() from e
+        if lock_token is None:
             raise ImportInProgressError()
 
-        IMPORT_IN_PROGRESS_FLAG = True
+        location = None
+        import_record = None
+        try:
+            location = stage_upload(file_obj, "ezpass", file_name)
+            import_record = self.repo.create_import_record(file_name, 0)
+            self.repo.update_import_record_status(import_record.id, EZPassImportStatus.PENDING, 0, 0)
+            self.db.commit()
+
+            process_ezpass_csv_import_task.delay(
+                import_record.id, location, file_name, user_id, lock_token
+            )
+        except Exception as e:
+            logger.error(f"Failed to queue EZPass import for {file_name}: {e}", exc_info=True)
+            self.db.rollback()
+            if import_record is not None:
+                self.repo.update_import_record_status(import_record.id, EZPassImportStatus.FAILED, 0, 0)
+                self.db.commit()
+            if location:
+                discard_staged_upload(location)
+            import_lock.release(lock_token)
+            raise EZPassError(f"Could not queue CSV file for import: {e}") from e
+
+        logger.info(f"Queued EZPass import {import_record.id} for file: {file_name}")
+        return {
+            "message": "File uploaded and queued for import.",
+            "import_id": import_record.id,
+            "status": EZPassImportStatus.PENDING.value,
+        }
+
+    def get_import_status(self, import_id: int) -> dict:
+        """Returns the status and running counts of one import record"""
+        import_record = self.repo.get_import_record(import_id)
+        if not import_record:
+            raise EZPassError(f"EZPass import {import_id} not found.")
+
+        status = import_record.to_dict()
+        status["processed_records"] = (
+            (import_record.successful_records or 0) + (import_record.failed_records or 0)
+        )
+        status["is_finished"] = import_record.status in (
+            EZPassImportStatus.COMPLETED, EZPassImportStatus.FAILED
+        )
+        return status
+
+    def process_uploaded_csv(
+        self,
+        file_stream: BinaryIO,
+        file_name: str,
+        user_id: int,
+        import_id: Optional[int] = None,
+    ):
+        """
+        Processes a CSV file. It is read and parsed in chunks of IMPORT_CHUNK_SIZE
+        rows; each chunk is inserted with one bulk statement and the import
+        record's counts are committed as it goes, so memory stays bounded and
+        progress is visible while it runs.
+
+        Runs inside process_ezpass_csv_import_task, which holds the import lock.
+        import_id is the PENDING record created by queue_csv_import; a new
+        record is created when it is omitted.
+        """
+        import_record = None
+        total_rows = 0
+        total_inserted = 0
+        total_failed = 0
         try:
             logger.info(f"Starting EZPass CSV import for file: {file_name}")
-            
-            # Read and decode the file stream
+
+            if import_id is not None:
+                import_record = self.repo.get_import_record(import_id)
+                if not import_record:
+                    raise EZPassError(f"EZPass import {import_id} not found.")
+            else:
+                import_record = self.repo.create_import_record(file_name, 0)
+            self.repo.update_import_record_status(import_record.id, EZPassImportStatus.PROCESSING, 0, 0)
+            self.db.commit()
+
+            # Read the header and the first chunk up front so an empty or
+            # undecodable file fails before any rows are processed
             try:
-                content = file_stream.read().decode("utf-8")
-                csv_reader = csv.reader(io.StringIO(content))
+                csv_reader = open_csv_reader(file_stream, "utf-8")
                 header = next(csv_reader)
-                rows = list(csv_reader)
+                chunks = iter_csv_chunks(csv_reader, IMPORT_CHUNK_SIZE)
+                first_chunk = next(chunks, None)
             except Exception as e:
                 raise CSVParseError(f"Failed to read or decode CSV content: {e}")
 
-            if not rows:
+            if not first_chunk:
                 logger.warning(f"EZPass CSV file '{file_name}' is empty or has no data rows.")
-                return {"message": "File is empty, no transactions were imported."}
+                self.repo.update_import_record_status(import_record.id, EZPassImportStatus.COMPLETED, 0, 0)
+                self.db.commit()
+                return {"message": "File is empty, no transactions were imported.", "import_id": import_record.id}
 
             # Map column names to indices dynamically
             column_indices = self._map_csv_columns(header)
@@ -141,148 +263,73 @@ class EZPassService:
                 raise CSVParseError(f"Missing required columns: {missing_fields}. "
                                   f"Available columns: {header}")
 
-            import_record = self.repo.create_import_record(file_name, len(rows))
-            self.db.flush() # Ensure import_record has an ID
-
-            transactions_to_insert = []
+            # One cache per file: the winning format is tried first on every row
+            datetime_formats = DateFormatCache(TRANSACTION_DATETIME_FORMATS)
+            posting_date_formats = DateFormatCache(POSTING_DATE_FORMATS)
             failed_rows = []
 
-            for i, row in enumerate(rows):
-                try:
-                    # Validate row has enough columns
-                    max_index = max(column_indices.values())
-                    if len(row) <= max_index:
-                        raise ValueError(f"Row has {len(row)} columns but needs at least {max_index + 1}")
-                    
-                    logger.debug("Row information ******** ", row=row)
-                    
-                    # Extract data using dynamic column mapping
-                    transaction_id = row[column_indices['transaction_id']].strip()
-                    tag_or_plate = row[column_indices['tag_or_plate']].strip()
-                    agency = row[column_indices['agency']].strip()
-                    entry_plaza = row[column_indices['entry_plaza']].strip()
-                    exit_plaza = row[column_indices['exit_plaza']].strip()
-                    ezpass_class = row[column_indices['ezpass_class']].strip()
-                    date_str = row[column_indices['date']].strip()
-                    time_str = row[column_indices['time']].strip()
-                    amount_str = row[column_indices['amount']].strip()
-                    
-                    if exit_plaza.upper() == "CRZ":
-                        continue
-                    
-                    # Process amount (handle parentheses for negative values, remove $ signs)
-                    amount_str = amount_str.replace("(", "-").replace(")", "").replace("$", "")
-                    
-                    # Process datetime - combine date and time
-                    transaction_datetime_str = f"{date_str} {time_str}"
-                    # Try parsing with different formats
-                    transaction_datetime = None
-                    datetime_formats = [
-                        "%m/%d/%Y %I:%M:%S %p",  # 10/28/2025 11:29:22 AM
-                        "%m/%d/%Y %I:%M %p",     # 10/28/2025 11:29 AM
-                        "%Y-%m-%d %H:%M:%S",     # 2025-10-28 11:29:22
-                        "%Y-%m-%d %H:%M",       # 2025-10-28 11:29
-                        "%m/%d/%Y %H:%M:%S",     # 10/28/2025 23:29:22
-                        "%m/%d/%Y %H:%M"         # 10/28/2025 23:29
-                    ]
-                    
-                    for fmt in datetime_formats:
-                        try:
-                            transaction_datetime = datetime.strptime(transaction_datetime_str, fmt)
-                            break
-                        except ValueError:
-                            continue
-                    
-                    if transaction_datetime is None:
-                        raise ValueError(f"Unable to parse datetime '{transaction_datetime_str}' with any known format")
-
-                    # Get medallion if present (optional field)
-                    medallion = None
-                    if 'medallion' in column_indices and len(row) > column_indices['medallion']:
-                        medallion = row[column_indices['medallion']].strip() or None
-
-                    # Get posting date if present (optional field)
-                    posting_date = None
-                    if 'posted_date' in column_indices and len(row) > column_indices['posted_date']:
-                        posted_date_str = row[column_indices['posted_date']].strip()
-                        if posted_date_str:
-                            # Try to parse posting date (usually just date, no time)
-                            posting_date_formats = [
-                                "%m/%d/%Y",      # 10/28/2025
-                                "%Y-%m-%d",      # 2025-10-28
-                                "%m-%d-%Y",      # 10-28-2025
-                                "%d/%m/%Y",      # 28/10/2025
-                            ]
-                            
-                            for fmt in posting_date_formats:
-                                try:
-                                    posting_date = datetime.strptime(posted_date_str, fmt)
-                                    break
-                                except ValueError:
-                                    continue
-
-                    transaction_data = {
+            for chunk in chain([first_chunk], chunks):
+                total_rows += len(chunk)
+                transactions_to_insert = []
+                row_numbers = {}
+
+                parsed_rows, row_errors = self._parse_csv_chunk(
+                    chunk, column_indices, datetime_formats, posting_date_formats
+                )
+                for row_number, error in row_errors:
+                    logger.warning(f"Skipping malformed row {row_number} in {file_name}: {error}")
+                    total_failed += 1
+                    if len(failed_rows) < MAX_FAILED_ROW_DETAILS:
+                        failed_rows.append({"row_number": row_number, "error": error})
+
+                for row_number, transaction_data in parsed_rows:
+                    transaction_data.update({
                         "import_id": import_record.id,
-                        "transaction_id": transaction_id,
-                        "tag_or_plate": tag_or_plate,
-                        "agency": agency,
-                        "entry_plaza": entry_plaza,
-                        "exit_plaza": exit_plaza,
-                        "ezpass_class": ezpass_class,
-                        "transaction_datetime": transaction_datetime,
-                        "amount": Decimal(amount_str),
-                        "med_from_csv": medallion,
-                        "posting_date": posting_date,
                         "created_by": user_id,
                         "status": EZPassTransactionStatus.IMPORTED,
-                    }
+                    })
                     transactions_to_insert.append(transaction_data)
-                except (ValueError, IndexError, KeyError) as e:
-                    logger.warning(f"Skipping malformed row {i+2} in {file_name}: {e}. Row data: {row}")
-                    failed_rows.append({"row_number": i + 2, "error": str(e)})
-
-            # Process transactions with individual error handling
-            total_inserted = 0
-            total_failed = len(failed_rows)  # Start with parsing failures
-            
-            # Process all transactions at once - the repository now handles individual failures
-            try:
-                successful_inserts = self.repo.bulk_insert_transactions(transactions_to_insert)
-                total_inserted = successful_inserts
-                
-                # Calculate failed insertions
-                total_failed += (len(transactions_to_insert) - successful_inserts)
-                
-                # If some transactions failed during insertion, we need to identify which ones
-                if successful_inserts < len(transactions_to_insert):
-                    logger.warning(f"Some transactions failed during insertion: {len(transactions_to_insert) - successful_inserts} failed")
-                    
-                    # Add generic failure records for the difference
-                    # (The specific errors are already logged in the repository)
-                    failed_during_insert = len(transactions_to_insert) - successful_inserts
-                    for i in range(failed_during_insert):
-                        failed_rows.append({
-                            "row_number": "unknown",
-                            "transaction_id": "unknown", 
-                            "error": "Database constraint violation or duplicate transaction"
-                        })
-                
-            except Exception as e:
-                # This should be rare now that repository handles individual failures
-                logger.error(f"Unexpected error during bulk insert: {e}")
-                total_failed += len(transactions_to_insert)
-                for i, transaction_data in enumerate(transactions_to_insert):
+                    row_numbers.setdefault(transaction_data["transaction_id"], row_number)
+
+                skipped, rejected = self.repo.insert_transaction_chunk(transactions_to_insert)
+                total_inserted += len(transactions_to_insert) - len(skipped) - len(rejected)
+                total_failed += len(skipped) + len(rejected)
+                failures = chain(
+                    ((transaction_id, "Duplicate transaction") for transaction_id in skipped),
+                    (
+                        (transaction_data["transaction_id"], f"Database error: {error}")
+                        for transaction_data, error in rejected
+                    ),
+                )
+                for transaction_id, error in failures:
+                    if len(failed_rows) >= MAX_FAILED_ROW_DETAILS:
+                        break
                     failed_rows.append({
-                        "row_number": i + 2,  # +2 for header and 1-based indexing
-                        "transaction_id": transaction_data.get('transaction_id', 'unknown'),
-                        "error": f"Bulk insert failed: {str(e)}"
+                        "row_number": row_numbers.get(transaction_id, "unknown"),
+                        "transaction_id": transaction_id,
+                        "error": error,
                     })
 
+                self.repo.update_import_record_status(
+                    import_id=import_record.id,
+                    status=EZPassImportStatus.PROCESSING,
+                    successful=total_inserted,
+                    failed=total_failed,
+                    total_records=total_rows,
+                )
+                self.db.commit()
+                logger.info(
+                    "EZPass import progress",
+                    import_id=import_record.id, rows=total_rows,
+                    imported=total_inserted, failed=total_failed
+                )
+
             self.repo.update_import_record_status(
                 import_id=import_record.id,
                 status=EZPassImportStatus.COMPLETED if total_inserted > 0 else EZPassImportStatus.FAILED,
                 successful=total_inserted,
                 failed=total_failed,
+                total_records=total_rows,
             )
             self.db.commit()
 
@@ -295,7 +342,7 @@ class EZPassService:
             return {
                 "message": f"File processed: {total_inserted} imported, {total_failed} failed.",
                 "import_id": import_record.id,
-                "total_rows": len(rows),
+                "total_rows": total_rows,
                 "imported_records": total_inserted,
                 "failed_rows": total_failed,
                 "failed_details": failed_rows,
@@ -305,21 +352,22 @@ class EZPassService:
 
         except Exception as e:
             logger.error(f"Fatal error during CSV processing for {file_name}: {e}", exc_info=True)
+            self.db.rollback()
             
-            # Try to update import record with failure status
+            # Try to update import record with failure status; chunks committed
+            # before the error stay imported and keep their counts
             try:
-                if 'import_record' in locals() and import_record and import_record.id:
-                    total_attempted = len(transactions_to_insert) if 'transactions_to_insert' in locals() else len(rows) if 'rows' in locals() else 0
+                if import_record is not None:
                     # Create a new session for the failure update to avoid session state issues
-                    from app.core.db import SessionLocal
                     failure_db = SessionLocal()
                     try:
                         failure_repo = EZPassRepository(failure_db)
                         failure_repo.update_import_record_status(
                             import_record.id, 
                             EZPassImportStatus.FAILED, 
-                            0,  # successful = 0 
-                            total_attempted  # all rows failed
+                            total_inserted,
+                            max(total_rows - total_inserted, total_failed),
+                            total_records=total_rows,
                         )
                         failure_db.commit()
                         logger.info(f"Updated import record {import_record.id} with failure status using new session")
@@ -329,12 +377,90 @@ class EZPassService:
                 logger.error(f"Failed to update import record status: {update_error}")
             
             # Re-raise the original error with context
-            if isinstance(e, (CSVParseError, ImportInProgressError)):
+            if isinstance(e, EZPassError):
                 raise  # Re-raise known exceptions as-is
             else:
                 raise EZPassError(f"Could not process CSV file: {e}") from e
-        finally:
-            IMPORT_IN_PROGRESS_FLAG = False
+
+    @staticmethod
+    def _parse_csv_chunk(
+        chunk: List[Tuple[int, list]],
+        column_indices: dict,
+        datetime_formats: DateFormatCache,
+        posting_date_formats: DateFormatCache,
+    ) -> Tuple[List[Tuple[int, dict]], List[Tuple[int, str]]]:
+        """
+        Validates and converts a whole chunk of CSV rows into transaction
+        column values with pandas/NumPy.
+
+        Returns:
+            (row_number, transaction values) for rows to insert, and
+            (row_number, error) for malformed rows. CRZ rows are in neither.
+        """
+        max_index = max(column_indices.values())
+        row_numbers, cells, widths = rows_to_cells(chunk, max_index + 1)
+        errors = RowErrors(row_numbers)
+        errors.add(
+            widths <= max_index,
+            lambda i: f"Row has {widths[i]} columns but needs at least {max_index + 1}",
+        )
+
+        def column(field: str) -> np.ndarray:
+            return cells[:, column_indices[field]]
+
+        exit_plaza = column('exit_plaza')
+        is_crz = (np.char.upper(exit_plaza) == "CRZ") & ~errors.failed
+
+        # Combine date and time, then parse with the file's winning format
+        datetime_str = np.char.add(np.char.add(column('date'), " "), column('time'))
+        candidates = ~errors.failed & ~is_crz
+        transaction_datetime = parse_datetimes(np.where(candidates, datetime_str, ""), datetime_formats)
+        errors.add(
+            candidates & transaction_datetime.isna(),
+            lambda i: f"Unable to parse datetime '{datetime_str[i]}' with any known format",
+        )
+
+        # Handle parentheses for negative values, remove $ signs
+        amount_str = np.char.replace(
+            np.char.replace(np.char.replace(column('amount'), "(", "-"), ")", ""), "$", ""
+        )
+        amount_cents, invalid_amount = parse_cents(amount_str)
+        errors.add(~is_crz & invalid_amount, lambda i: f"Invalid amount '{amount_str[i]}'")
+
+        keep = ~errors.failed & ~is_crz
+        count = int(keep.sum())
+
+        if 'medallion' in column_indices:
+            medallion = text_values(column('medallion')[keep])
+        else:
+            medallion = [None] * count
+
+        # Posting date is optional; values that do not parse are left empty
+        if 'posted_date' in column_indices:
+            posting_date = datetime_values(
+                parse_datetimes(column('posted_date')[keep], posting_date_formats)
+            )
+        else:
+            posting_date = [None] * count
+
+        fields = {
+            "transaction_id": column('transaction_id')[keep].tolist(),
+            "tag_or_plate": column('tag_or_plate')[keep].tolist(),
+            "agency": column('agency')[keep].tolist(),
+            "entry_plaza": column('entry_plaza')[keep].tolist(),
+            "exit_plaza": exit_plaza[keep].tolist(),
+            "ezpass_class": column('ezpass_class')[keep].tolist(),
+            "transaction_datetime": datetime_values(transaction_datetime[keep]),
+            "amount": cents_to_decimals(amount_cents[keep]),
+            "med_from_csv": medallion,
+            "posting_date": posting_date,
+        }
+        names = list(fields)
+        parsed = [
+            (row_number, dict(zip(names, row_values)))
+            for row_number, row_values in zip(row_numbers[keep].tolist(), zip(*fields.values()))
+        ]
+        return parsed, list(errors.items())
 
     def associate_transactions(self):
         """
@@ -348,65 +474,7 @@ class EZPassService:
             logger.info("No imported EZPass transactions to associate.")
             return {"processed": 0, "successful": 0, "failed": 0}
 
-        successful_count = 0
-        failed_count = 0
-
-        for trans in transactions_to_process:
-            updates = {"status": EZPassTransactionStatus.ASSOCIATION_FAILED}
-            try:
-                # 1. Find the vehicle using the plate number
-                plate_number_full = trans.tag_or_plate
-                plate_number = plate_number_full.split(' ')[1] if ' ' in plate_number_full else plate_number_full
-                
-                vehicle_reg = self.db.query(VehicleRegistration).filter(
-                    VehicleRegistration.plate_number.ilike(f"%{plate_number}%")
-                ).first()
-
-                if not vehicle_reg or not vehicle_reg.vehicle:
-                    raise AssociationError(trans.transaction_id, f"No vehicle found for plate '{plate_number}'")
-                
-                vehicle = vehicle_reg.vehicle
-                updates["vehicle_id"] = vehicle.id
-
-                # 2. Find the corresponding CURB trip to identify the driver
-                # Look for a trip within a time window around the toll time
-                time_buffer = timedelta(minutes=30)
-                trip_start = trans.transaction_datetime - time_buffer
-                trip_end = trans.transaction_datetime + time_buffer
-
-                curb_trip = self.db.query(CurbTrip).filter(
-                    CurbTrip.vehicle_id == vehicle.id,
-                    CurbTrip.start_time <= trip_end,
-                    CurbTrip.end_time >= trip_start
-                ).order_by(CurbTrip.start_time.desc()).first()
-                
-                if not curb_trip or not curb_trip.driver_id:
-                    curb_trip = self.db.query(CurbTrip).filter(
-                        CurbTrip.vehicle_id == vehicle.id
-                    ).order_by(CurbTrip.start_time.desc()).first()
-
-                if not curb_trip or not curb_trip.driver_id:
-                    raise AssociationError(trans.transaction_id, f"No active CURB trip found for vehicle {vehicle.id} around {trans.transaction_datetime}")
-                
-                updates["driver_id"] = curb_trip.driver_id
-                updates["lease_id"] = curb_trip.lease_id
-                updates["medallion_id"] = curb_trip.medallion_id
-                updates["status"] = EZPassTransactionStatus.ASSOCIATED
-                updates["failure_reason"] = None
-                successful_count += 1
-                
-            except AssociationError as e:
-                updates["failure_reason"] = e.reason
-                failed_count += 1
-                logger.warning(f"Association failed for transaction {trans.transaction_id}: {e.reason}")
-
-            except Exception as e:
-                updates["failure_reason"] = f"An unexpected error occurred: {str(e)}"
-                failed_count += 1
-                logger.error(f"Unexpected error associating transaction {trans.transaction_id}: {e}", exc_info=True)
-
-            finally:
-                self.repo.update_transaction(trans.id, updates)
+        successful_count, failed_count = self._associate_batch(transactions_to_process)
         
         self.db.commit()
         logger.info(f"Association task finished. Processed: {len(transactions_to_process)}, Successful: {successful_count}, Failed: {failed_count}")
@@ -416,10 +484,70 @@ class EZPassService:
 
         return {"processed": len(transactions_to_process), "successful": successful_count, "failed": failed_count}
 
+    def _associate_batch(self, transactions: list, fallback_to_latest_trip: bool = True) -> tuple:
+        """
+        Match transactions to CURB trips with the batch engine and write the
+        outcomes with bulk updates. Returns (successful_count, failed_count).
+
+        The initial pass falls back to the vehicle's latest trip when no trip
+        covers the toll; retries pass `fallback_to_latest_trip=False` and
+        only accept a trip around the toll time.
+
+        Failures record a failure code and the database time taken before the
+        lookups ran; the retry worklist compares plate and trip changes
+        against that time (see EZPassRepository.get_association_worklist).
+        """
+        checked_at = self.db.scalar(select(func.now()))
+        engine = TripAssociationEngine(
+            self.db, ASSOCIATION_TIME_WINDOW, fallback_to_latest_trip=fallback_to_latest_trip
+        )
+        requests = []
+        for trans in transactions:
+            state, plate = split_tag_or_plate(trans.tag_or_plate)
+            requests.append(AssociationRequest(
+                key=trans.id,
+                plate=plate,
+                occurred_at=trans.transaction_datetime,
+                state=state,
+            ))
+        results = engine.associate(requests)
+
+        updates = []
+        successful_count = 0
+        for trans in transactions:
+            result = results[trans.id]
+            values = {
+                "id": trans.id,
+                "failure_reason": result.failure_reason,
+                "failure_code": result.failure_code,
+                "association_checked_at": checked_at,
+            }
+            if result.vehicle_id:
+                values["vehicle_id"] = result.vehicle_id
+
+            if result.is_associated:
+                values.update({
+                    "status": EZPassTransactionStatus.ASSOCIATED,
+                    "driver_id": result.driver_id,
+                    "lease_id": result.lease_id,
+                    "medallion_id": result.medallion_id,
+                })
+                successful_count += 1
+            else:
+                values["status"] = EZPassTransactionStatus.ASSOCIATION_FAILED
+                logger.warning(f"Association failed for transaction {trans.transaction_id}: {result.failure_reason}")
+            updates.append(values)
+
+        self.repo.bulk_update_transactions(updates)
+        return successful_count, len(transactions) - successful_count
+
     def post_tolls_to_ledger(self, ledger_service: LedgerService):
         """
         Posts successfully associated EZPass tolls as obligations to the Centralized Ledger.
         This is designed to be run as a background task.
+
+        All obligations are written in one batch (see LedgerService.create_obligations)
+        and the transactions' outcomes with one UPDATE per status and reason.
         """
         logger.info("Starting task to post EZPass tolls to ledger.")
         transactions_to_post = self.repo.get_transactions_by_status(EZPassTransactionStatus.ASSOCIATED)
@@ -428,40 +556,28 @@ class EZPassService:
             logger.info("No associated EZPass transactions to post to ledger.")
             return {"posted": 0, "failed": 0}
 
-        posted_count = 0
-        failed_count = 0
-
+        failures = {}
+        postable = []
         for trans in transactions_to_post:
-            updates = {"status": EZPassTransactionStatus.POSTING_FAILED}
-            try:
-                if not all([trans.driver_id, trans.lease_id, trans.amount > 0]):
-                    raise LedgerPostingError(trans.transaction_id, "Missing required driver, lease, or positive amount.")
-
-                # The create_obligation method is atomic and handles both posting and balance creation
-                ledger_service.create_obligation(
-                    category=PostingCategory.EZPASS,
-                    amount=trans.amount,
-                    reference_id=trans.transaction_id,
-                    driver_id=trans.driver_id,
-                    lease_id=trans.lease_id,
-                    vehicle_id=trans.vehicle_id,
-                    medallion_id=trans.medallion_id,
-                )
-                
-                updates["status"] = EZPassTransactionStatus.POSTED_TO_LEDGER
-                updates["failure_reason"] = None
-                updates["posting_date"] = datetime.utcnow()
-                posted_count += 1
+            if not all([trans.driver_id, trans.lease_id, trans.amount > 0]):
+                error = LedgerPostingError(trans.transaction_id, "Missing required driver, lease, or positive amount.")
+                failures[trans.id] = f"Ledger service error: {error}"
+            else:
+                postable.append(trans)
 
-            except Exception as e:
-                updates["failure_reason"] = f"Ledger service error: {str(e)}"
-                failed_count += 1
-                logger.error(f"Failed to post EZPass transaction {trans.transaction_id} to ledger: {e}", exc_info=True)
-            
-            finally:
-                self.repo.update_transaction(trans.id, updates)
+        result = ledger_service.create_obligations(
+            self._toll_obligation(trans, trans.amount) for trans in postable
+        )
+        for trans in postable:
+            if trans.id in result.failed:
+                error = LedgerPostingError(trans.transaction_id, result.failed[trans.id])
+                failures[trans.id] = f"Ledger service error: {error}"
+                logger.error(f"Failed to post EZPass transaction {trans.transaction_id} to ledger: {error}")
 
+        self._write_posting_outcomes(list(result.posted), failures, datetime.utcnow())
         self.db.commit()
+
+        posted_count, failed_count = len(result.posted), len(failures)
         logger.info(f"Ledger posting task finished. Posted: {posted_count}, Failed: {failed_count}")
         return {"posted": posted_count, "failed": failed_count}
     
@@ -470,98 +586,79 @@ class EZPassService:
         Manually post EZPass transactions to the centralized ledger.
         Used to force posting of ASSOCIATED transactions.
         """
-        from app.ledger.services import LedgerService
-        from app.ledger.repository import LedgerRepository
-
         logger.info("Manual posting of transactions to ledger", transactions_count=len(transaction_ids))
 
-        ledger_repo = LedgerRepository(self.db)
-        ledger_service = LedgerService(ledger_repo)
-        success_count = 0
-        failed_count = 0
+        ledger_service = LedgerService(LedgerRepository(self.db))
         errors = []
 
-        for txn_id in transaction_ids:
-            try:
-                transaction = self.repo.get_transaction_by_id(txn_id)
-                if not transaction:
-                    errors.append({
-                        "transaction_id": txn_id,
-                        "error": "Transaction not found"
-                    })
-                    failed_count += 1
-                    continue
-
-                # Validate transaction can be posted
-                if transaction.status == EZPassTransactionStatus.POSTED_TO_LEDGER:
-                    errors.append({
-                        "transaction_id": txn_id,
-                        "error": "Already posted to ledger"
-                    })
-                    failed_count += 1
-                    continue
-
-                if transaction.status != EZPassTransactionStatus.ASSOCIATED:
-                    errors.append({
-                        "transaction_id": txn_id,
-                        "error": f"Cannot post - transaction status is {transaction.status.value}"
-                    })
-                    failed_count += 1
-                    continue
-
-                if not all([transaction.driver_id, transaction.lease_id, transaction.amount != 0]):
-                    errors.append({
-                        "transaction_id": txn_id,
-                        "error": "Missing required fields (driver_id, lease_id, or valid amount)"
-                    })
-                    failed_count += 1
-                    continue
-
-                # Post to ledger
-                logger.info("Posting transaction to ledger", amount=transaction.amount)
-                ledger_service.create_obligation(
-                    category=PostingCategory.EZPASS,
-                    amount=transaction.amount if transaction.amount > 0 else transaction.amount * -1,
-                    reference_id=transaction.transaction_id,
-                    driver_id=transaction.driver_id,
-                    lease_id=transaction.lease_id,
-                    vehicle_id=transaction.vehicle_id,
-                    medallion_id=transaction.medallion_id,
-                )
-
-                # Update transaction status
-                updates = {
-                    "status": EZPassTransactionStatus.POSTED_TO_LEDGER,
-                    "failure_reason": None,
-                    "posting_date": datetime.now(timezone.utc)
-                }
-                self.repo.update_transaction(transaction.id, updates)
-                success_count += 1
-                logger.info("Transaction posted to ledger", transaction_id=transaction.transaction_id)
+        transactions = self.repo.get_transactions_by_ids(transaction_ids)
+        postable = []
+        for txn_id in dict.fromkeys(transaction_ids):
+            transaction = transactions.get(txn_id)
+            if not transaction:
+                error = "Transaction not found"
+            elif transaction.status == EZPassTransactionStatus.POSTED_TO_LEDGER:
+                error = "Already posted to ledger"
+            elif transaction.status != EZPassTransactionStatus.ASSOCIATED:
+                error = f"Cannot post - transaction status is {transaction.status.value}"
+            elif not all([transaction.driver_id, transaction.lease_id, transaction.amount != 0]):
+                error = "Missing required fields (driver_id, lease_id, or valid amount)"
+            else:
+                postable.append(transaction)
+                continue
+            errors.append({"transaction_id": txn_id, "error": error})
 
-            except Exception as e:
-                # Update transaction with error
-                if transaction:
-                    self.repo.update_transaction(transaction.id, {
-                        "status": EZPassTransactionStatus.POSTING_FAILED,
-                        "failure_reason": f"Manual posting error: {str(e)}"
-                    })
+        result = ledger_service.create_obligations(
+            self._toll_obligation(transaction, abs(transaction.amount)) for transaction in postable
+        )
 
-                errors.append({
-                    "transaction_id": txn_id,
-                    "error": str(e)
-                })
-                failed_count += 1
-                logger.error(f"Failed to post transaction {txn_id}: {e}", exc_info=True)
+        failures = {}
+        for txn_id, reason in result.failed.items():
+            failures[txn_id] = f"Manual posting error: {reason}"
+            errors.append({"transaction_id": txn_id, "error": reason})
+            logger.error(f"Failed to post transaction {txn_id}: {reason}")
 
+        self._write_posting_outcomes(list(result.posted), failures, datetime.now(timezone.utc))
         self.db.commit()
 
+        success_count, failed_count = len(result.posted), len(errors)
+        logger.info("Manual posting finished", posted=success_count, failed=failed_count)
         return {
             "success_count": success_count,
             "failed_count": failed_count,
             "errors": errors,
             "message": f"Successfully posted {success_count} transactions, {failed_count} failed."
         }
+
+    @staticmethod
+    def _toll_obligation(trans: EZPassTransaction, amount: Decimal) -> ObligationRequest:
+        return ObligationRequest(
+            key=trans.id,
+            category=PostingCategory.EZPASS,
+            amount=amount,
+            reference_id=trans.transaction_id,
+            driver_id=trans.driver_id,
+            lease_id=trans.lease_id,
+            vehicle_id=trans.vehicle_id,
+            medallion_id=trans.medallion_id,
+        )
+
+    def _write_posting_outcomes(self, posted_ids: List[int], failures: Dict[int, str], posting_date: datetime):
+        """Write posting results with one UPDATE per outcome (status and failure reason)"""
+        self.repo.update_transactions_by_ids(posted_ids, {
+            "status": EZPassTransactionStatus.POSTED_TO_LEDGER,
+            "failure_reason": None,
+            "posting_date": posting_date,
+        })
+
+        by_reason = defaultdict(list)
+        for transaction_id, reason in failures.items():
+            by_reason[reason].append(transaction_id)
+        for reason, transaction_ids in by_reason.items():
+            self.repo.update_transactions_by_ids(transaction_ids, {
+                "status": EZPassTransactionStatus.POSTING_FAILED,
+                "failure_reason": reason,
+            })
     
     def reassign_transactions(
         self, transaction_ids: List[int], new_driver_id: int, new_lease_id: int,
@@ -666,7 +763,10 @@ class EZPassService:
         This uses the SAME association logic as the initial automatic process.
         
         If transaction_ids provided: Only retry those specific transactions
-        If transaction_ids is None: Retry ALL ASSOCIATION_FAILED transactions
+        If transaction_ids is None: Retry the ASSOCIATION_FAILED transactions
+        whose blocking condition may have changed since the last attempt (a
+        plate registered or moved, a CURB trip mapped to the vehicle); see
+        EZPassRepository.get_association_worklist
         
         Business Logic (same as automatic association):
         1. Extract plate number from tag_or_plate
@@ -675,7 +775,7 @@ class EZPassService:
         4. If found: Associate driver_id, lease_id, medallion_id from CURB trip
         5. Update status to ASSOCIATED or ASSOCIATION_FAILED
         """
-        logger.info(f"Retrying association for transactions: {transaction_ids or 'all failed'}")
+        logger.info(f"Retrying association for transactions: {transaction_ids or 'failed worklist'}")
         
         # Get transactions to retry
         if transaction_ids:
@@ -686,10 +786,8 @@ class EZPassService:
             ]
             transactions_to_process = [t for t in transactions_to_process if t is not None]
         else:
-            # Retry all ASSOCIATION_FAILED transactions
-            transactions_to_process = self.repo.get_transactions_by_status(
-                EZPassTransactionStatus.ASSOCIATION_FAILED
-            )
+            # Retry only failures that could now succeed
+            transactions_to_process = self.repo.get_association_worklist()
         
         if not transactions_to_process:
             return {
@@ -699,64 +797,9 @@ class EZPassService:
                 "message": "No transactions to retry association"
             }
         
-        successful_count = 0
-        failed_count = 0
-        
-        for trans in transactions_to_process:
-            updates = {"status": EZPassTransactionStatus.ASSOCIATION_FAILED}
-            try:
-                # 1. Find the vehicle using the plate number (same logic as automatic)
-                plate_number_full = trans.tag_or_plate
-                plate_number = plate_number_full.split(' ')[1] if ' ' in plate_number_full else plate_number_full
-                
-                vehicle_reg = self.db.query(VehicleRegistration).filter(
-                    VehicleRegistration.plate_number.ilike(f"%{plate_number}%")
-                ).first()
-
-                if not vehicle_reg or not vehicle_reg.vehicle:
-                    raise AssociationError(trans.transaction_id, f"No vehicle found for plate '{plate_number}'")
-                
-                vehicle = vehicle_reg.vehicle
-                updates["vehicle_id"] = vehicle.id
-
-                # 2. Find the corresponding CURB trip to identify the driver
-                # Look for a trip within a time window around the toll time
-                time_buffer = timedelta(minutes=30)
-                trip_start = trans.transaction_datetime - time_buffer
-                trip_end = trans.transaction_datetime + time_buffer
-
-                curb_trip = self.db.query(CurbTrip).filter(
-                    CurbTrip.vehicle_id == vehicle.id,
-                    CurbTrip.start_time <= trip_end,
-                    CurbTrip.end_time >= trip_start
-                ).order_by(CurbTrip.start_time.desc()).first()
-
-                if not curb_trip or not curb_trip.driver_id:
-                    raise AssociationError(
-                        trans.transaction_id, 
-                        f"No active CURB trip found for vehicle {vehicle.id} around {trans.transaction_datetime}"
-                    )
-                
-                # SUCCESS - Associate with driver/lease from CURB trip
-                updates["driver_id"] = curb_trip.driver_id
-                updates["lease_id"] = curb_trip.lease_id
-                updates["medallion_id"] = curb_trip.medallion_id
-                updates["status"] = EZPassTransactionStatus.ASSOCIATED
-                updates["failure_reason"] = None
-                successful_count += 1
-                
-            except AssociationError as e:
-                updates["failure_reason"] = e.reason
-                failed_count += 1
-                logger.warning(f"Association retry failed for transaction {trans.transaction_id}: {e.reason}")
-
-            except Exception as e:
-                updates["failure_reason"] = f"Unexpected error during retry: {str(e)}"
-                failed_count += 1
-                logger.error(f"Unexpected error retrying transaction {trans.transaction_id}: {e}", exc_info=True)
-
-            finally:
-                self.repo.update_transaction(trans.id, updates)
+        successful_count, failed_count = self._associate_batch(
+            transactions_to_process, fallback_to_latest_trip=False
+        )
         
         self.db.commit()
         logger.info(
@@ -779,6 +822,36 @@ class EZPassService:
 
 # --- Celery Tasks ---
 
+@shared_task(name="ezpass.process_csv_import")
+def process_ezpass_csv_import_task(
+    import_id: int, location: str, file_name: str, user_id: int, lock_token: str
+):
+    """
+    Background task to import a staged EZPass CSV. Releases the import lock
+    taken by EZPassService.queue_csv_import and removes the staged file.
+    """
+    logger.info("Executing Celery task: process_ezpass_csv_import_task", import_id=import_id)
+    db: Session = SessionLocal()
+    try:
+        with open_staged_upload(location) as file_stream:
+            return EZPassService(db).process_uploaded_csv(
+                file_stream, file_name, user_id, import_id=import_id
+            )
+    except Exception as e:
+        logger.error(f"Celery task process_ezpass_csv_import_task failed: {e}", exc_info=True)
+        db.rollback()
+        # The staged file could not be opened: the record never left PENDING
+        repo = EZPassRepository(db)
+        import_record = repo.get_import_record(import_id)
+        if import_record and import_record.status == EZPassImportStatus.PENDING:
+            repo.update_import_record_status(import_id, EZPassImportStatus.FAILED, 0, 0)
+            db.commit()
+        raise
+    finally:
+        db.close()
+        discard_staged_upload(location)
+        import_lock.release(lock_token)
+
 @shared_task(name="ezpass.associate_transactions")
 def associate_ezpass_transactions_task():
     """
@@ -797,6 +870,25 @@ def associate_ezpass_transactions_task():
     finally:
         db.close()
 
+@shared_task(name="ezpass.retry_failed_associations")
+def retry_ezpass_associations_task():
+    """
+    Background task to retry failed EZPass associations whose plate or CURB
+    trips have changed since the last attempt.
+    """
+    logger.info("Executing Celery task: retry_ezpass_associations_task")
+    db: Session = SessionLocal()
+    try:
+        service = EZPassService(db)
+        result = service.retry_failed_associations()
+        return result
+    except Exception as e:
+        logger.error(f"Celery task retry_ezpass_associations_task failed: {e}", exc_info=True)
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 @shared_task(name="ezpass.post_tolls_to_ledger")
 def post_ezpass_tolls_to_ledger_task():
     """
@@ -805,7 +897,7 @@ def post_ezpass_tolls_to_ledger_task():
     logger.info("Executing Celery task: post_ezpass_tolls_to_ledger_task")
     db: Session = SessionLocal()
     try:
-        ledger_service = LedgerService(db)
+        ledger_service = LedgerService(LedgerRepository(db))
         ezpass_service = EZPassService(db)
         result = ezpass_service.post_tolls_to_ledger(ledger_service)
         return result
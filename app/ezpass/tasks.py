@@ -11,6 +11,8 @@ for Celery's autodiscovery mechanism.
 from app.ezpass.services import (
     associate_ezpass_transactions_task,
     post_ezpass_tolls_to_ledger_task,
+    process_ezpass_csv_import_task,
+    retry_ezpass_associations_task,
 )
 
 # The tasks are defined in the services module using the @shared_task decorator.
@@ -20,4 +22,6 @@ from app.ezpass.services import (
 __all__ = [
     "associate_ezpass_transactions_task",
     "post_ezpass_tolls_to_ledger_task",
+    "process_ezpass_csv_import_task",
+    "retry_ezpass_associations_task",
 ]
\ No newline at end of file
@@ -0,0 +1,360 @@
+# app/leases/availability.py
+
+"""
+Lease availability index maintenance.
+
+The `lease_availability` table holds one row per vehicle, medallion and
+driver saying whether it can be picked for a new lease, with the shift
+occupancy of its active leases. After each flush, an `after_flush` listener
+re-derives the rows of the records the flush touched, in SQL. The records
+are those of leases changing status, shifts, vehicle or medallion, drivers
+joining or leaving a lease, vehicles and medallions changing status or
+assignment, and drivers changing status. No caller has to remember to update
+the index. `LeaseAvailabilityService.rebuild` re-derives every row and is
+used for periodic reconciliation.
+
+Rules (those LeaseService.get_can_lease and the driver lease flow applied):
+
+- a vehicle can be leased when it is hacked up, or has an active lease
+  holding only one shift, and its active leases do not hold both shifts;
+- a medallion can be leased when it is not archived and a vehicle assigned
+  to it can be leased;
+- a driver can be leased when Registered or Active.
+"""
+
+from itertools import chain
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import and_, case, delete, event, func, insert, literal, or_, select
+from sqlalchemy.orm import Session
+
+from app.drivers.models import Driver
+from app.drivers.schemas import DriverStatus
+from app.leases.models import Lease, LeaseAvailability, LeaseDriver
+from app.leases.schemas import LeaseAvailabilityEntity, LeaseStatus
+from app.medallions.models import Medallion
+from app.medallions.schemas import MedallionStatus
+from app.utils.flush_tracking import attribute_values, has_changes, track_previous_values
+from app.utils.logger import get_logger
+from app.vehicles.models import Vehicle
+from app.vehicles.schemas import VehicleStatus
+
+logger = get_logger(__name__)
+
+# Attributes that affect availability
+LEASE_FIELDS = ("lease_status", "is_day_shift", "is_night_shift", "vehicle_id", "medallion_id")
+LEASE_DRIVER_FIELDS = ("is_active", "driver_id", "lease_id")
+VEHICLE_FIELDS = ("vehicle_status", "medallion_id")
+MEDALLION_FIELDS = ("medallion_status",)
+DRIVER_FIELDS = ("driver_status", "driver_id")
+# References whose previous record must be refreshed too when they change
+track_previous_values(
+    Lease.vehicle_id, Lease.medallion_id, Vehicle.medallion_id, LeaseDriver.driver_id,
+)
+
+LEASABLE_DRIVER_STATUSES = (DriverStatus.REGISTERED, DriverStatus.ACTIVE)
+
+_table = LeaseAvailability.__table__
+_COLUMNS = [
+    "entity_type", "entity_id", "can_lease", "active_lease_count",
+    "day_shift_occupied", "night_shift_occupied", "updated_at",
+]
+
+
+def _flag(condition):
+    """1 if any row of the group meets condition, else 0"""
+    return func.max(case((condition, 1), else_=0))
+
+
+def _entity(entity_type: LeaseAvailabilityEntity):
+    return literal(entity_type, _table.c.entity_type.type)
+
+
+def _active_lease_occupancy(key_column, ids: Optional[Set[int]]):
+    """Active lease count and shift flags per vehicle or medallion (key_column on Lease)"""
+    only_day = and_(
+        Lease.is_day_shift == True,
+        or_(Lease.is_night_shift == False, Lease.is_night_shift.is_(None)),
+    )
+    only_night = and_(
+        Lease.is_night_shift == True,
+        or_(Lease.is_day_shift == False, Lease.is_day_shift.is_(None)),
+    )
+    stmt = (
+        select(
+            key_column.label("key"),
+            func.count(Lease.id).label("active_leases"),
+            _flag(Lease.is_day_shift == True).label("day"),
+            _flag(Lease.is_night_shift == True).label("night"),
+            _flag(or_(only_day, only_night)).label("single_shift"),
+        )
+        .where(Lease.lease_status == LeaseStatus.ACTIVE, key_column.isnot(None))
+        .group_by(key_column)
+    )
+    if ids is not None:
+        stmt = stmt.where(key_column.in_(ids))
+    return stmt.subquery()
+
+
+class LeaseAvailabilityService:
+    """Service for reading and maintaining the lease availability index"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(
+        self, entity_type: LeaseAvailabilityEntity, entity_id: int
+    ) -> Optional[LeaseAvailability]:
+        """Availability row of one vehicle, medallion or driver"""
+        return (
+            self.db.query(LeaseAvailability)
+            .filter(
+                LeaseAvailability.entity_type == entity_type,
+                LeaseAvailability.entity_id == entity_id,
+            )
+            .first()
+        )
+
+    def can_lease(self, entity_type: LeaseAvailabilityEntity, entity_id: int) -> bool:
+        """Whether a vehicle, medallion or driver can be picked for a new lease"""
+        availability = self.get(entity_type, entity_id)
+        return bool(availability and availability.can_lease)
+
+    def refresh(
+        self,
+        vehicle_ids: Iterable[int] = (),
+        medallion_ids: Iterable[int] = (),
+        driver_ids: Iterable[int] = (),
+    ) -> None:
+        """
+        Re-derive the rows of the given records in the caller's transaction.
+        Medallions follow their vehicles, so the medallions of refreshed
+        vehicles are refreshed too.
+        """
+        vehicle_ids = set(vehicle_ids)
+        medallion_ids = set(medallion_ids)
+        driver_ids = set(driver_ids)
+
+        if vehicle_ids:
+            self._refresh_vehicles(vehicle_ids)
+            medallion_ids.update(
+                medallion_id for (medallion_id,) in self.db.connection().execute(
+                    select(Vehicle.medallion_id).where(
+                        Vehicle.id.in_(vehicle_ids), Vehicle.medallion_id.isnot(None)
+                    )
+                )
+            )
+        if medallion_ids:
+            self._refresh_medallions(medallion_ids)
+        if driver_ids:
+            self._refresh_drivers(driver_ids)
+
+    def rebuild(self) -> dict:
+        """
+        Re-derive the whole index from leases, vehicles, medallions and drivers.
+
+        Returns:
+            Dictionary with the number of leasable vehicles, medallions and drivers.
+        """
+        logger.info("Rebuilding lease availability index")
+
+        self._refresh_vehicles(None)
+        self._refresh_medallions(None)
+        self._refresh_drivers(None)
+        self.db.commit()
+
+        counts = dict(
+            self.db.query(LeaseAvailability.entity_type, func.count(LeaseAvailability.id))
+            .filter(LeaseAvailability.can_lease == True)
+            .group_by(LeaseAvailability.entity_type)
+            .all()
+        )
+        result = {
+            "vehicles": counts.get(LeaseAvailabilityEntity.VEHICLE, 0),
+            "medallions": counts.get(LeaseAvailabilityEntity.MEDALLION, 0),
+            "drivers": counts.get(LeaseAvailabilityEntity.DRIVER, 0),
+        }
+        logger.info("Lease availability index rebuilt", **result)
+        return result
+
+    # ==========================================
+    # Internal Helpers
+    # ==========================================
+
+    def _replace(self, entity_type: LeaseAvailabilityEntity, source, ids: Optional[Set[int]]) -> None:
+        """Delete the rows of ids (all rows of entity_type if None) and insert them from source"""
+        stmt = delete(_table).where(_table.c.entity_type == entity_type)
+        if ids is not None:
+            stmt = stmt.where(_table.c.entity_id.in_(ids))
+
+        # Core statements on the connection, so this is safe inside a flush
+        connection = self.db.connection()
+        connection.execute(stmt)
+        connection.execute(insert(_table).from_select(_COLUMNS, source))
+
+    def _refresh_vehicles(self, ids: Optional[Set[int]]) -> None:
+        occupancy = _active_lease_occupancy(Lease.vehicle_id, ids)
+        day = func.coalesce(occupancy.c.day, 0) == 1
+        night = func.coalesce(occupancy.c.night, 0) == 1
+        leasable = and_(
+            or_(
+                Vehicle.vehicle_status == VehicleStatus.HACKED_UP,
+                occupancy.c.single_shift == 1,
+            ),
+            ~and_(day, night),
+        )
+        source = (
+            select(
+                _entity(LeaseAvailabilityEntity.VEHICLE),
+                Vehicle.id,
+                case((leasable, True), else_=False),
+                func.coalesce(occupancy.c.active_leases, 0),
+                case((day, True), else_=False),
+                case((night, True), else_=False),
+                func.now(),
+            )
+            .select_from(Vehicle)
+            .outerjoin(occupancy, occupancy.c.key == Vehicle.id)
+        )
+        if ids is not None:
+            source = source.where(Vehicle.id.in_(ids))
+        self._replace(LeaseAvailabilityEntity.VEHICLE, source, ids)
+
+    def _refresh_medallions(self, ids: Optional[Set[int]]) -> None:
+        occupancy = _active_lease_occupancy(Lease.medallion_id, ids)
+        vehicles = (
+            select(
+                Vehicle.medallion_id.label("key"),
+                _flag(LeaseAvailability.can_lease == True).label("leasable"),
+            )
+            .join(
+                LeaseAvailability,
+                and_(
+                    LeaseAvailability.entity_type == LeaseAvailabilityEntity.VEHICLE,
+                    LeaseAvailability.entity_id == Vehicle.id,
+                ),
+            )
+            .where(Vehicle.medallion_id.isnot(None))
+            .group_by(Vehicle.medallion_id)
+        )
+        if ids is not None:
+            vehicles = vehicles.where(Vehicle.medallion_id.in_(ids))
+        vehicles = vehicles.subquery()
+
+        day = func.coalesce(occupancy.c.day, 0) == 1
+        night = func.coalesce(occupancy.c.night, 0) == 1
+        leasable = and_(
+            or_(
+                Medallion.medallion_status.is_(None),
+                Medallion.medallion_status != MedallionStatus.ARCHIVED,
+            ),
+            vehicles.c.leasable == 1,
+        )
+        source = (
+            select(
+                _entity(LeaseAvailabilityEntity.MEDALLION),
+                Medallion.id,
+                case((leasable, True), else_=False),
+                func.coalesce(occupancy.c.active_leases, 0),
+                case((day, True), else_=False),
+                case((night, True), else_=False),
+                func.now(),
+            )
+            .select_from(Medallion)
+            .outerjoin(occupancy, occupancy.c.key == Medallion.id)
+            .outerjoin(vehicles, vehicles.c.key == Medallion.id)
+        )
+        if ids is not None:
+            source = source.where(Medallion.id.in_(ids))
+        self._replace(LeaseAvailabilityEntity.MEDALLION, source, ids)
+
+    def _refresh_drivers(self, ids: Optional[Set[int]]) -> None:
+        # Lease drivers reference drivers by their lookup id (drivers.driver_id)
+        leases = (
+            select(
+                LeaseDriver.driver_id.label("key"),
+                func.count(func.distinct(Lease.id)).label("active_leases"),
+            )
+            .join(Lease, Lease.id == LeaseDriver.lease_id)
+            .where(LeaseDriver.is_active == True, Lease.lease_status == LeaseStatus.ACTIVE)
+            .group_by(LeaseDriver.driver_id)
+        )
+        if ids is not None:
+            leases = leases.where(
+                LeaseDriver.driver_id.in_(select(Driver.driver_id).where(Driver.id.in_(ids)))
+            )
+        leases = leases.subquery()
+
+        source = (
+            select(
+                _entity(LeaseAvailabilityEntity.DRIVER),
+                Driver.id,
+                case((Driver.driver_status.in_(LEASABLE_DRIVER_STATUSES), True), else_=False),
+                func.coalesce(leases.c.active_leases, 0),
+                literal(False),
+                literal(False),
+                func.now(),
+            )
+            .select_from(Driver)
+            .outerjoin(leases, leases.c.key == Driver.driver_id)
+        )
+        if ids is not None:
+            source = source.where(Driver.id.in_(ids))
+        self._replace(LeaseAvailabilityEntity.DRIVER, source, ids)
+
+
+@event.listens_for(Session, "after_flush")
+def maintain_lease_availability(session, flush_context):
+    """
+    Refresh the lease availability of the vehicles, medallions and drivers
+    affected by what was just flushed. Runs after the flush so the index is
+    derived from the written rows; attribute history is still available to
+    tell which records changed and what they referenced before.
+    """
+    vehicle_ids: Set[int] = set()
+    medallion_ids: Set[int] = set()
+    driver_ids: Set[int] = set()
+    lease_ids: Set[int] = set()
+    driver_lookup_ids: Set[str] = set()
+
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Lease):
+            if has_changes(session, obj, LEASE_FIELDS):
+                vehicle_ids |= attribute_values(obj, "vehicle_id")
+                medallion_ids |= attribute_values(obj, "medallion_id")
+                lease_ids.add(obj.id)
+        elif isinstance(obj, LeaseDriver):
+            if has_changes(session, obj, LEASE_DRIVER_FIELDS):
+                driver_lookup_ids |= attribute_values(obj, "driver_id")
+        elif isinstance(obj, Vehicle):
+            if has_changes(session, obj, VEHICLE_FIELDS):
+                vehicle_ids.add(obj.id)
+                medallion_ids |= attribute_values(obj, "medallion_id")
+        elif isinstance(obj, Medallion):
+            if has_changes(session, obj, MEDALLION_FIELDS):
+                medallion_ids.add(obj.id)
+        elif isinstance(obj, Driver):
+            if has_changes(session, obj, DRIVER_FIELDS):
+                driver_ids.add(obj.id)
+
+    if not (vehicle_ids or medallion_ids or driver_ids or lease_ids or driver_lookup_ids):
+        return
+
+    connection = session.connection()
+    if lease_ids:
+        # A lease changing status changes the active lease count of its drivers
+        driver_lookup_ids.update(
+            driver_id for (driver_id,) in connection.execute(
+                select(LeaseDriver.driver_id).where(
+                    LeaseDriver.lease_id.in_(lease_ids), LeaseDriver.driver_id.isnot(None)
+                )
+            )
+        )
+    if driver_lookup_ids:
+        driver_ids.update(
+            driver_pk for (driver_pk,) in connection.execute(
+                select(Driver.id).where(Driver.driver_id.in_(driver_lookup_ids))
+            )
+        )
+
+    LeaseAvailabilityService(session).refresh(vehicle_ids, medallion_ids, driver_ids)
@@ -3,69 +3,22 @@
 from datetime import datetime
 from typing import Any, Dict
 
-import boto3
-from sqlalchemy import and_
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, selectinload
 
-from app.audit_trail.schemas import AuditTrailType
 from app.audit_trail.services import audit_trail_service
 from app.core.config import settings
 from app.leases.models import Lease
+from app.leases.notification_outbox import NotificationOutbox
 from app.leases.schemas import LeaseStatus
 from app.utils.logger import get_logger
+from app.utils.template_store import template_store
 from app.vehicles.schemas import VehicleStatus
 
 logger = get_logger(__name__)
 
-
-def get_s3_template(bucket_name: str, template_key: str) -> str | None:
-    """
-    Fetch an HTML email template from S3 and return it as a decoded string.
-
-    Args:
-        bucket_name: S3 bucket name
-        template_key: S3 object key for the template
-
-    Returns:
-        HTML template content as string or None if error
-    """
-    try:
-        logger.info(
-            f"Fetching S3 template from bucket: {bucket_name}, key: {template_key}"
-        )
-        s3_client = boto3.client(
-            "s3",
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-            region_name=settings.aws_region,
-        )
-
-        response = s3_client.get_object(Bucket=bucket_name, Key=template_key)
-        body = response["Body"].read()
-
-        # Try to honor charset from ContentType; default to utf-8
-        content_type = response.get("ContentType", "") or ""
-        charset = "utf-8"
-        if "charset=" in content_type.lower():
-            try:
-                charset = (
-                    content_type.lower()
-                    .split("charset=", 1)[1]
-                    .split(";", 1)[0]
-                    .strip()
-                ) or "utf-8"
-            except Exception:
-                charset = "utf-8"
-
-        html = body.decode(charset, errors="replace")
-        logger.info(f"Successfully fetched template from S3: {template_key}")
-        return html
-
-    except Exception as e:
-        logger.error(
-            f"Error fetching template from S3 bucket '{bucket_name}' with key '{template_key}': {str(e)}"
-        )
-        return None
+# Outbox message kind
+ADMIN_EXPIRY_SUMMARY = "ADMIN_EXPIRY_SUMMARY"
 
 
 def render_admin_expiry_template(template: str, expiry_summary: Dict[str, Any]) -> str:
@@ -163,70 +116,18 @@ def render_admin_expiry_template(template: str, expiry_summary: Dict[str, Any])
     return html
 
 
-def send_email_via_ses(
-    to_email: str,
-    subject: str,
-    body_html: str,
-    body_text: str,
-    sender_email: str,
-    configuration_set: str | None = None,
+def queue_admin_expiry_notification(
+    outbox: NotificationOutbox, expiry_summary: Dict[str, Any]
 ) -> bool:
     """
-    Send email via AWS SES.
-
-    Args:
-        to_email: Recipient email address
-        subject: Email subject
-        body_html: HTML body content
-        body_text: Plain text body content
-        sender_email: Sender email address
-        configuration_set: Optional SES configuration set
-
-    Returns:
-        True if successful, False otherwise
-    """
-    try:
-        ses_client = boto3.client(
-            "ses",
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-            region_name=settings.aws_region,
-        )
-
-        message = {
-            "Subject": {"Data": subject, "Charset": "UTF-8"},
-            "Body": {
-                "Text": {"Data": body_text, "Charset": "UTF-8"},
-                "Html": {"Data": body_html, "Charset": "UTF-8"},
-            },
-        }
-
-        params = {
-            "Source": sender_email,
-            "Destination": {"ToAddresses": [to_email]},
-            "Message": message,
-        }
-
-        if configuration_set:
-            params["ConfigurationSetName"] = configuration_set
-
-        response = ses_client.send_email(**params)
-        logger.info(f"Email sent to {to_email}, MessageId: {response['MessageId']}")
-        return True
-    except Exception as e:
-        logger.error(f"Error sending email to {to_email}: {str(e)}")
-        return False
-
-
-def send_admin_expiry_notification(expiry_summary: Dict[str, Any]) -> bool:
-    """
-    Send email notification to admin with lease expiry summary.
+    Queue the email notification to admin with lease expiry summary.
 
     Args:
+        outbox: Outbox of the expiry run
         expiry_summary: Dictionary containing expiry results
 
     Returns:
-        True if successful, False otherwise
+        True if queued, False otherwise
     """
     try:
         # Fetch template from S3
@@ -235,7 +136,7 @@ def send_admin_expiry_notification(expiry_summary: Dict[str, Any]) -> bool:
             "admin_expiry_notification_template_key",
             "email_sms_templates/admin_expiry_notification.html",
         )
-        template = get_s3_template(settings.s3_bucket_name, template_key)
+        template = template_store.get_s3_template(settings.s3_bucket_name, template_key)
 
         if not template:
             error_msg = f"Failed to fetch admin expiry notification template from S3 bucket '{settings.s3_bucket_name}' with key '{template_key}'"
@@ -327,27 +228,28 @@ Errors: {expiry_summary["errors"]}
         logger.info(f"  S3 Bucket: {settings.s3_bucket_name or 'NOT CONFIGURED'}")
         logger.info(f"  Template Key: {template_key or 'NOT CONFIGURED'}")
 
-        # Send email
-        return send_email_via_ses(
+        # Queue email
+        outbox.email(
+            kind=ADMIN_EXPIRY_SUMMARY,
             to_email=settings.aws_admin_email,
             subject=subject,
             body_html=html_body,
             body_text=text_body,
-            sender_email=settings.aws_ses_sender_email,
-            configuration_set=settings.aws_ses_configuration_set,
         )
+        return True
 
     except Exception as e:
-        logger.error(f"Error sending admin expiry notification: {str(e)}")
+        logger.error(f"Error queueing admin expiry notification: {str(e)}")
         return False
 
 
-def mark_lease_as_terminated(db: Session, lease: Lease, check_date) -> Dict[str, Any]:
+def mark_lease_as_terminated(lease: Lease, check_date) -> Dict[str, Any]:
     """
     Mark a lease as terminated and return termination details.
 
+    Audit trails are written for the whole run by process_lease_expiries.
+
     Args:
-        db: Database session
         lease: The lease to mark as terminated
         check_date: The date on which termination check is happening
 
@@ -394,33 +296,16 @@ def mark_lease_as_terminated(db: Session, lease: Lease, check_date) -> Dict[str,
         f"Lease {lease.lease_id} marked as TERMINATED (was {result['previous_status']})"
     )
 
-    # Create audit trail for lease termination
-    try:
-        audit_description = f"Lease terminated. Termination date: {result['termination_date']}"
-        audit_trail_service.create_audit_trail(
-            db=db,
-            description=audit_description,
-            case=None,
-            user=None,  # Automated termination, no user
-            meta_data={
-                "lease_id": lease.id,
-            },
-            audit_type=AuditTrailType.AUTOMATED,
-        )
-        logger.info(f"Created audit trail for lease termination: {lease.lease_id}")
-    except Exception as e:
-        logger.error(f"Error creating audit trail for lease {lease.lease_id}: {str(e)}")
-        # Don't fail the termination if audit trail creation fails
-
     return result
 
 
-def mark_lease_as_expired(db: Session, lease: Lease, check_date) -> Dict[str, Any]:
+def mark_lease_as_expired(lease: Lease, check_date) -> Dict[str, Any]:
     """
     Mark a lease as expired and return expiry details.
 
+    Audit trails are written for the whole run by process_lease_expiries.
+
     Args:
-        db: Database session
         lease: The lease to mark as expired
         check_date: The date on which expiry check is happening
 
@@ -466,24 +351,6 @@ def mark_lease_as_expired(db: Session, lease: Lease, check_date) -> Dict[str, An
         f"Lease {lease.lease_id} marked as EXPIRED (was {result['previous_status']})"
     )
 
-    # Create audit trail for lease expiry
-    try:
-        audit_description = f"Lease expired. End date: {result['lease_end_date']}"
-        audit_trail_service.create_audit_trail(
-            db=db,
-            description=audit_description,
-            case=None,
-            user=None,  # Automated expiry, no user
-            meta_data={
-                "lease_id": lease.id,
-            },
-            audit_type=AuditTrailType.AUTOMATED,
-        )
-        logger.info(f"Created audit trail for lease expiry: {lease.lease_id}")
-    except Exception as e:
-        logger.error(f"Error creating audit trail for lease {lease.lease_id}: {str(e)}")
-        # Don't fail the expiry if audit trail creation fails
-
     return result
 
 
@@ -495,6 +362,10 @@ def process_lease_expiries(db: Session, check_date) -> Dict[str, Any]:
     1. Check for leases with termination_date < check_date → mark as TERMINATED
     2. Check for leases with lease_end_date < check_date and is_auto_renewed = False → mark as EXPIRED
 
+    Lease changes are flushed once and their audit trails written in one
+    flush; the admin summary is queued in the lease notification outbox and
+    sent once the caller commits.
+
     Args:
         db: Database session
         check_date: Date to check expiries for
@@ -506,10 +377,9 @@ def process_lease_expiries(db: Session, check_date) -> Dict[str, Any]:
 
     # Find all active leases that need to be checked
     # Either they have a termination_date or they're past their end date
-    from sqlalchemy import or_
-
     leases = (
         db.query(Lease)
+        .options(selectinload(Lease.vehicle))
         .filter(
             and_(
                 Lease.lease_status == LeaseStatus.ACTIVE.value,
@@ -532,6 +402,7 @@ def process_lease_expiries(db: Session, check_date) -> Dict[str, Any]:
     terminated_leases = []
     expired_leases = []
     errors = []
+    audit_entries = []
 
     for lease in leases:
         try:
@@ -540,8 +411,12 @@ def process_lease_expiries(db: Session, check_date) -> Dict[str, Any]:
                 logger.info(
                     f"Processing lease for termination: {lease.lease_id} (Termination Date: {lease.termination_date})"
                 )
-                result = mark_lease_as_terminated(db, lease, check_date)
+                result = mark_lease_as_terminated(lease, check_date)
                 terminated_leases.append(result)
+                audit_entries.append((
+                    f"Lease terminated. Termination date: {result['termination_date']}",
+                    {"lease_id": lease.id},
+                ))
                 logger.info(
                     f"Successfully marked lease as terminated: {lease.lease_id}"
                 )
@@ -550,8 +425,12 @@ def process_lease_expiries(db: Session, check_date) -> Dict[str, Any]:
                 logger.info(
                     f"Processing lease for expiry: {lease.lease_id} (End Date: {lease.lease_end_date})"
                 )
-                result = mark_lease_as_expired(db, lease, check_date)
+                result = mark_lease_as_expired(lease, check_date)
                 expired_leases.append(result)
+                audit_entries.append((
+                    f"Lease expired. End date: {result['lease_end_date']}",
+                    {"lease_id": lease.id},
+                ))
                 logger.info(
                     f"Successfully marked lease as expired: {lease.lease_id} ({result['days_overdue']} days overdue)"
                 )
@@ -560,6 +439,17 @@ def process_lease_expiries(db: Session, check_date) -> Dict[str, Any]:
             logger.error(error_msg)
             errors.append({"lease_id": lease.lease_id, "error": str(e)})
 
+    # Flush the lease and vehicle changes first
+    db.flush()
+
+    # Create audit trails for the terminations and expiries
+    try:
+        audit_trail_service.create_automated_audit_trails(db, audit_entries)
+        logger.info(f"Created {len(audit_entries)} audit trails for lease expiries")
+    except Exception as e:
+        logger.error(f"Error creating audit trails for lease expiries: {str(e)}")
+        # Don't fail the expiries if audit trail creation fails
+
     # Prepare response
     response = {
         "success": True,
@@ -573,9 +463,11 @@ def process_lease_expiries(db: Session, check_date) -> Dict[str, Any]:
         "error_details": errors,
     }
 
-    # Always send and log admin notification (even if there are no expiries)
-    logger.info("Sending admin expiry notification...")
-    notification_sent = send_admin_expiry_notification(response)
-    response["admin_notification_sent"] = notification_sent
+    # Always queue the admin notification (even if there are no expiries)
+    logger.info("Queueing admin expiry notification...")
+    outbox = NotificationOutbox(db)
+    notification_queued = queue_admin_expiry_notification(outbox, response)
+    outbox.flush()
+    response["admin_notification_sent"] = notification_queued
 
     return response
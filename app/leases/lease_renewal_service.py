@@ -1,14 +1,13 @@
 # app/leases/lease_renewal_service.py
 
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-import boto3
 from dateutil.relativedelta import relativedelta
 from sqlalchemy import and_
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, selectinload
 
-from app.audit_trail.schemas import AuditTrailType
 from app.audit_trail.services import audit_trail_service
 from app.core.config import settings
 from app.leases.models import Lease, LeaseConfiguration, LeaseDriver, LeaseSchedule
@@ -18,11 +17,17 @@ from app.leases.schemas import (
     LeaseType,
     get_lease_renewal_period_config_key,
 )
+from app.leases.notification_outbox import NotificationOutbox
 from app.leases.services import lease_service
 from app.utils.logger import get_logger
+from app.utils.template_store import compile_template, template_store
 
 logger = get_logger(__name__)
 
+# Outbox message kinds
+ADMIN_RENEWAL_SUMMARY = "ADMIN_RENEWAL_SUMMARY"
+RENEWAL_REMINDER = "RENEWAL_REMINDER"
+
 
 def get_renewal_period_months(lease_type: str) -> int:
     """
@@ -38,58 +43,6 @@ def get_renewal_period_months(lease_type: str) -> int:
     return getattr(settings, config_key, 6)
 
 
-def get_s3_template(bucket_name: str, template_key: str) -> Optional[str]:
-    """
-    Fetch an HTML email template from S3 and return it as a decoded string.
-    (No gzip handling.)
-
-    Args:
-        bucket_name: S3 bucket name
-        template_key: S3 object key for the template
-
-    Returns:
-        HTML template content as string or None if error
-    """
-    try:
-        logger.info(
-            f"Fetching S3 template from bucket: {bucket_name}, key: {template_key}"
-        )
-        s3_client = boto3.client(
-            "s3",
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-            region_name=settings.aws_region,
-        )
-
-        response = s3_client.get_object(Bucket=bucket_name, Key=template_key)
-        body = response["Body"].read()
-
-        # Try to honor charset from ContentType; default to utf-8
-        content_type = response.get("ContentType", "") or ""
-        charset = "utf-8"
-        if "charset=" in content_type.lower():
-            # e.g. "text/html; charset=utf-8"
-            try:
-                charset = (
-                    content_type.lower()
-                    .split("charset=", 1)[1]
-                    .split(";", 1)[0]
-                    .strip()
-                ) or "utf-8"
-            except Exception:
-                charset = "utf-8"
-
-        html = body.decode(charset, errors="replace")
-        logger.info(f"Successfully fetched template from S3: {template_key}")
-        return html
-
-    except Exception as e:
-        logger.error(
-            f"Error fetching template from S3 bucket '{bucket_name}' with key '{template_key}': {str(e)}"
-        )
-        return None
-
-
 def render_template(template: str, data: Dict[str, Any]) -> str:
     """
     Simple template rendering by replacing placeholders.
@@ -101,11 +54,7 @@ def render_template(template: str, data: Dict[str, Any]) -> str:
     Returns:
         Rendered template string
     """
-    rendered = template
-    for key, value in data.items():
-        placeholder = "{{" + key + "}}"
-        rendered = rendered.replace(placeholder, str(value) if value else "")
-    return rendered
+    return compile_template(template).render(data)
 
 
 def render_admin_template(template: str, renewal_summary: Dict[str, Any]) -> str:
@@ -183,108 +132,6 @@ def render_admin_template(template: str, renewal_summary: Dict[str, Any]) -> str
     return html
 
 
-def send_email_via_ses(
-    to_email: str,
-    subject: str,
-    body_html: str,
-    body_text: str,
-    sender_email: str,
-    configuration_set: Optional[str] = None,
-) -> bool:
-    """
-    Send email via AWS SES.
-
-    Args:
-        to_email: Recipient email address
-        subject: Email subject
-        body_html: HTML body content
-        body_text: Plain text body content
-        sender_email: Sender email address
-        configuration_set: Optional SES configuration set
-
-    Returns:
-        True if successful, False otherwise
-    """
-    try:
-        ses_client = boto3.client(
-            "ses",
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-            region_name=settings.aws_region,
-        )
-
-        message = {
-            "Subject": {"Data": subject, "Charset": "UTF-8"},
-            "Body": {
-                "Text": {"Data": body_text, "Charset": "UTF-8"},
-                "Html": {"Data": body_html, "Charset": "UTF-8"},
-            },
-        }
-
-        params = {
-            "Source": sender_email,
-            "Destination": {"ToAddresses": [to_email]},
-            "Message": message,
-        }
-
-        if configuration_set:
-            params["ConfigurationSetName"] = configuration_set
-
-        response = ses_client.send_email(**params)
-        logger.info(f"Email sent to {to_email}, MessageId: {response['MessageId']}")
-        return True
-    except Exception as e:
-        logger.error(f"Error sending email to {to_email}: {str(e)}")
-        return False
-
-
-def send_sms_via_sns(
-    phone_number: str, message: str, sender_id: Optional[str] = None
-) -> bool:
-    """
-    Send SMS via AWS SNS.
-
-    Args:
-        phone_number: Phone number in E.164 format (e.g., +1234567890)
-        message: SMS message content
-        sender_id: Optional sender ID
-
-    Returns:
-        True if successful, False otherwise
-    """
-    try:
-        sns_client = boto3.client(
-            "sns",
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-            region_name=settings.aws_region,
-        )
-
-        params = {
-            "PhoneNumber": phone_number,
-            "Message": message,
-            "MessageAttributes": {
-                "AWS.SNS.SMS.SMSType": {
-                    "DataType": "String",
-                    "StringValue": "Transactional",
-                }
-            },
-        }
-
-        if sender_id:
-            params["MessageAttributes"]["AWS.SNS.SMS.SenderID"] = {
-                "DataType": "String",
-                "StringValue": sender_id,
-            }
-
-        response = sns_client.publish(**params)
-        logger.info(f"SMS sent to {phone_number}, MessageId: {response['MessageId']}")
-        return True
-    except Exception as e:
-        logger.error(f"Error sending SMS to {phone_number}: {str(e)}")
-        return False
-
-
 def normalize_phone_number(phone: str) -> Optional[str]:
     """
     Normalize US phone number to E.164 format.
@@ -310,20 +157,23 @@ def normalize_phone_number(phone: str) -> Optional[str]:
     return None
 
 
-def send_admin_notification(renewal_summary: Dict[str, Any]) -> bool:
+def queue_admin_notification(
+    outbox: NotificationOutbox, renewal_summary: Dict[str, Any]
+) -> bool:
     """
-    Send email notification to admin with lease renewal summary.
+    Queue the email notification to admin with lease renewal summary.
 
     Args:
+        outbox: Outbox of the renewal run
         renewal_summary: Dictionary containing renewal results
 
     Returns:
-        True if successful, False otherwise
+        True if queued, False otherwise
     """
     try:
         # Fetch template from S3
         template_key = settings.admin_renewal_notification_template_key
-        template = get_s3_template(settings.s3_bucket_name, template_key)
+        template = template_store.get_s3_template(settings.s3_bucket_name, template_key)
 
         if not template:
             error_msg = f"Failed to fetch admin renewal notification template from S3 bucket '{settings.s3_bucket_name}' with key '{template_key}'"
@@ -399,32 +249,136 @@ Renewed Leases:
             f"  Template Key: {settings.admin_renewal_notification_template_key or 'NOT CONFIGURED'}"
         )
 
-        # Send email
-        return send_email_via_ses(
+        # Queue email; it is sent once the renewals are committed
+        outbox.email(
+            kind=ADMIN_RENEWAL_SUMMARY,
             to_email=settings.aws_admin_email,
             subject=subject,
             body_html=html_body,
             body_text=text_body,
-            sender_email=settings.aws_ses_sender_email,
-            configuration_set=settings.aws_ses_configuration_set,
         )
+        return True
 
     except Exception as e:
-        logger.error(f"Error sending admin notification: {str(e)}")
+        logger.error(f"Error queueing admin notification: {str(e)}")
         return False
 
 
-def renew_lease(db: Session, lease: Lease, renewal_date) -> Dict[str, Any]:
+def load_lease_limits(db: Session, lease_ids: List[int]) -> Dict[int, Dict[str, str]]:
     """
-    Renew a lease based on its type and return renewal details.
+    Lease configuration limits of many leases in one query.
+
+    Returns:
+        lease id -> {lease_breakup_type: lease_limit}; the first configuration
+        of a breakup type wins
+    """
+    limits = defaultdict(dict)
+    if not lease_ids:
+        return limits
+    rows = (
+        db.query(
+            LeaseConfiguration.lease_id,
+            LeaseConfiguration.lease_breakup_type,
+            LeaseConfiguration.lease_limit,
+        )
+        .filter(LeaseConfiguration.lease_id.in_(lease_ids))
+        .order_by(LeaseConfiguration.id.asc())
+        .all()
+    )
+    for row in rows:
+        limits[row.lease_id].setdefault(row.lease_breakup_type, row.lease_limit)
+    return limits
+
+
+def load_active_lease_drivers(db: Session, lease_ids: List[int]) -> Dict[int, List[LeaseDriver]]:
+    """Active (not terminated) drivers of many leases, with their Driver rows, in one query"""
+    drivers = defaultdict(list)
+    if not lease_ids:
+        return drivers
+    rows = (
+        db.query(LeaseDriver)
+        .options(joinedload(LeaseDriver.driver))
+        .filter(
+            and_(
+                LeaseDriver.lease_id.in_(lease_ids),
+                LeaseDriver.date_terminated.is_(None),  # Active drivers only
+            )
+        )
+        .order_by(LeaseDriver.id.asc())
+        .all()
+    )
+    for lease_driver in rows:
+        drivers[lease_driver.lease_id].append(lease_driver)
+    return drivers
+
+
+def _config_value(limits: Dict[str, str], key: str) -> float:
+    value = limits.get(key)
+    return float(value) if value else 0.0
+
+
+def get_renewal_weekly_amounts(lease_type: str, limits: Dict[str, str]) -> Tuple[float, float]:
+    """(vehicle, medallion) weekly amounts of a renewed lease's new schedule"""
+    if lease_type == LeaseType.DOV.value:
+        return (
+            _config_value(limits, "total_vehicle_lease"),
+            _config_value(limits, "total_medallion_lease_payment"),
+        )
+    if lease_type in [
+        LeaseType.MEDALLION.value,
+        LeaseType.LONG_TERM.value,
+        LeaseType.SHIFT.value,
+    ]:
+        return 0.0, _config_value(limits, "total_medallion_lease_payment")
+    return 0.0, 0.0
+
+
+def get_total_lease_amount(lease: Lease, limits: Dict[str, str]) -> float:
+    """
+    Calculate total lease amount for the renewal period from lease configurations.
+
+    Args:
+        lease: The lease object
+        limits: The lease's configuration limits (see load_lease_limits)
+
+    Returns:
+        Total lease amount for the renewal period
+    """
+    lease_type = lease.lease_type if lease.lease_type else ""
+
+    if lease_type == LeaseType.DOV.value:
+        total_weekly = _config_value(limits, "total_vehicle_lease") + _config_value(
+            limits, "total_medallion_lease_payment"
+        )
+    elif lease_type == LeaseType.MEDALLION.value:
+        total_weekly = _config_value(limits, "total_medallion_lease_payment")
+    elif lease_type in [LeaseType.LONG_TERM.value, LeaseType.SHIFT.value]:
+        total_weekly = _config_value(limits, "total_medallion_lease_payment")
+    else:
+        total_weekly = (
+            _config_value(limits, "total_vehicle_lease")
+            or _config_value(limits, "total_medallion_lease_payment")
+            or 0.0
+        )
+
+    duration_weeks = lease.duration_in_weeks or 26
+    total_amount = total_weekly * duration_weeks
+
+    return total_amount
+
+
+def apply_renewal(lease: Lease, renewal_date) -> Dict[str, Any]:
+    """
+    Renew a lease in memory based on its type and return renewal details.
+    The lease's audit trail and new schedule are written by renew_leases.
 
     Args:
-        db: Database session
         lease: The lease to renew
         renewal_date: The date on which renewal is happening
 
     Returns:
-        Dictionary with renewal details
+        Dictionary with renewal details; "renewed" is False for unknown
+        lease types, which are left unchanged
     """
     lease_type = lease.lease_type if lease.lease_type else ""
 
@@ -448,6 +402,7 @@ def renew_lease(db: Session, lease: Lease, renewal_date) -> Dict[str, Any]:
         "last_renewed_date": renewal_date.isoformat(),
         "new_end_date": new_end_date.isoformat(),
         "action": None,
+        "renewed": True,
     }
 
     # Initialize segment tracking if not set (for all lease types)
@@ -512,135 +467,126 @@ def renew_lease(db: Session, lease: Lease, renewal_date) -> Dict[str, Any]:
 
     else:
         result["action"] = f"Unknown lease type: {lease_type}, no renewal performed"
-        return result
-
-    # Flush the lease changes first
-    db.flush()
-    db.refresh(lease)
-
-    # Create audit trail for lease renewal
-    try:
-        audit_description = f"Lease auto-renewed. New end date: {result['new_end_date']}"
-        audit_trail_service.create_audit_trail(
-            db=db,
-            description=audit_description,
-            case=None,
-            user=None,  # Automated renewal, no user
-            meta_data={
-                "lease_id": lease.id,
-            },
-            audit_type=AuditTrailType.AUTOMATED,
-        )
-        logger.info(f"Created audit trail for lease renewal: {lease.lease_id}")
-    except Exception as e:
-        logger.error(f"Error creating audit trail for lease {lease.lease_id}: {str(e)}")
-        # Don't fail the renewal if audit trail creation fails
-
-    # Create new lease schedule for the renewed lease
-    try:
-        configs = (
-            db.query(LeaseConfiguration)
-            .filter(LeaseConfiguration.lease_id == lease.id)
-            .all()
-        )
-
-        def get_config_value(key: str) -> float:
-            config = next((c for c in configs if c.lease_breakup_type == key), None)
-            return float(config.lease_limit) if config and config.lease_limit else 0.0
-
-        if lease_type == LeaseType.DOV.value:
-            vehicle_weekly_amount = get_config_value("total_vehicle_lease")
-            medallion_weekly_amount = get_config_value("total_medallion_lease_payment")
-        elif lease_type == LeaseType.MEDALLION.value:
-            vehicle_weekly_amount = 0.0
-            medallion_weekly_amount = get_config_value("total_medallion_lease_payment")
-        elif lease_type in [LeaseType.LONG_TERM.value, LeaseType.SHIFT.value]:
-            vehicle_weekly_amount = 0.0
-            medallion_weekly_amount = get_config_value("total_medallion_lease_payment")
-        else:
-            vehicle_weekly_amount = 0.0
-            medallion_weekly_amount = 0.0
-
-        lease_service.create_or_update_lease_schedule(
-            db=db,
-            lease=lease,
-            vehicle_weekly_amount=vehicle_weekly_amount,
-            medallion_weekly_amount=medallion_weekly_amount,
-            override_start_date=lease.last_renewed_date,  # Use renewal date as start for new schedule
-        )
-        logger.info(f"Created new lease schedule for renewed lease: {lease.lease_id}")
-    except Exception as e:
-        logger.error(
-            f"Error creating lease schedule for lease {lease.lease_id}: {str(e)}"
-        )
-        result["schedule_error"] = str(e)
+        result["renewed"] = False
 
     return result
 
 
-def get_total_lease_amount(db: Session, lease: Lease) -> float:
+def renew_leases(
+    db: Session, leases: List[Lease], renewal_date
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
-    Calculate total lease amount for the renewal period from lease configurations.
+    Renew a cohort of leases.
+
+    Lease changes are applied in memory and flushed once; the audit trails
+    are added in one flush and the new schedules are written with one bulk
+    deactivate and one bulk insert (LeaseService.replace_lease_schedules).
 
     Args:
         db: Database session
-        lease: The lease object
+        leases: The leases to renew
+        renewal_date: The date on which renewal is happening
 
     Returns:
-        Total lease amount for the renewal period
+        (renewed_leases, errors): renewal details per lease, and the leases
+        that could not be renewed
     """
-    configs = (
-        db.query(LeaseConfiguration)
-        .filter(LeaseConfiguration.lease_id == lease.id)
-        .all()
-    )
+    renewed_leases = []
+    errors = []
+    changed = []
 
-    def get_config_value(key: str) -> float:
-        config = next((c for c in configs if c.lease_breakup_type == key), None)
-        return float(config.lease_limit) if config and config.lease_limit else 0.0
+    for lease in leases:
+        try:
+            logger.info(
+                f"Processing lease: {lease.lease_id} (Type: {lease.lease_type})"
+            )
+            result = apply_renewal(lease, renewal_date)
+        except Exception as e:
+            error_msg = f"Error renewing lease {lease.lease_id}: {str(e)}"
+            logger.error(error_msg)
+            errors.append({"lease_id": lease.lease_id, "error": str(e)})
+            continue
 
-    lease_type = lease.lease_type if lease.lease_type else ""
+        if result.pop("renewed"):
+            changed.append((lease, result))
+        renewed_leases.append(result)
+        logger.info(
+            f"Successfully renewed lease: {lease.lease_id} - {result['action']}"
+        )
 
-    if lease_type == LeaseType.DOV.value:
-        total_weekly = get_config_value("total_vehicle_lease") + get_config_value(
-            "total_medallion_lease_payment"
+    if not changed:
+        return renewed_leases, errors
+
+    # Flush the lease changes first
+    db.flush()
+
+    # Create audit trails for the lease renewals
+    try:
+        audit_trail_service.create_automated_audit_trails(
+            db,
+            (
+                (
+                    f"Lease auto-renewed. New end date: {result['new_end_date']}",
+                    {"lease_id": lease.id},
+                )
+                for lease, result in changed
+            ),
         )
-    elif lease_type == LeaseType.MEDALLION.value:
-        total_weekly = get_config_value("total_medallion_lease_payment")
-    elif lease_type in [LeaseType.LONG_TERM.value, LeaseType.SHIFT.value]:
-        total_weekly = get_config_value("total_medallion_lease_payment")
-    else:
-        total_weekly = (
-            get_config_value("total_vehicle_lease")
-            or get_config_value("total_medallion_lease_payment")
-            or 0.0
+        logger.info(f"Created audit trails for {len(changed)} lease renewals")
+    except Exception as e:
+        logger.error(f"Error creating audit trails for lease renewals: {str(e)}")
+        # Don't fail the renewals if audit trail creation fails
+
+    # Create new lease schedules for the renewed leases, starting from the renewal date
+    limits = load_lease_limits(db, [lease.id for lease, _ in changed])
+    plans = []
+    for lease, result in changed:
+        try:
+            vehicle_weekly_amount, medallion_weekly_amount = get_renewal_weekly_amounts(
+                lease.lease_type or "", limits.get(lease.id, {})
+            )
+        except Exception as e:
+            logger.error(
+                f"Error creating lease schedule for lease {lease.lease_id}: {str(e)}"
+            )
+            result["schedule_error"] = str(e)
+            continue
+        plans.append(
+            (lease, vehicle_weekly_amount, medallion_weekly_amount, lease.last_renewed_date)
         )
 
-    duration_weeks = lease.duration_in_weeks or 26
-    total_amount = total_weekly * duration_weeks
+    _, schedule_errors = lease_service.replace_lease_schedules(db, plans)
+    for lease, result in changed:
+        if lease.id in schedule_errors:
+            result["schedule_error"] = schedule_errors[lease.id]
 
-    return total_amount
+    return renewed_leases, errors
 
 
-def send_renewal_reminders(
-    db: Session,
+def queue_renewal_reminders(
+    outbox: NotificationOutbox,
     lease: Lease,
+    lease_drivers: List[LeaseDriver],
+    limits: Dict[str, str],
     days_until_expiry: int,
     email_template: str,
     sms_template: str,
 ) -> Dict[str, Any]:
     """
-    Send renewal reminders to all drivers associated with a lease.
+    Queue renewal reminders to all drivers associated with a lease.
 
     Args:
-        db: Database session
+        outbox: Outbox of the reminder run
         lease: The lease that's expiring
+        lease_drivers: The lease's active drivers (see load_active_lease_drivers)
+        limits: The lease's configuration limits (see load_lease_limits)
         days_until_expiry: Number of days until lease expires
         email_template: Email template content
         sms_template: SMS template content
 
     Returns:
-        Dictionary with reminder sending results
+        Dictionary with reminder results; emails_sent and sms_sent count the
+        messages queued for sending
     """
     result = {
         "lease_id": lease.lease_id,
@@ -656,24 +602,12 @@ def send_renewal_reminders(
         "sms_body": [],
     }
 
-    # Get all active drivers for this lease
-    lease_drivers = (
-        db.query(LeaseDriver)
-        .filter(
-            and_(
-                LeaseDriver.lease_id == lease.id,
-                LeaseDriver.date_terminated.is_(None),  # Active drivers only
-            )
-        )
-        .all()
-    )
-
     if not lease_drivers:
         result["errors"].append("No active drivers found for this lease")
         return result
 
     # Calculate total lease amount
-    total_lease_amount = get_total_lease_amount(db, lease)
+    total_lease_amount = get_total_lease_amount(lease, limits)
 
     # Prepare template data
     template_data = {
@@ -704,55 +638,41 @@ def send_renewal_reminders(
                 "driver_id": driver.driver_id or "",
             }
 
-            # Send email if driver has email address
+            # Queue email if driver has email address
             if driver.email_address:
                 email_subject = f"Lease Renewal Reminder - {lease.lease_id}"
                 email_body_html = render_template(email_template, driver_data)
-                email_body_text = email_body_html
-
-                logger.info(f"\n{'=' * 80}")
-                logger.info(f"EMAIL CONTENT FOR DRIVER {driver.driver_id}:")
-                logger.info(f"{'=' * 80}")
-                logger.info(f"To: {driver.email_address}")
-                logger.info(f"Subject: {email_subject}")
-                logger.info(f"Body:\n{email_body_html}")
-                logger.info(f"{'=' * 80}\n")
+
                 result["email_body"].append(
                     {"email_subject": email_subject, "email_body": email_body_html}
                 )
-                if send_email_via_ses(
+                outbox.email(
+                    kind=RENEWAL_REMINDER,
                     to_email=driver.email_address,
                     subject=email_subject,
                     body_html=email_body_html,
-                    body_text=email_body_text,
-                    sender_email=settings.aws_ses_sender_email,
-                    configuration_set=settings.aws_ses_configuration_set,
-                ):
-                    result["emails_sent"] += 1
+                    body_text=email_body_html,
+                    lease_id=lease.id,
+                )
+                result["emails_sent"] += 1
             else:
                 result["errors"].append(
                     f"No email address for driver {driver.driver_id}"
                 )
 
-            # Send SMS if driver has phone number
+            # Queue SMS if driver has phone number
             phone = normalize_phone_number(driver.phone_number_1)
             if phone:
                 sms_body = render_template(sms_template, driver_data)
 
-                logger.info(f"\n{'=' * 80}")
-                logger.info(f"SMS CONTENT FOR DRIVER {driver.driver_id}:")
-                logger.info(f"{'=' * 80}")
-                logger.info(f"To: {phone}")
-                logger.info(f"Message:\n{sms_body}")
-                logger.info(f"{'=' * 80}\n")
-
                 result["sms_body"].append(sms_body)
-                if send_sms_via_sns(
+                outbox.sms(
+                    kind=RENEWAL_REMINDER,
                     phone_number=phone,
                     message=sms_body,
-                    sender_id=settings.aws_sns_sender_id,
-                ):
-                    result["sms_sent"] += 1
+                    lease_id=lease.id,
+                )
+                result["sms_sent"] += 1
             else:
                 result["errors"].append(
                     f"No valid phone number for driver {driver.driver_id}"
@@ -760,7 +680,7 @@ def send_renewal_reminders(
 
         except Exception as e:
             error_msg = (
-                f"Error sending reminders for driver {lease_driver.driver_id}: {str(e)}"
+                f"Error queueing reminders for driver {lease_driver.driver_id}: {str(e)}"
             )
             logger.error(error_msg)
             result["errors"].append(error_msg)
@@ -772,6 +692,9 @@ def process_auto_renewals(db: Session, renewal_date) -> Dict[str, Any]:
     """
     Process auto-renewals for leases expiring on the given date.
 
+    The admin summary is queued in the lease notification outbox and sent
+    once the caller commits.
+
     Args:
         db: Database session
         renewal_date: Date to process renewals for
@@ -796,23 +719,7 @@ def process_auto_renewals(db: Session, renewal_date) -> Dict[str, Any]:
 
     logger.info(f"Found {len(leases)} leases eligible for auto-renewal")
 
-    renewed_leases = []
-    errors = []
-
-    for lease in leases:
-        try:
-            logger.info(
-                f"Processing lease: {lease.lease_id} (Type: {lease.lease_type})"
-            )
-            result = renew_lease(db, lease, renewal_date)
-            renewed_leases.append(result)
-            logger.info(
-                f"Successfully renewed lease: {lease.lease_id} - {result['action']}"
-            )
-        except Exception as e:
-            error_msg = f"Error renewing lease {lease.lease_id}: {str(e)}"
-            logger.error(error_msg)
-            errors.append({"lease_id": lease.lease_id, "error": str(e)})
+    renewed_leases, errors = renew_leases(db, leases, renewal_date)
 
     # Prepare response
     response = {
@@ -825,10 +732,12 @@ def process_auto_renewals(db: Session, renewal_date) -> Dict[str, Any]:
         "error_details": errors,
     }
 
-    # Always send and log admin notification (even if there are no renewals)
-    logger.info("Sending admin notification...")
-    notification_sent = send_admin_notification(response)
-    response["admin_notification_sent"] = notification_sent
+    # Always queue the admin notification (even if there are no renewals)
+    logger.info("Queueing admin notification...")
+    outbox = NotificationOutbox(db)
+    notification_queued = queue_admin_notification(outbox, response)
+    outbox.flush()
+    response["admin_notification_sent"] = notification_queued
 
     return response
 
@@ -839,6 +748,10 @@ def process_renewal_reminders(
     """
     Process renewal reminders for leases expiring in the given number of days.
 
+    Drivers and lease configurations of all expiring leases are read up
+    front; the reminders are queued in the lease notification outbox and
+    sent once the caller commits.
+
     Args:
         db: Database session
         check_date: Date to check from
@@ -855,10 +768,10 @@ def process_renewal_reminders(
     if not bucket_name:
         raise ValueError("S3 bucket name not configured")
 
-    email_template = get_s3_template(
+    email_template = template_store.get_s3_template(
         bucket_name, settings.lease_renewal_email_template_key
     )
-    sms_template = get_s3_template(bucket_name, settings.lease_renewal_sms_template_key)
+    sms_template = template_store.get_s3_template(bucket_name, settings.lease_renewal_sms_template_key)
 
     if not email_template or not sms_template:
         raise ValueError("Failed to fetch templates from S3")
@@ -874,6 +787,7 @@ def process_renewal_reminders(
 
     leases = (
         db.query(Lease)
+        .options(selectinload(Lease.medallion), selectinload(Lease.vehicle))
         .filter(
             and_(
                 Lease.lease_status == LeaseStatus.ACTIVE.value,
@@ -886,6 +800,11 @@ def process_renewal_reminders(
 
     logger.info(f"Found {len(leases)} leases expiring around {target_expiry_date}")
 
+    lease_ids = [lease.id for lease in leases]
+    drivers_by_lease = load_active_lease_drivers(db, lease_ids)
+    limits_by_lease = load_lease_limits(db, lease_ids)
+    outbox = NotificationOutbox(db)
+
     reminder_results = []
     total_emails_sent = 0
     total_sms_sent = 0
@@ -898,9 +817,11 @@ def process_renewal_reminders(
             logger.info(
                 f"Processing lease: {lease.lease_id} (Expires: {lease.lease_end_date})"
             )
-            result = send_renewal_reminders(
-                db=db,
+            result = queue_renewal_reminders(
+                outbox=outbox,
                 lease=lease,
+                lease_drivers=drivers_by_lease.get(lease.id, []),
+                limits=limits_by_lease.get(lease.id, {}),
                 days_until_expiry=reminder_days,
                 email_template=email_template,
                 sms_template=sms_template,
@@ -915,13 +836,15 @@ def process_renewal_reminders(
                 errors.extend(result["errors"])
 
             logger.info(
-                f"Lease {lease.lease_id}: {result['emails_sent']} emails, {result['sms_sent']} SMS sent"
+                f"Lease {lease.lease_id}: {result['emails_sent']} emails, {result['sms_sent']} SMS queued"
             )
         except Exception as e:
             error_msg = f"Error processing lease {lease.lease_id}: {str(e)}"
             logger.error(error_msg)
             errors.append(error_msg)
 
+    outbox.flush()
+
     return {
         "success": True,
         "check_date": check_date.isoformat(),
@@ -11,11 +11,13 @@ from datetime import date, datetime, timezone, timedelta
 from decimal import Decimal
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, func, or_, update
 
-from app.leases.models import Lease, LeaseSchedule
+from app.drivers.models import Driver
+from app.leases.models import Lease, LeaseDriver, LeaseSchedule
 from app.leases.schemas import LeaseStatus
-from app.ledger.services import LedgerService
+from app.ledger.repository import LedgerRepository
+from app.ledger.services import LedgerService, ObligationRequest
 from app.ledger.models import PostingCategory
 from app.utils.logger import get_logger
 
@@ -30,7 +32,7 @@ class LeaseScheduleService:
     
     def __init__(self, db: Session):
         self.db = db
-        self.ledger_service = LedgerService(db)
+        self.ledger_service = LedgerService(LedgerRepository(db))
     
     def post_weekly_lease_fees(
         self,
@@ -56,13 +58,12 @@ class LeaseScheduleService:
                 - total_amount_posted: Sum of all posted amounts
                 
         Process:
-            1. Find all unposted schedule entries due this week
-            2. For each entry:
-                - Validate lease is active
-                - Get driver information from lease
-                - Create DEBIT posting in ledger
-                - Mark schedule entry as posted
-            3. Return summary of results
+            1. Find all unposted schedule entries due this week on active
+               leases, with each lease's primary driver (one query)
+            2. Create DEBIT postings for all entries with a driver in one
+               ledger batch (LedgerService.create_obligations)
+            3. Mark the posted entries with one UPDATE and commit
+            4. Return summary of results
         """
         try:
             if target_date is None:
@@ -70,30 +71,7 @@ class LeaseScheduleService:
             
             logger.info(f"Starting weekly lease fee posting for date: {target_date}")
             
-            # Build query for unposted lease schedules
-            query = self.db.query(LeaseSchedule).filter(
-                LeaseSchedule.is_active == True,
-                LeaseSchedule.posted_to_ledger == 0,
-                LeaseSchedule.installment_due_date <= target_date
-            )
-            
-            # Filter by specific lease if provided
-            if lease_id:
-                query = query.filter(LeaseSchedule.lease_id == lease_id)
-            
-            # Join with Lease to ensure lease is active
-            query = query.join(
-                Lease,
-                and_(
-                    LeaseSchedule.lease_id == Lease.id,
-                    Lease.lease_status.in_([
-                        LeaseStatus.ACTIVE,
-                        LeaseStatus.IN_PROGRESS
-                    ])
-                )
-            )
-            
-            unposted_schedules = query.all()
+            unposted_schedules = self._get_postable_schedules(target_date, lease_id)
             
             logger.info(f"Found {len(unposted_schedules)} unposted lease schedule entries")
             
@@ -106,154 +84,70 @@ class LeaseScheduleService:
                     'total_amount_posted': Decimal('0.00')
                 }
             
-            success_count = 0
-            failure_count = 0
-            posted_schedules = []
             failed_schedules = []
-            total_amount_posted = Decimal('0.00')
-            
-            # Process each schedule entry
-            for schedule in unposted_schedules:
-                try:
-                    # Get lease details
-                    lease = self.db.query(Lease).filter(
-                        Lease.id == schedule.lease_id
-                    ).first()
-                    
-                    if not lease:
-                        logger.warning(f"Lease {schedule.lease_id} not found for schedule {schedule.id}")
-                        failed_schedules.append({
-                            'schedule_id': schedule.id,
-                            'lease_id': schedule.lease_id,
-                            'error': 'Lease not found'
-                        })
-                        failure_count += 1
-                        continue
-                    
-                    # Get driver from lease_drivers
-                    from app.leases.models import LeaseDriver
-                    driver_lease = self.db.query(LeaseDriver).filter(
-                        LeaseDriver.lease_id == lease.id,
-                        LeaseDriver.is_active == True,
-                        or_(
-                            LeaseDriver.driver_role.in_(['DL', 'NL']),
-                            LeaseDriver.is_additional_driver == False
-                        )
-                    ).first()
-                    
-                    if not driver_lease:
-                        logger.warning(f"No active driver found for lease {lease.id}")
-                        failed_schedules.append({
-                            'schedule_id': schedule.id,
-                            'lease_id': lease.id,
-                            'error': 'No active driver found'
-                        })
-                        failure_count += 1
-                        continue
-                    
-                    # Get driver ID
-                    from app.drivers.models import Driver
-                    driver = self.db.query(Driver).filter(
-                        Driver.driver_id == driver_lease.driver_id
-                    ).first()
-                    
-                    if not driver:
-                        logger.warning(f"Driver {driver_lease.driver_id} not found")
-                        failed_schedules.append({
-                            'schedule_id': schedule.id,
-                            'lease_id': lease.id,
-                            'error': f'Driver {driver_lease.driver_id} not found'
-                        })
-                        failure_count += 1
-                        continue
-                    
-                    # Ensure amount is Decimal
-                    amount = Decimal(str(schedule.installment_amount))
-                    
-                    # Calculate payment period - ensure datetime objects
-                    period_start_date = schedule.period_start_date
-                    period_end_date = schedule.period_end_date
-                    
-                    # Convert date to datetime if needed
-                    if isinstance(period_start_date, date) and not isinstance(period_start_date, datetime):
-                        period_start = datetime.combine(period_start_date, datetime.min.time())
-                    else:
-                        period_start = period_start_date
-                    
-                    if isinstance(period_end_date, date) and not isinstance(period_end_date, datetime):
-                        # End of day for period_end
-                        period_end = datetime.combine(period_end_date, datetime.max.time().replace(microsecond=0))
-                    else:
-                        period_end = period_end_date
-                    
-                    # Ensure timezone aware
-                    if period_start.tzinfo is None:
-                        period_start = period_start.replace(tzinfo=timezone.utc)
-                    if period_end.tzinfo is None:
-                        period_end = period_end.replace(tzinfo=timezone.utc)
-                    
-                    # Due date should be datetime object for ledger service
-                    due_date_value = schedule.installment_due_date
-                    if isinstance(due_date_value, date) and not isinstance(due_date_value, datetime):
-                        due_date_value = datetime.combine(due_date_value, datetime.max.time().replace(microsecond=0))
-                    
-                    # Ensure timezone aware
-                    if due_date_value.tzinfo is None:
-                        due_date_value = due_date_value.replace(tzinfo=timezone.utc)
-                    
-                    # Create posting description
-                    if schedule.installment_number == 1:
-                        description = f"Lease fee - Installment {schedule.installment_number} (Prorated)"
-                    else:
-                        description = f"Lease fee - Installment {schedule.installment_number}"
-                    
-                    # Post to ledger using create_obligation (correct function name)
-                    posting, balance = self.ledger_service.create_obligation(
-                        driver_id=int(driver.id),
-                        lease_id=int(lease.id),
-                        category=PostingCategory.LEASE,
-                        amount=amount,
-                        reference_type='LEASE_SCHEDULE',
-                        reference_id=str(schedule.id),
-                        payment_period_start=period_start,
-                        payment_period_end=period_end,
-                        due_date=due_date_value,
-                        description=description
-                    )
-                    
-                    # Mark schedule as posted
-                    schedule.posted_to_ledger = 1
-                    schedule.posted_on = datetime.now(timezone.utc)
-                    schedule.ledger_posting_id = posting.posting_id
-                    schedule.ledger_balance_id = balance.balance_id
-                    
-                    self.db.flush()
-                    
-                    posted_schedules.append(schedule.id)
-                    total_amount_posted += amount
-                    success_count += 1
-                    
-                    logger.info(
-                        f"Posted lease fee: Schedule {schedule.id}, "
-                        f"Lease {lease.id}, Amount ${amount}"
-                    )
-                    
-                except Exception as e:
-                    logger.error(
-                        f"Failed to post schedule {schedule.id}: {str(e)}",
-                        exc_info=True
-                    )
+            obligations = []
+            amounts = {}
+            for row in unposted_schedules:
+                if row.lease_driver_id is None:
+                    error = 'No active driver found'
+                elif row.driver_pk is None:
+                    error = f'Driver {row.lease_driver_id} not found'
+                else:
+                    error = None
+                
+                if error:
+                    logger.warning(f"Cannot post schedule {row.id} for lease {row.lease_id}: {error}")
                     failed_schedules.append({
-                        'schedule_id': schedule.id,
-                        'lease_id': schedule.lease_id if schedule.lease_id else None,
-                        'error': str(e)
+                        'schedule_id': row.id,
+                        'lease_id': row.lease_id,
+                        'error': error
                     })
-                    failure_count += 1
                     continue
+                
+                amount = Decimal(str(row.installment_amount)) if row.installment_amount is not None else None
+                amounts[row.id] = amount
+                obligations.append(ObligationRequest(
+                    key=row.id,
+                    category=PostingCategory.LEASE,
+                    amount=amount,
+                    reference_id=str(row.id),
+                    driver_id=int(row.driver_pk),
+                    lease_id=int(row.lease_id),
+                ))
+            
+            # One batch of postings and balances, then one UPDATE for the schedules
+            result = self.ledger_service.create_obligations(obligations)
+            
+            posted_on = datetime.now(timezone.utc)
+            schedule_updates = []
+            for schedule_id, posting in result.posted.items():
+                schedule_updates.append({
+                    'id': schedule_id,
+                    'posted_to_ledger': 1,
+                    'posted_on': posted_on,
+                    'ledger_posting_id': posting.id,
+                    'ledger_balance_id': result.balances[schedule_id].id,
+                })
+            if schedule_updates:
+                self.db.execute(update(LeaseSchedule), schedule_updates)
+            
+            lease_ids = {row.id: row.lease_id for row in unposted_schedules}
+            for schedule_id, error in result.failed.items():
+                logger.error(f"Failed to post schedule {schedule_id}: {error}")
+                failed_schedules.append({
+                    'schedule_id': schedule_id,
+                    'lease_id': lease_ids[schedule_id],
+                    'error': error
+                })
             
             # Commit all successful postings
             self.db.commit()
             
+            posted_schedules = list(result.posted)
+            total_amount_posted = sum((amounts[schedule_id] for schedule_id in posted_schedules), Decimal('0.00'))
+            success_count = len(posted_schedules)
+            failure_count = len(failed_schedules)
+            
             logger.info(
                 f"Lease fee posting completed: "
                 f"{success_count} posted, {failure_count} failed, "
@@ -273,6 +167,66 @@ class LeaseScheduleService:
             logger.error(f"Lease fee posting failed: {str(e)}", exc_info=True)
             raise
     
+    def _get_postable_schedules(self, target_date: date, lease_id: Optional[int] = None) -> list:
+        """
+        Unposted schedule entries due by target_date on active leases, with
+        the lease's primary driver, in one query.
+        
+        Each row carries the schedule columns plus lease_driver_id (the
+        primary driver's driver_id on the lease, None if the lease has none)
+        and driver_pk (drivers.id, None if that driver does not exist).
+        """
+        # First active primary driver of each lease
+        primary_driver = (
+            self.db.query(
+                LeaseDriver.lease_id.label('lease_id'),
+                func.min(LeaseDriver.id).label('lease_driver_row_id'),
+            )
+            .filter(
+                LeaseDriver.is_active == True,
+                or_(
+                    LeaseDriver.driver_role.in_(['DL', 'NL']),
+                    LeaseDriver.is_additional_driver == False
+                )
+            )
+            .group_by(LeaseDriver.lease_id)
+            .subquery()
+        )
+        
+        query = (
+            self.db.query(
+                LeaseSchedule.id,
+                LeaseSchedule.lease_id,
+                LeaseSchedule.installment_amount,
+                LeaseDriver.driver_id.label('lease_driver_id'),
+                Driver.id.label('driver_pk'),
+            )
+            .join(
+                Lease,
+                and_(
+                    LeaseSchedule.lease_id == Lease.id,
+                    Lease.lease_status.in_([
+                        LeaseStatus.ACTIVE,
+                        LeaseStatus.IN_PROGRESS
+                    ])
+                )
+            )
+            .outerjoin(primary_driver, primary_driver.c.lease_id == Lease.id)
+            .outerjoin(LeaseDriver, LeaseDriver.id == primary_driver.c.lease_driver_row_id)
+            .outerjoin(Driver, Driver.driver_id == LeaseDriver.driver_id)
+            .filter(
+                LeaseSchedule.is_active == True,
+                LeaseSchedule.posted_to_ledger == 0,
+                LeaseSchedule.installment_due_date <= target_date
+            )
+        )
+        
+        # Filter by specific lease if provided
+        if lease_id:
+            query = query.filter(LeaseSchedule.lease_id == lease_id)
+        
+        return query.order_by(LeaseSchedule.id.asc()).all()
+    
     def get_unposted_schedule_entries(
         self,
         lease_id: Optional[int] = None,
@@ -309,7 +263,6 @@ class LeaseScheduleService:
             
             if driver_id:
                 # Join with lease and lease_drivers
-                from app.leases.models import LeaseDriver
                 query = query.join(
                     Lease,
                     LeaseSchedule.lease_id == Lease.id
@@ -0,0 +1,337 @@
+# app/leases/lease_search.py
+
+"""
+Lease search index maintenance.
+
+The lease list filters on values that live in other tables: medallion
+number, VIN, plate, driver id, driver name and TLC number, each as a
+"contains" match. Two tables keep them next to the lease:
+
+- `lease_search` holds one row per lease with the values the list sorts
+  on (those of the primary driver and the current plate) and the lease
+  amount;
+- `lease_search_terms` holds every suffix of every searchable value,
+  uppercased. A value contains the search term exactly when one of its
+  suffixes starts with it, so `lease_search_matches` is a prefix range seek
+  on the (field, term) index instead of a leading-wildcard ILIKE through
+  four joins.
+
+An `after_flush` listener re-derives the rows of the leases touched by each
+flush: leases changing medallion or vehicle, lease drivers and lease amount
+configurations changing, and medallion numbers, VINs, plates, driver names
+and TLC numbers being edited. `LeaseSearchService.rebuild` re-derives every
+row and is used for periodic reconciliation.
+"""
+
+from collections import defaultdict
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, event, false, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.drivers.models import Driver, TLCLicense
+from app.leases.models import (
+    Lease, LeaseConfiguration, LeaseDriver, LeaseSearch, LeaseSearchTerm,
+)
+from app.leases.schemas import LeaseSearchField
+from app.medallions.models import Medallion
+from app.utils.flush_tracking import attribute_values, has_changes, track_previous_values
+from app.utils.logger import get_logger
+from app.vehicles.models import Vehicle, VehicleRegistration
+from app.vehicles.plate_index import normalize_plate
+
+logger = get_logger(__name__)
+
+TERM_LENGTH = 64
+REFRESH_CHUNK_SIZE = 500
+
+# Attributes that change what a lease is found or sorted by
+LEASE_FIELDS = ("medallion_id", "vehicle_id")
+LEASE_DRIVER_FIELDS = ("lease_id", "driver_id", "is_active", "is_additional_driver")
+LEASE_CONFIGURATION_FIELDS = ("lease_id", "lease_breakup_type", "lease_limit")
+MEDALLION_FIELDS = ("medallion_number",)
+VEHICLE_FIELDS = ("vin",)
+REGISTRATION_FIELDS = ("vehicle_id", "plate_number", "status")
+DRIVER_FIELDS = ("driver_id", "full_name", "last_name", "tlc_license_number_id")
+TLC_LICENSE_FIELDS = ("tlc_license_number",)
+# References whose previous record must be refreshed too when they change
+track_previous_values(
+    LeaseDriver.lease_id, LeaseConfiguration.lease_id,
+    VehicleRegistration.vehicle_id, Driver.driver_id,
+)
+
+_DRIVER_FIELDS = (
+    LeaseSearchField.DRIVER_ID, LeaseSearchField.DRIVER_NAME, LeaseSearchField.TLC_NUMBER,
+)
+
+
+def normalize_search_value(field: LeaseSearchField, value: Optional[str]) -> str:
+    """Value as indexed: plates as plate keys, everything else uppercased"""
+    if field == LeaseSearchField.PLATE:
+        return normalize_plate(value)
+    return str(value or "").strip().upper()
+
+
+def search_suffixes(field: LeaseSearchField, value: Optional[str]) -> Set[str]:
+    """
+    Suffixes of a value to index, cut to TERM_LENGTH. Suffixes starting
+    with a space are left out; filter terms are stripped, so they never
+    start with one.
+    """
+    value = normalize_search_value(field, value)
+    return {value[i:i + TERM_LENGTH] for i in range(len(value)) if not value[i].isspace()}
+
+
+def lease_search_matches(
+    field: LeaseSearchField, values: Iterable[str], primary_drivers_only: bool = False
+):
+    """
+    Condition on Lease.id: the lease has a value of field containing any of
+    the given search terms (case-insensitive).
+
+    Args:
+        primary_drivers_only: For the driver fields, ignore additional drivers
+    """
+    terms = {normalize_search_value(field, value)[:TERM_LENGTH] for value in values} - {""}
+    if not terms:
+        return false()
+
+    stmt = select(LeaseSearchTerm.lease_id).where(
+        LeaseSearchTerm.field == field,
+        or_(*[LeaseSearchTerm.term.like(f"{term}%") for term in sorted(terms)]),
+    )
+    if primary_drivers_only and field in _DRIVER_FIELDS:
+        stmt = stmt.where(LeaseSearchTerm.is_additional_driver == False)
+    return Lease.id.in_(stmt)
+
+
+def _parse_amount(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+class LeaseSearchService:
+    """Service for maintaining the lease search projection and term index"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh(self, lease_ids: Iterable[int]) -> None:
+        """Re-derive the rows of the given leases in the caller's transaction"""
+        lease_ids = sorted(set(lease_ids))
+        for start in range(0, len(lease_ids), REFRESH_CHUNK_SIZE):
+            self._refresh_chunk(lease_ids[start:start + REFRESH_CHUNK_SIZE])
+
+    def rebuild(self) -> dict:
+        """
+        Re-derive the projection and term index of every lease.
+
+        Returns:
+            Dictionary with the number of leases and terms indexed.
+        """
+        logger.info("Rebuilding lease search index")
+
+        connection = self.db.connection()
+        connection.execute(delete(LeaseSearchTerm.__table__))
+        connection.execute(delete(LeaseSearch.__table__))
+        lease_ids = [lease_id for (lease_id,) in connection.execute(select(Lease.id))]
+        self.refresh(lease_ids)
+        self.db.commit()
+
+        result = {
+            "leases": self.db.query(func.count(LeaseSearch.lease_id)).scalar(),
+            "terms": self.db.query(func.count(LeaseSearchTerm.id)).scalar(),
+        }
+        logger.info("Lease search index rebuilt", **result)
+        return result
+
+    # ==========================================
+    # Internal Helpers
+    # ==========================================
+
+    def _refresh_chunk(self, lease_ids: List[int]) -> None:
+        # Core statements on the connection, so this is safe inside a flush
+        connection = self.db.connection()
+
+        leases = connection.execute(
+            select(Lease.id, Lease.vehicle_id, Medallion.medallion_number, Vehicle.vin)
+            .outerjoin(Medallion, Lease.medallion_id == Medallion.id)
+            .outerjoin(Vehicle, Lease.vehicle_id == Vehicle.id)
+            .where(Lease.id.in_(lease_ids))
+        ).all()
+
+        vehicle_ids = {lease.vehicle_id for lease in leases if lease.vehicle_id}
+        plates: Dict[int, list] = defaultdict(list)
+        if vehicle_ids:
+            for registration in connection.execute(
+                select(
+                    VehicleRegistration.vehicle_id,
+                    VehicleRegistration.plate_number,
+                    VehicleRegistration.status,
+                )
+                .where(VehicleRegistration.vehicle_id.in_(vehicle_ids))
+                .order_by(VehicleRegistration.id)
+            ):
+                plates[registration.vehicle_id].append(registration)
+
+        drivers: Dict[int, list] = defaultdict(list)
+        for lease_driver in connection.execute(
+            select(
+                LeaseDriver.lease_id,
+                LeaseDriver.is_active,
+                LeaseDriver.is_additional_driver,
+                Driver.driver_id,
+                Driver.full_name,
+                Driver.last_name,
+                TLCLicense.tlc_license_number,
+            )
+            .join(Driver, LeaseDriver.driver_id == Driver.driver_id)
+            .outerjoin(TLCLicense, Driver.tlc_license_number_id == TLCLicense.id)
+            .where(LeaseDriver.lease_id.in_(lease_ids))
+            .order_by(LeaseDriver.id)
+        ):
+            drivers[lease_driver.lease_id].append(lease_driver)
+
+        amounts: Dict[int, Optional[float]] = {}
+        for lease_id, lease_limit in connection.execute(
+            select(LeaseConfiguration.lease_id, LeaseConfiguration.lease_limit)
+            .where(
+                LeaseConfiguration.lease_id.in_(lease_ids),
+                LeaseConfiguration.lease_breakup_type == "lease_amount",
+            )
+            .order_by(LeaseConfiguration.id)
+        ):
+            amounts.setdefault(lease_id, _parse_amount(lease_limit))
+
+        projections, terms = [], []
+        for lease in leases:
+            registrations = plates.get(lease.vehicle_id, [])
+            current_plate = next(
+                (r for r in registrations if r.status == "Active"),
+                registrations[0] if registrations else None,
+            )
+            lease_drivers = drivers.get(lease.id, [])
+            primary = next(
+                chain(
+                    (d for d in lease_drivers if d.is_active and not d.is_additional_driver),
+                    (d for d in lease_drivers if not d.is_additional_driver),
+                    lease_drivers,
+                ),
+                None,
+            )
+
+            projections.append({
+                "lease_id": lease.id,
+                "medallion_number": lease.medallion_number,
+                "vin": lease.vin,
+                "plate_number": current_plate.plate_number if current_plate else None,
+                "driver_id": primary.driver_id if primary else None,
+                "driver_last_name": primary.last_name if primary else None,
+                "tlc_number": primary.tlc_license_number if primary else None,
+                "lease_amount": amounts.get(lease.id),
+            })
+
+            values = [
+                (LeaseSearchField.MEDALLION, lease.medallion_number, False),
+                (LeaseSearchField.VIN, lease.vin, False),
+                *((LeaseSearchField.PLATE, r.plate_number, False) for r in registrations),
+            ]
+            for d in lease_drivers:
+                additional = bool(d.is_additional_driver)
+                values += [
+                    (LeaseSearchField.DRIVER_ID, d.driver_id, additional),
+                    (LeaseSearchField.DRIVER_NAME, d.full_name, additional),
+                    (LeaseSearchField.TLC_NUMBER, d.tlc_license_number, additional),
+                ]
+            lease_terms = {
+                (field, term, additional)
+                for field, value, additional in values
+                for term in search_suffixes(field, value)
+            }
+            terms.extend(
+                {"lease_id": lease.id, "field": field, "term": term, "is_additional_driver": additional}
+                for field, term, additional in sorted(lease_terms)
+            )
+
+        connection.execute(delete(LeaseSearchTerm.__table__).where(LeaseSearchTerm.lease_id.in_(lease_ids)))
+        connection.execute(delete(LeaseSearch.__table__).where(LeaseSearch.lease_id.in_(lease_ids)))
+        if projections:
+            connection.execute(insert(LeaseSearch.__table__), projections)
+        if terms:
+            connection.execute(insert(LeaseSearchTerm.__table__), terms)
+
+
+@event.listens_for(Session, "after_flush")
+def maintain_lease_search(session, flush_context):
+    """
+    Refresh the search rows of the leases affected by what was just
+    flushed. Runs after the flush so the rows are derived from the written
+    values; attribute history tells which records changed and what they
+    referenced before.
+    """
+    lease_ids: Set[int] = set()
+    medallion_ids: Set[int] = set()
+    vehicle_ids: Set[int] = set()
+    driver_lookup_ids: Set[str] = set()
+    tlc_license_ids: Set[int] = set()
+
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Lease):
+            if has_changes(session, obj, LEASE_FIELDS):
+                lease_ids.add(obj.id)
+        elif isinstance(obj, LeaseDriver):
+            if has_changes(session, obj, LEASE_DRIVER_FIELDS):
+                lease_ids |= attribute_values(obj, "lease_id")
+        elif isinstance(obj, LeaseConfiguration):
+            if has_changes(session, obj, LEASE_CONFIGURATION_FIELDS):
+                lease_ids |= attribute_values(obj, "lease_id")
+        elif isinstance(obj, Medallion):
+            if obj not in session.new and has_changes(session, obj, MEDALLION_FIELDS):
+                medallion_ids.add(obj.id)
+        elif isinstance(obj, Vehicle):
+            if obj not in session.new and has_changes(session, obj, VEHICLE_FIELDS):
+                vehicle_ids.add(obj.id)
+        elif isinstance(obj, VehicleRegistration):
+            if has_changes(session, obj, REGISTRATION_FIELDS):
+                vehicle_ids |= attribute_values(obj, "vehicle_id")
+        elif isinstance(obj, Driver):
+            if obj not in session.new and has_changes(session, obj, DRIVER_FIELDS):
+                driver_lookup_ids |= attribute_values(obj, "driver_id")
+        elif isinstance(obj, TLCLicense):
+            if obj not in session.new and has_changes(session, obj, TLC_LICENSE_FIELDS):
+                tlc_license_ids.add(obj.id)
+
+    if not (lease_ids or medallion_ids or vehicle_ids or driver_lookup_ids or tlc_license_ids):
+        return
+
+    connection = session.connection()
+    if tlc_license_ids:
+        driver_lookup_ids.update(
+            driver_id for (driver_id,) in connection.execute(
+                select(Driver.driver_id).where(
+                    Driver.tlc_license_number_id.in_(tlc_license_ids), Driver.driver_id.isnot(None)
+                )
+            )
+        )
+    if driver_lookup_ids:
+        lease_ids.update(
+            lease_id for (lease_id,) in connection.execute(
+                select(LeaseDriver.lease_id).where(
+                    LeaseDriver.driver_id.in_(driver_lookup_ids), LeaseDriver.lease_id.isnot(None)
+                )
+            )
+        )
+    if medallion_ids or vehicle_ids:
+        lease_ids.update(
+            lease_id for (lease_id,) in connection.execute(
+                select(Lease.id).where(
+                    or_(Lease.medallion_id.in_(medallion_ids), Lease.vehicle_id.in_(vehicle_ids))
+                )
+            )
+        )
+
+    if lease_ids:
+        LeaseSearchService(session).refresh(lease_ids)
@@ -2,16 +2,22 @@
 
 from typing import Optional
 
+from datetime import datetime
+
 from sqlalchemy import (
     CHAR, Boolean, Column, Date,
-    Float, ForeignKey, Integer,
-    String, DateTime
+    Enum, Float, ForeignKey, Index,
+    Integer, String, DateTime, Text, UniqueConstraint
 )
 from sqlalchemy.orm import Mapped, foreign, mapped_column, relationship
 
 from app.core.config import settings
 from app.core.db import Base
 from app.esign.models import ESignEnvelope
+from app.leases.schemas import (
+    LeaseAvailabilityEntity, LeaseNotificationChannel, LeaseNotificationStatus,
+    LeaseSearchField,
+)
 from app.users.models import AuditMixin
 
 
@@ -509,3 +515,160 @@ class LeasePreset(Base, AuditMixin):
             "created_on": self.created_on,
             "updated_on": self.updated_on,
         }
+
+
+class LeaseNotification(Base):
+    """
+    Outbox of lease lifecycle notifications
+
+    Renewal, expiry and reminder runs add rows here in the same transaction
+    as the lease changes; app.leases.notification_outbox sends pending rows
+    in batches once that transaction has committed.
+    """
+
+    __tablename__ = "lease_notification_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    lease_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("leases.id"), nullable=True,
+        comment="Lease the message is about; NULL for run summaries"
+    )
+    kind: Mapped[str] = mapped_column(
+        String(64), nullable=False, comment="Message type, e.g. RENEWAL_REMINDER"
+    )
+    channel: Mapped[LeaseNotificationChannel] = mapped_column(
+        Enum(LeaseNotificationChannel), nullable=False
+    )
+    recipient: Mapped[str] = mapped_column(
+        String(255), nullable=False, comment="Email address or E.164 phone number"
+    )
+    subject: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    body_html: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    body_text: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[LeaseNotificationStatus] = mapped_column(
+        Enum(LeaseNotificationStatus), nullable=False, default=LeaseNotificationStatus.PENDING
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    queued_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_lease_notification_outbox_status_id", "status", "id"),
+    )
+
+
+class LeaseAvailability(Base):
+    """
+    Lease availability index
+
+    One row per vehicle, medallion and driver saying whether it can be
+    picked for a new lease, with the shift occupancy of its active leases.
+    Rows are refreshed on flush by app.leases.availability when leases,
+    lease drivers, vehicles, medallions or drivers change status, so the
+    lease wizard's candidate lists are an indexed read.
+    """
+
+    __tablename__ = "lease_availability"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    entity_type: Mapped[LeaseAvailabilityEntity] = mapped_column(
+        Enum(LeaseAvailabilityEntity), nullable=False
+    )
+    entity_id: Mapped[int] = mapped_column(
+        Integer, nullable=False, comment="vehicles.id, medallions.id or drivers.id"
+    )
+    can_lease: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    active_lease_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, comment="Active leases on the record"
+    )
+    day_shift_occupied: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, comment="An active lease holds the day shift"
+    )
+    night_shift_occupied: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, comment="An active lease holds the night shift"
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_id", name="uq_lease_availability_entity"),
+        Index("ix_lease_availability_candidates", "entity_type", "can_lease", "entity_id"),
+    )
+
+
+class LeaseSearch(Base):
+    """
+    Lease search projection
+
+    One row per lease with the values of its medallion, vehicle, drivers and
+    lease amount configuration that the lease list sorts on, so sorting
+    needs no join through those tables. Maintained on flush by
+    app.leases.lease_search together with LeaseSearchTerm.
+    """
+
+    __tablename__ = "lease_search"
+
+    lease_id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=False, comment="leases.id"
+    )
+    medallion_number: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    vin: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    plate_number: Mapped[Optional[str]] = mapped_column(
+        String(255), nullable=True, comment="Plate of the active registration, else the first"
+    )
+    driver_id: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True, comment="Lookup id of the primary driver"
+    )
+    driver_last_name: Mapped[Optional[str]] = mapped_column(
+        String(128), nullable=True, comment="Last name of the primary driver"
+    )
+    tlc_number: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True, comment="TLC license number of the primary driver"
+    )
+    lease_amount: Mapped[Optional[float]] = mapped_column(
+        Float, nullable=True, comment="lease_limit of the lease_amount configuration"
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    __table_args__ = (
+        Index("ix_lease_search_medallion_number", "medallion_number"),
+        Index("ix_lease_search_vin", "vin"),
+        Index("ix_lease_search_plate_number", "plate_number"),
+        Index("ix_lease_search_driver_id", "driver_id"),
+        Index("ix_lease_search_driver_last_name", "driver_last_name"),
+        Index("ix_lease_search_tlc_number", "tlc_number"),
+        Index("ix_lease_search_lease_amount", "lease_amount"),
+    )
+
+
+class LeaseSearchTerm(Base):
+    """
+    Lease search term index
+
+    One row per suffix of each searchable value of a lease (medallion
+    number, VIN, plate numbers, driver ids, names and TLC numbers),
+    uppercased. A "contains" filter becomes a prefix match on the term
+    column, which the lookup index serves as a range seek.
+    """
+
+    __tablename__ = "lease_search_terms"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    lease_id: Mapped[int] = mapped_column(Integer, nullable=False, comment="leases.id")
+    field: Mapped[LeaseSearchField] = mapped_column(Enum(LeaseSearchField), nullable=False)
+    term: Mapped[str] = mapped_column(
+        String(64), nullable=False, comment="A suffix of the uppercased value"
+    )
+    is_additional_driver: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False,
+        comment="The value belongs to an additional driver of the lease",
+    )
+
+    __table_args__ = (
+        Index("ix_lease_search_terms_lookup", "field", "term", "lease_id"),
+        Index("ix_lease_search_terms_lease_id", "lease_id"),
+    )
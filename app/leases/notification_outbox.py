@@ -0,0 +1,213 @@
+# app/leases/notification_outbox.py
+
+"""
+Lease notification outbox.
+
+Auto-renewal, expiry and renewal reminder runs do not call SES/SNS while
+they process leases. `NotificationOutbox` collects the run's messages and
+writes them to `lease_notification_outbox` with one INSERT, in the same
+transaction as the lease changes, so messages exist only for work that
+committed and a slow or failing provider cannot hold up or undo it.
+
+`dispatch_lease_notifications` sends pending rows in batches with one SES
+and one SNS client per run and records the outcomes with one UPDATE per
+batch. It is triggered after the run's transaction commits and also runs
+periodically to pick up anything left behind (see app.worker.config).
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import boto3
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.leases.models import LeaseNotification
+from app.leases.schemas import LeaseNotificationChannel, LeaseNotificationStatus
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DISPATCH_BATCH_SIZE = 200
+
+# Sends are retried on later dispatch runs until this many attempts failed
+MAX_SEND_ATTEMPTS = 3
+
+
+class NotificationOutbox:
+    """Messages queued by one lifecycle run"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.rows: List[dict] = []
+
+    def email(
+        self,
+        kind: str,
+        to_email: str,
+        subject: str,
+        body_html: str,
+        body_text: str,
+        lease_id: Optional[int] = None,
+    ) -> None:
+        """Queue an email"""
+        self._add(kind, LeaseNotificationChannel.EMAIL, to_email, body_text, lease_id,
+                  subject=subject, body_html=body_html)
+
+    def sms(self, kind: str, phone_number: str, message: str, lease_id: Optional[int] = None) -> None:
+        """Queue an SMS to an E.164 phone number"""
+        self._add(kind, LeaseNotificationChannel.SMS, phone_number, message, lease_id)
+
+    def _add(self, kind, channel, recipient, body_text, lease_id, subject=None, body_html=None):
+        self.rows.append({
+            "lease_id": lease_id,
+            "kind": kind,
+            "channel": channel,
+            "recipient": recipient,
+            "subject": subject,
+            "body_html": body_html,
+            "body_text": body_text,
+            "status": LeaseNotificationStatus.PENDING,
+            "attempts": 0,
+            "queued_at": datetime.utcnow(),
+        })
+
+    def flush(self) -> int:
+        """
+        Write the queued messages in the caller's transaction and dispatch
+        them once it commits. Returns the number of messages written.
+        """
+        if not self.rows:
+            return 0
+        count = len(self.rows)
+        self.db.execute(insert(LeaseNotification), self.rows)
+        self.rows = []
+
+        if not event.contains(self.db, "after_commit", _dispatch_after_commit):
+            event.listen(self.db, "after_commit", _dispatch_after_commit, once=True)
+
+        logger.info(f"Queued {count} lease notifications")
+        return count
+
+
+def _dispatch_after_commit(session) -> None:
+    from app.leases.tasks import dispatch_lease_notifications_task
+
+    try:
+        dispatch_lease_notifications_task.delay()
+    except Exception as e:
+        # The periodic dispatch run still picks the messages up
+        logger.error(f"Could not trigger lease notification dispatch: {str(e)}")
+
+
+class _Senders:
+    """SES and SNS clients shared by all messages of a dispatch run"""
+
+    def __init__(self):
+        self._ses = None
+        self._sns = None
+
+    def _client(self, service: str):
+        return boto3.client(
+            service,
+            aws_access_key_id=settings.aws_access_key_id,
+            aws_secret_access_key=settings.aws_secret_access_key,
+            region_name=settings.aws_region,
+        )
+
+    def send(self, message: LeaseNotification) -> str:
+        """Send one message and return the provider's message id"""
+        if message.channel == LeaseNotificationChannel.EMAIL:
+            if self._ses is None:
+                self._ses = self._client("ses")
+            params = {
+                "Source": settings.aws_ses_sender_email,
+                "Destination": {"ToAddresses": [message.recipient]},
+                "Message": {
+                    "Subject": {"Data": message.subject or "", "Charset": "UTF-8"},
+                    "Body": {
+                        "Text": {"Data": message.body_text, "Charset": "UTF-8"},
+                        "Html": {"Data": message.body_html or message.body_text, "Charset": "UTF-8"},
+                    },
+                },
+            }
+            if settings.aws_ses_configuration_set:
+                params["ConfigurationSetName"] = settings.aws_ses_configuration_set
+            return self._ses.send_email(**params)["MessageId"]
+
+        if self._sns is None:
+            self._sns = self._client("sns")
+        attributes = {
+            "AWS.SNS.SMS.SMSType": {"DataType": "String", "StringValue": "Transactional"}
+        }
+        if settings.aws_sns_sender_id:
+            attributes["AWS.SNS.SMS.SenderID"] = {
+                "DataType": "String", "StringValue": settings.aws_sns_sender_id
+            }
+        return self._sns.publish(
+            PhoneNumber=message.recipient,
+            Message=message.body_text,
+            MessageAttributes=attributes,
+        )["MessageId"]
+
+
+def dispatch_lease_notifications(db: Session, batch_size: int = DISPATCH_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Send pending lease notifications.
+
+    Batches are claimed with SELECT ... FOR UPDATE SKIP LOCKED so concurrent
+    dispatch runs do not send the same message twice; each batch's outcomes
+    are committed before the next batch is claimed.
+
+    Returns:
+        Counts of sent messages and failed attempts
+    """
+    senders = _Senders()
+    sent = failed = 0
+    last_id = 0
+
+    while True:
+        # Walk forward by id so messages that fail in this run are not retried in it
+        batch = (
+            db.query(LeaseNotification)
+            .filter(
+                LeaseNotification.status == LeaseNotificationStatus.PENDING,
+                LeaseNotification.id > last_id,
+            )
+            .order_by(LeaseNotification.id.asc())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not batch:
+            break
+
+        outcomes = []
+        for message in batch:
+            outcome = {"id": message.id, "attempts": message.attempts + 1}
+            try:
+                message_id = senders.send(message)
+                outcome.update(status=LeaseNotificationStatus.SENT, sent_at=datetime.utcnow(), last_error=None)
+                sent += 1
+                logger.info(f"Sent {message.channel.value} {message.kind} to {message.recipient}, MessageId: {message_id}")
+            except Exception as e:
+                exhausted = outcome["attempts"] >= MAX_SEND_ATTEMPTS
+                outcome.update(
+                    status=LeaseNotificationStatus.FAILED if exhausted else LeaseNotificationStatus.PENDING,
+                    sent_at=None,
+                    last_error=str(e),
+                )
+                failed += 1
+                logger.error(f"Error sending {message.channel.value} to {message.recipient}: {str(e)}")
+            outcomes.append(outcome)
+
+        db.execute(update(LeaseNotification), outcomes)
+        db.commit()
+
+        last_id = batch[-1].id
+        if len(batch) < batch_size:
+            break
+
+    logger.info(f"Lease notification dispatch finished: {sent} sent, {failed} failed")
+    return {"sent": sent, "failed": failed}
@@ -7,6 +7,7 @@ from typing import Any, Dict, Optional
 
 import aiohttp
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
@@ -20,7 +21,9 @@ from app.leases.schemas import (
     LeaseStatus,
     LeaseType,
 )
-from app.leases.search_service import format_lease_export, format_lease_response
+from app.leases.search_service import (
+    format_lease_export, format_lease_response, format_lease_responses,
+)
 from app.leases.services import lease_service
 from app.leases.utils import (
     calculate_short_term_lease_schedule,
@@ -86,30 +89,38 @@ def can_lease(
         ) from e
 
 
+def _get_signed_lease_driver_documents(db: Session, lease_id: str) -> list:
+    """Get the enveloped documents of the active drivers on a lease"""
+    lease = lease_service.get_lease(db, lease_id=lease_id)
+
+    if not lease:
+        raise HTTPException(status_code=404, detail="Lease not found")
+
+    lease_driver_docs = []
+    for lease_driver in lease.lease_driver:
+        if not lease_driver.is_active:
+            continue
+
+        doc = lease_service.get_lease_driver_documents(
+            db, lease_driver_id=lease_driver.id, status=True
+        )
+
+        if doc and doc.document_envelope_id:
+            lease_driver_docs.append(doc)
+
+    return lease_driver_docs
+
+
 @router.get("/lease/{lease_id}/documents/preview", tags=["Leases"])
 async def get_lease_documents_preview(
     lease_id: str, db: Session = Depends(get_db), _: User = Depends(get_current_user)
 ):
     """Get preview of all documents associated with a lease from DocuSign"""
     try:
-        # Get the lease
-        lease = lease_service.get_lease(db, lease_id=lease_id)
-
-        if not lease:
-            raise HTTPException(status_code=404, detail="Lease not found")
-
-        # Get all active lease driver documents
-        lease_driver_docs = []
-        for lease_driver in lease.lease_driver:
-            if not lease_driver.is_active:
-                continue
-
-            doc = lease_service.get_lease_driver_documents(
-                db, lease_driver_id=lease_driver.id, status=True
-            )
-
-            if doc and doc.document_envelope_id:
-                lease_driver_docs.append(doc)
+        # Database lookups use the synchronous session; keep them off the event loop
+        lease_driver_docs = await run_in_threadpool(
+            _get_signed_lease_driver_documents, db, lease_id
+        )
 
         if not lease_driver_docs:
             return []
@@ -216,7 +227,7 @@ def list_leases(
             exclude_additional_drivers=exclude_additional_drivers,
             multiple=True,
         )
-        lease_info = [format_lease_response(db, lease) for lease in leases]
+        lease_info = format_lease_responses(db, leases)
         lease_types = [lease_type.value for lease_type in LeaseType]
         lease_statuses = [status.value for status in LeaseStatus]
 
@@ -724,7 +735,8 @@ def process_lease_auto_renewals(
     3. For DOV, increments the segment and updates term dates
     4. For all types, the term start date is the renewal date and end date is calculated
        from the configured renewal period per lease type
-    5. Sends admin notification email with summary of all renewals
+    5. Queues the admin notification email with summary of all renewals; it is
+       sent from the lease notification outbox once the renewals are committed
     """
     try:
         from datetime import datetime
@@ -774,8 +786,9 @@ def send_lease_renewal_reminders(
     This endpoint:
     1. Finds all active leases expiring within the configured reminder period
     2. Fetches email and SMS templates from S3
-    3. Sends email (via SES) and SMS (via SNS) reminders to all drivers on the lease
-    4. Returns a summary of reminders sent
+    3. Queues email (via SES) and SMS (via SNS) reminders to all drivers on the lease;
+       they are sent from the lease notification outbox once the request commits
+    4. Returns a summary of reminders queued
 
     Parameters:
         - check_date: Date to check from (default: current date, format: YYYY-MM-DD)
@@ -829,7 +842,8 @@ def process_lease_expiries_endpoint(
     This endpoint:
     1. Finds all active leases with is_auto_renewed = False that have passed their lease_end_date
     2. Marks them as EXPIRED
-    3. Sends admin notification email with summary of all expired leases
+    3. Queues the admin notification email with summary of all expired leases; it is
+       sent from the lease notification outbox once the expiries are committed
 
     This is separate from auto-renewal:
     - Auto-renewal handles active renewal of leases
@@ -33,6 +33,40 @@ class LeaseStatus(str, PyEnum):
     CANCELLED = "Cancelled"
 
 
+class LeaseNotificationChannel(str, PyEnum):
+    """Delivery channel of a queued lease notification"""
+
+    EMAIL = "EMAIL"
+    SMS = "SMS"
+
+
+class LeaseAvailabilityEntity(str, PyEnum):
+    """Kind of record tracked in the lease availability index"""
+
+    MEDALLION = "MEDALLION"
+    VEHICLE = "VEHICLE"
+    DRIVER = "DRIVER"
+
+
+class LeaseSearchField(str, PyEnum):
+    """Lease list filter served by the lease search term index"""
+
+    MEDALLION = "MEDALLION"
+    VIN = "VIN"
+    PLATE = "PLATE"
+    DRIVER_ID = "DRIVER_ID"
+    DRIVER_NAME = "DRIVER_NAME"
+    TLC_NUMBER = "TLC_NUMBER"
+
+
+class LeaseNotificationStatus(str, PyEnum):
+    """Delivery status of a queued lease notification"""
+
+    PENDING = "PENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
+
 class LongTermFinancialInfo(BaseModel):
     """
     Financial information for a long term lease
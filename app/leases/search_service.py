@@ -1,16 +1,18 @@
 ### app/leases/search_service.py
 
 # Third party imports
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.sql import desc, func
 
 # Local imports
-from app.bpm.models import CaseEntity
+from app.bpm.models import Case, CaseEntity, CaseStatus, CaseType
 from app.core.config import settings
-from app.leases.models import Lease, LeaseDriver, LeaseDriverDocument
-from app.medallions.utils import format_medallion_response
+from app.drivers.models import Driver
+from app.leases.models import Lease, LeaseConfiguration, LeaseDriver, LeaseDriverDocument
+from app.medallions.models import Medallion, MedallionOwner
 from app.uploads.models import Document
 from app.utils.general import format_us_phone_number
+from app.vehicles.models import Vehicle
 
 
 def get_active_leases(db: Session):
@@ -33,77 +35,180 @@ def get_active_leases(db: Session):
     )
 
 
-def format_lease_response(db: Session, lease):
-    """Format a lease response"""
-    from app.bpm.models import Case, CaseEntity
-    from app.leases.models import LeaseConfiguration
+def _medallion_owner_name(medallion) -> str:
+    """Owner name as format_medallion_response reports it"""
+    owner = medallion.owner
+    if owner:
+        if owner.medallion_owner_type == "I" and owner.individual:
+            return f"{owner.individual.first_name} {owner.individual.last_name}"
+        if owner.medallion_owner_type == "C" and owner.corporation:
+            return owner.corporation.name
+    return "Unknown"
 
-    # Get lease amount from configurations
-    lease_amount = 0.0
-    lease_config = (
-        db.query(LeaseConfiguration)
-        .filter(
-            LeaseConfiguration.lease_id == lease.id,
-            LeaseConfiguration.lease_breakup_type == "lease_amount",
-        )
-        .first()
-    )
 
-    if lease_config and lease_config.lease_limit:
-        lease_amount = float(lease_config.lease_limit)
+def _case_detail(case):
+    if not case:
+        return None
+    return {
+        "case_no": case.case_no,
+        "case_status": case.case_status.name if case.case_status else None,
+    }
 
-    # Get driver lease case (DRVLEA) - regardless of status
-    case_detail = None
-    lease_termination_case_no = None
 
-    from app.bpm.models import Case, CaseStatus, CaseType
+def _load_lease_list_data(db: Session, leases) -> dict:
+    """
+    Everything format_lease_responses reads beyond the leases themselves,
+    loaded for all leases at once: one query per relationship level and one
+    per lookup, whatever the number of leases.
+    """
+    lease_ids = [lease.id for lease in leases]
+    lease_keys = [str(lease_id) for lease_id in lease_ids]
 
-    # Get DRIVERLEASE case (prefix DRVLEA) - regardless of status
-    driverlease_case_entity = (
-        db.query(CaseEntity)
+    # Populates the relationships of the already loaded leases
+    db.query(Lease).options(
+        selectinload(Lease.medallion)
+        .selectinload(Medallion.owner)
+        .options(
+            selectinload(MedallionOwner.individual),
+            selectinload(MedallionOwner.corporation),
+        ),
+        selectinload(Lease.vehicle).selectinload(Vehicle.registrations),
+        selectinload(Lease.lease_driver).options(
+            selectinload(LeaseDriver.documents),
+            selectinload(LeaseDriver.driver).options(
+                selectinload(Driver.tlc_license), selectinload(Driver.dmv_license)
+            ),
+        ),
+    ).filter(Lease.id.in_(lease_ids)).all()
+
+    lease_amounts = {}
+    for lease_id, lease_limit in (
+        db.query(LeaseConfiguration.lease_id, LeaseConfiguration.lease_limit)
+        .filter(
+            LeaseConfiguration.lease_id.in_(lease_ids),
+            LeaseConfiguration.lease_breakup_type == "lease_amount",
+        )
+        .order_by(LeaseConfiguration.id)
+    ):
+        lease_amounts.setdefault(lease_id, lease_limit)
+
+    # Latest DRIVERLEASE case (prefix DRVLEA) per lease - regardless of status
+    driverlease_cases = {}
+    for identifier_value, case in (
+        db.query(CaseEntity.identifier_value, Case)
         .join(Case, CaseEntity.case_no == Case.case_no)
         .join(CaseType, Case.case_type_id == CaseType.id)
+        .options(joinedload(Case.case_status))
         .filter(
             CaseEntity.entity_name == "lease",
             CaseEntity.identifier == "id",
-            CaseEntity.identifier_value == str(lease.id),
+            CaseEntity.identifier_value.in_(lease_keys),
             CaseType.prefix == "DRVLEA",
         )
         .order_by(CaseEntity.created_on.desc())
-        .first()
-    )
+    ):
+        driverlease_cases.setdefault(identifier_value, case)
 
-    if driverlease_case_entity:
-        case = (
-            db.query(Case)
-            .filter(Case.case_no == driverlease_case_entity.case_no)
-            .first()
-        )
-        if case:
-            case_detail = {
-                "case_no": case.case_no,
-                "case_status": case.case_status.name if case.case_status else None,
-            }
-
-    # Check for TERMINATELEASE case (prefix TERMLEA) - only OPEN/IN_PROGRESS
-    terminate_case_entity = (
-        db.query(CaseEntity)
+    # Latest open TERMINATELEASE case (prefix TERMLEA) per lease
+    termination_cases = {}
+    for identifier_value, case_no in (
+        db.query(CaseEntity.identifier_value, CaseEntity.case_no)
         .join(Case, CaseEntity.case_no == Case.case_no)
         .join(CaseType, Case.case_type_id == CaseType.id)
         .join(CaseStatus, Case.case_status_id == CaseStatus.id)
         .filter(
             CaseEntity.entity_name == "lease",
             CaseEntity.identifier == "id",
-            CaseEntity.identifier_value == str(lease.id),
+            CaseEntity.identifier_value.in_(lease_keys),
             CaseType.prefix == "TERMLEA",
             CaseStatus.name.in_(["OPEN", "IN_PROGRESS"]),
         )
         .order_by(CaseEntity.created_on.desc())
-        .first()
-    )
+    ):
+        termination_cases.setdefault(identifier_value, case_no)
+
+    lease_drivers = [
+        lease_driver for lease in leases for lease_driver in lease.lease_driver
+    ]
+
+    document_ids = {
+        lease_driver_doc.document_id
+        for lease_driver in lease_drivers
+        for lease_driver_doc in lease_driver.documents
+        if lease_driver_doc.document_id
+    }
+    documents = {}
+    if document_ids:
+        documents = {
+            document.id: document
+            for document in db.query(Document).filter(Document.id.in_(document_ids))
+        }
+
+    # Cases of additional drivers: the latest one for active drivers, the
+    # first one for removed drivers
+    additional_driver_ids = {
+        lease_driver.driver.driver_id
+        for lease_driver in lease_drivers
+        if lease_driver.is_additional_driver and lease_driver.driver
+    }
+    latest_driver_case_nos, first_driver_case_nos = {}, {}
+    cases_by_no = {}
+    if additional_driver_ids:
+        entities = (
+            db.query(CaseEntity.identifier_value, CaseEntity.case_no, CaseEntity.id)
+            .filter(
+                CaseEntity.entity_name == "lease_drivers",
+                CaseEntity.identifier == "driver_id",
+                CaseEntity.identifier_value.in_(additional_driver_ids),
+            )
+            .order_by(CaseEntity.created_on.desc())
+            .all()
+        )
+        for identifier_value, case_no, _ in entities:
+            latest_driver_case_nos.setdefault(identifier_value, case_no)
+        for identifier_value, case_no, _ in sorted(entities, key=lambda entity: entity.id):
+            first_driver_case_nos.setdefault(identifier_value, case_no)
+
+        case_nos = set(latest_driver_case_nos.values()) | set(first_driver_case_nos.values())
+        for case in (
+            db.query(Case)
+            .options(joinedload(Case.case_status))
+            .filter(Case.case_no.in_(case_nos))
+            .order_by(Case.created_on.desc())
+        ):
+            cases_by_no.setdefault(case.case_no, case)
+
+    return {
+        "lease_amounts": lease_amounts,
+        "driverlease_cases": driverlease_cases,
+        "termination_cases": termination_cases,
+        "documents": documents,
+        "latest_driver_case_nos": latest_driver_case_nos,
+        "first_driver_case_nos": first_driver_case_nos,
+        "cases_by_no": cases_by_no,
+    }
+
+
+def format_lease_response(db: Session, lease):
+    """Format a lease response"""
+    return format_lease_responses(db, [lease])[0]
+
+
+def format_lease_responses(db: Session, leases) -> list:
+    """Format lease responses for a page of leases in a fixed number of queries"""
+    if not leases:
+        return []
+
+    data = _load_lease_list_data(db, leases)
+    return [_format_lease(lease, data) for lease in leases]
 
-    if terminate_case_entity:
-        lease_termination_case_no = terminate_case_entity.case_no
+
+def _format_lease(lease, data: dict) -> dict:
+    # Get lease amount from configurations
+    lease_amount = 0.0
+    lease_limit = data["lease_amounts"].get(lease.id)
+    if lease_limit:
+        lease_amount = float(lease_limit)
 
     # Determine shift information for shift-lease types
     shift_type = ""
@@ -139,17 +244,16 @@ def format_lease_response(db: Session, lease):
         "current_segment": lease.current_segment,
         "total_segments": lease.total_segments,
         "lease_amount": f"{lease_amount:,.2f}",
-        "case_detail": case_detail,
-        "lease_termination_case_no": lease_termination_case_no,
+        "case_detail": _case_detail(data["driverlease_cases"].get(str(lease.id))),
+        "lease_termination_case_no": data["termination_cases"].get(str(lease.id)),
         "shift_type": shift_type,
         "driver": [],
         "removed_drivers": [],
         "has_documents": False,
     }
 
-    medallion = format_medallion_response(lease.medallion) if lease.medallion else None
     lease_details["medallion_owner"] = (
-        medallion["medallion_owner"] if medallion else None
+        _medallion_owner_name(lease.medallion) if lease.medallion else None
     )
 
     for lease_driver in lease.lease_driver:
@@ -161,77 +265,44 @@ def format_lease_response(db: Session, lease):
             lease_details["has_documents"] = True
 
         driver = lease_driver.driver
+        # MIGRATION: This is a migration issue where lease driver is present but driver is not present
+        if not driver:
+            continue
 
-        # Fetch all documents for this driver from lease_driver.documents relationship
         driver_documents = []
-
-        # Use the lease_driver.documents relationship which contains LeaseDriverDocument records
         for lease_driver_doc in lease_driver.documents:
-            # Fetch the actual document from the Document table using document_id
-            if lease_driver_doc.document_id:
-                document = (
-                    db.query(Document)
-                    .filter(Document.id == lease_driver_doc.document_id)
-                    .first()
+            document = data["documents"].get(lease_driver_doc.document_id)
+            if document:
+                driver_documents.append(
+                    {
+                        "document_id": document.id,
+                        "document_name": document.document_name,
+                        "document_type": document.document_type,
+                        "document_format": document.document_format,
+                        "document_date": document.document_date.strftime("%Y-%m-%d")
+                        if document.document_date
+                        else None,
+                        "document_size": document.document_actual_size,
+                        "document_note": document.document_note,
+                        "presigned_url": document.presigned_url,
+                        "object_type": document.object_type,
+                        "created_on": document.created_on.strftime(
+                            "%Y-%m-%d %H:%M:%S"
+                        )
+                        if document.created_on
+                        else None,
+                        "has_frontend_signed": lease_driver_doc.has_frontend_signed,
+                        "has_driver_signed": lease_driver_doc.has_driver_signed,
+                        "document_envelope_id": lease_driver_doc.document_envelope_id,
+                        "signing_type": lease_driver_doc.signing_type,
+                    }
                 )
-                if document:
-                    driver_documents.append(
-                        {
-                            "document_id": document.id,
-                            "document_name": document.document_name,
-                            "document_type": document.document_type,
-                            "document_format": document.document_format,
-                            "document_date": document.document_date.strftime("%Y-%m-%d")
-                            if document.document_date
-                            else None,
-                            "document_size": document.document_actual_size,
-                            "document_note": document.document_note,
-                            "presigned_url": document.presigned_url,
-                            "object_type": document.object_type,
-                            "created_on": document.created_on.strftime(
-                                "%Y-%m-%d %H:%M:%S"
-                            )
-                            if document.created_on
-                            else None,
-                            "has_frontend_signed": lease_driver_doc.has_frontend_signed,
-                            "has_driver_signed": lease_driver_doc.has_driver_signed,
-                            "document_envelope_id": lease_driver_doc.document_envelope_id,
-                            "signing_type": lease_driver_doc.signing_type,
-                        }
-                    )
 
         # Get case details for additional driver
         case_detail = None
         if lease_driver.is_additional_driver:
-            case_entity = (
-                db.query(CaseEntity)
-                .filter(
-                    CaseEntity.entity_name == "lease_drivers",
-                    CaseEntity.identifier == "driver_id",
-                    CaseEntity.identifier_value == driver.driver_id,
-                )
-                .order_by(CaseEntity.created_on.desc())
-                .first()
-            )
-            if case_entity:
-                from app.bpm.models import Case
-
-                case = (
-                    db.query(Case)
-                    .filter(Case.case_no == case_entity.case_no)
-                    .order_by(Case.created_on.desc())
-                    .first()
-                )
-                if case:
-                    case_detail = {
-                        "case_no": case.case_no,
-                        "case_status": case.case_status.name
-                        if case.case_status
-                        else None,
-                    }
-        # MIGRATION: This is a migration issue where lease driver is present but driver is not present
-        if not driver:
-            continue
+            case_no = data["latest_driver_case_nos"].get(driver.driver_id)
+            case_detail = _case_detail(data["cases_by_no"].get(case_no))
 
         lease_details["driver"].append(
             {
@@ -268,28 +339,11 @@ def format_lease_response(db: Session, lease):
             continue
 
         driver = lease_driver.driver
+        if not driver:
+            continue
 
-        # Get case details for removed additional driver
-        case_entity = (
-            db.query(CaseEntity)
-            .filter(
-                CaseEntity.entity_name == "lease_drivers",
-                CaseEntity.identifier == "driver_id",
-                CaseEntity.identifier_value == driver.driver_id,
-            )
-            .first()
-        )
-
-        case_detail = None
-        if case_entity:
-            from app.bpm.models import Case
-
-            case = db.query(Case).filter(Case.case_no == case_entity.case_no).first()
-            if case:
-                case_detail = {
-                    "case_no": case.case_no,
-                    "case_status": case.case_status.name if case.case_status else None,
-                }
+        case_no = data["first_driver_case_nos"].get(driver.driver_id)
+        case_detail = _case_detail(data["cases_by_no"].get(case_no))
 
         lease_details["removed_drivers"].append(
             {
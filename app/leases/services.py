@@ -4,28 +4,32 @@ import os
 import tempfile
 from decimal import Decimal
 from datetime import date, datetime, timezone
-from typing import List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 
-from sqlalchemy import and_, asc, desc, func, or_, select
+from sqlalchemy import Float, and_, asc, cast, desc, func, insert, or_, select, update
 from sqlalchemy.orm import Session, joinedload
 
-from app.drivers.models import Driver, TLCLicense
+from app.drivers.models import Driver
 from app.drivers.schemas import DOVLease
 from app.drivers.services import driver_service
 from app.esign.esign_client import ESignClient
 from app.leases.models import (
     Lease,
+    LeaseAvailability,
     LeaseConfiguration,
     LeaseDriver,
     LeaseDriverDocument,
     LeasePaymentConfiguration,
     LeasePreset,
     LeaseSchedule,
+    LeaseSearch,
 )
+from app.leases.lease_search import lease_search_matches
 from app.leases.schemas import (
+    LeaseAvailabilityEntity,
     LeasePresetCreate,
     LeasePresetUpdate,
-    LeaseStatus,
+    LeaseSearchField,
     LongTermLease,
     MedallionOnlyLease,
     ShiftLease,
@@ -35,8 +39,9 @@ from app.medallions.models import Medallion
 from app.uploads.models import Document
 from app.utils.logger import get_logger
 from app.utils.s3_utils import s3_utils
+from app.utils.money import to_cents
+from app.utils.schedule_kernel import WeeklyLeaseTerm, weekly_lease_installments
 from app.vehicles.models import Vehicle, VehicleRegistration
-from app.vehicles.schemas import VehicleStatus
 
 logger = get_logger(__name__)
 
@@ -72,13 +77,6 @@ class LeaseService:
         """Get a lease by ID, vehicle ID, or status"""
         try:
             query = db.query(Lease)
-            joined_medallion = False
-            joined_vehicle = False
-            joined_vehicle_registration = False
-            joined_lease_driver = False
-            joined_driver = False
-            joined_tlc_license = False
-            joined_lease_configuration = False
 
             if lookup_id:
                 query = query.filter(Lease.id == lookup_id)
@@ -92,124 +90,41 @@ class LeaseService:
 
             if vehicle_id:
                 query = query.filter(Lease.vehicle_id == vehicle_id)
-            if medallion_number:
-                medallion_numbers = [
-                    i.strip() for i in medallion_number.split(",") if i.strip()
-                ]
-                if not joined_medallion:
-                    query = query.join(Medallion, Lease.medallion_id == Medallion.id)
-                    joined_medallion = True
-                query = query.filter(
-                    or_(
-                        *[
-                            Medallion.medallion_number.ilike(f"%{number}%")
-                            for number in medallion_numbers
-                        ]
-                    )
-                )
-            if vin_number:
-                vins = [i.strip() for i in vin_number.split(",") if i.strip()]
-                if not joined_vehicle:
-                    query = query.join(Vehicle, Lease.vehicle_id == Vehicle.id)
-                    joined_vehicle = True
-                query = query.filter(
-                    or_(*[Vehicle.vin.ilike(f"%{vin}%") for vin in vins])
-                )
-            if plate_number:
-                plate_numbers = [
-                    i.strip() for i in plate_number.split(",") if i.strip()
-                ]
-                if not joined_vehicle:
-                    query = query.join(Vehicle, Lease.vehicle_id == Vehicle.id)
-                    joined_vehicle = True
-                if not joined_vehicle_registration:
-                    query = query.join(
-                        VehicleRegistration,
-                        Vehicle.id == VehicleRegistration.vehicle_id,
-                    )
-                    joined_vehicle_registration = True
-                query = query.filter(
-                    or_(
-                        *[
-                            VehicleRegistration.plate_number.ilike(f"%{plate}%")
-                            for plate in plate_numbers
-                        ]
-                    )
-                )
 
-            if driver_id:
-                driver_ids = [i.strip() for i in str(driver_id).split(",") if i.strip()]
-                if not joined_lease_driver:
-                    query = query.join(LeaseDriver, Lease.id == LeaseDriver.lease_id)
-                    joined_lease_driver = True
-                if not joined_driver:
-                    query = query.join(
-                        Driver, LeaseDriver.driver_id == Driver.driver_id
+            # Medallion, vehicle and driver filters are contains-matches served
+            # by the lease search term index (app.leases.lease_search)
+            search_filters = {
+                LeaseSearchField.MEDALLION: medallion_number,
+                LeaseSearchField.VIN: vin_number,
+                LeaseSearchField.PLATE: plate_number,
+                LeaseSearchField.DRIVER_ID: driver_id,
+                LeaseSearchField.DRIVER_NAME: driver_name,
+                LeaseSearchField.TLC_NUMBER: tlc_number,
+            }
+            for field, value in search_filters.items():
+                if value:
+                    values = [i.strip() for i in str(value).split(",") if i.strip()]
+                    query = query.filter(
+                        lease_search_matches(
+                            field,
+                            values,
+                            primary_drivers_only=exclude_additional_drivers is not None,
+                        )
                     )
-                    joined_driver = True
 
-                query = query.filter(
-                    or_(*[Driver.driver_id.ilike(f"%{id}%") for id in driver_ids])
-                )
-
-            if driver_name:
-                driver_names = [i.strip() for i in driver_name.split(",") if i.strip()]
-                if not joined_lease_driver:
-                    query = query.join(LeaseDriver, Lease.id == LeaseDriver.lease_id)
-                    joined_lease_driver = True
-                if not joined_driver:
-                    query = query.join(
-                        Driver, LeaseDriver.driver_id == Driver.driver_id
-                    )
-                    joined_driver = True
-                query = query.filter(
-                    or_(
-                        *[
-                            (Driver.full_name.ilike(f"%{name}%"))
-                            for name in driver_names
-                        ]
-                    )
-                )
             # ✅ NEW: Exclude additional drivers if requested
             if exclude_additional_drivers is not None:
                 logger.info(
                     f"Filtering leases for tlc_number={tlc_number}: excluding additional drivers"
                 )
-                if not joined_lease_driver:
-                    query = query.join(
-                        LeaseDriver, Lease.id == LeaseDriver.lease_id
-                    )
-                    joined_lease_driver = True
-                    
                 query = query.filter(
-                    or_(
-                        LeaseDriver.is_additional_driver == False,
-                        LeaseDriver.is_additional_driver.is_(None)
-                    )
-                )
-
-            if tlc_number:
-                tlc_numbers = [i.strip() for i in tlc_number.split(",") if i.strip()]
-                if not joined_lease_driver:
-                    query = query.join(LeaseDriver, Lease.id == LeaseDriver.lease_id)
-                    joined_lease_driver = True
-                if not joined_driver:
-                    query = query.join(
-                        Driver, LeaseDriver.driver_id == Driver.driver_id
-                    )
-                    joined_driver = True
-                if not joined_tlc_license:
-                    query = query.join(
-                        TLCLicense, Driver.tlc_license_number_id == TLCLicense.id
-                    )
-                    joined_tlc_license = True
-                    
-                query = query.filter(
-                    or_(
-                        *[
-                            TLCLicense.tlc_license_number.ilike(f"%{tlc}%")
-                            for tlc in tlc_numbers
-                        ]
+                    Lease.id.in_(
+                        select(LeaseDriver.lease_id).where(
+                            or_(
+                                LeaseDriver.is_additional_driver == False,
+                                LeaseDriver.is_additional_driver.is_(None),
+                            )
+                        )
                     )
                 )
 
@@ -220,199 +135,57 @@ class LeaseService:
             if status:
                 query = query.filter(Lease.lease_status == status)
 
-            if lease_amount is not None:
-                from sqlalchemy import Float, cast
+            # Sort values from other tables come from the lease search projection
+            search_sort_attr = {
+                "vin_no": LeaseSearch.vin,
+                "medallion_no": LeaseSearch.medallion_number,
+                "plate_no": LeaseSearch.plate_number,
+                "driver_id": LeaseSearch.driver_id,
+                "driver_name": LeaseSearch.driver_last_name,
+                "tlc_number": LeaseSearch.tlc_number,
+                "lease_amount": LeaseSearch.lease_amount,
+            }
+            sort_attr = {
+                "lease_id": Lease.lease_id,
+                "created_on": Lease.created_on,
+                "lease_type": Lease.lease_type,
+                "lease_start_date": Lease.lease_start_date,
+                "lease_end_date": Lease.lease_end_date,
+                "lease_status": Lease.lease_status,
+                **search_sort_attr,
+            }
+
+            if sort_by in search_sort_attr:
+                query = query.outerjoin(LeaseSearch, LeaseSearch.lease_id == Lease.id)
 
+            if lease_amount is not None:
                 # Parse comma-separated lease amounts
                 lease_amounts = [
                     float(amt.strip()) for amt in str(lease_amount).split(",") if amt.strip()
                 ]
-
-                if not joined_lease_configuration:
-                    query = query.join(
-                        LeaseConfiguration,
-                        and_(
-                            LeaseConfiguration.lease_id == Lease.id,
-                            LeaseConfiguration.lease_breakup_type == "lease_amount",
-                        ),
-                    )
-                    joined_lease_configuration = True
-
-                # Filter by multiple lease amounts using OR
+                # Any lease_amount configuration of the lease may match, not
+                # only the one the search projection sorts on
                 query = query.filter(
-                    or_(
-                        *[
-                            cast(LeaseConfiguration.lease_limit, Float) == amt
-                            for amt in lease_amounts
-                        ]
+                    Lease.id.in_(
+                        select(LeaseConfiguration.lease_id).where(
+                            LeaseConfiguration.lease_breakup_type == "lease_amount",
+                            cast(LeaseConfiguration.lease_limit, Float).in_(lease_amounts),
+                        )
                     )
                 )
 
             if sort_by:
-                sort_attr = [
-                    "lease_id",
-                    "created_on",
-                    "lease_type",
-                    "lease_start_date",
-                    "lease_end_date",
-                    "lease_status",
-                    "vin_no",
-                    "medallion_no",
-                    "plate_no",
-                    "driver_id",
-                    "driver_name",
-                    "tlc_number",
-                    "lease_amount",
-                ]
                 if sort_by in sort_attr:
-                    if sort_by == "vin_no":
-                        if not joined_vehicle:
-                            query = query.join(Vehicle, Lease.vehicle_id == Vehicle.id)
-                            joined_vehicle = True
-                        query = query.order_by(
-                            Vehicle.vin.asc()
-                            if sort_order == "asc"
-                            else Vehicle.vin.desc()
-                        )
-                    if sort_by == "medallion_no":
-                        if not joined_medallion:
-                            query = query.join(
-                                Medallion, Lease.medallion_id == Medallion.id
-                            )
-                            joined_medallion = True
-                        query = query.order_by(
-                            Medallion.medallion_number.asc()
-                            if sort_order == "asc"
-                            else Medallion.medallion_number.desc()
-                        )
-                    if sort_by == "plate_no":
-                        if not joined_vehicle:
-                            query = query.join(Vehicle, Lease.vehicle_id == Vehicle.id)
-                            joined_vehicle = True
-                        if not joined_vehicle_registration:
-                            query = query.join(
-                                VehicleRegistration,
-                                Vehicle.id == VehicleRegistration.vehicle_id,
-                            )
-                            joined_vehicle_registration = True
-                        query = query.order_by(
-                            VehicleRegistration.plate_number.asc()
-                            if sort_order == "asc"
-                            else VehicleRegistration.plate_number.desc()
-                        )
-                    if sort_by == "driver_id":
-                        if not joined_lease_driver:
-                            query = query.join(
-                                LeaseDriver, Lease.id == LeaseDriver.lease_id
-                            )
-                            joined_lease_driver = True
-                        if not joined_driver:
-                            query = query.join(
-                                Driver, LeaseDriver.driver_id == Driver.driver_id
-                            )
-                            joined_driver = True
-                        query = query.order_by(
-                            Driver.driver_id.asc()
-                            if sort_order == "asc"
-                            else Driver.driver_id.desc()
-                        )
-                    if sort_by == "driver_name":
-                        if not joined_lease_driver:
-                            query = query.join(
-                                LeaseDriver, Lease.id == LeaseDriver.lease_id
-                            )
-                            joined_lease_driver = True
-                        if not joined_driver:
-                            query = query.join(
-                                Driver, LeaseDriver.driver_id == Driver.driver_id
-                            )
-                            joined_driver = True
-                        query = query.order_by(
-                            Driver.last_name.asc()
-                            if sort_order == "asc"
-                            else Driver.last_name.desc()
-                        )
-                    if sort_by == "tlc_number":
-                        if not joined_lease_driver:
-                            query = query.join(
-                                LeaseDriver, Lease.id == LeaseDriver.lease_id
-                            )
-                            joined_lease_driver = True
-                        if not joined_driver:
-                            query = query.join(
-                                Driver, LeaseDriver.driver_id == Driver.driver_id
-                            )
-                            joined_driver = True
-                        if not joined_tlc_license:
-                            query = query.join(
-                                TLCLicense,
-                                Driver.tlc_license_number_id == TLCLicense.id,
-                            )
-                            joined_tlc_license = True
-                        query = query.order_by(
-                            TLCLicense.tlc_license_number.asc()
-                            if sort_order == "asc"
-                            else TLCLicense.tlc_license_number.desc()
-                        )
-                    if sort_by == "lease_start_date":
-                        query = query.order_by(
-                            Lease.lease_start_date.asc()
-                            if sort_order == "asc"
-                            else Lease.lease_start_date.desc()
-                        )
-                    if sort_by == "lease_end_date":
-                        query = query.order_by(
-                            Lease.lease_end_date.asc()
-                            if sort_order == "asc"
-                            else Lease.lease_end_date.desc()
-                        )
-                    if sort_by == "created_on":
-                        query = query.order_by(
-                            Lease.created_on.asc()
-                            if sort_order == "asc"
-                            else Lease.created_on.desc()
-                        )
-                    if sort_by == "lease_status":
-                        query = query.order_by(
-                            Lease.lease_status.asc()
-                            if sort_order == "asc"
-                            else Lease.lease_status.desc()
-                        )
-                    if sort_by == "lease_type":
-                        query = query.order_by(
-                            Lease.lease_type.asc()
-                            if sort_order == "asc"
-                            else Lease.lease_type.desc()
-                        )
-                    if sort_by == "lease_id":
-                        query = query.order_by(
-                            Lease.lease_id.asc()
-                            if sort_order == "asc"
-                            else Lease.lease_id.desc()
-                        )
-                    if sort_by == "lease_amount":
-                        # Join with LeaseConfiguration and cast lease_limit to numeric for proper sorting
-                        from sqlalchemy import Float, cast
-
-                        if not joined_lease_configuration:
-                            query = query.outerjoin(
-                                LeaseConfiguration,
-                                and_(
-                                    LeaseConfiguration.lease_id == Lease.id,
-                                    LeaseConfiguration.lease_breakup_type == "lease_amount",
-                                ),
-                            )
-                            joined_lease_configuration = True
-                        query = query.order_by(
-                            cast(LeaseConfiguration.lease_limit, Float).asc()
-                            if sort_order == "asc"
-                            else cast(LeaseConfiguration.lease_limit, Float).desc()
-                        )
+                    query = query.order_by(
+                        sort_attr[sort_by].asc()
+                        if sort_order == "asc"
+                        else sort_attr[sort_by].desc()
+                    )
             else:
                 query = query.order_by(Lease.updated_on.desc(), Lease.created_on.desc())
 
             if multiple:
-                total_count = query.distinct(Lease.id).count()
+                total_count = query.count()
                 if page and per_page:
                     query = query.offset((page - 1) * per_page).limit(per_page)
                 return query.all(), total_count
@@ -439,6 +212,10 @@ class LeaseService:
         1. Vehicles with HACKED_UP status (not yet leased)
         2. Vehicles in active leases with only day shift OR only night shift selected (can add another shift lease)
 
+        Eligibility and shift occupancy are read from the lease availability
+        index (app.leases.availability), so filtering, counting and paging
+        happen in one indexed query.
+
         Args:
             shift_availability: Filter by shift availability
                 - 'full': Both day and night shifts available (no active lease)
@@ -447,49 +224,25 @@ class LeaseService:
         """
 
         try:
-            # Subquery to find vehicles with active leases that have only one shift selected
-            single_shift_vehicles = (
-                db.query(Lease.vehicle_id).filter(
-                    Lease.lease_status == LeaseStatus.ACTIVE,
-                    or_(
-                        # Only day shift is selected (night shift is False or NULL)
-                        and_(
-                            Lease.is_day_shift == True,
-                            or_(
-                                Lease.is_night_shift == False,
-                                Lease.is_night_shift.is_(None),
-                            ),
-                        ),
-                        # Only night shift is selected (day shift is False or NULL)
-                        and_(
-                            Lease.is_night_shift == True,
-                            or_(
-                                Lease.is_day_shift == False,
-                                Lease.is_day_shift.is_(None),
-                            ),
-                        ),
-                    ),
-                )
-            ).subquery()
-
             query = (
                 db.query(
                     Vehicle,
                     Medallion.medallion_number.label("medallion_number"),
                     VehicleRegistration.plate_number.label("plate_number"),
+                    LeaseAvailability,
+                )
+                .join(
+                    LeaseAvailability,
+                    and_(
+                        LeaseAvailability.entity_type == LeaseAvailabilityEntity.VEHICLE,
+                        LeaseAvailability.entity_id == Vehicle.id,
+                    ),
                 )
                 .outerjoin(
                     VehicleRegistration, Vehicle.id == VehicleRegistration.vehicle_id
                 )
                 .outerjoin(Medallion, Vehicle.medallion_id == Medallion.id)
-                .filter(
-                    or_(
-                        # Vehicles that are hacked up and not yet leased
-                        Vehicle.vehicle_status == VehicleStatus.HACKED_UP,
-                        # Vehicles that have an active lease with only one shift
-                        Vehicle.id.in_(single_shift_vehicles),
-                    )
-                )
+                .filter(LeaseAvailability.can_lease == True)
             )
             if vin:
                 query = query.filter(Vehicle.vin.ilike(f"%{vin}%"))
@@ -502,6 +255,27 @@ class LeaseService:
                     VehicleRegistration.plate_number.ilike(f"%{plate_number}%")
                 )
 
+            if shift_availability:
+                shift_filter = shift_availability.lower()
+                if shift_filter == "full":
+                    # Only show vehicles with BOTH shifts available (no active lease at all)
+                    query = query.filter(
+                        LeaseAvailability.day_shift_occupied == False,
+                        LeaseAvailability.night_shift_occupied == False,
+                    )
+                elif shift_filter == "day":
+                    # Only show vehicles with ONLY day shift available (night shift must be occupied)
+                    query = query.filter(
+                        LeaseAvailability.day_shift_occupied == False,
+                        LeaseAvailability.night_shift_occupied == True,
+                    )
+                elif shift_filter == "night":
+                    # Only show vehicles with ONLY night shift available (day shift must be occupied)
+                    query = query.filter(
+                        LeaseAvailability.night_shift_occupied == False,
+                        LeaseAvailability.day_shift_occupied == True,
+                    )
+
             if sort_by and sort_order:
                 sort_attr = {
                     "medallion_number": Medallion.medallion_number,
@@ -522,139 +296,62 @@ class LeaseService:
                     )
 
             if multiple:
-                # First, fetch ALL results without pagination
-                all_results = []
-                for vehicle, medallion_number, plate_number in query.all():
-                    # Get ALL active leases for this vehicle to check shift occupancy
-                    active_leases = (
-                        db.query(Lease)
-                        .filter(
-                            Lease.vehicle_id == vehicle.id,
-                            Lease.lease_status == LeaseStatus.ACTIVE,
-                        )
-                        .all()
-                    )
+                total = query.count()
 
-                    # Determine which shifts are occupied across ALL active leases
-                    has_day_shift = False
-                    has_night_shift = False
-
-                    for lease in active_leases:
-                        if lease.is_day_shift:
-                            has_day_shift = True
-                        if lease.is_night_shift:
-                            has_night_shift = True
-
-                    # If both shifts are occupied, skip this vehicle entirely
-                    if has_day_shift and has_night_shift:
-                        continue
+                if page and per_page:
+                    query = query.offset((page - 1) * per_page).limit(per_page)
 
-                    # Calculate available shifts
-                    available_day_shift = not has_day_shift
-                    available_night_shift = not has_night_shift
-
-                    # Apply shift availability filter if provided
-                    if shift_availability:
-                        shift_filter = shift_availability.lower()
-                        logger.info(
-                            f"Filtering by shift_availability='{shift_filter}' for vehicle {vehicle.id} "
-                            f"(has_day_shift={has_day_shift}, has_night_shift={has_night_shift}, "
-                            f"available_day_shift={available_day_shift}, available_night_shift={available_night_shift})"
-                        )
-                        if shift_filter == "full":
-                            # Only show vehicles with BOTH shifts available (no active lease at all)
-                            if has_day_shift or has_night_shift:
-                                logger.info(
-                                    f"Skipping vehicle {vehicle.id} - not fully available"
-                                )
-                                continue
-                        elif shift_filter == "day":
-                            # Only show vehicles with ONLY day shift available (night shift must be occupied)
-                            if not available_day_shift or not has_night_shift:
-                                logger.info(
-                                    f"Skipping vehicle {vehicle.id} - not day-shift-only available"
-                                )
-                                continue
-                        elif shift_filter == "night":
-                            # Only show vehicles with ONLY night shift available (day shift must be occupied)
-                            if not available_night_shift or not has_day_shift:
-                                logger.info(
-                                    f"Skipping vehicle {vehicle.id} - not night-shift-only available"
-                                )
-                                continue
-
-                    all_results.append(
+                results = []
+                for vehicle, medallion_number, plate_number, availability in query.all():
+                    result = self._can_lease_vehicle_details(vehicle, medallion_number, plate_number)
+                    result.update(
                         {
-                            "id": vehicle.id,
-                            "vin": vehicle.vin,
-                            "medallion_number": medallion_number,
-                            "plate_number": plate_number,
-                            "vehicle_type": vehicle.vehicle_type,
-                            "status": vehicle.vehicle_status,
-                            "created_on": vehicle.created_on,
-                            "updated_on": vehicle.updated_on,
-                            "make": vehicle.make,
-                            "model": vehicle.model,
-                            "year": vehicle.year,
-                            "base_price": vehicle.base_price,
-                            "sales_tax": vehicle.sales_tax,
-                            "vehicle_hack_up_cost": vehicle.vehicle_hack_up_cost,
-                            "vehicle_true_cost": vehicle.vehicle_true_cost,
-                            "vehicle_lifetime_cap": vehicle.vehicle_lifetime_cap,
-                            "recoverable_base": min(
-                                vehicle.vehicle_true_cost or 0,
-                                vehicle.vehicle_lifetime_cap or 0,
-                            ),
-                            "has_active_lease": len(active_leases) > 0,
-                            "current_day_shift_occupied": has_day_shift,
-                            "current_night_shift_occupied": has_night_shift,
-                            "available_day_shift": available_day_shift,
-                            "available_night_shift": available_night_shift,
+                            "has_active_lease": availability.active_lease_count > 0,
+                            "current_day_shift_occupied": availability.day_shift_occupied,
+                            "current_night_shift_occupied": availability.night_shift_occupied,
+                            "available_day_shift": not availability.day_shift_occupied,
+                            "available_night_shift": not availability.night_shift_occupied,
                         }
                     )
-
-                # Get total count from filtered results
-                total = len(all_results)
-
-                # Apply pagination to the filtered results
-                if page and per_page:
-                    start_idx = (page - 1) * per_page
-                    end_idx = start_idx + per_page
-                    results = all_results[start_idx:end_idx]
-                else:
-                    results = all_results
+                    results.append(result)
 
                 return results, total
 
-            vehicle, medallion_number, plate_number = query.first()
-            if vehicle:
-                return {
-                    "id": vehicle.id,
-                    "vin": vehicle.vin,
-                    "medallion_number": medallion_number,
-                    "plate_number": plate_number,
-                    "vehicle_type": vehicle.vehicle_type,
-                    "status": vehicle.vehicle_status,
-                    "created_on": vehicle.created_on,
-                    "updated_on": vehicle.updated_on,
-                    "make": vehicle.make,
-                    "model": vehicle.model,
-                    "year": vehicle.year,
-                    "base_price": vehicle.base_price,
-                    "sales_tax": vehicle.sales_tax,
-                    "vehicle_hack_up_cost": vehicle.vehicle_hack_up_cost,
-                    "vehicle_true_cost": vehicle.vehicle_true_cost,
-                    "vehicle_lifetime_cap": vehicle.vehicle_lifetime_cap,
-                    "recoverable_base": min(
-                        vehicle.vehicle_true_cost or 0,
-                        vehicle.vehicle_lifetime_cap or 0,
-                    ),
-                }
+            row = query.first()
+            if row:
+                vehicle, medallion_number, plate_number, _ = row
+                return self._can_lease_vehicle_details(vehicle, medallion_number, plate_number)
             return None
         except Exception as e:
             logger.error("Error getting all active leases: %s", str(e))
             raise e
 
+    @staticmethod
+    def _can_lease_vehicle_details(vehicle: Vehicle, medallion_number, plate_number) -> dict:
+        """Vehicle fields of a get_can_lease result"""
+        return {
+            "id": vehicle.id,
+            "vin": vehicle.vin,
+            "medallion_number": medallion_number,
+            "plate_number": plate_number,
+            "vehicle_type": vehicle.vehicle_type,
+            "status": vehicle.vehicle_status,
+            "created_on": vehicle.created_on,
+            "updated_on": vehicle.updated_on,
+            "make": vehicle.make,
+            "model": vehicle.model,
+            "year": vehicle.year,
+            "base_price": vehicle.base_price,
+            "sales_tax": vehicle.sales_tax,
+            "vehicle_hack_up_cost": vehicle.vehicle_hack_up_cost,
+            "vehicle_true_cost": vehicle.vehicle_true_cost,
+            "vehicle_lifetime_cap": vehicle.vehicle_lifetime_cap,
+            "recoverable_base": min(
+                vehicle.vehicle_true_cost or 0,
+                vehicle.vehicle_lifetime_cap or 0,
+            ),
+        }
+
     def get_lease_configurations(
         self,
         db: Session,
@@ -1775,10 +1472,6 @@ class LeaseService:
             override_start_date: Optional override for the start date (used for renewals to start from last_renewed_date)
         """
         try:
-            from datetime import datetime
-
-            from app.leases.utils import calculate_weekly_lease_schedule
-
             # Mark existing active schedule records as inactive instead of deleting
             existing_schedules = (
                 db.query(LeaseSchedule)
@@ -1794,111 +1487,12 @@ class LeaseService:
 
             db.flush()
 
-
-            logger.info(
-                "Weekly amounts -> Vehicle: %s (%s), Medallion: %s (%s)",
-                vehicle_weekly_amount,
-                type(vehicle_weekly_amount),
-                medallion_weekly_amount,
-                type(medallion_weekly_amount),
+            rows = self.build_lease_schedule_rows(
+                lease, vehicle_weekly_amount, medallion_weekly_amount, override_start_date
             )
 
-            vehicle_weekly_amount = float(vehicle_weekly_amount or 0)
-            medallion_weekly_amount = float(medallion_weekly_amount or 0)
-            total_weekly = vehicle_weekly_amount + medallion_weekly_amount
-
-            if total_weekly <= 0:
-                logger.warning(
-                    f"Total weekly amount is 0 for lease {lease.id}, skipping schedule creation"
-                )
-                return []
-
-            # Generate schedule using existing utility function
-            from app.core.config import settings
-
-            # Use override_start_date for renewals, otherwise use lease_start_date
-            schedule_start_date = (
-                override_start_date if override_start_date else lease.lease_start_date
-            )
-
-            schedule_data = calculate_weekly_lease_schedule(
-                lease_start_date=schedule_start_date,
-                duration_weeks=lease.duration_in_weeks or 0,
-                payment_due_day=lease.lease_pay_day or settings.payment_date,
-                weekly_lease_amount=total_weekly,
-                lease_end_date=lease.lease_end_date,
-            )
-
-            # Create LeaseSchedule entries
-            lease_schedules = []
-            for entry in schedule_data:
-                # Parse the due date from the formatted string
-                due_date_str = entry.get("due_date", "")
-                try:
-                    due_date = datetime.strptime(due_date_str, "%a, %B %d, %Y").date()
-                except Exception as e:
-                    logger.error(f"Error parsing due date '{due_date_str}': {e}")
-                    continue
-
-                # Parse period start and end dates
-                period_start_str = entry.get("period_start", "")
-                period_end_str = entry.get("period_end", "")
-                try:
-                    period_start = (
-                        datetime.strptime(period_start_str, "%a, %B %d, %Y").date()
-                        if period_start_str
-                        else None
-                    )
-                    period_end = (
-                        datetime.strptime(period_end_str, "%a, %B %d, %Y").date()
-                        if period_end_str
-                        else None
-                    )
-                except Exception as e:
-                    logger.error(f"Error parsing period dates: {e}")
-                    period_start = None
-                    period_end = None
-
-                # Parse amount from string (format: "$ 1,234.56")
-                amount_str = entry.get("amount_due", "$ 0.00")
-                try:
-                    amount = float(amount_str.replace("$", "").replace(",", "").strip())
-                except Exception as e:
-                    logger.error(f"Error parsing amount '{amount_str}': {e}")
-                    amount = 0.0
-
-                # Calculate prorated amounts if needed
-                if entry.get("is_prorated", False):
-                    # For prorated periods, maintain the same proportion between vehicle and medallion
-                    # The amount is already prorated based on days, so split it proportionally
-                    if total_weekly > 0:
-                        vehicle_proportion = vehicle_weekly_amount / total_weekly
-                        medallion_proportion = medallion_weekly_amount / total_weekly
-                        prorated_vehicle = amount * vehicle_proportion
-                        prorated_medallion = amount * medallion_proportion
-                    else:
-                        prorated_vehicle = 0.0
-                        prorated_medallion = 0.0
-                else:
-                    prorated_vehicle = vehicle_weekly_amount
-                    prorated_medallion = medallion_weekly_amount
-
-                schedule_entry = LeaseSchedule(
-                    lease_id=lease.id,
-                    installment_number=entry.get("installment_no"),
-                    installment_due_date=due_date,
-                    installment_amount=amount,
-                    period_start_date=period_start,
-                    period_end_date=period_end,
-                    medallion_installment_amount=round(prorated_medallion, 2),
-                    vehicle_installment_amount=round(prorated_vehicle, 2),
-                    installment_status="D",  # D = Due
-                    is_active=True,  # Mark new schedule entries as active
-                    created_on=datetime.now(timezone.utc),
-                    updated_on=datetime.now(timezone.utc),
-                )
-                db.add(schedule_entry)
-                lease_schedules.append(schedule_entry)
+            lease_schedules = [LeaseSchedule(**row) for row in rows]
+            db.add_all(lease_schedules)
 
             db.flush()
             logger.info(
@@ -1913,6 +1507,183 @@ class LeaseService:
             )
             raise e
 
+    def replace_lease_schedules(
+        self,
+        db: Session,
+        plans: List[Tuple[Lease, float, float, Optional[date]]],
+    ) -> Tuple[dict, dict]:
+        """
+        Batch form of create_or_update_lease_schedule for many leases.
+
+        Builds every lease's new schedule in memory, then deactivates the
+        active schedule rows of all those leases with one UPDATE and inserts
+        the new rows with one INSERT. A lease whose schedule cannot be built
+        keeps its current schedule.
+
+        Args:
+            db: Database session
+            plans: (lease, vehicle_weekly_amount, medallion_weekly_amount,
+                override_start_date) per lease
+
+        Returns:
+            (created, errors): lease id -> number of rows created, and
+            lease id -> error message for leases that were skipped
+        """
+        rows_by_lease, errors = self.build_lease_schedules(plans)
+        created = {lease_id: len(lease_rows) for lease_id, lease_rows in rows_by_lease.items()}
+        rows = [row for lease_rows in rows_by_lease.values() for row in lease_rows]
+
+        if created:
+            db.execute(
+                update(LeaseSchedule)
+                .where(
+                    LeaseSchedule.lease_id.in_(list(created)),
+                    LeaseSchedule.is_active == True,
+                )
+                .values(is_active=False, updated_on=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+        if rows:
+            db.execute(insert(LeaseSchedule), rows)
+
+        logger.info(
+            f"Replaced schedules of {len(created)} leases with {len(rows)} entries, "
+            f"{len(errors)} failed"
+        )
+        return created, errors
+
+    @classmethod
+    def build_lease_schedule_rows(
+        cls,
+        lease: Lease,
+        vehicle_weekly_amount: float = 0.0,
+        medallion_weekly_amount: float = 0.0,
+        override_start_date: Optional[date] = None,
+    ) -> List[dict]:
+        """
+        Column values of a lease's schedule entries, without touching the database.
+        Returns no rows when the weekly amount is 0.
+        """
+        plan = (lease, vehicle_weekly_amount, medallion_weekly_amount, override_start_date)
+        return cls._lease_schedule_rows([plan], [cls._lease_schedule_term(*plan)])[0]
+
+    @classmethod
+    def build_lease_schedules(
+        cls, plans: List[Tuple[Lease, float, float, Optional[date]]]
+    ) -> Tuple[Dict[int, List[dict]], Dict[int, str]]:
+        """
+        Column values of the schedule entries of many leases, computed
+        together by the schedule kernel.
+
+        Args:
+            plans: (lease, vehicle_weekly_amount, medallion_weekly_amount,
+                override_start_date) per lease
+
+        Returns:
+            (rows, errors): lease id -> schedule rows, and lease id -> error
+            message for leases whose schedule could not be built
+        """
+        valid_plans, terms, errors = [], [], {}
+        for plan in plans:
+            lease = plan[0]
+            try:
+                terms.append(cls._lease_schedule_term(*plan))
+            except Exception as e:
+                logger.error(
+                    f"Error creating lease schedule for lease {lease.id}: {str(e)}",
+                    exc_info=True,
+                )
+                errors[lease.id] = str(e)
+                continue
+            valid_plans.append(plan)
+
+        rows = cls._lease_schedule_rows(valid_plans, terms)
+        return {plan[0].id: lease_rows for plan, lease_rows in zip(valid_plans, rows)}, errors
+
+    @staticmethod
+    def _lease_schedule_term(
+        lease: Lease,
+        vehicle_weekly_amount: float = 0.0,
+        medallion_weekly_amount: float = 0.0,
+        override_start_date: Optional[date] = None,
+    ) -> Optional[WeeklyLeaseTerm]:
+        """Schedule kernel input of a lease, or None when the weekly amount is 0"""
+        from app.core.config import settings
+
+        logger.info(
+            "Weekly amounts -> Vehicle: %s (%s), Medallion: %s (%s)",
+            vehicle_weekly_amount,
+            type(vehicle_weekly_amount),
+            medallion_weekly_amount,
+            type(medallion_weekly_amount),
+        )
+
+        total_weekly = float(vehicle_weekly_amount or 0) + float(medallion_weekly_amount or 0)
+        if total_weekly <= 0:
+            logger.warning(
+                f"Total weekly amount is 0 for lease {lease.id}, skipping schedule creation"
+            )
+            return None
+
+        # Use override_start_date for renewals, otherwise use lease_start_date
+        schedule_start_date = (
+            override_start_date if override_start_date else lease.lease_start_date
+        )
+        payment_due_day = lease.lease_pay_day or settings.payment_date
+
+        return WeeklyLeaseTerm(
+            start_date=schedule_start_date,
+            end_date=lease.lease_end_date,
+            duration_weeks=lease.duration_in_weeks or 0,
+            pay_day=settings.day_name_to_num[payment_due_day.strip().lower()],
+            weekly_cents=to_cents(total_weekly),
+        )
+
+    @staticmethod
+    def _lease_schedule_rows(
+        plans: List[Tuple[Lease, float, float, Optional[date]]],
+        terms: List[Optional[WeeklyLeaseTerm]],
+    ) -> List[List[dict]]:
+        """LeaseSchedule rows per plan; plans without a term get none"""
+        rows = [[] for _ in plans]
+        kernel_plans = [index for index, term in enumerate(terms) if term is not None]
+        schedule = weekly_lease_installments([terms[index] for index in kernel_plans])
+
+        now = datetime.now(timezone.utc)
+        for entry in schedule.records():
+            plan_index = kernel_plans[entry["term"]]
+            lease, vehicle_weekly_amount, medallion_weekly_amount, _ = plans[plan_index]
+            vehicle_weekly_amount = float(vehicle_weekly_amount or 0)
+            medallion_weekly_amount = float(medallion_weekly_amount or 0)
+            amount = entry["amount_cents"] / 100
+
+            # Calculate prorated amounts if needed
+            if entry["is_prorated"]:
+                # For prorated periods, maintain the same proportion between vehicle and medallion
+                # The amount is already prorated based on days, so split it proportionally
+                total_weekly = vehicle_weekly_amount + medallion_weekly_amount
+                prorated_vehicle = amount * (vehicle_weekly_amount / total_weekly)
+                prorated_medallion = amount * (medallion_weekly_amount / total_weekly)
+            else:
+                prorated_vehicle = vehicle_weekly_amount
+                prorated_medallion = medallion_weekly_amount
+
+            rows[plan_index].append({
+                "lease_id": lease.id,
+                "installment_number": entry["installment_no"],
+                "installment_due_date": entry["due_date"],
+                "installment_amount": amount,
+                "period_start_date": entry["period_start"],
+                "period_end_date": entry["period_end"],
+                "medallion_installment_amount": round(prorated_medallion, 2),
+                "vehicle_installment_amount": round(prorated_vehicle, 2),
+                "installment_status": "D",  # D = Due
+                "is_active": True,  # Mark new schedule entries as active
+                "created_on": now,
+                "updated_on": now,
+            })
+        return rows
+
     def get_lease_schedule(
         self, db: Session, lease_id: int, multiple: bool = True, is_active: bool = True
     ) -> Union[LeaseSchedule, List[LeaseSchedule], None]:
@@ -3,14 +3,21 @@
 """
 Celery tasks for lease schedule automation
 
-Scheduled to run every Sunday at 05:00 AM to post weekly lease fees
+Scheduled to run every Sunday at 05:00 AM to post weekly lease fees.
+Lease notifications queued by the renewal, reminder and expiry runs are
+sent by dispatch_lease_notifications_task. The lease availability and lease
+search indexes are reconciled nightly by rebuild_lease_availability_task and
+rebuild_lease_search_task.
 """
 
 from datetime import date
 from celery import shared_task
 
 from app.core.db import SessionLocal
+from app.leases.availability import LeaseAvailabilityService
 from app.leases.lease_schedule_service import LeaseScheduleService
+from app.leases.lease_search import LeaseSearchService
+from app.leases.notification_outbox import dispatch_lease_notifications
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -24,12 +31,11 @@ def post_weekly_lease_fees_task():
     Scheduled to run: Every Sunday at 05:00 AM
     
     Process:
-    1. Find all unposted lease schedule entries due this week
-    2. For each entry:
-        - Validate lease is active
-        - Create DEBIT posting in ledger (category: LEASE)
-        - Mark schedule entry as posted
-    3. Log results and handle errors
+    1. Find all unposted lease schedule entries due this week on active
+       leases, with their primary drivers
+    2. Create DEBIT postings in ledger (category: LEASE) in one batch
+    3. Mark the posted schedule entries in one UPDATE
+    4. Log results and handle errors
     
     Returns:
         Dictionary with posting results:
@@ -71,6 +77,89 @@ def post_weekly_lease_fees_task():
         db.close()
 
 
+@shared_task(name="leases.dispatch_notifications")
+def dispatch_lease_notifications_task():
+    """
+    Send pending lease notifications from the outbox
+
+    Triggered after a renewal, reminder or expiry run commits, and scheduled
+    every 5 minutes to pick up messages left pending (retries, or a trigger
+    that could not be enqueued).
+
+    Returns:
+        Dictionary with dispatch results:
+        {
+            'sent': int,
+            'failed': int
+        }
+    """
+    db = SessionLocal()
+
+    try:
+        return dispatch_lease_notifications(db)
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Lease notification dispatch task failed: {str(e)}", exc_info=True)
+        raise
+
+    finally:
+        db.close()
+
+
+@shared_task(name="leases.rebuild_lease_availability")
+def rebuild_lease_availability_task():
+    """
+    Nightly reconciliation of the lease availability index
+
+    The index is maintained on flush; this re-derives it from leases,
+    vehicles, medallions and drivers to pick up rows changed outside the ORM.
+
+    Returns:
+        Dictionary with the number of leasable vehicles, medallions and drivers.
+    """
+    logger.info("Starting lease availability rebuild task")
+    db = SessionLocal()
+
+    try:
+        return LeaseAvailabilityService(db).rebuild()
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Lease availability rebuild task failed: {str(e)}", exc_info=True)
+        raise
+
+    finally:
+        db.close()
+
+
+@shared_task(name="leases.rebuild_lease_search")
+def rebuild_lease_search_task():
+    """
+    Nightly reconciliation of the lease search projection and term index
+
+    The index is maintained on flush; this re-derives it from leases,
+    medallions, vehicles, registrations and drivers to pick up rows changed
+    outside the ORM.
+
+    Returns:
+        Dictionary with the number of leases and terms indexed.
+    """
+    logger.info("Starting lease search rebuild task")
+    db = SessionLocal()
+
+    try:
+        return LeaseSearchService(db).rebuild()
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Lease search rebuild task failed: {str(e)}", exc_info=True)
+        raise
+
+    finally:
+        db.close()
+
+
 # Configuration for Celery Beat schedule
 # This should be added to your celery beat schedule configuration in app/worker/config.py:
 """
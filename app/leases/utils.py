@@ -3,7 +3,7 @@
 # Standard imports
 import json
 import re
-from datetime import date, datetime, timedelta, timezone
+from datetime import date, datetime, timezone
 
 from dateutil.rrule import DAILY, WEEKLY, rrule
 from sqlalchemy.orm import Session
@@ -17,6 +17,8 @@ from app.medallions.utils import extract_medallion_info
 from app.utils.general import format_us_phone_number
 from app.utils.lambda_utils import LambdaInvocationError, invoke_lambda_function
 from app.utils.logger import get_logger
+from app.utils.money import to_cents
+from app.utils.schedule_kernel import WeeklyLeaseTerm, weekly_lease_installments
 from app.vehicles.models import Vehicle
 from app.vehicles.utils import extract_vehicle_info
 
@@ -523,175 +525,40 @@ def calculate_weekly_lease_schedule(
     weekly_lease_amount: float = 0.00,
     lease_end_date: datetime = None,
 ):
-    try:
-        # Ensure lease_start_date is a datetime object
-        if isinstance(lease_start_date, date) and not isinstance(
-            lease_start_date, datetime
-        ):
-            lease_start_date = datetime.combine(lease_start_date, datetime.min.time())
+    """
+    Weekly lease schedule for display.
 
+    Weeks run from the day before the payment due day; the days before the
+    first full week and after the last one are prorated installments (see
+    app.utils.schedule_kernel.weekly_lease_installments). When lease_end_date
+    is passed in it is the last active day of the lease; otherwise the lease
+    ends duration_weeks after lease_start_date.
+    """
+    try:
         day_num = settings.day_name_to_num[payment_due_day.strip().lower()]
-        daily_rate = weekly_lease_amount / 7
-
-        # Calculate lease end date if not provided
-        if lease_end_date is None:
-            lease_end_date = lease_start_date + timedelta(weeks=duration_weeks)
-        elif isinstance(lease_end_date, date) and not isinstance(
-            lease_end_date, datetime
-        ):
-            lease_end_date = datetime.combine(lease_end_date, datetime.min.time())
-
-        # Week runs from (payment_due_day - 1) to (payment_due_day - 1)
-        # E.g., if payment_due_day is Monday (0), week runs Sunday (6) to Saturday (5)
-        week_start_day = (day_num - 1) % 7
-
-        # Find the first proper week start (Sunday in our case) on or after lease_start_date
-        days_to_week_start = (week_start_day - lease_start_date.weekday() + 7) % 7
-        if days_to_week_start == 0:
-            first_proper_week_start = lease_start_date
-        else:
-            first_proper_week_start = lease_start_date + timedelta(
-                days=days_to_week_start
-            )
-
-        schedule = []
-        installment_no = 1
-
-        # PART 1: Prorated first installment (from lease_start_date to day before first_proper_week_start)
-        if first_proper_week_start > lease_start_date:
-            first_period_end = first_proper_week_start - timedelta(days=1)
-            first_period_days = (first_period_end - lease_start_date).days + 1
-            first_prorated_amount = daily_rate * first_period_days
-
-            # First payment due date (first occurrence of payment_due_day)
-            days_to_payment_day = (day_num - lease_start_date.weekday() + 7) % 7
-            if days_to_payment_day == 0:
-                days_to_payment_day = 7
-            first_due_date = lease_start_date + timedelta(days=days_to_payment_day)
-
-            due_date_obj = (
-                first_due_date.date()
-                if isinstance(first_due_date, datetime)
-                else first_due_date
-            )
-            rounded_amount = round(first_prorated_amount, 2)
-            schedule.append(
-                {
-                    "installment_no": installment_no,
-                    "due_date": due_date_obj.strftime("%a, %B %d, %Y"),
-                    "start_date": (
-                        lease_start_date.date()
-                        if isinstance(lease_start_date, datetime)
-                        else lease_start_date
-                    ).strftime("%a, %B %d, %Y"),
-                    "amount_due": f"$ {rounded_amount:,.2f}",
-                    "is_prorated": True,
-                    "active_days": first_period_days,
-                    "period_start": (
-                        lease_start_date.date()
-                        if isinstance(lease_start_date, datetime)
-                        else lease_start_date
-                    ).strftime("%a, %B %d, %Y"),
-                    "period_end": (
-                        first_period_end.date()
-                        if isinstance(first_period_end, datetime)
-                        else first_period_end
-                    ).strftime("%a, %B %d, %Y"),
-                }
+        schedule = weekly_lease_installments([
+            WeeklyLeaseTerm(
+                start_date=lease_start_date,
+                end_date=lease_end_date,
+                duration_weeks=duration_weeks,
+                pay_day=day_num,
+                weekly_cents=to_cents(weekly_lease_amount),
             )
-            installment_no += 1
-
-        # PART 2: Full 7-day cycles (Sunday to Saturday)
-        current_week_start = first_proper_week_start
-
-        while current_week_start + timedelta(days=6) < lease_end_date:
-            current_week_end = current_week_start + timedelta(days=6)
+        ])
 
-            # Payment due date for this week
-            days_to_payment = (day_num - current_week_start.weekday() + 7) % 7
-            current_due_date = current_week_start + timedelta(days=days_to_payment)
-
-            due_date_obj = (
-                current_due_date.date()
-                if isinstance(current_due_date, datetime)
-                else current_due_date
-            )
-            rounded_amount = round(weekly_lease_amount, 2)
-            schedule.append(
-                {
-                    "installment_no": installment_no,
-                    "due_date": due_date_obj.strftime("%a, %B %d, %Y"),
-                    "start_date": (
-                        current_week_start.date()
-                        if isinstance(current_week_start, datetime)
-                        else current_week_start
-                    ).strftime("%a, %B %d, %Y"),
-                    "amount_due": f"$ {rounded_amount:,.2f}",
-                    "is_prorated": False,
-                    "active_days": 7,
-                    "period_start": (
-                        current_week_start.date()
-                        if isinstance(current_week_start, datetime)
-                        else current_week_start
-                    ).strftime("%a, %B %d, %Y"),
-                    "period_end": (
-                        current_week_end.date()
-                        if isinstance(current_week_end, datetime)
-                        else current_week_end
-                    ).strftime("%a, %B %d, %Y"),
-                }
-            )
-            installment_no += 1
-            current_week_start += timedelta(days=7)
-
-        # PART 3: Prorated last installment (from last proper week start through the end of the lease term)
-        # When lease_end_date is passed in, it represents the last active day (inclusive)
-        # When calculated from duration_weeks, it represents the day after the last active day (exclusive)
-        # To handle both cases: if we have an explicit end date passed in, we use it as-is (inclusive)
-        # If calculated, we subtract 1 day to make it inclusive
-        if current_week_start < lease_end_date:
-            last_period_start = current_week_start
-            last_period_end = lease_end_date
-            # Calculate days: since lease_end_date is now the last active day, we need to include it
-            last_period_days = (last_period_end - last_period_start).days + 1
-            last_prorated_amount = daily_rate * last_period_days
-
-            # Payment due date for last week
-            days_to_payment = (day_num - last_period_start.weekday() + 7) % 7
-            last_due_date = last_period_start + timedelta(days=days_to_payment)
-
-            due_date_obj = (
-                last_due_date.date()
-                if isinstance(last_due_date, datetime)
-                else last_due_date
-            )
-            rounded_amount = round(last_prorated_amount, 2)
-            schedule.append(
-                {
-                    "installment_no": installment_no,
-                    "due_date": due_date_obj.strftime("%a, %B %d, %Y"),
-                    "start_date": (
-                        last_period_start.date()
-                        if isinstance(last_period_start, datetime)
-                        else last_period_start
-                    ).strftime("%a, %B %d, %Y"),
-                    "amount_due": f"$ {rounded_amount:,.2f}",
-                    "is_prorated": True,
-                    "active_days": last_period_days,
-                    "period_start": (
-                        last_period_start.date()
-                        if isinstance(last_period_start, datetime)
-                        else last_period_start
-                    ).strftime("%a, %B %d, %Y"),
-                    "period_end": (
-                        last_period_end.date()
-                        if isinstance(last_period_end, datetime)
-                        else last_period_end
-                    ).strftime("%a, %B %d, %Y"),
-                }
-            )
-
-        return schedule
+        return [
+            {
+                "installment_no": entry["installment_no"],
+                "due_date": entry["due_date"].strftime("%a, %B %d, %Y"),
+                "start_date": entry["period_start"].strftime("%a, %B %d, %Y"),
+                "amount_due": f"$ {entry['amount_cents'] / 100:,.2f}",
+                "is_prorated": entry["is_prorated"],
+                "active_days": entry["active_days"],
+                "period_start": entry["period_start"].strftime("%a, %B %d, %Y"),
+                "period_end": entry["period_end"].strftime("%a, %B %d, %Y"),
+            }
+            for entry in schedule.records()
+        ]
     except Exception as e:
         logger.error(
             "Error calculating weekly lease schedule: %s", str(e), exc_info=True
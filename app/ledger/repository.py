@@ -2,7 +2,7 @@
 
 from datetime import date
 from decimal import Decimal
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from sqlalchemy import case, func, or_, select
 from sqlalchemy.orm import Session, joinedload
@@ -97,6 +97,22 @@ class LedgerRepository:
         result = self.db.execute(stmt)
         return result.scalars().first()
 
+    def get_balances_by_reference_ids(self, reference_ids: Iterable[str]) -> Dict[str, LedgerBalance]:
+        """
+        Fetches the latest LedgerBalance of each reference_id in one query.
+        References without a balance are absent from the result.
+        """
+        reference_ids = list(set(reference_ids))
+        if not reference_ids:
+            return {}
+        stmt = (
+            select(LedgerBalance)
+            .where(LedgerBalance.reference_id.in_(reference_ids))
+            .order_by(LedgerBalance.created_on.asc())
+        )
+        # Later rows overwrite earlier ones, leaving the latest per reference
+        return {balance.reference_id: balance for balance in self.db.execute(stmt).scalars()}
+
     def get_balance_by_id(self, balance_id: str) -> LedgerBalance:
         """
         Fetches a single LedgerBalance by its unique ID.
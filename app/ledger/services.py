@@ -1,7 +1,8 @@
 # app/ledger/services.py
 
+from dataclasses import dataclass, field
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
 from datetime import datetime, timezone, timedelta
 
 from fastapi import Depends
@@ -30,6 +31,28 @@ from app.utils.logger import get_logger
 logger = get_logger(__name__)
 
 
+@dataclass(frozen=True)
+class ObligationRequest:
+    """One obligation for LedgerService.create_obligations; key is the caller's record key"""
+    key: Hashable
+    category: PostingCategory
+    amount: Decimal
+    reference_id: str
+    driver_id: int
+    entry_type: EntryType = EntryType.DEBIT
+    lease_id: Optional[int] = None
+    vehicle_id: Optional[int] = None
+    medallion_id: Optional[int] = None
+
+
+@dataclass
+class ObligationBatchResult:
+    """Postings and resulting balances per request key, and the failure reason of the rest"""
+    posted: Dict[Hashable, LedgerPosting] = field(default_factory=dict)
+    balances: Dict[Hashable, LedgerBalance] = field(default_factory=dict)
+    failed: Dict[Hashable, str] = field(default_factory=dict)
+
+
 def get_ledger_repository(db: Session = Depends(get_db)) -> LedgerRepository:
     """Dependency injector to get an instance of LedgerRepository."""
     return LedgerRepository(db)
@@ -117,6 +140,96 @@ class LedgerService:
             logger.error("Failed to create obligation.", error=str(e), exc_info=True)
             raise LedgerError(f"Failed to create obligation: {str(e)}") from e
 
+    def create_obligations(self, obligations: Iterable[ObligationRequest]) -> ObligationBatchResult:
+        """
+        Creates many obligations in the caller's transaction.
+
+        Existing balances of the batch's references are read in one query and
+        all postings and new balances are written in one flush, inside a
+        savepoint. If that flush fails, the batch is replayed one obligation
+        per savepoint so only the offending records fail. Nothing is
+        committed; the caller commits once the records' own status updates
+        are written.
+        """
+        result = ObligationBatchResult()
+        valid = []
+        for obligation in obligations:
+            if obligation.amount is None or obligation.amount <= 0:
+                result.failed[obligation.key] = "Obligation amount must be positive."
+            else:
+                valid.append(obligation)
+        if not valid:
+            return result
+
+        db = self.repo.db
+        try:
+            with db.begin_nested():
+                self._stage_obligations(valid, result)
+        except SQLAlchemyError as e:
+            logger.warning(
+                "Batch obligation write failed, retrying one by one",
+                obligations=len(valid), error=str(e)
+            )
+            for obligation in valid:
+                try:
+                    with db.begin_nested():
+                        self._stage_obligations([obligation], result)
+                except SQLAlchemyError as item_error:
+                    result.failed[obligation.key] = f"Failed to create obligation: {item_error}"
+
+        logger.info(
+            "Created obligations in batch",
+            posted=len(result.posted), failed=len(result.failed)
+        )
+        return result
+
+    def _stage_obligations(self, obligations: List[ObligationRequest], result: ObligationBatchResult) -> None:
+        """Add postings and apply them to balances, flush once, then record them in result"""
+        balances = self.repo.get_balances_by_reference_ids(o.reference_id for o in obligations)
+        postings = {}
+
+        for obligation in obligations:
+            amount = Decimal(str(obligation.amount))
+            posting = LedgerPosting(
+                category=obligation.category,
+                amount=amount,
+                entry_type=obligation.entry_type,
+                status=PostingStatus.POSTED,
+                reference_id=obligation.reference_id,
+                driver_id=obligation.driver_id,
+                lease_id=obligation.lease_id,
+                vehicle_id=obligation.vehicle_id,
+                medallion_id=obligation.medallion_id,
+            )
+            self.repo.db.add(posting)
+            postings[obligation.key] = posting
+
+            balance = balances.get(obligation.reference_id)
+            if balance is not None:
+                balance.balance = (
+                    balance.balance - amount if obligation.entry_type == EntryType.CREDIT
+                    else balance.balance + amount
+                )
+                balance.status = BalanceStatus.OPEN
+            else:
+                balance = LedgerBalance(
+                    category=obligation.category,
+                    reference_id=obligation.reference_id,
+                    original_amount=amount,
+                    balance=amount,
+                    status=BalanceStatus.OPEN,
+                    driver_id=obligation.driver_id,
+                    lease_id=obligation.lease_id,
+                    vehicle_id=obligation.vehicle_id,
+                    medallion_id=obligation.medallion_id,
+                )
+                self.repo.db.add(balance)
+                balances[obligation.reference_id] = balance
+
+        self.repo.db.flush()
+        result.posted.update(postings)
+        result.balances.update((o.key, balances[o.reference_id]) for o in obligations)
+
     def apply_interim_payment(
         self,
         payment_amount: Decimal,
@@ -9,6 +9,7 @@ from sqlalchemy import (
     Date,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
@@ -61,6 +62,7 @@ class DriverLoan(Base, AuditMixin):
     # --- Lifecycle and Payment ---
     status: Mapped[LoanStatus] = mapped_column(Enum(LoanStatus), default=LoanStatus.DRAFT, index=True)
     start_week: Mapped[date] = mapped_column(Date, comment="The Sunday that marks the beginning of the first repayment period.")
+    open_installment_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", comment="Installments of this loan not yet PAID; the loan closes when it reaches 0.")
     loan_date: Mapped[date] = mapped_column(Date, comment="The date the loan was disbursed.")
 
     # --- Receipt Storage (NEW) ---
@@ -94,6 +96,10 @@ class LoanInstallment(Base, AuditMixin):
     Represents a single, scheduled weekly installment for a DriverLoan.
     """
     __tablename__ = "loan_installments"
+    __table_args__ = (
+        # Due-installment queue of the weekly posting run
+        Index("ix_loan_installments_status_week_start", "status", "week_start_date"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     loan_id: Mapped[int] = mapped_column(Integer, ForeignKey("driver_loans.id"), index=True)
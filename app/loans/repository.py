@@ -4,8 +4,9 @@ from datetime import date
 from typing import List, Optional, Tuple
 from decimal import Decimal
 
-from sqlalchemy import func, update
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, contains_eager, joinedload
 
 from app.drivers.models import Driver , TLCLicense
 from app.leases.models import Lease
@@ -56,10 +57,10 @@ class LoanRepository:
             .first()
         )
 
-    def bulk_insert_installments(self, installments: List[LoanInstallment]):
-        """Performs a bulk insert of new LoanInstallment records."""
+    def bulk_insert_installments(self, installments: List[dict]):
+        """Inserts new LoanInstallment rows (column dicts) in one statement."""
         if installments:
-            self.db.add_all(installments)
+            self.db.execute(insert(LoanInstallment), installments)
 
     def update_loan(self, loan_id: int, updates: dict):
         """Updates specific fields of a single loan record."""
@@ -73,7 +74,7 @@ class LoanRepository:
     def get_due_installments_to_post(self, post_date: date) -> List[LoanInstallment]:
         """
         Fetches all loan installments that are scheduled and due on or before
-        the specified posting date for all OPEN loans.
+        the specified posting date for all OPEN loans, with their loan loaded.
         """
         return (
             self.db.query(LoanInstallment)
@@ -83,9 +84,89 @@ class LoanRepository:
                 LoanInstallment.week_start_date <= post_date,
                 DriverLoan.status == LoanStatus.OPEN,
             )
+            .options(contains_eager(LoanInstallment.loan))
+            .order_by(LoanInstallment.week_start_date, LoanInstallment.id)
             .all()
         )
 
+    def _installment_queue(self):
+        """
+        Installment rows with the ledger linkage of their loan attached:
+        id, installment_id, status, week_start_date, amount (total due),
+        loan_status, driver_id, lease_id, vehicle_id (the lease's vehicle)
+        and medallion_id.
+        """
+        return (
+            select(
+                LoanInstallment.id,
+                LoanInstallment.installment_id,
+                LoanInstallment.status,
+                LoanInstallment.week_start_date,
+                LoanInstallment.total_due.label("amount"),
+                DriverLoan.status.label("loan_status"),
+                DriverLoan.driver_id,
+                DriverLoan.lease_id,
+                Lease.vehicle_id,
+                DriverLoan.medallion_id,
+            )
+            .join(DriverLoan, LoanInstallment.loan_id == DriverLoan.id)
+            .outerjoin(Lease, DriverLoan.lease_id == Lease.id)
+        )
+
+    def get_due_installment_queue(self, post_date: date) -> List[Row]:
+        """
+        Due-installment queue of the posting run: scheduled installments of
+        OPEN loans due on or before post_date, read from the
+        (status, week_start_date) index in one query.
+        """
+        stmt = (
+            self._installment_queue()
+            .where(
+                LoanInstallment.status == LoanInstallmentStatus.SCHEDULED,
+                LoanInstallment.week_start_date <= post_date,
+                DriverLoan.status == LoanStatus.OPEN,
+            )
+            .order_by(LoanInstallment.week_start_date, LoanInstallment.id)
+        )
+        return self.db.execute(stmt).all()
+
+    def get_installment_queue_by_ids(self, installment_ids: List[str]) -> List[Row]:
+        """Queue rows (see _installment_queue) of the given installment_ids, whatever their status"""
+        if not installment_ids:
+            return []
+        stmt = self._installment_queue().where(LoanInstallment.installment_id.in_(installment_ids))
+        return self.db.execute(stmt).all()
+
+    def bulk_update_installments(self, updates: List[dict]):
+        """Updates many installments in one executemany; each dict carries the row's id."""
+        if updates:
+            self.db.execute(update(LoanInstallment), updates)
+
+    def adjust_open_installment_count(self, loan_id: int, delta: int):
+        """Adds delta to the loan's count of installments not yet PAID."""
+        stmt = (
+            update(DriverLoan)
+            .where(DriverLoan.id == loan_id)
+            .values(open_installment_count=DriverLoan.open_installment_count + delta)
+        )
+        self.db.execute(stmt)
+
+    def close_loan_if_settled(self, loan_id: int) -> bool:
+        """
+        Closes the loan if none of its installments is left unpaid.
+        Returns True if the loan was closed by this call.
+        """
+        stmt = (
+            update(DriverLoan)
+            .where(
+                DriverLoan.id == loan_id,
+                DriverLoan.status != LoanStatus.CLOSED,
+                DriverLoan.open_installment_count <= 0,
+            )
+            .values(status=LoanStatus.CLOSED)
+        )
+        return self.db.execute(stmt).rowcount > 0
+
     def update_installment(self, installment_id: int, updates: dict):
         """Updates specific fields of a single installment record."""
         stmt = (
@@ -1,6 +1,6 @@
 ### app/loans/services.py
 
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from decimal import Decimal
 from typing import List, Tuple, Dict, Optional
 from io import BytesIO
@@ -8,24 +8,24 @@ from io import BytesIO
 from sqlalchemy.orm import Session
 
 from app.bpm.services import bpm_service
-from app.core.db import SessionLocal
 from app.ledger.models import PostingCategory
 from app.ledger.repository import LedgerRepository
-from app.ledger.services import LedgerService
+from app.ledger.services import LedgerService, ObligationRequest
 from app.loans.exceptions import (
     InvalidLoanOperationError,
     LoanScheduleGenerationError,
 )
 from app.loans.models import (
     DriverLoan,
-    LoanInstallment,
     LoanInstallmentStatus,
     LoanStatus,
 )
 from app.loans.repository import LoanRepository
 from app.loans.schemas import InstallmentPostingResult
+from app.utils.money import cents_to_decimals, to_cents
 from app.utils.logger import get_logger
 from app.utils.s3_utils import s3_utils
+from app.utils.schedule_kernel import loan_installments
 
 logger = get_logger(__name__)
 
@@ -159,217 +159,155 @@ class LoanService:
         including principal and interest.
         """
         try:
-            total_principal = loan.principal_amount
-            if total_principal <= 0:
+            if loan.principal_amount <= 0:
                 raise LoanScheduleGenerationError("Loan principal amount must be positive.")
 
-            weekly_principal_payment = self._get_weekly_principal(total_principal)
-            
-            remaining_principal = total_principal
-            current_start_date = loan.start_week
-            last_installment_date = loan.loan_date
-            installments = []
-            seq = 1
-
-            while remaining_principal > 0:
-                principal_due = min(weekly_principal_payment, remaining_principal)
-                
-                due_date = current_start_date + timedelta(days=6) # Due at the end of the week
-                accrual_days = (due_date - last_installment_date).days
-                
-                # Interest = Outstanding Principal * (Annual Rate / 100) * (Accrual Days / 365)
-                interest_due = (remaining_principal * (loan.interest_rate / Decimal("100")) * Decimal(accrual_days)) / Decimal("365")
-                interest_due = interest_due.quantize(Decimal("0.01"))
-
-                total_due = principal_due + interest_due
-
-                installment = LoanInstallment(
-                    loan_id=loan.id,
-                    installment_id=f"{loan.loan_id}-{str(seq).zfill(2)}",
-                    week_start_date=current_start_date,
-                    week_end_date=due_date,
-                    principal_amount=principal_due,
-                    interest_amount=interest_due,
-                    total_due=total_due,
-                    status=LoanInstallmentStatus.SCHEDULED,
-                )
-                installments.append(installment)
-
-                remaining_principal -= principal_due
-                last_installment_date = due_date
-                current_start_date += timedelta(weeks=1)
-                seq += 1
-
+            installments = self.build_installment_rows([loan])
             self.repo.bulk_insert_installments(installments)
+            loan.open_installment_count = len(installments)
             self.db.flush()
             logger.info(f"Generated {len(installments)} installments for Loan ID {loan.loan_id}.")
         except Exception as e:
             logger.error(f"Error generating payment schedule for {loan.loan_id}: {e}", exc_info=True)
             raise LoanScheduleGenerationError(f"Could not generate payment schedule: {e}")
 
+    def build_installment_rows(self, loans: List[DriverLoan]) -> List[dict]:
+        """
+        LoanInstallment column values of the weekly schedules of many loans,
+        computed together by the schedule kernel.
+
+        Interest = Outstanding Principal * (Annual Rate / 100) * (Accrual Days / 365),
+        accrued from the loan date for the first installment and over the
+        week for the others. Installments are due at the end of their week.
+        """
+        schedule = loan_installments(
+            principal_cents=[to_cents(loan.principal_amount) for loan in loans],
+            weekly_cents=[to_cents(self._get_weekly_principal(loan.principal_amount)) for loan in loans],
+            start_weeks=[loan.start_week for loan in loans],
+            loan_dates=[loan.loan_date for loan in loans],
+            annual_rates=[loan.interest_rate or 0 for loan in loans],
+        )
+        columns = schedule.columns
+        principal = cents_to_decimals(columns["principal_cents"])
+        interest = cents_to_decimals(columns["interest_cents"])
+        total_due = cents_to_decimals(columns["principal_cents"] + columns["interest_cents"])
+
+        return [
+            {
+                "loan_id": loans[row["term"]].id,
+                "installment_id": f"{loans[row['term']].loan_id}-{str(row['installment_no']).zfill(2)}",
+                "week_start_date": row["week_start_date"],
+                "week_end_date": row["week_end_date"],
+                "principal_amount": principal[index],
+                "interest_amount": interest[index],
+                "total_due": total_due[index],
+                "status": LoanInstallmentStatus.SCHEDULED,
+            }
+            for index, row in enumerate(schedule.records())
+        ]
+
     def post_due_installments_to_ledger(self):
         """
         Finds all due loan installments and posts them as obligations to the ledger.
         Designed to be called by a scheduled Celery task.
         """
         logger.info("Starting task to post due loan installments to ledger.")
-        db = SessionLocal()
-        ledger_service = LedgerService(db)
-        repo = LoanRepository(db)
-        
-        posted_count, failed_count = 0, 0
         try:
-            installments_to_post = repo.get_due_installments_to_post(datetime.utcnow().date())
-
-            if not installments_to_post:
-                logger.info("No due loan installments to post.")
-                return {"posted": 0, "failed": 0}
-
-            for installment in installments_to_post:
-                try:
-                    ledger_service.create_obligation(
-                        category=PostingCategory.LOAN,
-                        amount=installment.total_due,
-                        reference_id=installment.installment_id,
-                        driver_id=installment.loan.driver_id,
-                        lease_id=installment.loan.lease_id,
-                        vehicle_id=installment.loan.vehicle_id,
-                        medallion_id=installment.loan.medallion_id,
-                    )
-                    
-                    repo.update_installment(installment.id, {
-                        "status": LoanInstallmentStatus.POSTED,
-                        "posted_on": datetime.utcnow()
-                    })
-                    posted_count += 1
-                except Exception as e:
-                    failed_count += 1
-                    reason = f"Ledger service error: {str(e)}"
-                    repo.update_installment(installment.id, {"status": LoanInstallmentStatus.POSTED, "failure_reason": reason})
-                    logger.error(f"Failed to post loan installment {installment.installment_id} to ledger: {e}", exc_info=True)
-            
-            db.commit()
+            _, posted_count, failed_count = self.post_installments_to_ledger(post_all_due=True)
             logger.info(f"Loan installment posting task finished. Posted: {posted_count}, Failed: {failed_count}")
             return {"posted": posted_count, "failed": failed_count}
         except Exception as e:
-            db.rollback()
             logger.error(f"Fatal error in post_due_installments_to_ledger: {e}", exc_info=True)
             raise
-        finally:
-            db.close()
 
     def post_installments_to_ledger(
         self, installment_ids: Optional[List[str]] = None,
         post_all_due: bool = False
     ) -> Tuple[List[InstallmentPostingResult], int, int]:
-        """Post loan installments to the ledger either by specific IDs or all due installments."""
+        """
+        Post loan installments to the ledger either by specific IDs or all due installments.
+
+        The installments are read from the due-installment queue with their
+        loan's ledger linkage in one query, posted in one ledger batch
+        (LedgerService.create_obligations) and marked POSTED with one UPDATE.
+        """
 
         if not installment_ids and not post_all_due:
             raise ValueError("Either provide installment_ids or set post_all_due=True")
         
-        ledger_repo = LedgerRepository(self.db)
-        ledger_service = LedgerService(ledger_repo)
+        ledger_service = LedgerService(LedgerRepository(self.db))
+        today = datetime.now(timezone.utc).date()
 
         results = []
-        successful_count = 0
         failed_count = 0
 
+        def fail(installment_id: str, message: str):
+            nonlocal failed_count
+            results.append(InstallmentPostingResult(
+                installment_id=installment_id,
+                success=False,
+                message=message
+            ))
+            failed_count += 1
+
         # Determine which installments to post
         if post_all_due:
-            installments_to_post = self.repo.get_due_installments_to_post(
-                datetime.now(timezone.utc).date()
-            )
-            logger.info(f"Found {len(installments_to_post)} due installments to post")
+            rows = self.repo.get_due_installment_queue(today)
+            logger.info(f"Found {len(rows)} due installments to post")
         else:
-            # Fetch specific installments by their IDs
-            installments_to_post = []
+            found = {row.installment_id: row for row in self.repo.get_installment_queue_by_ids(installment_ids)}
+            rows = []
             for installment_id in installment_ids:
-                installment = self.repo.get_installment_by_installment_id(installment_id)
-                if installment:
-                    installments_to_post.append(installment)
+                row = found.get(installment_id)
+                if not row:
+                    fail(installment_id, f"Installment {installment_id} not found")
+                elif row.status != LoanInstallmentStatus.SCHEDULED:
+                    fail(installment_id, f"Installment status is {row.status.value}, must be SCHEDULED")
+                elif row.loan_status != LoanStatus.OPEN:
+                    fail(installment_id, f"Parent loan status is {row.loan_status.value}, must be OPEN")
+                elif row.week_start_date > today:
+                    fail(installment_id, f"Installment date {row.week_start_date} is in the future")
                 else:
-                    results.append(InstallmentPostingResult(
-                        installment_id=installment_id,
-                        success=False,
-                        error_message=f"Installment {installment_id} not found"
-                    ))
-                    failed_count += 1
-
-        # Process each installment
-        for installment in installments_to_post:
-            try:
-                # Validate installment can be posted
-                if installment.status != LoanInstallmentStatus.SCHEDULED:
-                    results.append(InstallmentPostingResult(
-                        installment_id=installment.installment_id,
-                        success=False,
-                        error_message=f"Installment status is {installment.status.value}, must be SCHEDULES"
-                    ))
-                    failed_count += 1
-                    continue
-
-                # Validate parent loan is OPEN
-                if installment.loan.status != LoanStatus.OPEN:
-                    results.append(InstallmentPostingResult(
-                        installment_id=installment.installment_id,
-                        success=False,
-                        error_message="Parent loan status is {installment.loan.status.value}, must be OPEN"
-                    ))
-
-                    failed_count += 1
-                    continue
-
-                if installment.week_start_date > datetime.utcnow().date():
-                    results.append(InstallmentPostingResult(
-                        installment_id=installment.installment_id,
-                        success=False,
-                        error_message=f"Installment date {installment.week_start_date} is in the future"
-                    ))
-
-                # Create obligation in ledger
-                ledger_posting = ledger_service.create_obligation(
-                    category=PostingCategory.LOAN,
-                    amount=installment.total_due,
-                    reference_id=installment.installment_id,
-                    driver_id=installment.loan.driver_id,
-                    lease_id=installment.loan.lease_id,
-                    # vehicle_id=installment.loan.vehicle_id,
-                    medallion_id=installment.loan.medallion_id,
-                )
-
-                # Update installment status
-                posted_on = datetime.now(timezone.utc)
-                self.repo.update_installment(installment.id, {
-                    "status": LoanInstallmentStatus.POSTED,
-                    "posted_on": posted_on,
-                    "ledger_posting_ref": ledger_posting.id
-                })
+                    rows.append(row)
+
+        result = ledger_service.create_obligations(
+            ObligationRequest(
+                key=row.id,
+                category=PostingCategory.LOAN,
+                amount=row.amount,
+                reference_id=row.installment_id,
+                driver_id=row.driver_id,
+                lease_id=row.lease_id,
+                vehicle_id=row.vehicle_id,
+                medallion_id=row.medallion_id,
+            )
+            for row in rows
+        )
 
+        posted_on = datetime.now(timezone.utc)
+        self.repo.bulk_update_installments([
+            {
+                "id": installment_pk,
+                "status": LoanInstallmentStatus.POSTED,
+                "posted_on": posted_on,
+                "ledger_posting_ref": posting.id,
+            }
+            for installment_pk, posting in result.posted.items()
+        ])
+
+        for row in rows:
+            if row.id in result.posted:
                 results.append(InstallmentPostingResult(
-                    installment_id=installment.installment_id,
+                    installment_id=row.installment_id,
                     success=True,
-                    logger_posting_id=ledger_posting.id,
-                    posted_on=posted_on
+                    message=f"Posted with ledger posting ID {result.posted[row.id].id}"
                 ))
-                successful_count += 1
+            else:
+                error = result.failed.get(row.id, "Not posted")
+                fail(row.installment_id, f"Ledger posting error: {error}")
+                logger.error(f"Failed to post installment {row.installment_id}: {error}")
 
-                logger.info(
-                    f"Successfully posted installment {installment.installment_id} "
-                    f"to ledger with posting ID {ledger_posting.id}"
-                )
-
-            except Exception as e:
-                results.append(InstallmentPostingResult(
-                    installment_id=installment.installment_id,
-                    success=False,
-                    error_message=f"Ledger posting error: {str(e)}"
-                ))
-
-                failed_count += 1
-                logger.error(
-                    f"Failed to post installment {installment.installment_id}: {e}",
-                    exc_info=True
-                )
+        successful_count = len(result.posted)
 
         # Commit all changes if at least one succeeded
         if successful_count > 0:
@@ -405,6 +343,7 @@ class LoanService:
                 self.repo.update_installment(installment.id, {
                     "status": LoanInstallmentStatus.PAID
                 })
+                self.repo.adjust_open_installment_count(installment.loan_id, -1)
                 
                 logger.info(
                     f"Marked loan installment as PAID",
@@ -443,6 +382,7 @@ class LoanService:
                 self.repo.update_installment(installment.id, {
                     "status": LoanInstallmentStatus.POSTED
                 })
+                self.repo.adjust_open_installment_count(installment.loan_id, 1)
                 
                 logger.info(
                     f"Reverted loan installment to POSTED (payment voided)",
@@ -467,33 +407,17 @@ class LoanService:
 
     def _check_and_close_loan(self, loan_id: int) -> None:
         """
-        Check if all installments for a loan are PAID.
-        If so, mark the loan as CLOSED.
+        Check if all installments for a loan are PAID, from the loan's
+        count of open installments. If so, mark the loan as CLOSED.
         
         Args:
             loan_id: The loan primary key
         """
         try:
-            loan = self.repo.get_loan_by_id(loan_id)
-            
-            if not loan or loan.status == LoanStatus.CLOSED:
-                return
-            
-            # Get all installments for this loan
-            installments = self.db.query(LoanInstallment).filter(
-                LoanInstallment.loan_id == loan_id
-            ).all()
-            
-            # Check if ALL installments are PAID
-            if all(inst.status == LoanInstallmentStatus.PAID for inst in installments):
-                self.repo.update_loan(loan_id, {
-                    "status": LoanStatus.CLOSED
-                })
-                
+            if self.repo.close_loan_if_settled(loan_id):
                 logger.info(
                     f"Closed loan (all installments paid)",
-                    loan_id=loan.loan_id,
-                    total_installments=len(installments)
+                    loan_id=loan_id
                 )
                 
         except Exception as e:
@@ -503,6 +427,3 @@ class LoanService:
                 exc_info=True
             )
             raise
-    
-
-        
\ No newline at end of file
@@ -17,6 +17,8 @@ import app.medallions.models
 import app.vehicles.models
 import app.drivers.models
 import app.leases.models
+import app.leases.availability  # registers lease availability flush listener
+import app.leases.lease_search  # registers lease search flush listener
 import app.esign.models
 import app.ledger.models
 import app.curb.models
@@ -28,6 +30,9 @@ import app.tlc.models
 import app.interim_payments.models
 import app.misc_expenses.models
 import app.driver_payments.models
+import app.driver_payments.payable_queue  # registers payable queue flush listener
+import app.current_balances.balance_grid  # registers balance grid change listener
+import app.vehicles.plate_index  # registers plate index flush listener
 import app.dtr.models
 import app.notes.models
 import app.reports.models
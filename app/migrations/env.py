@@ -38,6 +38,7 @@ from app.interim_payments.models import *
 from app.misc_expenses.models import *
 from app.dtr.models import *
 from app.driver_payments.models import *
+from app.current_balances.models import *
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
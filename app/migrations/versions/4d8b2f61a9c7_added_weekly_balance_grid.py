@@ -0,0 +1,75 @@
+"""added weekly balance grid
+
+Revision ID: 4d8b2f61a9c7
+Revises: 7c1e4a9b2d30
+Create Date: 2026-10-19 11:02:17.481930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d8b2f61a9c7'
+down_revision: Union[str, Sequence[str], None] = '7c1e4a9b2d30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('weekly_balance_grid',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('lease_pk', sa.Integer(), nullable=False),
+    sa.Column('week_start', sa.Date(), nullable=False),
+    sa.Column('week_end', sa.Date(), nullable=False),
+    sa.Column('driver_pk', sa.Integer(), nullable=True),
+    sa.Column('vehicle_id', sa.Integer(), nullable=True),
+    sa.Column('lease_id', sa.String(length=255), nullable=True),
+    sa.Column('driver_name', sa.String(length=255), nullable=True),
+    sa.Column('tlc_license', sa.String(length=255), nullable=True),
+    sa.Column('ssn', sa.String(length=16), nullable=True, comment='Masked SSN (XXX-XX-####)'),
+    sa.Column('medallion_number', sa.String(length=255), nullable=True),
+    sa.Column('plate_number', sa.String(length=255), nullable=True),
+    sa.Column('vin_number', sa.String(length=255), nullable=True),
+    sa.Column('lease_status', sa.String(length=64), nullable=True),
+    sa.Column('driver_status', sa.String(length=64), nullable=True),
+    sa.Column('dtr_status', sa.String(length=32), nullable=False),
+    sa.Column('payment_type', sa.String(length=16), nullable=False),
+    sa.Column('cc_earnings', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('weekly_lease_fee', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('mta_tif', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('ezpass_tolls', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('pvb_violations', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('tlc_tickets', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('repairs_wtd', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('loans_wtd', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('misc_charges', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('subtotal_deductions', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('prior_balance', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('deposit_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('net_earnings', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('last_updated', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['lease_pk'], ['leases.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['driver_pk'], ['drivers.id'], ),
+    sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('lease_pk', 'week_start', name='uq_weekly_balance_grid_lease_week')
+    )
+    op.create_index(op.f('ix_weekly_balance_grid_id'), 'weekly_balance_grid', ['id'], unique=False)
+    op.create_index(op.f('ix_weekly_balance_grid_driver_pk'), 'weekly_balance_grid', ['driver_pk'], unique=False)
+    op.create_index(op.f('ix_weekly_balance_grid_lease_id'), 'weekly_balance_grid', ['lease_id'], unique=False)
+    op.create_index('ix_weekly_balance_grid_week_net', 'weekly_balance_grid', ['week_start', 'net_earnings'], unique=False)
+    op.create_index('ix_weekly_balance_grid_week_driver', 'weekly_balance_grid', ['week_start', 'driver_name'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_weekly_balance_grid_week_driver', table_name='weekly_balance_grid')
+    op.drop_index('ix_weekly_balance_grid_week_net', table_name='weekly_balance_grid')
+    op.drop_index(op.f('ix_weekly_balance_grid_lease_id'), table_name='weekly_balance_grid')
+    op.drop_index(op.f('ix_weekly_balance_grid_driver_pk'), table_name='weekly_balance_grid')
+    op.drop_index(op.f('ix_weekly_balance_grid_id'), table_name='weekly_balance_grid')
+    op.drop_table('weekly_balance_grid')
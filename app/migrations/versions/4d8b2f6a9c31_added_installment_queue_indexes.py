@@ -0,0 +1,48 @@
+"""added installment queue indexes and open installment counts
+
+Revision ID: 4d8b2f6a9c31
+Revises: 9e3a6c1d8b42
+Create Date: 2026-10-19 21:02:18.447310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d8b2f6a9c31'
+down_revision: Union[str, Sequence[str], None] = '9e3a6c1d8b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# parent table -> (record name, installment table, installment foreign key, queue index)
+TABLES = {
+    'driver_loans': ('loan', 'loan_installments', 'loan_id', 'ix_loan_installments_status_week_start'),
+    'repair_invoices': ('invoice', 'repair_installments', 'invoice_id', 'ix_repair_installments_status_week_start'),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for parent, (record, table, foreign_key, index) in TABLES.items():
+        op.create_index(index, table, ['status', 'week_start_date'], unique=False)
+        op.add_column(parent, sa.Column('open_installment_count', sa.Integer(), server_default='0', nullable=False, comment=f'Installments of this {record} not yet PAID; the {record} closes when it reaches 0.'))
+
+        # Existing records start from the installments not yet PAID
+        op.execute(f"""
+            UPDATE {parent}
+            SET open_installment_count = (
+                SELECT COUNT(*) FROM {table}
+                WHERE {table}.{foreign_key} = {parent}.id
+                  AND {table}.status <> 'PAID'
+            )
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for parent, (record, table, foreign_key, index) in TABLES.items():
+        op.drop_column(parent, 'open_installment_count')
+        op.drop_index(index, table_name=table)
@@ -0,0 +1,79 @@
+"""added plate key and plate history
+
+Revision ID: 5b2e8d4f7a13
+Revises: 9e3a5c7d1b48
+Create Date: 2026-10-19 16:42:07.518224
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e8d4f7a13'
+down_revision: Union[str, Sequence[str], None] = '9e3a5c7d1b48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('vehicle_registration', sa.Column('plate_key', sa.String(length=32), nullable=True, comment='Plate number uppercased with separators removed, set on flush (see app.vehicles.plate_index)'))
+    op.create_index('ix_vehicle_registration_plate_key_state', 'vehicle_registration', ['plate_key', 'registration_state'], unique=False)
+
+    op.create_table('vehicle_plate_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('vehicle_id', sa.Integer(), nullable=False),
+    sa.Column('registration_id', sa.Integer(), nullable=True),
+    sa.Column('plate_number', sa.String(length=255), nullable=False, comment='Plate number as registered'),
+    sa.Column('plate_key', sa.String(length=32), nullable=False, comment='Normalized plate number'),
+    sa.Column('plate_state', sa.String(length=2), nullable=True, comment='Registration state, if known'),
+    sa.Column('effective_from', sa.Date(), nullable=False, comment='First day the vehicle carried the plate'),
+    sa.Column('effective_to', sa.Date(), nullable=True, comment='Day the plate moved on; NULL while current'),
+    sa.Column('recorded_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ),
+    sa.ForeignKeyConstraint(['registration_id'], ['vehicle_registration.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('registration_id', 'effective_from', name='uq_vehicle_plate_history_registration_from')
+    )
+    op.create_index(op.f('ix_vehicle_plate_history_id'), 'vehicle_plate_history', ['id'], unique=False)
+    op.create_index(op.f('ix_vehicle_plate_history_vehicle_id'), 'vehicle_plate_history', ['vehicle_id'], unique=False)
+    op.create_index('ix_vehicle_plate_history_key_from', 'vehicle_plate_history', ['plate_key', 'effective_from'], unique=False)
+
+    # Same normalization as app.vehicles.plate_index.normalize_plate
+    op.execute("""
+        UPDATE vehicle_registration
+        SET plate_key = NULLIF(LEFT(REGEXP_REPLACE(UPPER(plate_number), '[^A-Z0-9]', ''), 32), '')
+        WHERE plate_number IS NOT NULL
+    """)
+
+    # One history row per registration, held until the next registration of the plate
+    op.execute("""
+        INSERT INTO vehicle_plate_history (
+            vehicle_id, registration_id, plate_number, plate_key, plate_state,
+            effective_from, effective_to, recorded_at
+        )
+        SELECT
+            vr.vehicle_id, vr.id, TRIM(vr.plate_number), vr.plate_key,
+            CASE WHEN UPPER(TRIM(vr.registration_state)) REGEXP '^[A-Z]{2}$'
+                 THEN UPPER(TRIM(vr.registration_state)) END,
+            vr.registration_date,
+            LEAD(vr.registration_date) OVER (
+                PARTITION BY vr.plate_key ORDER BY vr.registration_date, vr.id
+            ),
+            NOW()
+        FROM vehicle_registration vr
+        WHERE vr.plate_key IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_vehicle_plate_history_key_from', table_name='vehicle_plate_history')
+    op.drop_index(op.f('ix_vehicle_plate_history_vehicle_id'), table_name='vehicle_plate_history')
+    op.drop_index(op.f('ix_vehicle_plate_history_id'), table_name='vehicle_plate_history')
+    op.drop_table('vehicle_plate_history')
+    op.drop_index('ix_vehicle_registration_plate_key_state', table_name='vehicle_registration')
+    op.drop_column('vehicle_registration', 'plate_key')
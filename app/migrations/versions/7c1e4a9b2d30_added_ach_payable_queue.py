@@ -0,0 +1,75 @@
+"""added ach payable queue
+
+Revision ID: 7c1e4a9b2d30
+Revises: abab11b9bf99
+Create Date: 2026-10-19 09:12:41.305118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4a9b2d30'
+down_revision: Union[str, Sequence[str], None] = 'abab11b9bf99'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ach_payable_queue',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('dtr_id', sa.Integer(), nullable=False),
+    sa.Column('driver_id', sa.Integer(), nullable=False),
+    sa.Column('receipt_number', sa.String(length=50), nullable=False),
+    sa.Column('week_start_date', sa.Date(), nullable=False),
+    sa.Column('medallion_number', sa.String(length=255), nullable=True),
+    sa.Column('driver_name', sa.String(length=255), nullable=True),
+    sa.Column('total_due', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('has_bank_info', sa.Boolean(), nullable=False),
+    sa.Column('enqueued_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['dtr_id'], ['dtrs.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['driver_id'], ['drivers.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('dtr_id')
+    )
+    op.create_index(op.f('ix_ach_payable_queue_id'), 'ach_payable_queue', ['id'], unique=False)
+    op.create_index(op.f('ix_ach_payable_queue_driver_id'), 'ach_payable_queue', ['driver_id'], unique=False)
+    op.create_index('ix_ach_payable_queue_bank_week', 'ach_payable_queue', ['has_bank_info', 'week_start_date'], unique=False)
+    op.create_index('ix_dtrs_ach_eligibility', 'dtrs', ['status', 'payment_method', 'ach_batch_id'], unique=False)
+
+    # Backfill the queue from currently payable DTRs
+    op.execute("""
+        INSERT INTO ach_payable_queue (
+            dtr_id, driver_id, receipt_number, week_start_date, medallion_number,
+            driver_name, total_due, has_bank_info, enqueued_at, updated_at
+        )
+        SELECT
+            d.id, d.primary_driver_id, d.receipt_number, d.week_start_date, m.medallion_number,
+            CONCAT(dr.first_name, ' ', dr.last_name), d.total_due_to_driver,
+            (ba.id IS NOT NULL
+             AND ba.bank_routing_number IS NOT NULL AND TRIM(ba.bank_routing_number) <> ''
+             AND ba.bank_account_number IS NOT NULL AND TRIM(ba.bank_account_number) <> ''),
+            NOW(), NOW()
+        FROM dtrs d
+        JOIN drivers dr ON dr.id = d.primary_driver_id
+        LEFT JOIN bank_account ba ON ba.id = dr.bank_account_id
+        LEFT JOIN medallions m ON m.id = d.medallion_id
+        WHERE d.status = 'FINALIZED'
+          AND d.payment_method = 'ACH'
+          AND d.ach_batch_id IS NULL
+          AND d.payment_date IS NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_dtrs_ach_eligibility', table_name='dtrs')
+    op.drop_index('ix_ach_payable_queue_bank_week', table_name='ach_payable_queue')
+    op.drop_index(op.f('ix_ach_payable_queue_driver_id'), table_name='ach_payable_queue')
+    op.drop_index(op.f('ix_ach_payable_queue_id'), table_name='ach_payable_queue')
+    op.drop_table('ach_payable_queue')
@@ -0,0 +1,58 @@
+"""added association failure codes
+
+Revision ID: 7c4f1a9e2d56
+Revises: 5b2e8d4f7a13
+Create Date: 2026-10-19 18:21:44.906315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4f1a9e2d56'
+down_revision: Union[str, Sequence[str], None] = '5b2e8d4f7a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FAILURE_CODE = sa.Enum('NO_PLATE_MATCH', 'NO_TRIP_IN_WINDOW', 'TRIP_WITHOUT_DRIVER', name='associationfailurecode')
+
+TABLES = {
+    'ezpass_transactions': 'ix_ezpass_transactions_status_failure_vehicle',
+    'pvb_violations': 'ix_pvb_violations_status_failure_vehicle',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, index in TABLES.items():
+        op.add_column(table, sa.Column('failure_code', FAILURE_CODE, nullable=True, comment='Why the last association attempt failed.'))
+        op.add_column(table, sa.Column('association_checked_at', sa.DateTime(timezone=True), nullable=True, comment='Database time of the last association attempt.'))
+        op.create_index(index, table, ['status', 'failure_code', 'vehicle_id'], unique=False)
+
+        # Classify existing failures from their reason text; the last change
+        # to the row stands in for the time of the last attempt
+        op.execute(f"""
+            UPDATE {table}
+            SET failure_code = CASE
+                    WHEN failure_reason LIKE 'No vehicle found for plate%' THEN 'NO_PLATE_MATCH'
+                    WHEN failure_reason LIKE 'No active CURB trip found%' THEN 'NO_TRIP_IN_WINDOW'
+                END,
+                association_checked_at = COALESCE(updated_on, created_on)
+            WHERE status = 'ASSOCIATION_FAILED'
+              AND (failure_reason LIKE 'No vehicle found for plate%'
+                   OR failure_reason LIKE 'No active CURB trip found%')
+        """)
+
+    op.create_index('ix_curb_trips_vehicle_updated', 'curb_trips', ['vehicle_id', 'updated_on'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_curb_trips_vehicle_updated', table_name='curb_trips')
+    for table, index in TABLES.items():
+        op.drop_index(index, table_name=table)
+        op.drop_column(table, 'association_checked_at')
+        op.drop_column(table, 'failure_code')
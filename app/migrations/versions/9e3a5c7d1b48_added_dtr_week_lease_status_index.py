@@ -0,0 +1,28 @@
+"""added dtr week lease status index
+
+Revision ID: 9e3a5c7d1b48
+Revises: 4d8b2f61a9c7
+Create Date: 2026-10-19 14:06:18.442913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3a5c7d1b48'
+down_revision: Union[str, Sequence[str], None] = '4d8b2f61a9c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_dtrs_week_lease_status', 'dtrs', ['week_start_date', 'lease_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_dtrs_week_lease_status', table_name='dtrs')
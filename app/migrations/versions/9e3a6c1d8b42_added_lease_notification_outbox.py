@@ -0,0 +1,48 @@
+"""added lease notification outbox
+
+Revision ID: 9e3a6c1d8b42
+Revises: 7c4f1a9e2d56
+Create Date: 2026-10-19 20:14:37.218604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3a6c1d8b42'
+down_revision: Union[str, Sequence[str], None] = '7c4f1a9e2d56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('lease_notification_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('lease_id', sa.Integer(), nullable=True, comment='Lease the message is about; NULL for run summaries'),
+    sa.Column('kind', sa.String(length=64), nullable=False, comment='Message type, e.g. RENEWAL_REMINDER'),
+    sa.Column('channel', sa.Enum('EMAIL', 'SMS', name='leasenotificationchannel'), nullable=False),
+    sa.Column('recipient', sa.String(length=255), nullable=False, comment='Email address or E.164 phone number'),
+    sa.Column('subject', sa.String(length=255), nullable=True),
+    sa.Column('body_html', sa.Text(), nullable=True),
+    sa.Column('body_text', sa.Text(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'SENT', 'FAILED', name='leasenotificationstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('queued_at', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['lease_id'], ['leases.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_lease_notification_outbox_id'), 'lease_notification_outbox', ['id'], unique=False)
+    op.create_index('ix_lease_notification_outbox_status_id', 'lease_notification_outbox', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_lease_notification_outbox_status_id', table_name='lease_notification_outbox')
+    op.drop_index(op.f('ix_lease_notification_outbox_id'), table_name='lease_notification_outbox')
+    op.drop_table('lease_notification_outbox')
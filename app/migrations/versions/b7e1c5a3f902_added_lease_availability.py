@@ -0,0 +1,120 @@
+"""added lease availability index
+
+Revision ID: b7e1c5a3f902
+Revises: 4d8b2f6a9c31
+Create Date: 2026-10-19 21:47:05.612894
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e1c5a3f902'
+down_revision: Union[str, Sequence[str], None] = '4d8b2f6a9c31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('lease_availability',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity_type', sa.Enum('MEDALLION', 'VEHICLE', 'DRIVER', name='leaseavailabilityentity'), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False, comment='vehicles.id, medallions.id or drivers.id'),
+    sa.Column('can_lease', sa.Boolean(), nullable=False),
+    sa.Column('active_lease_count', sa.Integer(), nullable=False, comment='Active leases on the record'),
+    sa.Column('day_shift_occupied', sa.Boolean(), nullable=False, comment='An active lease holds the day shift'),
+    sa.Column('night_shift_occupied', sa.Boolean(), nullable=False, comment='An active lease holds the night shift'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('entity_type', 'entity_id', name='uq_lease_availability_entity')
+    )
+    op.create_index(op.f('ix_lease_availability_id'), 'lease_availability', ['id'], unique=False)
+    op.create_index('ix_lease_availability_candidates', 'lease_availability', ['entity_type', 'can_lease', 'entity_id'], unique=False)
+
+    # Backfill with the rules of app.leases.availability; vehicles first,
+    # since medallions follow the vehicles assigned to them
+    op.execute("""
+        INSERT INTO lease_availability (
+            entity_type, entity_id, can_lease, active_lease_count,
+            day_shift_occupied, night_shift_occupied, updated_at
+        )
+        SELECT
+            'VEHICLE', v.id,
+            (v.vehicle_status = 'Available' OR COALESCE(o.single_shift, 0) = 1)
+                AND NOT (COALESCE(o.day, 0) = 1 AND COALESCE(o.night, 0) = 1),
+            COALESCE(o.active_leases, 0), COALESCE(o.day, 0) = 1, COALESCE(o.night, 0) = 1,
+            NOW()
+        FROM vehicles v
+        LEFT JOIN (
+            SELECT
+                vehicle_id,
+                COUNT(id) AS active_leases,
+                MAX(CASE WHEN is_day_shift = 1 THEN 1 ELSE 0 END) AS day,
+                MAX(CASE WHEN is_night_shift = 1 THEN 1 ELSE 0 END) AS night,
+                MAX(CASE WHEN (is_day_shift = 1 AND COALESCE(is_night_shift, 0) = 0)
+                          OR (is_night_shift = 1 AND COALESCE(is_day_shift, 0) = 0)
+                         THEN 1 ELSE 0 END) AS single_shift
+            FROM leases
+            WHERE lease_status = 'Active' AND vehicle_id IS NOT NULL
+            GROUP BY vehicle_id
+        ) o ON o.vehicle_id = v.id
+    """)
+    op.execute("""
+        INSERT INTO lease_availability (
+            entity_type, entity_id, can_lease, active_lease_count,
+            day_shift_occupied, night_shift_occupied, updated_at
+        )
+        SELECT
+            'MEDALLION', m.id,
+            COALESCE(m.medallion_status, '') <> 'N' AND COALESCE(lv.leasable, 0) = 1,
+            COALESCE(o.active_leases, 0), COALESCE(o.day, 0) = 1, COALESCE(o.night, 0) = 1,
+            NOW()
+        FROM medallions m
+        LEFT JOIN (
+            SELECT
+                medallion_id,
+                COUNT(id) AS active_leases,
+                MAX(CASE WHEN is_day_shift = 1 THEN 1 ELSE 0 END) AS day,
+                MAX(CASE WHEN is_night_shift = 1 THEN 1 ELSE 0 END) AS night
+            FROM leases
+            WHERE lease_status = 'Active' AND medallion_id IS NOT NULL
+            GROUP BY medallion_id
+        ) o ON o.medallion_id = m.id
+        LEFT JOIN (
+            SELECT v.medallion_id, MAX(CASE WHEN la.can_lease = 1 THEN 1 ELSE 0 END) AS leasable
+            FROM vehicles v
+            JOIN lease_availability la ON la.entity_type = 'VEHICLE' AND la.entity_id = v.id
+            WHERE v.medallion_id IS NOT NULL
+            GROUP BY v.medallion_id
+        ) lv ON lv.medallion_id = m.id
+    """)
+    op.execute("""
+        INSERT INTO lease_availability (
+            entity_type, entity_id, can_lease, active_lease_count,
+            day_shift_occupied, night_shift_occupied, updated_at
+        )
+        SELECT
+            'DRIVER', d.id,
+            COALESCE(d.driver_status IN ('Registered', 'Active'), 0),
+            COALESCE(dl.active_leases, 0), 0, 0,
+            NOW()
+        FROM drivers d
+        LEFT JOIN (
+            SELECT ld.driver_id, COUNT(DISTINCT l.id) AS active_leases
+            FROM lease_drivers ld
+            JOIN leases l ON l.id = ld.lease_id
+            WHERE ld.is_active = 1 AND l.lease_status = 'Active'
+            GROUP BY ld.driver_id
+        ) dl ON dl.driver_id = d.driver_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_lease_availability_candidates', table_name='lease_availability')
+    op.drop_index(op.f('ix_lease_availability_id'), table_name='lease_availability')
+    op.drop_table('lease_availability')
@@ -0,0 +1,150 @@
+"""added lease search projection and term index
+
+Revision ID: c3f8a1d6e274
+Revises: b7e1c5a3f902
+Create Date: 2026-10-19 22:36:41.208517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8a1d6e274'
+down_revision: Union[str, Sequence[str], None] = 'b7e1c5a3f902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_INDEXES = {
+    'ix_lease_search_medallion_number': ['medallion_number'],
+    'ix_lease_search_vin': ['vin'],
+    'ix_lease_search_plate_number': ['plate_number'],
+    'ix_lease_search_driver_id': ['driver_id'],
+    'ix_lease_search_driver_last_name': ['driver_last_name'],
+    'ix_lease_search_tlc_number': ['tlc_number'],
+    'ix_lease_search_lease_amount': ['lease_amount'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('lease_search',
+    sa.Column('lease_id', sa.Integer(), autoincrement=False, nullable=False, comment='leases.id'),
+    sa.Column('medallion_number', sa.String(length=64), nullable=True),
+    sa.Column('vin', sa.String(length=64), nullable=True),
+    sa.Column('plate_number', sa.String(length=255), nullable=True, comment='Plate of the active registration, else the first'),
+    sa.Column('driver_id', sa.String(length=64), nullable=True, comment='Lookup id of the primary driver'),
+    sa.Column('driver_last_name', sa.String(length=128), nullable=True, comment='Last name of the primary driver'),
+    sa.Column('tlc_number', sa.String(length=64), nullable=True, comment='TLC license number of the primary driver'),
+    sa.Column('lease_amount', sa.Float(), nullable=True, comment='lease_limit of the lease_amount configuration'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('lease_id')
+    )
+    for index, columns in SEARCH_INDEXES.items():
+        op.create_index(index, 'lease_search', columns, unique=False)
+
+    op.create_table('lease_search_terms',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('lease_id', sa.Integer(), nullable=False, comment='leases.id'),
+    sa.Column('field', sa.Enum('MEDALLION', 'VIN', 'PLATE', 'DRIVER_ID', 'DRIVER_NAME', 'TLC_NUMBER', name='leasesearchfield'), nullable=False),
+    sa.Column('term', sa.String(length=64), nullable=False, comment='A suffix of the uppercased value'),
+    sa.Column('is_additional_driver', sa.Boolean(), nullable=False, comment='The value belongs to an additional driver of the lease'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_lease_search_terms_id'), 'lease_search_terms', ['id'], unique=False)
+    op.create_index('ix_lease_search_terms_lookup', 'lease_search_terms', ['field', 'term', 'lease_id'], unique=False)
+    op.create_index('ix_lease_search_terms_lease_id', 'lease_search_terms', ['lease_id'], unique=False)
+
+    # Backfill with the rules of app.leases.lease_search: the primary driver
+    # is the first active regular driver, else the first regular driver,
+    # else the first driver
+    op.execute("""
+        INSERT INTO lease_search (
+            lease_id, medallion_number, vin, plate_number,
+            driver_id, driver_last_name, tlc_number, lease_amount, updated_at
+        )
+        SELECT
+            l.id, m.medallion_number, v.vin,
+            (
+                SELECT vr.plate_number FROM vehicle_registration vr
+                WHERE vr.vehicle_id = l.vehicle_id
+                ORDER BY vr.status = 'Active' DESC, vr.id
+                LIMIT 1
+            ),
+            pd.driver_id, pd.last_name, pd.tlc_license_number,
+            (
+                SELECT CASE WHEN TRIM(lc.lease_limit) REGEXP '^[-+]?[0-9]*\\\\.?[0-9]+$'
+                            THEN CAST(lc.lease_limit AS DOUBLE) END
+                FROM lease_configuration lc
+                WHERE lc.lease_id = l.id AND lc.lease_breakup_type = 'lease_amount'
+                ORDER BY lc.id
+                LIMIT 1
+            ),
+            NOW()
+        FROM leases l
+        LEFT JOIN medallions m ON m.id = l.medallion_id
+        LEFT JOIN vehicles v ON v.id = l.vehicle_id
+        LEFT JOIN (
+            SELECT
+                ld.lease_id, d.driver_id, d.last_name, t.tlc_license_number,
+                ROW_NUMBER() OVER (
+                    PARTITION BY ld.lease_id
+                    ORDER BY
+                        CASE WHEN ld.is_active = 1 AND COALESCE(ld.is_additional_driver, 0) = 0 THEN 0
+                             WHEN COALESCE(ld.is_additional_driver, 0) = 0 THEN 1
+                             ELSE 2 END,
+                        ld.id
+                ) AS position
+            FROM lease_drivers ld
+            JOIN drivers d ON d.driver_id = ld.driver_id
+            LEFT JOIN driver_tlc_license t ON t.id = d.tlc_license_number_id
+        ) pd ON pd.lease_id = l.id AND pd.position = 1
+    """)
+
+    # Every suffix of every value, skipping suffixes that start with a space;
+    # plates are indexed by their normalized plate_key
+    op.execute("""
+        INSERT INTO lease_search_terms (lease_id, field, term, is_additional_driver)
+        WITH RECURSIVE positions (i) AS (
+            SELECT 1 UNION ALL SELECT i + 1 FROM positions WHERE i < 255
+        ),
+        search_values (lease_id, field, value, is_additional_driver) AS (
+            SELECT l.id, 'MEDALLION', UPPER(TRIM(m.medallion_number)), 0
+            FROM leases l JOIN medallions m ON m.id = l.medallion_id
+            UNION ALL
+            SELECT l.id, 'VIN', UPPER(TRIM(v.vin)), 0
+            FROM leases l JOIN vehicles v ON v.id = l.vehicle_id
+            UNION ALL
+            SELECT l.id, 'PLATE', vr.plate_key, 0
+            FROM leases l JOIN vehicle_registration vr ON vr.vehicle_id = l.vehicle_id
+            UNION ALL
+            SELECT ld.lease_id, 'DRIVER_ID', UPPER(TRIM(d.driver_id)), COALESCE(ld.is_additional_driver, 0)
+            FROM lease_drivers ld JOIN drivers d ON d.driver_id = ld.driver_id
+            UNION ALL
+            SELECT ld.lease_id, 'DRIVER_NAME', UPPER(TRIM(d.full_name)), COALESCE(ld.is_additional_driver, 0)
+            FROM lease_drivers ld JOIN drivers d ON d.driver_id = ld.driver_id
+            UNION ALL
+            SELECT ld.lease_id, 'TLC_NUMBER', UPPER(TRIM(t.tlc_license_number)), COALESCE(ld.is_additional_driver, 0)
+            FROM lease_drivers ld
+            JOIN drivers d ON d.driver_id = ld.driver_id
+            JOIN driver_tlc_license t ON t.id = d.tlc_license_number_id
+        )
+        SELECT DISTINCT sv.lease_id, sv.field, LEFT(SUBSTRING(sv.value, p.i), 64), sv.is_additional_driver
+        FROM search_values sv
+        JOIN positions p ON p.i <= CHAR_LENGTH(sv.value)
+        WHERE sv.lease_id IS NOT NULL
+          AND SUBSTRING(sv.value, p.i, 1) NOT REGEXP '[[:space:]]'
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_lease_search_terms_lease_id', table_name='lease_search_terms')
+    op.drop_index('ix_lease_search_terms_lookup', table_name='lease_search_terms')
+    op.drop_index(op.f('ix_lease_search_terms_id'), table_name='lease_search_terms')
+    op.drop_table('lease_search_terms')
+    for index in SEARCH_INDEXES:
+        op.drop_index(index, table_name='lease_search')
+    op.drop_table('lease_search')
@@ -32,6 +32,11 @@ class PVBImportInProgressError(PVBError):
     def __init__(self):
         super().__init__("A PVB import is already in progress. Please wait for it to complete.")
 
+class PVBImportLockUnavailableError(PVBError):
+    """Raised when the import lock cannot be checked, so an import cannot safely start."""
+    def __init__(self):
+        super().__init__("PVB imports are temporarily unavailable. Please try again shortly.")
+
 class PVBValidationError(PVBError):
     """Raised for general validation errors during manual PVB creation."""
     pass
\ No newline at end of file
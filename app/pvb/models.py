@@ -9,6 +9,7 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
@@ -20,6 +21,7 @@ from sqlalchemy import (
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db import Base
+from app.curb.models import AssociationFailureCode
 from app.users.models import AuditMixin
 
 
@@ -141,6 +143,12 @@ class PVBViolation(Base, AuditMixin):
         Enum(PVBViolationStatus), default=PVBViolationStatus.IMPORTED, index=True
     )
     failure_reason: Mapped[Optional[str]] = mapped_column(Text)
+    failure_code: Mapped[Optional[AssociationFailureCode]] = mapped_column(
+        Enum(AssociationFailureCode), nullable=True, comment="Why the last association attempt failed."
+    )
+    association_checked_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True, comment="Database time of the last association attempt."
+    )
     posting_date: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     violation_code : Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     violation_country : Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
@@ -159,6 +167,11 @@ class PVBViolation(Base, AuditMixin):
     medallion: Mapped[Optional["Medallion"]] = relationship()
     lease: Mapped[Optional["Lease"]] = relationship()
 
+    __table_args__ = (
+        # Re-association worklist: failed records by blocking condition and vehicle
+        Index("ix_pvb_violations_status_failure_vehicle", "status", "failure_code", "vehicle_id"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -178,6 +191,7 @@ class PVBViolation(Base, AuditMixin):
             "amount_due": float(self.amount_due),
             "status": self.status.value,
             "failure_reason": self.failure_reason,
+            "failure_code": self.failure_code.value if self.failure_code else None,
             "posting_date": self.posting_date.isoformat() if self.posting_date else None,
             "driver_id": self.driver_id,
             "vehicle_id": self.vehicle_id,
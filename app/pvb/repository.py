@@ -1,14 +1,17 @@
 ### app/pvb/repository.py
 
 from datetime import date, datetime, time
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import func, update , or_
+from sqlalchemy import and_, exists, func, update , or_
 from sqlalchemy.orm import Session, joinedload
 
+from app.curb.models import AssociationFailureCode, CurbTrip
+from app.current_balances.balance_grid import mark_leases_changed
 from app.drivers.models import Driver
 from app.medallions.models import Medallion
-from app.vehicles.models import Vehicle
+from app.vehicles.models import Vehicle, VehiclePlateHistory
+from app.vehicles.plate_index import normalize_plate
 from app.leases.models import Lease
 from app.pvb.models import (
     PVBImport,
@@ -16,6 +19,7 @@ from app.pvb.models import (
     PVBViolation,
     PVBViolationStatus,
 )
+from app.utils.csv_import import insert_chunk
 from app.utils.logger import get_logger
 from app.utils.general import apply_multi_filter
 
@@ -41,43 +45,78 @@ class PVBRepository:
         self.db.flush()
         return import_record
 
+    def get_import_record(self, import_id: int) -> Optional[PVBImport]:
+        """Fetches a single import record by its ID."""
+        return self.db.query(PVBImport).filter(PVBImport.id == import_id).first()
+
     def update_import_record_status(
-        self, import_id: int, status: PVBImportStatus, successful: int, failed: int
+        self,
+        import_id: int,
+        status: PVBImportStatus,
+        successful: int,
+        failed: int,
+        total_records: Optional[int] = None,
     ):
-        """Updates the status and counts of an import record upon completion."""
+        """
+        Updates the status and counts of an import record. Called after each
+        chunk of a streaming import (status PROCESSING) and upon completion.
+        """
+        values = {
+            "status": status,
+            "successful_records": successful,
+            "failed_records": failed,
+            "updated_on": datetime.utcnow(),
+        }
+        if total_records is not None:
+            values["total_records"] = total_records
+
         stmt = (
             update(PVBImport)
             .where(PVBImport.id == import_id)
-            .values(
-                status=status,
-                successful_records=successful,
-                failed_records=failed,
-                updated_on=datetime.utcnow(),
-            )
+            .values(**values)
         )
         self.db.execute(stmt)
 
-    def bulk_insert_violations(self, violations_data: List[dict]):
-        """Performs a bulk insert of new PVBViolation records, skipping duplicates."""
+    def insert_violation_chunk(
+        self, violations_data: List[dict]
+    ) -> Tuple[List[str], List[Tuple[dict, str]]]:
+        """
+        Inserts a chunk of new PVBViolation records with a single bulk INSERT,
+        skipping summons numbers that already exist or repeat within the
+        chunk. If the database rejects the chunk, its rows are inserted one
+        by one and only the bad rows are lost.
+
+        Returns:
+            The skipped summons numbers, and (violation data, error) for rows
+            the database rejected.
+        """
         if not violations_data:
-            return
-            
-        incoming_summons = {v['summons'] for v in violations_data}
+            return [], []
+
+        incoming_summons = {v["summons"] for v in violations_data if v["summons"]}
         existing_summons = {
             res[0] for res in self.db.query(PVBViolation.summons)
             .filter(PVBViolation.summons.in_(incoming_summons))
         }
-        
-        new_violations = [
-            PVBViolation(**data)
-            for data in violations_data
-            if data['summons'] not in existing_summons
-        ]
 
-        if new_violations:
-            self.db.add_all(new_violations)
-        
-        logger.info(f"Prepared {len(new_violations)} new PVB violations for insertion. Skipped {len(existing_summons)} duplicates.")
+        new_violations = []
+        skipped = []
+        seen = set(existing_summons)
+        for violation_data in violations_data:
+            summons = violation_data["summons"]
+            if summons and summons in seen:
+                skipped.append(summons)
+                continue
+            seen.add(summons)
+            new_violations.append(violation_data)
+
+        failed = insert_chunk(self.db, PVBViolation, new_violations)
+
+        logger.debug(
+            f"Inserted {len(new_violations) - len(failed)} PVB violations, "
+            f"skipped {len(skipped)} duplicates, {len(failed)} rejected."
+        )
+        return skipped, failed
 
 
     def get_violation_by_summons(self, summons: str) -> Optional[PVBViolation]:
@@ -88,6 +127,17 @@ class PVBRepository:
         """Retrieves a single violation record by its ID."""
         return self.db.query(PVBViolation).filter(PVBViolation.id == violation_id).first()
 
+    def get_violations_by_ids(self, violation_ids: List[int]) -> Dict[int, PVBViolation]:
+        """Retrieves many violations by ID in one query, keyed by ID."""
+        if not violation_ids:
+            return {}
+        violations = (
+            self.db.query(PVBViolation)
+            .filter(PVBViolation.id.in_(set(violation_ids)))
+            .all()
+        )
+        return {violation.id: violation for violation in violations}
+
     def get_violations_by_status(
         self, status: PVBViolationStatus
     ) -> List[PVBViolation]:
@@ -98,8 +148,72 @@ class PVBRepository:
             .all()
         )
 
+    def get_association_worklist(self) -> List[PVBViolation]:
+        """
+        Retrieves the failed violations whose blocking condition may have changed
+        since their last association attempt:
+        - failures recorded before failure codes existed (no code or check time),
+        - NO_PLATE_MATCH where the plate has since been registered or moved,
+        - NO_TRIP_IN_WINDOW / TRIP_WITHOUT_DRIVER where CURB trips have since
+          been mapped to the violation's vehicle.
+        """
+        failed = PVBViolation.status == PVBViolationStatus.ASSOCIATION_FAILED
+        trip_mapped_since = exists().where(
+            CurbTrip.vehicle_id == PVBViolation.vehicle_id,
+            CurbTrip.updated_on >= PVBViolation.association_checked_at,
+        )
+        ids = {
+            row.id for row in self.db.query(PVBViolation.id).filter(
+                failed,
+                or_(
+                    PVBViolation.failure_code.is_(None),
+                    PVBViolation.association_checked_at.is_(None),
+                    and_(
+                        PVBViolation.failure_code.in_([
+                            AssociationFailureCode.NO_TRIP_IN_WINDOW,
+                            AssociationFailureCode.TRIP_WITHOUT_DRIVER,
+                        ]),
+                        trip_mapped_since,
+                    ),
+                ),
+            )
+        }
+
+        no_plate = and_(failed, PVBViolation.failure_code == AssociationFailureCode.NO_PLATE_MATCH)
+        oldest_check = self.db.query(func.min(PVBViolation.association_checked_at)).filter(no_plate).scalar()
+        if oldest_check is not None:
+            registered = dict(
+                self.db.query(VehiclePlateHistory.plate_key, func.max(VehiclePlateHistory.recorded_at))
+                .filter(VehiclePlateHistory.recorded_at >= oldest_check)
+                .group_by(VehiclePlateHistory.plate_key)
+                .all()
+            )
+            if registered:
+                rows = self.db.query(
+                    PVBViolation.id, PVBViolation.plate, PVBViolation.association_checked_at
+                ).filter(no_plate).all()
+                for row in rows:
+                    recorded_at = registered.get(normalize_plate(row.plate))
+                    if recorded_at and _naive(recorded_at) >= _naive(row.association_checked_at):
+                        ids.add(row.id)
+
+        if not ids:
+            return []
+        return self.db.query(PVBViolation).filter(PVBViolation.id.in_(ids)).all()
+
+    def _mark_balance_grid_leases(self, ids: List[int], new_values: List[dict]) -> None:
+        """Reports the current and new leases of rows about to be updated to the balance grid."""
+        lease_ids = {values["lease_id"] for values in new_values if "lease_id" in values}
+        if ids:
+            lease_ids.update(
+                lease_id for (lease_id,) in
+                self.db.query(PVBViolation.lease_id).filter(PVBViolation.id.in_(ids))
+            )
+        mark_leases_changed(self.db, lease_ids)
+
     def update_violation(self, violation_id: int, updates: dict):
         """Updates specific fields of a single violation record."""
+        self._mark_balance_grid_leases([violation_id], [updates])
         updates["updated_on"] = datetime.utcnow()
         stmt = (
             update(PVBViolation)
@@ -109,6 +223,31 @@ class PVBRepository:
         self.db.execute(stmt)
         self.db.commit()
 
+    def bulk_update_violations(self, updates: List[dict]):
+        """
+        Updates many violations in one executemany UPDATE by primary key.
+        Each dict must contain "id" plus the fields to change.
+        """
+        if not updates:
+            return
+        self._mark_balance_grid_leases([values["id"] for values in updates], updates)
+        now = datetime.utcnow()
+        self.db.execute(
+            update(PVBViolation),
+            [{**values, "updated_on": now} for values in updates],
+        )
+
+    def update_violations_by_ids(self, violation_ids: List[int], values: dict):
+        """Sets the same field values on many violations in one UPDATE."""
+        if not violation_ids:
+            return
+        self._mark_balance_grid_leases(violation_ids, [values])
+        self.db.execute(
+            update(PVBViolation)
+            .where(PVBViolation.id.in_(violation_ids))
+            .values(**values, updated_on=datetime.utcnow())
+        )
+
     def list_violations(
         self,
         page: int,
@@ -328,4 +467,9 @@ class PVBRepository:
                 .all()
         ]
 
-        return query.all(), total_items , states , types
\ No newline at end of file
+        return query.all(), total_items , states , types
+
+
+def _naive(value: datetime) -> datetime:
+    """Compare database timestamps on the same wall clock"""
+    return value.replace(tzinfo=None) if value.tzinfo else value
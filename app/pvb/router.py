@@ -2,17 +2,17 @@
 
 import math
 from datetime import date , datetime , time
-from io import BytesIO
 from typing import Optional
 
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from fastapi import status as fast_status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
 from app.core.dependencies import get_db_with_current_user
-from app.pvb.exceptions import PVBError
+from app.pvb.exceptions import PVBError, PVBImportLockUnavailableError
 from app.pvb.schemas import (
     PaginatedPVBViolationResponse,
     PVBManualAssociateRequest,
@@ -47,18 +47,21 @@ async def upload_pvb_csv(
     current_user: User = Depends(get_current_user),
 ):
     """
-    Accepts a CSV file of PVB violations, validates it, and triggers a background
-    task for processing and association.
+    Accepts a CSV file of PVB violations, stages it and queues a background job
+    that parses, stores and associates the violations. Responds immediately with
+    the import ID; poll `/imports/{import_id}` for progress.
     """
     if not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="Invalid file type. Please upload a CSV file.")
 
     try:
-        file_stream = BytesIO(await file.read())
-        result = pvb_service.process_uploaded_csv(
-            file_stream, file.filename, current_user.id
+        result = await run_in_threadpool(
+            pvb_service.queue_csv_import,
+            file.file, file.filename, current_user.id
         )
         return JSONResponse(content=result, status_code=fast_status.HTTP_202_ACCEPTED)
+    except PVBImportLockUnavailableError as e:
+        raise HTTPException(status_code=fast_status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)) from e
     except PVBError as e:
         logger.warning("Business logic error during PVB CSV upload: %s", e, exc_info=True)
         raise HTTPException(status_code=fast_status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
@@ -67,6 +70,24 @@ async def upload_pvb_csv(
         raise HTTPException(status_code=500, detail="An unexpected error occurred during file processing.") from e
 
 
+@router.get("/imports/{import_id}", summary="Get PVB Import Status")
+def get_pvb_import_status(
+    import_id: int,
+    pvb_service: PVBService = Depends(get_pvb_service),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Returns the status and running counts of a queued or running CSV import.
+    """
+    try:
+        return pvb_service.get_import_status(import_id)
+    except PVBError as e:
+        raise HTTPException(status_code=fast_status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+    except Exception as e:
+        logger.error("Error fetching PVB import status: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail="An unexpected error occurred while fetching import status.") from e
+
+
 @router.get("/get_logs" , summary="Get PVB Processing Logs")
 def get_pvb_processing_logs(
     page: int = Query(1, ge=1, description="Page number for pagination."),
@@ -458,13 +479,14 @@ def retry_association_with_batm(
     automatic association logic (plate → vehicle → CURB trip → driver/lease).
 
     **Use Cases:**
-    - Retry all ASSOCIATION_FAILED violations (send empty request)
+    - Retry failed violations that could now match (send empty request)
     - Retry specific violations that failed (provide transaction_ids)
     - Re-run association after CURB data updates
 
     **Request Body:**
     - transaction_ids: Optional list of violation IDs to retry
-    - If null/empty: Retries ALL violations with ASSOCIATION_FAILED status
+    - If null/empty: Retries IMPORTED violations and ASSOCIATION_FAILED ones whose
+      plate was registered or whose vehicle had CURB trips mapped since the last attempt
 
     **Association Logic:**
     1. Extract plate number from violation data
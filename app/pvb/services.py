@@ -1,21 +1,24 @@
 ### app/pvb/services.py
 
-import csv
-import io
 from datetime import datetime, time, timedelta, date , timezone
-from decimal import Decimal
-from typing import Dict, List, Optional
+from collections import defaultdict
+from itertools import chain
+from typing import BinaryIO, Dict, List, Optional, Tuple
 
+import numpy as np
+import pandas as pd
 from celery import shared_task
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
+from app.core.cache import DistributedLock, LockUnavailableError
 from app.core.db import SessionLocal
-from app.curb.models import CurbTrip
+from app.curb.trip_association import AssociationRequest, TripAssociationEngine
 from app.pvb.exceptions import (
-    PVBAssociationError,
     PVBCSVParseError,
     PVBError,
     PVBImportInProgressError,
+    PVBImportLockUnavailableError,
     PVBLedgerPostingError,
     PVBValidationError,
 )
@@ -28,15 +31,53 @@ from app.pvb.models import (
 )
 from app.pvb.repository import PVBRepository
 from app.ledger.models import PostingCategory
-from app.ledger.services import LedgerService
+from app.ledger.repository import LedgerRepository
+from app.ledger.services import LedgerService, ObligationRequest
+from app.utils.csv_columnar import (
+    RowErrors, bool_values, parse_cents, parse_datetimes, rows_to_cells, text_values,
+)
+from app.utils.csv_import import DateFormatCache, iter_csv_chunks, open_csv_reader
+from app.utils.import_staging import discard_staged_upload, open_staged_upload, stage_upload
 from app.utils.logger import get_logger
-from app.vehicles.models import VehicleRegistration
-from app.utils.general import parse_custom_time , clean_value
+from app.utils.money import cents_to_decimals, round_half_away
 
 logger = get_logger(__name__)
 
-# In-memory flag to prevent concurrent imports. A distributed lock (Redis) is recommended for multi-worker environments.
-IMPORT_IN_PROGRESS_FLAG = False
+# A wider buffer for violations than for tolls
+ASSOCIATION_TIME_WINDOW = timedelta(hours=2)
+
+# Upper bound on how long a queued or running import holds the import lock;
+# the job releases it when done, the TTL only matters if a worker dies
+IMPORT_LOCK_TTL_SECONDS = 2 * 60 * 60
+
+# Prevents concurrent imports across all API and worker processes
+import_lock = DistributedLock("pvb_csv_import", ttl_seconds=IMPORT_LOCK_TTL_SECONDS)
+
+# Rows parsed and inserted per bulk statement / progress update
+IMPORT_CHUNK_SIZE = 1000
+
+# Per-row failure reasons returned to the caller; the count is always exact
+MAX_FAILED_ROW_DETAILS = 500
+
+ISSUE_DATE_FORMATS = ["%m/%d/%Y", "%m/%d/%y"]
+
+# Column positions in the PVB export (street_code_3 is the last, at 29)
+CSV_COLUMN_COUNT = 30
+
+TEXT_COLUMNS = {
+    "plate": 0, "state": 1, "type": 2, "summons": 4, "violation_code": 10,
+    "hearing_ind": 11, "penalty_warning": 12, "violation_country": 21,
+    "front_or_opp": 22, "house_number": 23, "street_name": 24,
+    "intersect_street": 25, "geo_location": 26, "street_code_1": 27,
+    "street_code_2": 28, "street_code_3": 29,
+}
+
+BOOL_COLUMNS = {"is_terminated": 3, "non_program": 5, "new_issue": 9, "judgement": 13, "ng_pmt": 19}
+
+AMOUNT_COLUMNS = {"penalty": 15, "interest": 16, "reduction": 17, "payment": 18}
+
+# Processing fee on the fine, per mille (2.5%)
+PROCESSING_FEE_PER_MILLE = 25
 
 
 class PVBService:
@@ -49,115 +90,172 @@ class PVBService:
         self.db = db
         self.repo = PVBRepository(db)
 
-    def process_uploaded_csv(self, file_stream: io.BytesIO, file_name: str, user_id: int):
+    def queue_csv_import(self, file_obj: BinaryIO, file_name: str, user_id: int) -> dict:
         """
-        Parses an uploaded PVB CSV, creates an import record, saves raw transaction
-        data, and triggers the asynchronous association task.
+        Stages an uploaded PVB CSV and enqueues process_pvb_csv_import_task for it.
+
+        Takes the import lock so that only one PVB import is queued or running
+        at a time across all workers; the job releases it when done. Returns
+        immediately with the PENDING import record.
         """
-        global IMPORT_IN_PROGRESS_FLAG
-        if IMPORT_IN_PROGRESS_FLAG:
+        try:
+            lock_token = import_lock.acquire()
+        except LockUnavailableError as e:
+            logger.error(f"Cannot queue import of {file_name}: {e}")
+            raise PVBImportLockUnavailableError() from e
+        if lock_token is None:
             raise PVBImportInProgressError()
 
-        IMPORT_IN_PROGRESS_FLAG = True
+        location = None
         import_record = None
+        try:
+            location = stage_upload(file_obj, "pvb", file_name)
+            import_record = self.repo.create_import_record(file_name, 0)
+            self.repo.update_import_record_status(import_record.id, PVBImportStatus.PENDING, 0, 0)
+            self.db.commit()
+
+            process_pvb_csv_import_task.delay(
+                import_record.id, location, file_name, user_id, lock_token
+            )
+        except Exception as e:
+            logger.error(f"Failed to queue PVB import for {file_name}: {e}", exc_info=True)
+            self.db.rollback()
+            if import_record is not None:
+                self.repo.update_import_record_status(import_record.id, PVBImportStatus.FAILED, 0, 0)
+                self.db.commit()
+            if location:
+                discard_staged_upload(location)
+            import_lock.release(lock_token)
+            raise PVBError(f"Could not queue PVB file for import: {e}") from e
+
+        logger.info(f"Queued PVB import {import_record.id} for file: {file_name}")
+        return {
+            "message": "File uploaded and queued for import.",
+            "import_id": import_record.id,
+            "status": PVBImportStatus.PENDING.value,
+        }
+
+    def get_import_status(self, import_id: int) -> dict:
+        """Returns the status and running counts of one import record"""
+        import_record = self.repo.get_import_record(import_id)
+        if not import_record:
+            raise PVBError(f"PVB import {import_id} not found.")
+
+        status = import_record.to_dict()
+        status["processed_records"] = (
+            (import_record.successful_records or 0) + (import_record.failed_records or 0)
+        )
+        status["is_finished"] = import_record.status in (
+            PVBImportStatus.COMPLETED, PVBImportStatus.FAILED
+        )
+        return status
+
+    def process_uploaded_csv(
+        self,
+        file_stream: BinaryIO,
+        file_name: str,
+        user_id: int,
+        import_id: Optional[int] = None,
+    ):
+        """
+        Parses a PVB CSV in chunks of IMPORT_CHUNK_SIZE rows, bulk inserting
+        each chunk and committing the import record's progress as it goes,
+        then associates the imported violations.
+
+        Runs inside process_pvb_csv_import_task, which holds the import lock.
+        import_id is the PENDING record created by queue_csv_import; a new
+        record is created when it is omitted.
+        """
+        import_record = None
+        total_rows = 0
+        total_inserted = 0
+        failed_rows_count = 0
         try:
             logger.info(f"Starting PVB CSV import for file: {file_name}")
-            content = file_stream.read().decode("utf-8-sig")  # Use utf-8-sig to handle potential BOM
-            csv_reader = csv.reader(io.StringIO(content))
-            header = next(csv_reader)
-            rows = list(csv_reader)
 
-            if not rows:
-                logger.warning(f"PVB CSV file '{file_name}' is empty.")
-                return {"message": "File is empty, no violations were imported."}
+            if import_id is not None:
+                import_record = self.repo.get_import_record(import_id)
+                if not import_record:
+                    raise PVBError(f"PVB import {import_id} not found.")
+            else:
+                import_record = self.repo.create_import_record(file_name, 0)
+            self.repo.update_import_record_status(import_record.id, PVBImportStatus.PROCESSING, 0, 0)
+            self.db.commit()
 
-            import_record = self.repo.create_import_record(file_name, len(rows))
+            csv_reader = open_csv_reader(file_stream, "utf-8-sig")  # Use utf-8-sig to handle potential BOM
+            next(csv_reader)  # Header
+            chunks = iter_csv_chunks(csv_reader, IMPORT_CHUNK_SIZE)
+            first_chunk = next(chunks, None)
 
-            violations_to_insert = []
-            failed_rows_count = 0
+            if not first_chunk:
+                logger.warning(f"PVB CSV file '{file_name}' is empty.")
+                self.repo.update_import_record_status(import_record.id, PVBImportStatus.COMPLETED, 0, 0)
+                self.db.commit()
+                return {"message": "File is empty, no violations were imported.", "import_id": import_record.id}
+
+            # One cache per file: the winning format is tried first on every row
+            issue_date_formats = DateFormatCache(ISSUE_DATE_FORMATS)
             faild_reasons = []
 
-            for i, row in enumerate(rows):
-                try:
-                    if len(row) < 29:
-                        raise ValueError(f"Expected at least 29 columns, but got {len(row)}")
-                    
-                    issue_date_str = row[6].strip() if row[6] else None
-                    issue_time_str = row[7].strip() if row[7] else None
-
-                    issue_time_str = parse_custom_time(issue_time_str)
-
-                    try:
-                        issue_date = datetime.strptime(issue_date_str, "%m/%d/%Y").date()
-                    except ValueError:
-                        issue_date = datetime.strptime(issue_date_str, "%m/%d/%y").date()
-                        
-                    issue_time = issue_time_str if issue_time_str else None
+            for chunk in chain([first_chunk], chunks):
+                total_rows += len(chunk)
+                violations_to_insert = []
 
-                    fine = Decimal(row[14] or "0")
-                    processing_fee = fine * Decimal("0.025")
-                    amount_due = Decimal(row[20] or "0") + processing_fee
-            
-                    violation_data = {
+                parsed_rows, row_errors = self._parse_csv_chunk(chunk, issue_date_formats)
+                for row_number, error in row_errors:
+                    logger.warning(f"Skipping malformed row {row_number} in {file_name}: {error}")
+                    failed_rows_count += 1
+                    if len(faild_reasons) < MAX_FAILED_ROW_DETAILS:
+                        faild_reasons.append(f"Row {row_number}: {error}")
+
+                for violation_data in parsed_rows:
+                    violation_data.update({
                         "import_id": import_record.id,
-                        "source": PVBSource.CSV_IMPORT,
-                        "plate": clean_value(row[0]),
-                        "state": clean_value(row[1]),
-                        "type": clean_value(row[2]),
-                        "is_terminated": clean_value(row[3] , True),
-                        "summons": clean_value(row[4]),
-                        "non_program": clean_value(row[5] , True),
-                        "issue_date": issue_date,
-                        "issue_time": issue_time,
-                        "fine": fine,
-                        "system_entry_date": datetime.strptime(clean_value(row[8]), "%m/%d/%Y").date() if clean_value(row[8]) else None,
-                        "new_issue": clean_value(row[9] , True),
-                        "violation_code": clean_value(row[10]),
-                        "hearing_ind": clean_value(row[11]),
-                        "penalty_warning": clean_value(row[12]),
-                        "judgement": clean_value(row[13] , True),
-                        "penalty": Decimal(row[15] or "0"),
-                        "interest": Decimal(row[16] or "0"),
-                        "reduction": Decimal(row[17] or "0"),
-                        "payment": Decimal(row[18] or "0"),
-                        "ng_pmt": clean_value(row[19] , True),
-                        "processing_fee": processing_fee,
-                        "amount_due": amount_due,
-                        "violation_country": clean_value(row[21]),
-                        "front_or_opp": clean_value(row[22]),
-                        "house_number": clean_value(row[23]),
-                        "street_name": clean_value(row[24]),
-                        "intersect_street": clean_value(row[25]),
-                        "geo_location": clean_value(row[26]),
-                        "street_code_1": clean_value(row[27]),
-                        "street_code_2": clean_value(row[28]),
-                        "street_code_3": clean_value(row[29]),
                         "created_by": user_id,
                         "status": PVBViolationStatus.IMPORTED,
-                    }
+                    })
                     violations_to_insert.append(violation_data)
-                except (ValueError, IndexError) as e:
-                    logger.warning(f"Skipping malformed row {i+2} in {file_name}: {e}. Data: {row}")
+
+                # Duplicate summons are skipped, as before, without counting as failures
+                skipped, rejected = self.repo.insert_violation_chunk(violations_to_insert)
+                total_inserted += len(violations_to_insert) - len(skipped) - len(rejected)
+                for violation_data, error in rejected:
+                    logger.warning(f"Database rejected summons {violation_data['summons']} in {file_name}: {error}")
                     failed_rows_count += 1
-                    faild_reasons.append(f"Row {i+2}: {e}")
+                    if len(faild_reasons) < MAX_FAILED_ROW_DETAILS:
+                        faild_reasons.append(f"Summons {violation_data['summons']}: Database error: {error}")
+
+                self.repo.update_import_record_status(
+                    import_id=import_record.id,
+                    status=PVBImportStatus.PROCESSING,
+                    successful=total_inserted,
+                    failed=failed_rows_count,
+                    total_records=total_rows,
+                )
+                self.db.commit()
+                logger.info(
+                    "PVB import progress",
+                    import_id=import_record.id, rows=total_rows,
+                    imported=total_inserted, failed=failed_rows_count
+                )
 
-            self.repo.bulk_insert_violations(violations_to_insert)
             self.repo.update_import_record_status(
                 import_id=import_record.id,
                 status=PVBImportStatus.COMPLETED,
-                successful=len(violations_to_insert),
+                successful=total_inserted,
                 failed=failed_rows_count,
+                total_records=total_rows,
             )
             self.db.commit()
 
-            logger.info(f"Imported {len(violations_to_insert)} records from {file_name}. Triggering association task.")
+            logger.info(f"Imported {total_inserted} records from {file_name}. Triggering association task.")
             self.associate_violations()
 
             return {
                 "message": "File uploaded and import process initiated.",
                 "import_id": import_record.id,
-                "total_rows": len(rows),
-                "imported_records": len(violations_to_insert),
+                "total_rows": total_rows,
+                "imported_records": total_inserted,
                 "failed_rows": failed_rows_count,
                 "failure_reasons": faild_reasons,
             }
@@ -165,11 +263,104 @@ class PVBService:
             self.db.rollback()
             logger.error(f"Fatal error during PVB CSV processing for {file_name}: {e}", exc_info=True)
             if import_record:
-                self.repo.update_import_record_status(import_record.id, PVBImportStatus.FAILED, 0, len(rows) if 'rows' in locals() else 0)
+                # Chunks committed before the error stay imported and keep their counts
+                self.repo.update_import_record_status(
+                    import_record.id, PVBImportStatus.FAILED,
+                    total_inserted, total_rows - total_inserted,
+                    total_records=total_rows,
+                )
                 self.db.commit()
             raise PVBError(f"Could not process PVB file: {e}") from e
-        finally:
-            IMPORT_IN_PROGRESS_FLAG = False
+
+    @staticmethod
+    def _parse_csv_chunk(
+        chunk: List[Tuple[int, list]], issue_date_formats: DateFormatCache
+    ) -> Tuple[List[dict], List[Tuple[int, str]]]:
+        """
+        Validates and converts a whole chunk of CSV rows into violation
+        column values with pandas/NumPy.
+
+        Returns:
+            Violation values for valid rows, and (row_number, error) for
+            malformed rows.
+        """
+        row_numbers, cells, widths = rows_to_cells(chunk, CSV_COLUMN_COUNT)
+        errors = RowErrors(row_numbers)
+        errors.add(
+            widths < CSV_COLUMN_COUNT,
+            lambda i: f"Expected at least {CSV_COLUMN_COUNT} columns, but got {widths[i]}",
+        )
+
+        # Issue time like "0930A": the last letter is the meridiem
+        issue_time_str = cells[:, 7]
+        has_time = issue_time_str != ""
+        bad_meridiem = has_time & ~(
+            np.char.endswith(issue_time_str, "A") | np.char.endswith(issue_time_str, "P")
+        )
+        errors.add(bad_meridiem, lambda i: "Invalid time format")
+        issue_time = pd.to_datetime(
+            np.where(has_time & ~errors.failed, np.char.add(issue_time_str, "M"), ""),
+            format="%I%M%p", errors="coerce",
+        )
+        errors.add(
+            has_time & issue_time.isna(),
+            lambda i: f"Unable to parse issue time '{issue_time_str[i]}'",
+        )
+
+        issue_date_str = cells[:, 6]
+        issue_date = parse_datetimes(np.where(errors.failed, "", issue_date_str), issue_date_formats)
+        errors.add(
+            issue_date.isna(),
+            lambda i: f"Unable to parse issue date '{issue_date_str[i]}'",
+        )
+
+        fine_cents, invalid_fine = parse_cents(cells[:, 14], blank_as_zero=True)
+        errors.add(invalid_fine, lambda i: f"Invalid fine '{cells[i, 14]}'")
+        due_cents, invalid_due = parse_cents(cells[:, 20], blank_as_zero=True)
+        errors.add(invalid_due, lambda i: f"Invalid amount due '{cells[i, 20]}'")
+
+        system_entry_str = cells[:, 8]
+        system_entry_date = pd.to_datetime(system_entry_str, format="%m/%d/%Y", errors="coerce")
+        errors.add(
+            (system_entry_str != "") & system_entry_date.isna(),
+            lambda i: f"Unable to parse system entry date '{system_entry_str[i]}'",
+        )
+
+        amounts = {}
+        for field, position in AMOUNT_COLUMNS.items():
+            cents, invalid = parse_cents(cells[:, position], blank_as_zero=True)
+            errors.add(invalid, lambda i, field=field, position=position: f"Invalid {field} '{cells[i, position]}'")
+            amounts[field] = cents
+
+        keep = ~errors.failed
+        count = int(keep.sum())
+
+        # Processing fee is 2.5% of the fine, carried in thousandths of a cent
+        fee_units = fine_cents * PROCESSING_FEE_PER_MILLE
+
+        fields = {
+            "source": [PVBSource.CSV_IMPORT] * count,
+            "issue_date": issue_date[keep].date.tolist(),
+            "issue_time": [
+                None if value is pd.NaT else value for value in issue_time[keep].time.tolist()
+            ],
+            "fine": cents_to_decimals(fine_cents[keep]),
+            "system_entry_date": [
+                None if value is pd.NaT else value for value in system_entry_date[keep].date.tolist()
+            ],
+            "processing_fee": cents_to_decimals(round_half_away(fee_units, 1000)[keep]),
+            "amount_due": cents_to_decimals(round_half_away(due_cents * 1000 + fee_units, 1000)[keep]),
+        }
+        for field, position in TEXT_COLUMNS.items():
+            fields[field] = text_values(cells[keep, position])
+        for field, position in BOOL_COLUMNS.items():
+            fields[field] = bool_values(cells[keep, position])
+        for field, cents in amounts.items():
+            fields[field] = cents_to_decimals(cents[keep])
+
+        names = list(fields)
+        parsed = [dict(zip(names, row_values)) for row_values in zip(*fields.values())]
+        return parsed, list(errors.items())
 
     def associate_violations(self):
         """
@@ -179,55 +370,7 @@ class PVBService:
         logger.info("Starting PVB violation association task.")
         violations_to_process = self.repo.get_violations_by_status(PVBViolationStatus.IMPORTED)
         
-        successful_count, failed_count = 0, 0
-
-        for violation in violations_to_process:
-            updates = {"status": PVBViolationStatus.ASSOCIATION_FAILED}
-            try:
-                # 1. Find Vehicle by Plate
-                vehicle_reg = self.db.query(VehicleRegistration).filter(
-                    VehicleRegistration.plate_number.ilike(f"%{violation.plate}%")
-                ).first()
-                if not vehicle_reg or not vehicle_reg.vehicle:
-                    raise PVBAssociationError(violation.summons, f"No vehicle found for plate '{violation.plate}'")
-                
-                vehicle = vehicle_reg.vehicle
-                updates["vehicle_id"] = vehicle.id
-
-                # 2. Find CURB trip to identify Driver and Lease
-                violation_datetime = datetime.combine(violation.issue_date, violation.issue_time or time.min)
-                time_buffer = timedelta(hours=2) # A wider buffer for violations
-                trip_start = violation_datetime - time_buffer
-                trip_end = violation_datetime + time_buffer
-
-                curb_trip = self.db.query(CurbTrip).filter(
-                    CurbTrip.vehicle_id == vehicle.id,
-                    CurbTrip.start_time <= trip_end,
-                    CurbTrip.end_time >= trip_start
-                ).order_by(CurbTrip.start_time.desc()).first()
-
-                if not curb_trip or not curb_trip.driver_id:
-                    raise PVBAssociationError(violation.summons, f"No active CURB trip found for vehicle {vehicle.id} around {violation_datetime}")
-
-                updates.update({
-                    "driver_id": curb_trip.driver_id,
-                    "lease_id": curb_trip.lease_id,
-                    "medallion_id": curb_trip.medallion_id,
-                    "status": PVBViolationStatus.ASSOCIATED,
-                    "failure_reason": None
-                })
-                successful_count += 1
-                
-            except PVBAssociationError as e:
-                updates["failure_reason"] = e.reason
-                failed_count += 1
-                logger.warning(f"Association failed for summons {violation.summons}: {e.reason}")
-            except Exception as e:
-                updates["failure_reason"] = f"An unexpected error occurred: {str(e)}"
-                failed_count += 1
-                logger.error(f"Error associating summons {violation.summons}: {e}", exc_info=True)
-            finally:
-                self.repo.update_violation(violation.id, updates)
+        successful_count, failed_count = self._associate_batch(violations_to_process)
         
         self.db.commit()
         logger.info(f"Association task finished. Processed: {len(violations_to_process)}, Successful: {successful_count}, Failed: {failed_count}")
@@ -237,45 +380,91 @@ class PVBService:
 
         return {"processed": len(violations_to_process), "successful": successful_count, "failed": failed_count}
 
+    def _associate_batch(self, violations: list) -> tuple:
+        """
+        Match violations to CURB trips with the batch engine and write the
+        outcomes with bulk updates. Returns (successful_count, failed_count).
+
+        Failures record a failure code and the database time taken before the
+        lookups ran; the retry worklist compares plate and trip changes
+        against that time (see PVBRepository.get_association_worklist).
+        """
+        if not violations:
+            return 0, 0
+
+        checked_at = self.db.scalar(select(func.now()))
+        engine = TripAssociationEngine(self.db, ASSOCIATION_TIME_WINDOW)
+        results = engine.associate(
+            AssociationRequest(
+                key=violation.id,
+                plate=violation.plate or "",
+                occurred_at=datetime.combine(violation.issue_date, violation.issue_time or time.min),
+                state=violation.state,
+            )
+            for violation in violations
+        )
+
+        updates = []
+        successful_count = 0
+        for violation in violations:
+            result = results[violation.id]
+            values = {
+                "id": violation.id,
+                "failure_reason": result.failure_reason,
+                "failure_code": result.failure_code,
+                "association_checked_at": checked_at,
+            }
+            if result.vehicle_id:
+                values["vehicle_id"] = result.vehicle_id
+
+            if result.is_associated:
+                values.update({
+                    "status": PVBViolationStatus.ASSOCIATED,
+                    "driver_id": result.driver_id,
+                    "lease_id": result.lease_id,
+                    "medallion_id": result.medallion_id,
+                })
+                successful_count += 1
+            else:
+                values["status"] = PVBViolationStatus.ASSOCIATION_FAILED
+                logger.warning(f"Association failed for summons {violation.summons}: {result.failure_reason}")
+            updates.append(values)
+
+        self.repo.bulk_update_violations(updates)
+        return successful_count, len(violations) - successful_count
+
     def post_violations_to_ledger(self, ledger_service: LedgerService):
         """
         Posts successfully associated PVB violations to the Centralized Ledger.
+
+        All obligations are written in one batch (see LedgerService.create_obligations)
+        and the violations' outcomes with one UPDATE per status and reason.
         """
         logger.info("Starting task to post PVB violations to ledger.")
         violations_to_post = self.repo.get_violations_by_status(PVBViolationStatus.ASSOCIATED)
 
-        posted_count, failed_count = 0, 0
-
+        failures = {}
+        postable = []
         for violation in violations_to_post:
-            updates = {"status": PVBViolationStatus.POSTING_FAILED}
-            try:
-                if not all([violation.driver_id, violation.lease_id, violation.amount_due > 0]):
-                    raise PVBLedgerPostingError(violation.summons, "Missing required driver, lease, or positive amount due.")
-
-                ledger_service.create_obligation(
-                    category=PostingCategory.PVB,
-                    amount=violation.amount_due,
-                    reference_id=violation.summons,
-                    driver_id=violation.driver_id,
-                    lease_id=violation.lease_id,
-                    vehicle_id=violation.vehicle_id,
-                    medallion_id=violation.medallion_id,
-                )
-                
-                updates.update({
-                    "status": PVBViolationStatus.POSTED_TO_LEDGER,
-                    "failure_reason": None,
-                    "posting_date": datetime.utcnow()
-                })
-                posted_count += 1
-            except Exception as e:
-                updates["failure_reason"] = f"Ledger service error: {str(e)}"
-                failed_count += 1
-                logger.error(f"Failed to post PVB summons {violation.summons} to ledger: {e}", exc_info=True)
-            finally:
-                self.repo.update_violation(violation.id, updates)
+            if not all([violation.driver_id, violation.lease_id, violation.amount_due > 0]):
+                error = PVBLedgerPostingError(violation.summons, "Missing required driver, lease, or positive amount due.")
+                failures[violation.id] = f"Ledger service error: {error}"
+            else:
+                postable.append(violation)
 
+        result = ledger_service.create_obligations(
+            self._violation_obligation(violation) for violation in postable
+        )
+        for violation in postable:
+            if violation.id in result.failed:
+                error = PVBLedgerPostingError(violation.summons, result.failed[violation.id])
+                failures[violation.id] = f"Ledger service error: {error}"
+                logger.error(f"Failed to post PVB summons {violation.summons} to ledger: {error}")
+
+        self._write_posting_outcomes(list(result.posted), failures, datetime.utcnow())
         self.db.commit()
+
+        posted_count, failed_count = len(result.posted), len(failures)
         logger.info(f"Ledger posting for PVB finished. Posted: {posted_count}, Failed: {failed_count}")
         return {"posted": posted_count, "failed": failed_count}
 
@@ -309,128 +498,57 @@ class PVBService:
 
     def manual_post_to_ledger(self, transaction_ids: List[int] , all_transactions: bool = False) -> dict:
         """
-        Manually post EZPass transactions to the centralized ledger.
-        Used to force posting of ASSOCIATED transactions.
+        Manually post PVB violations to the centralized ledger.
+        Used to force posting of ASSOCIATED violations; with all_transactions,
+        every ASSOCIATED violation is posted.
         """
-        from app.ledger.services import LedgerService
-        from app.ledger.repository import LedgerRepository
-
         logger.info("Manual posting of transactions to ledger", transactions_count=len(transaction_ids))
 
-        ledger_repo = LedgerRepository(self.db)
-        ledger_service = LedgerService(ledger_repo)
-        success_count = 0
-        failed_count = 0
+        ledger_service = LedgerService(LedgerRepository(self.db))
         errors = []
+        postable = []
 
         if all_transactions:
-            transactions = self.repo.get_violations_by_status(PVBViolationStatus.ASSOCIATED)
-            for transaction in transactions:
+            for transaction in self.repo.get_violations_by_status(PVBViolationStatus.ASSOCIATED):
                 if not all([transaction.driver_id, transaction.lease_id, transaction.amount_due > 0]):
                     errors.append({
                         "transaction_id": transaction.id,
                         "error": "Missing required fields"
                     })
-                    failed_count += 1
-                    continue
-                
-                # Post to ledger
-                ledger_service.create_obligation(
-                    category=PostingCategory.PVB,
-                    amount=transaction.amount_due,
-                    reference_id=transaction.summons,
-                    driver_id=transaction.driver_id,
-                    lease_id=transaction.lease_id,
-                    vehicle_id=transaction.vehicle_id,
-                    medallion_id=transaction.medallion_id,
-                )
-
-                # Update transaction status
-                updates = {
-                    "status": PVBViolationStatus.POSTED_TO_LEDGER,
-                    "failure_reason": None,
-                    "posting_date": datetime.now(timezone.utc)
-                }
-                self.repo.update_violation(transaction.id, updates)
-                success_count += 1
-                logger.info("Transaction posted to ledger", transaction_id=transaction.id)
-
+                else:
+                    postable.append(transaction)
         else:
+            transactions = self.repo.get_violations_by_ids(transaction_ids)
+            for txn_id in dict.fromkeys(transaction_ids):
+                transaction = transactions.get(txn_id)
+                if not transaction:
+                    error = "Transaction not found"
+                elif transaction.status == PVBViolationStatus.POSTED_TO_LEDGER:
+                    error = "Already posted to ledger"
+                elif transaction.status != PVBViolationStatus.ASSOCIATED:
+                    error = f"Cannot post - transaction status is {transaction.status.value}"
+                elif not all([transaction.driver_id, transaction.lease_id, transaction.amount_due > 0]):
+                    error = "Missing required fields (driver_id, lease_id, or valid amount)"
+                else:
+                    postable.append(transaction)
+                    continue
+                errors.append({"transaction_id": txn_id, "error": error})
 
-            for txn_id in transaction_ids:
-                try:
-                    transaction = self.repo.get_violation_by_id(txn_id)
-                    if not transaction:
-                        errors.append({
-                            "transaction_id": txn_id,
-                            "error": "Transaction not found"
-                        })
-                        failed_count += 1
-                        continue
-
-                    # Validate transaction can be posted
-                    if transaction.status == PVBViolationStatus.POSTED_TO_LEDGER:
-                        errors.append({
-                            "transaction_id": txn_id,
-                            "error": "Already posted to ledger"
-                        })
-                        failed_count += 1
-                        continue
-
-                    if transaction.status != PVBViolationStatus.ASSOCIATED:
-                        errors.append({
-                            "transaction_id": txn_id,
-                            "error": f"Cannot post - transaction status is {transaction.status.value}"
-                        })
-                        failed_count += 1
-                        continue
-
-                    if not all([transaction.driver_id, transaction.lease_id, transaction.amount_due > 0]):
-                        errors.append({
-                            "transaction_id": txn_id,
-                            "error": "Missing required fields (driver_id, lease_id, or valid amount)"
-                        })
-                        failed_count += 1
-                        continue
-
-                    # Post to ledger
-                    ledger_service.create_obligation(
-                        category=PostingCategory.PVB,
-                        amount=transaction.amount_due,
-                        reference_id=transaction.summons,
-                        driver_id=transaction.driver_id,
-                        lease_id=transaction.lease_id,
-                        vehicle_id=transaction.vehicle_id,
-                        medallion_id=transaction.medallion_id,
-                    )
-
-                    # Update transaction status
-                    updates = {
-                        "status": PVBViolationStatus.POSTED_TO_LEDGER,
-                        "failure_reason": None,
-                        "posting_date": datetime.now(timezone.utc)
-                    }
-                    self.repo.update_violation(transaction.id, updates)
-                    success_count += 1
-                    logger.info("Transaction posted to ledger", transaction_id=transaction.id)
-
-                except Exception as e:
-                    # Update transaction with error
-                    if transaction:
-                        self.repo.update_violation(transaction.id, {
-                            "status": PVBViolationStatus.POSTING_FAILED,
-                            "failure_reason": f"Manual posting error: {str(e)}"
-                        })
+        result = ledger_service.create_obligations(
+            self._violation_obligation(transaction) for transaction in postable
+        )
 
-                    errors.append({
-                        "transaction_id": txn_id,
-                        "error": str(e)
-                    })
-                    failed_count += 1
-                    logger.error(f"Failed to post transaction {txn_id}: {e}", exc_info=True)
+        failures = {}
+        for txn_id, reason in result.failed.items():
+            failures[txn_id] = f"Manual posting error: {reason}"
+            errors.append({"transaction_id": txn_id, "error": reason})
+            logger.error(f"Failed to post transaction {txn_id}: {reason}")
 
+        self._write_posting_outcomes(list(result.posted), failures, datetime.now(timezone.utc))
         self.db.commit()
 
+        success_count, failed_count = len(result.posted), len(errors)
+        logger.info("Manual posting finished", posted=success_count, failed=failed_count)
         return {
             "success_count": success_count,
             "failed_count": failed_count,
@@ -438,6 +556,36 @@ class PVBService:
             "message": f"Successfully posted {success_count} transactions, {failed_count} failed."
         }
 
+    @staticmethod
+    def _violation_obligation(violation: PVBViolation) -> ObligationRequest:
+        return ObligationRequest(
+            key=violation.id,
+            category=PostingCategory.PVB,
+            amount=violation.amount_due,
+            reference_id=violation.summons,
+            driver_id=violation.driver_id,
+            lease_id=violation.lease_id,
+            vehicle_id=violation.vehicle_id,
+            medallion_id=violation.medallion_id,
+        )
+
+    def _write_posting_outcomes(self, posted_ids: List[int], failures: Dict[int, str], posting_date: datetime):
+        """Write posting results with one UPDATE per outcome (status and failure reason)"""
+        self.repo.update_violations_by_ids(posted_ids, {
+            "status": PVBViolationStatus.POSTED_TO_LEDGER,
+            "failure_reason": None,
+            "posting_date": posting_date,
+        })
+
+        by_reason = defaultdict(list)
+        for violation_id, reason in failures.items():
+            by_reason[reason].append(violation_id)
+        for reason, violation_ids in by_reason.items():
+            self.repo.update_violations_by_ids(violation_ids, {
+                "status": PVBViolationStatus.POSTING_FAILED,
+                "failure_reason": reason,
+            })
+
     def reassign_transactions(
             self, transaction_ids: List[int], new_driver_id: int, new_lease_id: int,
             new_medallion_id: Optional[int] = None, new_vehicle_id: Optional[int] = None
@@ -544,16 +692,19 @@ class PVBService:
         This uses the SAME association logic as the initial automatic process.
         
         If transaction_ids provided: Only retry those specific transactions
-        If transaction_ids is None: Retry ALL ASSOCIATION_FAILED transactions
+        If transaction_ids is None: Retry IMPORTED violations and the
+        ASSOCIATION_FAILED ones whose blocking condition may have changed since
+        the last attempt (a plate registered or moved, a CURB trip mapped to the
+        vehicle); see PVBRepository.get_association_worklist
         
         Business Logic (same as automatic association):
-        1. Extract plate number from tag_or_plate
+        1. Normalize the violation plate
         2. Find Vehicle via plate number
-        3. Find CURB trip on that vehicle ±30 minutes of toll time
+        3. Find CURB trip on that vehicle ±2 hours of the violation time
         4. If found: Associate driver_id, lease_id, medallion_id from CURB trip
         5. Update status to ASSOCIATED or ASSOCIATION_FAILED
         """
-        logger.info(f"Retrying association for transactions: {transaction_ids or 'all failed'}")
+        logger.info(f"Retrying association for transactions: {transaction_ids or 'failed worklist'}")
         
         # Get transactions to retry
         if transaction_ids:
@@ -564,14 +715,11 @@ class PVBService:
             ]
             transactions_to_process = [t for t in transactions_to_process if t is not None]
         else:
-            # Retry all ASSOCIATION_FAILED transactions
+            # Retry pending violations and failures that could now succeed
             transactions_to_process = (
-                self.db.query(PVBViolation)
-                .filter(PVBViolation.status.in_([
-                    PVBViolationStatus.ASSOCIATION_FAILED,
-                    PVBViolationStatus.IMPORTED
-                    ])).all()
-                )
+                self.repo.get_violations_by_status(PVBViolationStatus.IMPORTED)
+                + self.repo.get_association_worklist()
+            )
         
         if not transactions_to_process:
             return {
@@ -581,64 +729,7 @@ class PVBService:
                 "message": "No transactions to retry association"
             }
         
-        successful_count = 0
-        failed_count = 0
-        
-        for trans in transactions_to_process:
-            updates = {"status": PVBViolationStatus.ASSOCIATION_FAILED}
-            try:
-                # 1. Find the vehicle using the plate number (same logic as automatic)
-                plate_number_full = trans.plate
-                plate_number = plate_number_full.split(' ')[1] if ' ' in plate_number_full else plate_number_full
-                
-                vehicle_reg = self.db.query(VehicleRegistration).filter(
-                    VehicleRegistration.plate_number.ilike(f"%{plate_number}%")
-                ).first()
-
-                if not vehicle_reg or not vehicle_reg.vehicle:
-                    raise ValueError(trans.id, f"No vehicle found for plate '{plate_number}'")
-                
-                vehicle = vehicle_reg.vehicle
-                updates["vehicle_id"] = vehicle.id
-
-                # 2. Find the corresponding CURB trip to identify the driver
-                # Look for a trip within a time window around the toll time
-                time_buffer = timedelta(minutes=30)
-                trip_start = datetime.combine(trans.issue_date, trans.issue_time)- time_buffer
-                trip_end = datetime.combine(trans.issue_date, trans.issue_time)+ time_buffer
-
-                curb_trip = self.db.query(CurbTrip).filter(
-                    CurbTrip.vehicle_id == vehicle.id,
-                    CurbTrip.start_time <= trip_end,
-                    CurbTrip.end_time >= trip_start
-                ).order_by(CurbTrip.start_time.desc()).first()
-
-                if not curb_trip or not curb_trip.driver_id:
-                    raise ValueError(
-                        trans.id, 
-                        f"No active CURB trip found for vehicle {vehicle.id} around {trans.issue_date}"
-                    )
-                
-                # SUCCESS - Associate with driver/lease from CURB trip
-                updates["driver_id"] = curb_trip.driver_id
-                updates["lease_id"] = curb_trip.lease_id
-                updates["medallion_id"] = curb_trip.medallion_id
-                updates["status"] = PVBViolationStatus.ASSOCIATED
-                updates["failure_reason"] = None
-                successful_count += 1
-                
-            except Exception as e:
-                updates["failure_reason"] = e
-                failed_count += 1
-                logger.warning(f"Association retry failed for transaction {trans.id}: {e}")
-
-            except Exception as e:
-                updates["failure_reason"] = f"Unexpected error during retry: {str(e)}"
-                failed_count += 1
-                logger.error(f"Unexpected error retrying transaction {trans.id}: {e}", exc_info=True)
-
-            finally:
-                self.repo.update_violation(trans.id, updates)
+        successful_count, failed_count = self._associate_batch(transactions_to_process)
         
         self.db.commit()
         logger.info(
@@ -648,7 +739,7 @@ class PVBService:
         
         # If successful associations exist, trigger posting task
         if successful_count > 0:
-            self.post_violations_to_ledger()
+            post_pvb_violations_to_ledger_task.delay()
         
         return {
             "processed": len(transactions_to_process),
@@ -715,6 +806,36 @@ class PVBService:
 
 # --- Celery Tasks ---
 
+@shared_task(name="pvb.process_csv_import")
+def process_pvb_csv_import_task(
+    import_id: int, location: str, file_name: str, user_id: int, lock_token: str
+):
+    """
+    Background task to import a staged PVB CSV. Releases the import lock
+    taken by PVBService.queue_csv_import and removes the staged file.
+    """
+    logger.info("Executing Celery task: process_pvb_csv_import_task", import_id=import_id)
+    db: Session = SessionLocal()
+    try:
+        with open_staged_upload(location) as file_stream:
+            return PVBService(db).process_uploaded_csv(
+                file_stream, file_name, user_id, import_id=import_id
+            )
+    except Exception as e:
+        logger.error(f"Celery task process_pvb_csv_import_task failed: {e}", exc_info=True)
+        db.rollback()
+        # The staged file could not be opened: the record never left PENDING
+        repo = PVBRepository(db)
+        import_record = repo.get_import_record(import_id)
+        if import_record and import_record.status == PVBImportStatus.PENDING:
+            repo.update_import_record_status(import_id, PVBImportStatus.FAILED, 0, 0)
+            db.commit()
+        raise
+    finally:
+        db.close()
+        discard_staged_upload(location)
+        import_lock.release(lock_token)
+
 @shared_task(name="pvb.associate_violations")
 def associate_pvb_violations_task():
     """Background task to associate imported PVB violations."""
@@ -731,13 +852,32 @@ def associate_pvb_violations_task():
     finally:
         db.close()
 
+@shared_task(name="pvb.retry_failed_associations")
+def retry_pvb_associations_task():
+    """
+    Background task to retry failed PVB associations whose plate or CURB
+    trips have changed since the last attempt.
+    """
+    logger.info("Executing Celery task: retry_pvb_associations_task")
+    db: Session = SessionLocal()
+    try:
+        service = PVBService(db)
+        result = service.retry_failed_associations()
+        return result
+    except Exception as e:
+        logger.error(f"Celery task retry_pvb_associations_task failed: {e}", exc_info=True)
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 @shared_task(name="pvb.post_violations_to_ledger")
 def post_pvb_violations_to_ledger_task():
     """Background task to post associated PVB violations to the ledger."""
     logger.info("Executing Celery task: post_pvb_violations_to_ledger_task")
     db: Session = SessionLocal()
     try:
-        ledger_service = LedgerService(db)
+        ledger_service = LedgerService(LedgerRepository(db))
         pvb_service = PVBService(db)
         result = pvb_service.post_violations_to_ledger(ledger_service)
         return result
@@ -10,6 +10,8 @@ are properly registered and discoverable by the Celery worker process.
 from app.pvb.services import (
     associate_pvb_violations_task,
     post_pvb_violations_to_ledger_task,
+    process_pvb_csv_import_task,
+    retry_pvb_associations_task,
 )
 
 # The tasks themselves are defined in the services module using the @shared_task decorator.
@@ -19,4 +21,6 @@ from app.pvb.services import (
 __all__ = [
     "associate_pvb_violations_task",
     "post_pvb_violations_to_ledger_task",
+    "process_pvb_csv_import_task",
+    "retry_pvb_associations_task",
 ]
\ No newline at end of file
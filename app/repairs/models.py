@@ -6,7 +6,7 @@ from enum import Enum as PyEnum
 from typing import List, Optional
 
 from sqlalchemy import (
-    Date, Enum, ForeignKey, Integer, Numeric, String,
+    Date, Enum, ForeignKey, Index, Integer, Numeric, String,
     Text, DateTime,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -65,6 +65,7 @@ class RepairInvoice(Base, AuditMixin):
     # --- Lifecycle and Payment ---
     status: Mapped[RepairInvoiceStatus] = mapped_column(Enum(RepairInvoiceStatus), default=RepairInvoiceStatus.DRAFT, index=True)
     start_week: Mapped[date] = mapped_column(Date, comment="The Sunday that marks the beginning of the first payment period.")
+    open_installment_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", comment="Installments of this invoice not yet PAID; the invoice closes when it reaches 0.")
 
     # --- Receipt Storage (NEW) ---
     receipt_s3_key: Mapped[Optional[str]] = mapped_column(String(512), 
@@ -99,6 +100,10 @@ class RepairInstallment(Base, AuditMixin):
     Each installment is posted to the ledger when it becomes due.
     """
     __tablename__ = "repair_installments"
+    __table_args__ = (
+        # Due-installment queue of the weekly posting run
+        Index("ix_repair_installments_status_week_start", "status", "week_start_date"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     invoice_id: Mapped[int] = mapped_column(Integer, ForeignKey("repair_invoices.id"), index=True)
@@ -5,8 +5,9 @@ from typing import List, Optional, Tuple
 from decimal import Decimal
 
 
-from sqlalchemy import func, update , or_
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, insert, select, update , or_
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, contains_eager, joinedload
 
 from app.drivers.models import Driver
 from app.medallions.models import Medallion
@@ -58,10 +59,10 @@ class RepairRepository:
             .first()
         )
 
-    def bulk_insert_installments(self, installments: List[RepairInstallment]):
-        """Performs a bulk insert of new RepairInstallment records."""
+    def bulk_insert_installments(self, installments: List[dict]):
+        """Inserts new RepairInstallment rows (column dicts) in one statement."""
         if installments:
-            self.db.add_all(installments)
+            self.db.execute(insert(RepairInstallment), installments)
 
     def update_invoice(self, invoice_id: int, updates: dict):
         """Updates specific fields of a single invoice record."""
@@ -75,7 +76,7 @@ class RepairRepository:
     def get_due_installments_to_post(self, post_date: date) -> List[RepairInstallment]:
         """
         Fetches all repair installments that are scheduled and due on or before
-        the specified posting date.
+        the specified posting date, with their invoice loaded.
         """
         return (
             self.db.query(RepairInstallment)
@@ -85,9 +86,99 @@ class RepairRepository:
                 RepairInstallment.week_start_date <= post_date,
                 RepairInvoice.status == RepairInvoiceStatus.OPEN,
             )
+            .options(contains_eager(RepairInstallment.invoice))
+            .order_by(RepairInstallment.week_start_date, RepairInstallment.id)
             .all()
         )
 
+    def _installment_queue(self):
+        """
+        Installment rows with the ledger linkage of their invoice attached:
+        id, installment_id, status, week_start_date, amount (principal),
+        invoice_status, driver_id, lease_id, vehicle_id and medallion_id.
+        """
+        return (
+            select(
+                RepairInstallment.id,
+                RepairInstallment.installment_id,
+                RepairInstallment.status,
+                RepairInstallment.week_start_date,
+                RepairInstallment.principal_amount.label("amount"),
+                RepairInvoice.status.label("invoice_status"),
+                RepairInvoice.driver_id,
+                RepairInvoice.lease_id,
+                RepairInvoice.vehicle_id,
+                RepairInvoice.medallion_id,
+            )
+            .join(RepairInvoice, RepairInstallment.invoice_id == RepairInvoice.id)
+        )
+
+    def get_due_installment_queue(self, post_date: date) -> List[Row]:
+        """
+        Due-installment queue of the posting run: scheduled installments of
+        OPEN invoices due on or before post_date, read from the
+        (status, week_start_date) index in one query.
+        """
+        stmt = (
+            self._installment_queue()
+            .where(
+                RepairInstallment.status == RepairInstallmentStatus.SCHEDULED,
+                RepairInstallment.week_start_date <= post_date,
+                RepairInvoice.status == RepairInvoiceStatus.OPEN,
+            )
+            .order_by(RepairInstallment.week_start_date, RepairInstallment.id)
+        )
+        return self.db.execute(stmt).all()
+
+    def get_installment_queue_by_ids(self, installment_ids: List[str]) -> List[Row]:
+        """Queue rows (see _installment_queue) of the given installment_ids, whatever their status"""
+        if not installment_ids:
+            return []
+        stmt = self._installment_queue().where(RepairInstallment.installment_id.in_(installment_ids))
+        return self.db.execute(stmt).all()
+
+    def bulk_update_installments(self, updates: List[dict]):
+        """Updates many installments in one executemany; each dict carries the row's id."""
+        if updates:
+            self.db.execute(update(RepairInstallment), updates)
+
+    def adjust_open_installment_count(self, invoice_id: int, delta: int):
+        """Adds delta to the invoice's count of installments not yet PAID."""
+        stmt = (
+            update(RepairInvoice)
+            .where(RepairInvoice.id == invoice_id)
+            .values(open_installment_count=RepairInvoice.open_installment_count + delta)
+        )
+        self.db.execute(stmt)
+
+    def close_invoice_if_settled(self, invoice_id: int) -> bool:
+        """
+        Closes the invoice if none of its installments is left unpaid.
+        Returns True if the invoice was closed by this call.
+        """
+        stmt = (
+            update(RepairInvoice)
+            .where(
+                RepairInvoice.id == invoice_id,
+                RepairInvoice.status != RepairInvoiceStatus.CLOSED,
+                RepairInvoice.open_installment_count <= 0,
+            )
+            .values(status=RepairInvoiceStatus.CLOSED)
+        )
+        return self.db.execute(stmt).rowcount > 0
+
+    def close_settled_invoices(self) -> int:
+        """Closes every OPEN invoice with no unpaid installment left; returns how many."""
+        stmt = (
+            update(RepairInvoice)
+            .where(
+                RepairInvoice.status == RepairInvoiceStatus.OPEN,
+                RepairInvoice.open_installment_count <= 0,
+            )
+            .values(status=RepairInvoiceStatus.CLOSED)
+        )
+        return self.db.execute(stmt).rowcount
+
     def update_installment(self, installment_id: int, updates: dict):
         """Updates specific fields of a single installment record."""
         stmt = (
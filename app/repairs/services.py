@@ -1,6 +1,6 @@
 ### app/repairs/services.py
 
-from datetime import datetime, timedelta , date , timezone
+from datetime import datetime , date , timezone
 from decimal import Decimal
 from typing import Optional , List , Tuple
 from io import BytesIO
@@ -8,16 +8,14 @@ from io import BytesIO
 from sqlalchemy.orm import Session
 
 from app.bpm.services import bpm_service
-from app.core.db import SessionLocal
 from app.ledger.models import PostingCategory
-from app.ledger.services import LedgerService
+from app.ledger.services import LedgerService, ObligationRequest
 from app.ledger.repository import LedgerRepository
 from app.repairs.exceptions import (
     InvalidRepairOperationError,
     PaymentScheduleGenerationError,
 )
 from app.repairs.models import (
-    RepairInstallment,
     RepairInstallmentStatus,
     RepairInvoice,
     RepairInvoiceStatus,
@@ -25,7 +23,9 @@ from app.repairs.models import (
 )
 from app.utils.s3_utils import s3_utils
 from app.repairs.repository import RepairRepository
+from app.utils.money import cents_to_decimals, to_cents
 from app.utils.logger import get_logger
+from app.utils.schedule_kernel import weekly_principal_installments
 from app.loans.schemas import PostInstallmentResponse , InstallmentPostingResult
 
 logger = get_logger(__name__)
@@ -168,53 +168,49 @@ class RepairService:
         Calculates and stores the weekly installment schedule for a given invoice.
         """
         try:
-            total_amount = invoice.total_amount
-            if total_amount <= 0:
+            if invoice.total_amount <= 0:
                 raise PaymentScheduleGenerationError("Total amount must be positive.")
 
-            weekly_principal = self._get_weekly_principal(total_amount)
-            
-            remaining_balance = total_amount
-            current_start_date = invoice.start_week
-            installments = []
-            seq = 1
-
-            while remaining_balance > 0:
-                installment_amount = min(weekly_principal, remaining_balance)
-                
-                installment = RepairInstallment(
-                    invoice_id=invoice.id,
-                    installment_id=f"{invoice.repair_id}-{str(seq).zfill(2)}",
-                    week_start_date=current_start_date,
-                    week_end_date=current_start_date + timedelta(days=6),
-                    principal_amount=installment_amount,
-                    status=RepairInstallmentStatus.SCHEDULED,
-                )
-                installments.append(installment)
-
-                remaining_balance -= installment_amount
-                current_start_date += timedelta(weeks=1)
-                seq += 1
-
+            installments = self.build_installment_rows([invoice])
             self.repo.bulk_insert_installments(installments)
+            invoice.open_installment_count = len(installments)
             self.db.flush()
             logger.info(f"Generated {len(installments)} installments for Repair ID {invoice.repair_id}.")
         except Exception as e:
             logger.error(f"Error generating payment schedule for {invoice.repair_id}: {e}", exc_info=True)
             raise PaymentScheduleGenerationError(f"Could not generate payment schedule: {e}")
-        
+
+    def build_installment_rows(self, invoices: List[RepairInvoice]) -> List[dict]:
+        """
+        RepairInstallment column values of the weekly schedules of many
+        invoices, computed together by the schedule kernel.
+        """
+        schedule = weekly_principal_installments(
+            principal_cents=[to_cents(invoice.total_amount) for invoice in invoices],
+            weekly_cents=[to_cents(self._get_weekly_principal(invoice.total_amount)) for invoice in invoices],
+            start_weeks=[invoice.start_week for invoice in invoices],
+        )
+        principal = cents_to_decimals(schedule.columns["principal_cents"])
+
+        return [
+            {
+                "invoice_id": invoices[row["term"]].id,
+                "installment_id": f"{invoices[row['term']].repair_id}-{str(row['installment_no']).zfill(2)}",
+                "week_start_date": row["week_start_date"],
+                "week_end_date": row["week_end_date"],
+                "principal_amount": principal[index],
+                "status": RepairInstallmentStatus.SCHEDULED,
+            }
+            for index, row in enumerate(schedule.records())
+        ]
+
     def closed_repair(self):
+        """Close OPEN invoices whose installments are all PAID, from their open-installment counts."""
         try:
-            repairs = self.db.query(RepairInvoice).filter(RepairInvoice.status == RepairInvoiceStatus.OPEN).all()
-            for repair in repairs:
-                installments = self.db.query(RepairInstallment).filter(RepairInstallment.invoice_id == repair.id).all()
-                if all(inst.status == RepairInstallmentStatus.POSTED for inst in installments):
-                        repair.status = RepairInvoiceStatus.OPEN
-                if all(inst.status == RepairInstallmentStatus.PAID for inst in installments):
-                    repair.status = RepairInvoiceStatus.CLOSED
+            closed_count = self.repo.close_settled_invoices()
             
             self.db.commit()
-            logger.info(f"Closed {len(repairs)} repairs.")
+            logger.info(f"Closed {closed_count} repairs.")
         except Exception as e:
             logger.error(f"Error closing repairs: {e}", exc_info=True)
             raise
@@ -224,110 +220,95 @@ class RepairService:
         installment_ids:Optional[list[str]]= None,
         post_all_due:bool = False
         )->Tuple[List[InstallmentPostingResult], int, int]:
-        """Post loan installments to the ledger either by specific IDs or all due installments."""
+        """
+        Post repair installments to the ledger either by specific IDs or all due installments.
+
+        The installments are read from the due-installment queue with their
+        invoice's ledger linkage in one query, posted in one ledger batch
+        (LedgerService.create_obligations) and marked POSTED with one UPDATE.
+        """
 
         logger.info("Starting task to post due repair installments to ledger.")
 
         if not installment_ids and not post_all_due:
             raise ValueError("Either provide installment_ids or set post_all_due=True")
         
-        db = SessionLocal()
-        
         ledger_repo = LedgerRepository(self.db)
         ledger_service = LedgerService(ledger_repo)
-        repo = RepairRepository(self.db)
+        today = datetime.utcnow().date()
         
         results = []
-        posted_count,failed_count = 0, 0
+        failed_count = 0
+
+        def fail(installment_id: str, message: str):
+            nonlocal failed_count
+            results.append(InstallmentPostingResult(
+                installment_id=installment_id,
+                success=False,
+                message=message
+            ))
+            failed_count += 1
+
         try:
 
             if post_all_due:
                 # Post for today's date to catch all due installments
-                installments_to_post = repo.get_due_installments_to_post(datetime.utcnow().date())
-                logger.info(f"Found {len(installments_to_post)} due installments to post")
+                rows = self.repo.get_due_installment_queue(today)
+                logger.info(f"Found {len(rows)} due installments to post")
             else:
-                installments_to_post = []
+                found = {row.installment_id: row for row in self.repo.get_installment_queue_by_ids(installment_ids)}
+                rows = []
                 for installment_id in installment_ids:
-                    installment = repo.get_installment_by_installment_id(installment_id)
-                    if installment:
-                        installments_to_post.append(installment)
+                    row = found.get(installment_id)
+                    if not row:
+                        fail(installment_id, f"Installment {installment_id} not found")
+                    elif row.status != RepairInstallmentStatus.SCHEDULED:
+                        fail(installment_id, f"Installment status is {row.status.value}, must be SCHEDULED")
+                    elif row.invoice_status != RepairInvoiceStatus.OPEN:
+                        fail(installment_id, f"Parent invoice status is {row.invoice_status.value}, must be OPEN")
+                    elif row.week_start_date > today:
+                        fail(installment_id, f"Installment date {row.week_start_date} is in the future")
                     else:
-                        results.append(InstallmentPostingResult(
-                        installment_id=installment_id,
-                        success=False,
-                        error_message=f"Installment {installment_id} not found"
-                        ))
-                        failed_count += 1
-
-
-            for installment in installments_to_post:
-                try:
-                    # Validate installment can be posted
-                    if installment.status != RepairInstallmentStatus.SCHEDULED:
-                        results.append(InstallmentPostingResult(
-                            installment_id=installment.installment_id,
-                            success=False,
-                            error_message=f"Installment status is {installment.status.value}, must be SCHEDULES"
-                        ))
-                        failed_count += 1
-                        continue
-
-                    if installment.invoice.status != RepairInvoiceStatus.OPEN:
-                        results.append(InstallmentPostingResult(
-                            installment_id=installment.installment_id,
-                            success=False,
-                            error_message=f"Parent invoice status is {installment.invoice.status.value}, must be OPEN"
-                        ))
-                        failed_count += 1
-                        continue
-
-                    if installment.week_start_date > datetime.utcnow().date():
-                        results.append(InstallmentPostingResult(
-                            installment_id=installment.installment_id,
-                            success=False,
-                            error_message=f"Installment date {installment.week_start_date} is in the future"
-                        ))
-                        failed_count += 1
-                        continue
-
-                    ledger_posting = ledger_service.create_obligation(
-                                    category=PostingCategory.REPAIR,
-                                    amount=installment.principal_amount,
-                                    reference_id=installment.installment_id,
-                                    driver_id=installment.invoice.driver_id,
-                                    lease_id=installment.invoice.lease_id,
-                                    vehicle_id=installment.invoice.vehicle_id,
-                                    medallion_id=installment.invoice.medallion_id,
-                                )
-                    
-                    posted_on = datetime.now(timezone.utc)
-                    self.repo.update_installment(installment.id, {
-                        "status": RepairInstallmentStatus.POSTED,
-                        "posted_on": posted_on,
-                        "ledger_posting_ref": ledger_posting.id
-                    })
+                        rows.append(row)
+
+            result = ledger_service.create_obligations(
+                ObligationRequest(
+                    key=row.id,
+                    category=PostingCategory.REPAIR,
+                    amount=row.amount,
+                    reference_id=row.installment_id,
+                    driver_id=row.driver_id,
+                    lease_id=row.lease_id,
+                    vehicle_id=row.vehicle_id,
+                    medallion_id=row.medallion_id,
+                )
+                for row in rows
+            )
 
+            posted_on = datetime.now(timezone.utc)
+            self.repo.bulk_update_installments([
+                {
+                    "id": installment_pk,
+                    "status": RepairInstallmentStatus.POSTED,
+                    "posted_on": posted_on,
+                    "ledger_posting_ref": posting.id,
+                }
+                for installment_pk, posting in result.posted.items()
+            ])
+
+            for row in rows:
+                if row.id in result.posted:
                     results.append(InstallmentPostingResult(
-                        installment_id=installment.installment_id,
+                        installment_id=row.installment_id,
                         success=True,
-                        ledger_posting_ref=ledger_posting.id,
-                        posted_on=posted_on
+                        message=f"Posted with ledger posting ID {result.posted[row.id].id}"
                     ))
-                    posted_count += 1
-
-                    logger.info(
-                        f"Successfully posted installment {installment.installment_id} "
-                        f"to ledger with posting ID {ledger_posting.id}"
-                    )
-                except Exception as e:
-                    results.append(InstallmentPostingResult(
-                        installment_id=installment.installment_id,
-                        success=False,
-                        error_message=f"Error posting installment to ledger: {e}"
-                    ))
-                    failed_count += 1
-                    logger.error(f"Error posting installment to ledger: {e}", exc_info=True)
+                else:
+                    error = result.failed.get(row.id, "Not posted")
+                    fail(row.installment_id, f"Error posting installment to ledger: {error}")
+                    logger.error(f"Error posting installment {row.installment_id} to ledger: {error}")
 
+            posted_count = len(result.posted)
 
             if posted_count > 0:
                 try:
@@ -429,6 +410,7 @@ class RepairService:
                 self.repo.update_installment(installment.id, {
                     "status": RepairInstallmentStatus.PAID
                 })
+                self.repo.adjust_open_installment_count(installment.invoice_id, -1)
                 
                 logger.info(
                     f"Marked repair installment as PAID",
@@ -467,6 +449,7 @@ class RepairService:
                 self.repo.update_installment(installment.id, {
                     "status": RepairInstallmentStatus.POSTED
                 })
+                self.repo.adjust_open_installment_count(installment.invoice_id, 1)
                 
                 logger.info(
                     f"Reverted repair installment to POSTED (payment voided)",
@@ -491,32 +474,17 @@ class RepairService:
 
     def _check_and_close_invoice(self, invoice_id: int) -> None:
         """
-        Check if all installments for an invoice are PAID.
-        If so, mark the invoice as CLOSED.
+        Check if all installments for an invoice are PAID, from the invoice's
+        count of open installments. If so, mark the invoice as CLOSED.
         
         Args:
             invoice_id: The invoice primary key
         """
         try:
-            invoice = self.repo.get_invoice_by_id(invoice_id)
-            
-            if not invoice or invoice.status == RepairInvoiceStatus.CLOSED:
-                return
-            
-            # Get all installments for this invoice
-            installments = self.repo.get_installments_by_invoice(invoice_id)
-            
-            # Check if ALL installments are PAID
-            if all(inst.status == RepairInstallmentStatus.PAID for inst in installments):
-                self.repo.update_invoice(invoice_id, {
-                    "status": RepairInvoiceStatus.CLOSED
-                })
-                
+            if self.repo.close_invoice_if_settled(invoice_id):
                 logger.info(
                     f"Closed repair invoice (all installments paid)",
-                    repair_id=invoice.repair_id,
-                    invoice_id=invoice_id,
-                    total_installments=len(installments)
+                    invoice_id=invoice_id
                 )
                 
         except Exception as e:
@@ -525,4 +493,4 @@ class RepairService:
                 error=str(e),
                 exc_info=True
             )
-            raise
\ No newline at end of file
+            raise
@@ -26,8 +26,8 @@ def post_due_repair_installments_task():
     db = SessionLocal()
     try:
         service = RepairService(db)
-        result = service.post_due_installments_to_ledger()
-        return result
+        _, posted_count, failed_count = service.post_due_installments_to_ledger(post_all_due=True)
+        return {"posted": posted_count, "failed": failed_count}
     except Exception as e:
         logger.error(
             f"Celery task post_due_repair_installments_task failed: {e}", exc_info=True
@@ -24,6 +24,7 @@ SUPERADMIN_USER_ID = 1
 def parse_lease(db: Session, df: pd.DataFrame):
     """Parse and load leases from dataframe into database."""
     try:
+        schedule_plans = {}
         for _, row in df.iterrows():
             # Use get_safe_value() to safely fetch values from DataFrame rows
             lease_id = get_safe_value(row, 'lease_id')
@@ -174,14 +175,18 @@ def parse_lease(db: Session, df: pd.DataFrame):
             vehicle_lease_amount = db.query(LeaseConfiguration).filter_by(lease_id=vehicle_lease.id , lease_breakup_type="total_vehicle_lease").first()
             medallion_lease_amount = db.query(LeaseConfiguration).filter_by(lease_id=vehicle_lease.id , lease_breakup_type="total_medallion_lease_payment").first()
 
-            lease_service.create_or_update_lease_schedule(
-                db=db,
-                lease=vehicle_lease,
-                vehicle_weekly_amount=vehicle_lease_amount.lease_limit or 0,
-                medallion_weekly_amount=medallion_lease_amount.lease_limit or 0,
-                override_start_date=lease_start_date or datetime.now()
+            schedule_plans[vehicle_lease.id] = (
+                vehicle_lease,
+                vehicle_lease_amount.lease_limit or 0,
+                medallion_lease_amount.lease_limit or 0,
+                lease_start_date or datetime.now(),
             )
 
+        # Schedules of all leases are computed together and inserted at once
+        _, schedule_errors = lease_service.replace_lease_schedules(db, list(schedule_plans.values()))
+        if schedule_errors:
+            raise ValueError(f"Could not create lease schedules: {schedule_errors}")
+
         db.commit()
         logger.info("✅ Data successfully processed.")
     except Exception as e:
@@ -10,6 +10,7 @@ from app.core.db import SessionLocal
 from app.utils.logger import get_logger
 from app.core.config import settings
 from app.vehicles.models import Vehicle, VehicleRegistration  # Import models
+import app.vehicles.plate_index  # noqa: F401 - registers plate index flush listener
 from app.utils.s3_utils import s3_utils
 from app.utils.general import get_safe_value
 
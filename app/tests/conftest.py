@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+import app.main  # noqa: F401 - registers every model and listener
+from app.core.db import Base
+from app.current_balances import tasks
+
+
+@pytest.fixture
+def balance_grid_refreshes(monkeypatch):
+    """Balance grid refreshes queued on commit; there is no broker in tests"""
+    calls = []
+    monkeypatch.setattr(tasks.refresh_balance_grid_task, "delay", lambda **kwargs: calls.append(kwargs))
+    return calls
+
+
+def _session(engine):
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def db(balance_grid_refreshes):
+    """Session on an in-memory SQLite database with every table"""
+    yield from _session(create_engine("sqlite://"))
+
+
+@pytest.fixture
+def savepoint_db(balance_grid_refreshes):
+    """Like db, on an engine that supports SAVEPOINT (begin_nested)"""
+    engine = create_engine("sqlite://")
+
+    # pysqlite defers BEGIN, which breaks SAVEPOINT; emit it ourselves
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    yield from _session(engine)
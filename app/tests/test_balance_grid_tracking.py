@@ -0,0 +1,101 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import update
+
+from app.current_balances.balance_grid import BalanceGridService
+from app.current_balances.models import WeeklyBalanceGrid
+from app.ezpass.models import EZPassImport, EZPassTransaction, EZPassTransactionStatus
+from app.ezpass.repository import EZPassRepository
+from app.ledger.models import BalanceStatus, LedgerBalance, PostingCategory
+from app.leases.models import Lease
+from app.medallions.models import Medallion
+
+
+def _grid_tolls(db, week_start):
+    return {
+        entry.lease_pk: entry.ezpass_tolls
+        for entry in db.query(WeeklyBalanceGrid).filter(WeeklyBalanceGrid.week_start == week_start)
+    }
+
+
+def _toll_on_first_of_two_leases(db):
+    """A posted toll and its ledger balance on lease L-1; returns (L-1, L-2, toll, balance)"""
+    medallion = Medallion(medallion_number="1A23")
+    db.add(medallion)
+    db.flush()
+    first = Lease(lease_id="L-1", lease_type="DOV", lease_status="Active", medallion_id=medallion.id)
+    second = Lease(lease_id="L-2", lease_type="DOV", lease_status="Active", medallion_id=medallion.id)
+    batch = EZPassImport(file_name="tolls.csv")
+    db.add_all([first, second, batch])
+    db.flush()
+
+    toll = EZPassTransaction(
+        import_id=batch.id, transaction_id="T-1", tag_or_plate="T123", agency="MTAB&T",
+        transaction_datetime=datetime.now(timezone.utc), amount=Decimal("6.94"),
+        status=EZPassTransactionStatus.POSTED_TO_LEDGER, lease_id=first.id,
+    )
+    balance = LedgerBalance(
+        category=PostingCategory.EZPASS, reference_id="T-1", original_amount=Decimal("6.94"),
+        balance=Decimal("6.94"), status=BalanceStatus.OPEN, lease_id=first.id,
+    )
+    db.add_all([toll, balance])
+    db.commit()
+    return first, second, toll, balance
+
+
+def test_reassociated_toll_refreshes_both_leases(db, balance_grid_refreshes):
+    first, second, toll, balance = _toll_on_first_of_two_leases(db)
+    first_id, second_id, toll_id, balance_id = first.id, second.id, toll.id, balance.id
+
+    service = BalanceGridService(db)
+    week_start, _ = service.balances.get_current_week()
+    service.rebuild()
+    assert _grid_tolls(db, week_start) == {first_id: Decimal("6.94"), second_id: Decimal("0.00")}
+    balance_grid_refreshes.clear()
+
+    # Bulk writers move the toll and its balance with Core UPDATEs
+    EZPassRepository(db).bulk_update_transactions([{"id": toll_id, "lease_id": second_id}])
+    db.execute(update(LedgerBalance).where(LedgerBalance.id == balance_id).values(lease_id=second_id))
+    db.commit()
+
+    assert len(balance_grid_refreshes) == 1
+    assert balance_grid_refreshes[0]["lease_ids"] == sorted([first_id, second_id])
+
+    service.refresh_leases(balance_grid_refreshes[0]["lease_ids"])
+    db.expire_all()
+    assert _grid_tolls(db, week_start) == {first_id: Decimal("0.00"), second_id: Decimal("6.94")}
+
+
+def test_toll_moved_through_the_orm_refreshes_both_leases(db, balance_grid_refreshes):
+    first, second, toll, balance = _toll_on_first_of_two_leases(db)
+    first_id, second_id = first.id, second.id
+    balance_grid_refreshes.clear()
+
+    # As the PVB/TLC edit flows do: set lease_id on instances expired by the commit
+    toll.lease_id = second_id
+    balance.lease_id = second_id
+    db.commit()
+
+    assert len(balance_grid_refreshes) == 1
+    assert balance_grid_refreshes[0]["lease_ids"] == sorted([first_id, second_id])
+
+
+def test_rolled_back_association_is_not_queued(db, balance_grid_refreshes):
+    lease = Lease(lease_id="L-1", lease_type="DOV", lease_status="Active")
+    batch = EZPassImport(file_name="tolls.csv")
+    db.add_all([lease, batch])
+    db.flush()
+    toll = EZPassTransaction(
+        import_id=batch.id, transaction_id="T-1", tag_or_plate="T123", agency="MTAB&T",
+        transaction_datetime=datetime.now(timezone.utc), amount=Decimal("6.94"),
+    )
+    db.add(toll)
+    db.commit()
+    balance_grid_refreshes.clear()
+
+    EZPassRepository(db).update_transactions_by_ids([toll.id], {"lease_id": lease.id})
+    db.rollback()
+    db.commit()
+
+    assert balance_grid_refreshes == []
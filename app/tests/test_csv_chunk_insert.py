@@ -0,0 +1,65 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from app.ezpass.models import EZPassTransaction
+from app.ezpass.services import EZPassService
+from app.pvb.models import PVBSource, PVBViolation
+from app.pvb.repository import PVBRepository
+
+EZPASS_HEADER = "Lane Txn ID,Tag/Plate #,Agency,Entry Plaza,Exit Plaza,Class,Date,Time,Amount,MED,Posted Date"
+
+
+@pytest.fixture
+def db(savepoint_db):
+    # Stand-in for a value MySQL rejects (too long, out of range)
+    for table, column in (("ezpass_transactions", "tag_or_plate"), ("pvb_violations", "plate")):
+        savepoint_db.execute(text(
+            f"CREATE TRIGGER reject_{table} BEFORE INSERT ON {table} "
+            f"WHEN NEW.{column} = 'REJECT' BEGIN SELECT RAISE(ABORT, 'value rejected'); END"
+        ))
+    savepoint_db.commit()
+    return savepoint_db
+
+
+def test_ezpass_bad_row_mid_file_only_loses_itself(db, monkeypatch):
+    monkeypatch.setattr(EZPassService, "associate_transactions", lambda self: None)
+    rows = [
+        f"T{index},{'REJECT' if index == 3 else f'NY T{index}C'},MTAB&T,,BB,1,"
+        f"10/0{index}/2025,08:15:00 AM,$6.94,,10/0{index}/2025"
+        for index in range(1, 6)
+    ]
+    upload = io.BytesIO("\n".join([EZPASS_HEADER, *rows]).encode())
+
+    result = EZPassService(db).process_uploaded_csv(upload, "tolls.csv", user_id=1)
+
+    assert result["imported_records"] == 4
+    assert result["failed_rows"] == 1
+    [failure] = result["failed_details"]
+    assert failure["row_number"] == 4
+    assert failure["transaction_id"] == "T3"
+    assert "value rejected" in failure["error"]
+    imported = {row.transaction_id for row in db.query(EZPassTransaction)}
+    assert imported == {"T1", "T2", "T4", "T5"}
+
+
+def test_pvb_rejected_violation_is_reported(db):
+    def violation(summons, plate):
+        return {
+            "source": PVBSource.CSV_IMPORT, "plate": plate, "state": "NY", "type": "OMT",
+            "summons": summons, "issue_date": date(2025, 10, 1),
+            "fine": Decimal("65.00"), "amount_due": Decimal("65.00"),
+        }
+
+    repo = PVBRepository(db)
+    skipped, rejected = repo.insert_violation_chunk([
+        violation("S1", "T1C"), violation("S2", "REJECT"), violation("S3", "T3C"), violation("S1", "T1C"),
+    ])
+    db.commit()
+
+    assert skipped == ["S1"]
+    assert [(data["summons"], "value rejected" in error) for data, error in rejected] == [("S2", True)]
+    assert {row.summons for row in db.query(PVBViolation)} == {"S1", "S3"}
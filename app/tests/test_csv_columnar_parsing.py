@@ -0,0 +1,59 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+from app.ezpass.services import EZPassService
+from scripts.bench.csv_parsing import (
+    EZPASS_HEADER, chunked, parse_ezpass_columnar, parse_ezpass_per_row,
+    parse_pvb_columnar, parse_pvb_per_row, synthetic_ezpass_rows, synthetic_pvb_rows,
+)
+from app.utils.csv_columnar import parse_cents
+from app.utils.money import round_half_away
+
+
+def _stored(value):
+    """Value as a NUMERIC(10, 2) column stores it"""
+    if isinstance(value, Decimal):
+        return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    return value
+
+
+def test_parse_cents_matches_decimal_storage():
+    values = np.array(["12.34", "-0.5", "7", ".995", "-1.005", "", "abc", "1.2.3", "+3.456"])
+    cents, invalid = parse_cents(values)
+
+    assert invalid.tolist() == [False, False, False, False, False, True, True, True, False]
+    for value, parsed, bad in zip(values, cents, invalid):
+        if not bad:
+            assert parsed == int(_stored(Decimal(value)) * 100), value
+
+
+def test_round_half_away():
+    assert round_half_away(np.array([1625, -1625, 1624, 0]), 1000).tolist() == [2, -2, 2, 0]
+
+
+def test_ezpass_columnar_matches_per_row():
+    chunks = chunked(synthetic_ezpass_rows(3000, seed=11), 500)
+    column_indices = EZPassService(None)._map_csv_columns(EZPASS_HEADER)
+
+    expected, expected_errors = parse_ezpass_per_row(chunks, column_indices)
+    actual, actual_errors = parse_ezpass_columnar(chunks, column_indices)
+
+    assert actual_errors.keys() == expected_errors.keys()
+    assert actual.keys() == expected.keys()
+    for row_number, values in expected.items():
+        assert {k: _stored(v) for k, v in actual[row_number].items()} == \
+            {k: _stored(v) for k, v in values.items()}, row_number
+
+
+def test_pvb_columnar_matches_per_row():
+    chunks = chunked(synthetic_pvb_rows(3000, seed=11), 500)
+
+    expected, expected_errors = parse_pvb_per_row(chunks)
+    actual, actual_errors = parse_pvb_columnar(chunks)
+
+    assert actual_errors.keys() == expected_errors.keys()
+    assert len(actual) == len(expected)
+    for values in expected.values():
+        assert {k: _stored(v) for k, v in actual[values["summons"]].items()} == \
+            {k: _stored(v) for k, v in values.items()}, values["summons"]
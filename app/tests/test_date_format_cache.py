@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import numpy as np
+
+from app.ezpass.services import POSTING_DATE_FORMATS, TRANSACTION_DATETIME_FORMATS
+from app.utils.csv_columnar import parse_datetimes
+from app.utils.csv_import import DateFormatCache, formats_can_collide
+
+
+def test_formats_can_collide():
+    assert formats_can_collide("%m/%d/%Y", "%d/%m/%Y")
+    assert formats_can_collide("%m/%d/%Y", "%m/%d/%y")
+    assert not formats_can_collide("%m/%d/%Y", "%Y-%m-%d")
+    assert not formats_can_collide("%m/%d/%Y %I:%M:%S %p", "%m/%d/%Y %I:%M %p")
+    assert formats_can_collide("%d %b %Y", "%Y-%m-%d")
+
+
+def test_ambiguous_value_keeps_declared_order():
+    cache = DateFormatCache(POSTING_DATE_FORMATS)
+
+    assert cache.parse("28/10/2025") == datetime(2025, 10, 28)
+    assert cache.winner == "%d/%m/%Y"
+    assert cache.parse("10/11/2025") == datetime(2025, 10, 11)
+    assert cache.parse("29/10/2025") == datetime(2025, 10, 29)
+
+
+def test_winner_moves_ahead_of_formats_it_cannot_collide_with():
+    cache = DateFormatCache(POSTING_DATE_FORMATS)
+    cache.parse("2025-10-28")
+    assert cache.ordered()[0] == "%Y-%m-%d"
+
+    cache.parse("28/10/2025")
+    assert cache.ordered().index("%d/%m/%Y") > cache.ordered().index("%m/%d/%Y")
+
+    cache = DateFormatCache(TRANSACTION_DATETIME_FORMATS)
+    cache.parse("2025-10-28 11:29")
+    assert cache.ordered()[0] == "%Y-%m-%d %H:%M"
+
+
+def test_columnar_ambiguous_values_keep_declared_order():
+    cache = DateFormatCache(POSTING_DATE_FORMATS)
+    parse_datetimes(np.array(["28/10/2025", "30/10/2025"]), cache)
+    assert cache.winner == "%d/%m/%Y"
+
+    parsed = parse_datetimes(np.array(["10/11/2025", "29/10/2025", ""]), cache)
+    assert parsed[0] == datetime(2025, 10, 11)
+    assert parsed[1] == datetime(2025, 10, 29)
+    assert parsed.isna()[2]
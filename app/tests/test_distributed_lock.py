@@ -0,0 +1,58 @@
+import asyncio
+import io
+from types import SimpleNamespace
+
+import pytest
+import redis
+from fastapi import HTTPException, UploadFile
+
+from app.core import cache
+from app.core.cache import DistributedLock, LockUnavailableError
+from app.ezpass.exceptions import ImportLockUnavailableError
+from app.ezpass.router import upload_ezpass_csv
+from app.ezpass.services import EZPassService
+
+
+class BrokenRedis:
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise redis.ConnectionError("Connection refused")
+        return fail
+
+
+@pytest.fixture
+def redis_down(monkeypatch):
+    monkeypatch.setattr(cache, "_get_redis_client", lambda: BrokenRedis())
+    monkeypatch.setattr(cache, "_mark_redis_down", lambda error: None)
+
+
+def test_lock_fails_closed_without_redis(redis_down):
+    lock = DistributedLock("test_import", ttl_seconds=60)
+
+    with pytest.raises(LockUnavailableError):
+        lock.acquire()
+    with pytest.raises(LockUnavailableError):
+        lock.is_locked()
+    # Nothing was taken in-process, and releasing never raises
+    assert cache._local_cache.get(lock.key) is None
+    lock.release("token")
+
+
+def test_lock_fails_closed_while_redis_backs_off(monkeypatch):
+    monkeypatch.setattr(cache, "_get_redis_client", lambda: None)
+
+    with pytest.raises(LockUnavailableError):
+        DistributedLock("test_import", ttl_seconds=60).acquire()
+
+
+def test_upload_returns_503_without_redis(redis_down):
+    service = EZPassService(db=None)
+    with pytest.raises(ImportLockUnavailableError):
+        service.queue_csv_import(io.BytesIO(b""), "tolls.csv", user_id=1)
+
+    upload = UploadFile(file=io.BytesIO(b""), filename="tolls.csv")
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(upload_ezpass_csv(
+            file=upload, ezpass_service=service, current_user=SimpleNamespace(id=1)
+        ))
+    assert error.value.status_code == 503
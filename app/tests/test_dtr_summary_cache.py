@@ -0,0 +1,31 @@
+from datetime import date
+
+from app.dtr.repository import DTRRepository
+from app.dtr.summary_cache import invalidate_dtr_summary, is_single_week
+
+
+def test_is_single_week():
+    assert is_single_week(date(2025, 11, 2), date(2025, 11, 8))
+    assert not is_single_week(date(2025, 11, 2), None)
+    assert not is_single_week(date(2025, 11, 2), date(2025, 11, 15))
+    assert not is_single_week(None, date(2025, 11, 8))
+    assert not is_single_week(None, None)
+
+
+def test_week_start_only_summary_is_open_ended(monkeypatch):
+    calls = []
+
+    def breakdown(self, week_start=None, week_end=None):
+        calls.append((week_start, week_end))
+        return [{"status": "PAID", "payment_method": "ACH", "count": 3, "total_amount": "30.00"}]
+
+    monkeypatch.setattr(DTRRepository, "_get_summary_breakdown", breakdown)
+    invalidate_dtr_summary([date(2025, 11, 2)])
+    repo = DTRRepository(db=None)
+
+    stats = repo.get_summary_stats(week_start=date(2025, 11, 2))
+    assert calls == [(date(2025, 11, 2), None)]
+    assert stats["total_count"] == 3
+
+    repo.get_summary_stats(week_start=date(2025, 11, 2), week_end=date(2025, 11, 8))
+    assert calls[-1] == (date(2025, 11, 2), date(2025, 11, 8))
@@ -0,0 +1,88 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from app.dtr.services import DTRService
+from app.dtr.vectorized_calculator import (
+    CHARGE_COLUMNS, TAX_COLUMNS, CancellationFeeRule, compute_dtr_amounts,
+)
+from app.utils.money import round_half_even, to_cents
+
+
+def _random_week(rng: random.Random, size: int) -> pd.DataFrame:
+    rows = []
+    for lease_id in range(1, size + 1):
+        row = {
+            "lease_id": lease_id,
+            "active_days": rng.choice([np.nan, np.nan, 1, 2, 3, 4, 5, 6]),
+            "weekly_lease_cents": rng.randint(0, 150000),
+            "earnings_cents": rng.randint(0, 500000),
+            "prior_balance_cents": rng.randint(0, 20000),
+            "lease_duration_days": float(rng.randint(1, 120)),
+            "termination_reason": rng.choice(["EMERGENCY", "VOLUNTARY", None]),
+        }
+        for column in TAX_COLUMNS + CHARGE_COLUMNS:
+            row[column] = rng.randint(0, 30000)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _per_lease(row) -> dict:
+    cents = lambda column: Decimal(int(row[column])) / 100
+    active_days = None if pd.isna(row["active_days"]) else int(row["active_days"])
+
+    lease_charge = DTRService._prorate_lease_charge(cents("weekly_lease_cents"), active_days)
+
+    cancellation_fee = Decimal("0.00")
+    if active_days is not None and active_days < 7:
+        start = date(2025, 1, 1)
+        lease = SimpleNamespace(
+            termination_reason=row["termination_reason"],
+            lease_start_date=start,
+            lease_end_date=start + timedelta(days=int(row["lease_duration_days"])),
+        )
+        cancellation_fee = DTRService._calculate_cancellation_fee(lease, active_days)
+
+    taxes = sum((cents(c) for c in TAX_COLUMNS), Decimal("0.00"))
+    subtotal, net, total_due = DTRService._calculate_totals(
+        earnings=cents("earnings_cents"),
+        deductions=[taxes, lease_charge["amount"], cancellation_fee, *(cents(c) for c in CHARGE_COLUMNS)],
+        prior_balance=cents("prior_balance_cents"),
+    )
+    return {
+        "lease_amount_cents": to_cents(lease_charge["amount"]),
+        "cancellation_fee_cents": to_cents(cancellation_fee),
+        "subtotal_deductions_cents": to_cents(subtotal),
+        "net_earnings_cents": to_cents(net),
+        "total_due_cents": to_cents(total_due),
+    }
+
+
+def test_round_half_even_matches_decimal():
+    numerators = np.arange(-50, 50, dtype=np.int64)
+    expected = [
+        int((Decimal(int(n)) / Decimal(4)).quantize(Decimal("1"))) for n in numerators
+    ]
+    assert round_half_even(numerators, 4).tolist() == expected
+
+
+def test_vectorized_amounts_match_per_lease_path():
+    week = _random_week(random.Random(1729), 500)
+    result = compute_dtr_amounts(week)
+
+    for index, row in week.iterrows():
+        expected = _per_lease(row)
+        actual = result.loc[index]
+        for field, value in expected.items():
+            assert int(actual[field]) == value, (row["lease_id"], field)
+
+
+def test_cancellation_fee_rule_override():
+    week = _random_week(random.Random(7), 200)
+    rule = CancellationFeeRule(fee_cents=0)
+
+    assert compute_dtr_amounts(week, rule)["cancellation_fee_cents"].sum() == 0
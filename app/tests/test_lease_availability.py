@@ -0,0 +1,168 @@
+from app.drivers.models import Driver
+from app.leases.availability import LeaseAvailabilityService
+from app.leases.models import Lease, LeaseAvailability, LeaseDriver
+from app.leases.schemas import LeaseAvailabilityEntity
+from app.leases.services import lease_service
+from app.medallions.models import Medallion
+from app.vehicles.models import Vehicle
+
+VEHICLE = LeaseAvailabilityEntity.VEHICLE
+MEDALLION = LeaseAvailabilityEntity.MEDALLION
+DRIVER = LeaseAvailabilityEntity.DRIVER
+
+
+def add_vehicle(db, vin, status="Available", medallion=None):
+    if medallion is None:
+        medallion = Medallion(medallion_number=f"M{vin}", medallion_status="Y")
+        db.add(medallion)
+        db.flush()
+    vehicle = Vehicle(vin=vin, vehicle_status=status, medallion_id=medallion.id)
+    db.add(vehicle)
+    db.flush()
+    return vehicle
+
+
+def add_lease(db, lease_id, vehicle, day=True, night=True, driver=None):
+    lease = Lease(
+        lease_id=lease_id, lease_type="DOV", lease_status="Active",
+        vehicle_id=vehicle.id, medallion_id=vehicle.medallion_id,
+        is_day_shift=day, is_night_shift=night,
+    )
+    db.add(lease)
+    db.flush()
+    if driver is not None:
+        db.add(LeaseDriver(lease_id=lease.id, driver_id=driver.driver_id, is_active=True))
+    return lease
+
+
+def snapshot(db):
+    db.expire_all()
+    return sorted(
+        (row.entity_type.name, row.entity_id, row.can_lease, row.active_lease_count,
+         row.day_shift_occupied, row.night_shift_occupied)
+        for row in db.query(LeaseAvailability)
+    )
+
+
+def test_vehicle_rules(db):
+    hacked_up = add_vehicle(db, "HACKED")
+    day_only = add_vehicle(db, "DAYONLY", status="Active")
+    add_lease(db, "L1", day_only, night=False)
+    both_shifts = add_vehicle(db, "BOTH", status="Active")
+    add_lease(db, "L2", both_shifts, day=True, night=False)
+    add_lease(db, "L3", both_shifts, day=False, night=True)
+    db.commit()
+
+    service = LeaseAvailabilityService(db)
+    assert service.can_lease(VEHICLE, hacked_up.id)
+    assert service.can_lease(VEHICLE, day_only.id)
+    assert not service.can_lease(VEHICLE, both_shifts.id)
+    # Medallions follow their vehicle
+    assert service.can_lease(MEDALLION, day_only.medallion_id)
+    assert not service.can_lease(MEDALLION, both_shifts.medallion_id)
+
+    availability = service.get(VEHICLE, both_shifts.id)
+    assert availability.active_lease_count == 2
+    assert availability.day_shift_occupied and availability.night_shift_occupied
+
+
+def test_get_can_lease_shift_filters(db):
+    add_vehicle(db, "FREE")
+    night_free = add_vehicle(db, "NIGHTFREE", status="Active")
+    add_lease(db, "L1", night_free, night=False)
+    day_free = add_vehicle(db, "DAYFREE", status="Active")
+    add_lease(db, "L2", day_free, day=False)
+    add_lease(db, "L3", add_vehicle(db, "FULL", status="Active"))
+    db.commit()
+
+    def vins(shift_availability=None):
+        results, total = lease_service.get_can_lease(
+            db, page=1, per_page=10, multiple=True, shift_availability=shift_availability
+        )
+        assert total == len(results)
+        return {result["vin"] for result in results}
+
+    assert vins() == {"FREE", "NIGHTFREE", "DAYFREE"}
+    assert vins("full") == {"FREE"}
+    assert vins("day") == {"DAYFREE"}
+    assert vins("night") == {"NIGHTFREE"}
+
+    [result], _ = lease_service.get_can_lease(db, page=1, per_page=10, multiple=True, vin="DAYFREE")
+    assert result["available_day_shift"] and not result["available_night_shift"]
+    assert result["has_active_lease"]
+
+
+def test_lease_status_change_updates_driver_count(db):
+    driver = Driver(driver_id="DRV1", driver_status="Registered")
+    db.add(driver)
+    vehicle = add_vehicle(db, "VIN1", status="Active")
+    lease = add_lease(db, "L1", vehicle, driver=driver)
+    db.commit()
+
+    service = LeaseAvailabilityService(db)
+    assert service.get(DRIVER, driver.id).active_lease_count == 1
+    assert service.can_lease(DRIVER, driver.id)
+
+    lease.lease_status = "Terminated"
+    db.commit()
+
+    db.expire_all()
+    assert service.get(DRIVER, driver.id).active_lease_count == 0
+    assert service.get(VEHICLE, vehicle.id).active_lease_count == 0
+
+
+def test_vehicle_moving_medallion_refreshes_both(db):
+    old = Medallion(medallion_number="OLD", medallion_status="Y")
+    new = Medallion(medallion_number="NEW", medallion_status="Y")
+    db.add_all([old, new])
+    db.flush()
+    vehicle = add_vehicle(db, "VIN1", medallion=old)
+    db.commit()
+
+    service = LeaseAvailabilityService(db)
+    assert service.can_lease(MEDALLION, old.id)
+    assert not service.can_lease(MEDALLION, new.id)
+
+    vehicle.medallion_id = new.id
+    db.commit()
+
+    db.expire_all()
+    assert not service.can_lease(MEDALLION, old.id)
+    assert service.can_lease(MEDALLION, new.id)
+
+
+def test_lease_moving_vehicle_refreshes_both(db):
+    old = add_vehicle(db, "OLD", status="Active")
+    new = add_vehicle(db, "NEW", status="Active")
+    lease = add_lease(db, "L1", old)
+    db.commit()
+
+    lease.vehicle_id = new.id
+    db.commit()
+
+    db.expire_all()
+    service = LeaseAvailabilityService(db)
+    assert service.get(VEHICLE, old.id).active_lease_count == 0
+    assert service.get(VEHICLE, new.id).active_lease_count == 1
+
+
+def test_rebuild_matches_incremental_refresh(db):
+    driver = Driver(driver_id="DRV1", driver_status="Registered")
+    other_driver = Driver(driver_id="DRV2", driver_status="Active")
+    db.add_all([driver, other_driver])
+    hacked_up = add_vehicle(db, "HACKED")
+    shared = add_vehicle(db, "SHARED", status="Active")
+    add_lease(db, "L1", shared, night=False, driver=driver)
+    terminated = add_lease(db, "L2", shared, day=False, driver=other_driver)
+    db.commit()
+
+    terminated.lease_status = "Terminated"
+    hacked_up.vehicle_status = "Active"
+    other_driver.driver_status = "Inactive"
+    db.commit()
+
+    incremental = snapshot(db)
+    counts = LeaseAvailabilityService(db).rebuild()
+
+    assert snapshot(db) == incremental
+    assert counts == {"vehicles": 1, "medallions": 1, "drivers": 1}
@@ -0,0 +1,471 @@
+import random
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.bpm.models import Case, CaseEntity, CaseStatus, CaseType
+from app.core.config import settings
+from app.drivers.models import Driver, TLCLicense
+from app.entities.models import Individual
+from app.leases.lease_search import (
+    TERM_LENGTH, LeaseSearchService, normalize_search_value, search_suffixes,
+)
+from app.leases.models import (
+    Lease, LeaseConfiguration, LeaseDriver, LeaseDriverDocument, LeaseSearchTerm,
+)
+from app.leases.schemas import LeaseSearchField
+from app.leases.search_service import format_lease_responses
+from app.leases.services import lease_service
+from app.medallions.models import Medallion, MedallionOwner
+from app.medallions.utils import format_medallion_response
+from app.uploads.models import Document
+from app.utils.general import format_us_phone_number
+from app.vehicles.models import Vehicle, VehicleRegistration
+
+
+def _contains_by_suffix(field, value, term):
+    """How lease_search_matches decides: a suffix of the value starts with the term"""
+    term = normalize_search_value(field, term)[:TERM_LENGTH]
+    return any(suffix.startswith(term) for suffix in search_suffixes(field, value))
+
+
+def test_suffixes():
+    assert search_suffixes(LeaseSearchField.MEDALLION, "1a23") == {"1A23", "A23", "23", "3"}
+    assert search_suffixes(LeaseSearchField.DRIVER_NAME, " Jane Roe ") == {
+        "JANE ROE", "ANE ROE", "NE ROE", "E ROE", "ROE", "OE", "E",
+    }
+    assert search_suffixes(LeaseSearchField.PLATE, "t 123-4c") == {
+        "T1234C", "1234C", "234C", "34C", "4C", "C",
+    }
+    assert search_suffixes(LeaseSearchField.VIN, None) == set()
+    assert all(len(s) <= TERM_LENGTH for s in search_suffixes(LeaseSearchField.DRIVER_NAME, "x" * 200))
+
+
+def test_suffix_match_is_case_insensitive_contains():
+    rng = random.Random(3)
+    alphabet = "ab1 "
+    for _ in range(2000):
+        value = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 10)))
+        term = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))).strip()
+        if not term:
+            continue
+        expected = term.upper() in value.strip().upper()
+        assert _contains_by_suffix(LeaseSearchField.DRIVER_NAME, value, term) == expected, (value, term)
+
+
+@pytest.fixture
+def leases(db):
+    """Two leases on their own medallion, vehicle and plate, with a primary and an additional driver each"""
+    created = {}
+    for index, (medallion_number, vin, plate, amounts) in enumerate(
+        [("5X55", "1FMCU0G67LUA12345", "T123-456C", ["1234.5"]),
+         ("7Y77", "5YJSA1E26HF000001", "T999-000C", ["800", "950"])],
+        start=1,
+    ):
+        medallion = Medallion(medallion_number=medallion_number, medallion_status="Y")
+        db.add(medallion)
+        db.flush()
+        vehicle = Vehicle(vin=vin, vehicle_status="Active", medallion_id=medallion.id)
+        db.add(vehicle)
+        db.flush()
+        db.add(VehicleRegistration(
+            vehicle_id=vehicle.id, plate_number=plate, status="Active",
+            registration_date=date(2025, 1, 1), registration_expiry_date=date(2027, 1, 1),
+        ))
+        license = TLCLicense(tlc_license_number=f"555000{index}")
+        db.add(license)
+        db.flush()
+        primary = Driver(
+            driver_id=f"DRV{index}00", driver_status="Active", first_name="Jane",
+            last_name=f"Roe{index}", full_name=f"Jane Roe{index}", tlc_license_number_id=license.id,
+        )
+        additional = Driver(
+            driver_id=f"DRV{index}01", driver_status="Active", first_name="Al",
+            last_name=f"Xu{index}", full_name=f"Al Xu{index}",
+        )
+        db.add_all([primary, additional])
+        lease = Lease(
+            lease_id=f"LS-000{index}", lease_type="DOV", lease_status="Active",
+            medallion_id=medallion.id, vehicle_id=vehicle.id,
+        )
+        db.add(lease)
+        db.flush()
+        db.add_all([
+            LeaseDriver(lease_id=lease.id, driver_id=primary.driver_id, is_active=True, is_additional_driver=False),
+            LeaseDriver(lease_id=lease.id, driver_id=additional.driver_id, is_active=True, is_additional_driver=True),
+            *(LeaseConfiguration(lease_id=lease.id, lease_breakup_type="lease_amount", lease_limit=amount)
+              for amount in amounts),
+        ])
+        created[lease.lease_id] = lease
+    db.commit()
+    return created
+
+
+def lease_ids(db, **filters):
+    results, total = lease_service.get_lease(db, multiple=True, page=1, per_page=10, **filters)
+    assert total == len(results)
+    return [lease.lease_id for lease in results]
+
+
+def test_get_lease_filters(db, leases):
+    assert lease_ids(db, medallion_number="x5") == ["LS-0001"]
+    assert lease_ids(db, vin_number="a123") == ["LS-0001"]
+    assert lease_ids(db, plate_number="t999 0") == ["LS-0002"]
+    assert sorted(lease_ids(db, driver_id="drv100,drv200")) == ["LS-0001", "LS-0002"]
+    assert lease_ids(db, driver_name="ane roe2") == ["LS-0002"]
+    assert lease_ids(db, tlc_number="0001") == ["LS-0001"]
+
+
+def test_get_lease_excludes_additional_drivers(db, leases):
+    assert lease_ids(db, driver_name="xu1") == ["LS-0001"]
+    assert lease_ids(db, driver_name="xu1", exclude_additional_drivers=True) == []
+    assert lease_ids(db, tlc_number="5550001", exclude_additional_drivers=True) == ["LS-0001"]
+
+    # An additional driver with a TLC license is not found through it either
+    additional = db.query(Driver).filter_by(driver_id="DRV101").one()
+    license = TLCLicense(tlc_license_number="7770001")
+    db.add(license)
+    db.flush()
+    additional.tlc_license_number_id = license.id
+    db.commit()
+    assert lease_ids(db, tlc_number="777") == ["LS-0001"]
+    assert lease_ids(db, tlc_number="777", exclude_additional_drivers=True) == []
+
+
+def test_get_lease_matches_any_lease_amount(db, leases):
+    assert lease_ids(db, lease_amount="1234.5") == ["LS-0001"]
+    assert lease_ids(db, lease_amount="800") == ["LS-0002"]
+    # Not only the first lease_amount configuration of the lease
+    assert lease_ids(db, lease_amount="950") == ["LS-0002"]
+    assert sorted(lease_ids(db, lease_amount="950, 1234.5")) == ["LS-0001", "LS-0002"]
+    assert lease_ids(db, lease_amount="1") == []
+
+
+def test_get_lease_sorts(db, leases):
+    assert lease_ids(db, sort_by="medallion_no", sort_order="desc") == ["LS-0002", "LS-0001"]
+    assert lease_ids(db, sort_by="plate_no", sort_order="asc") == ["LS-0001", "LS-0002"]
+    assert lease_ids(db, sort_by="driver_name", sort_order="desc") == ["LS-0002", "LS-0001"]
+    assert lease_ids(db, sort_by="lease_amount", sort_order="asc") == ["LS-0002", "LS-0001"]
+
+
+def test_search_follows_renamed_driver_and_new_plate(db, leases):
+    driver = db.query(Driver).filter_by(driver_id="DRV100").one()
+    driver.full_name = "Jane Doe"
+    driver.last_name = "Doe"
+    db.add(VehicleRegistration(
+        vehicle_id=leases["LS-0001"].vehicle_id, plate_number="Y555-111C", status="Inactive",
+        registration_date=date(2024, 1, 1), registration_expiry_date=date(2025, 1, 1),
+    ))
+    db.commit()
+
+    assert lease_ids(db, driver_name="doe") == ["LS-0001"]
+    assert lease_ids(db, driver_name="roe1") == []
+    assert lease_ids(db, plate_number="y555") == ["LS-0001"]
+    assert lease_ids(db, plate_number="t123") == ["LS-0001"]
+    assert lease_ids(db, sort_by="driver_name", sort_order="asc") == ["LS-0001", "LS-0002"]
+
+
+def test_search_follows_lease_driver_moving_lease(db, leases):
+    lease_driver = db.query(LeaseDriver).filter_by(driver_id="DRV101").one()
+    lease_driver.lease_id = leases["LS-0002"].id
+    db.commit()
+
+    assert lease_ids(db, driver_name="xu1") == ["LS-0002"]
+
+
+def test_rebuild_matches_incremental_refresh(db, leases):
+    def rows():
+        db.expire_all()
+        return sorted(
+            (row.lease_id, row.field.name, row.term, row.is_additional_driver)
+            for row in db.query(LeaseSearchTerm)
+        )
+
+    incremental = rows()
+    assert LeaseSearchService(db).rebuild()["leases"] == 2
+    assert rows() == incremental
+
+
+# Per-lease formatter as it was before format_lease_responses batched the
+# lookups; the golden test checks the batched version returns the same.
+def reference_format_lease_response(db: Session, lease):
+    lease_amount = 0.0
+    lease_config = (
+        db.query(LeaseConfiguration)
+        .filter(
+            LeaseConfiguration.lease_id == lease.id,
+            LeaseConfiguration.lease_breakup_type == "lease_amount",
+        )
+        .first()
+    )
+    if lease_config and lease_config.lease_limit:
+        lease_amount = float(lease_config.lease_limit)
+
+    case_detail = None
+    lease_termination_case_no = None
+
+    driverlease_case_entity = (
+        db.query(CaseEntity)
+        .join(Case, CaseEntity.case_no == Case.case_no)
+        .join(CaseType, Case.case_type_id == CaseType.id)
+        .filter(
+            CaseEntity.entity_name == "lease",
+            CaseEntity.identifier == "id",
+            CaseEntity.identifier_value == str(lease.id),
+            CaseType.prefix == "DRVLEA",
+        )
+        .order_by(CaseEntity.created_on.desc())
+        .first()
+    )
+    if driverlease_case_entity:
+        case = db.query(Case).filter(Case.case_no == driverlease_case_entity.case_no).first()
+        if case:
+            case_detail = {
+                "case_no": case.case_no,
+                "case_status": case.case_status.name if case.case_status else None,
+            }
+
+    terminate_case_entity = (
+        db.query(CaseEntity)
+        .join(Case, CaseEntity.case_no == Case.case_no)
+        .join(CaseType, Case.case_type_id == CaseType.id)
+        .join(CaseStatus, Case.case_status_id == CaseStatus.id)
+        .filter(
+            CaseEntity.entity_name == "lease",
+            CaseEntity.identifier == "id",
+            CaseEntity.identifier_value == str(lease.id),
+            CaseType.prefix == "TERMLEA",
+            CaseStatus.name.in_(["OPEN", "IN_PROGRESS"]),
+        )
+        .order_by(CaseEntity.created_on.desc())
+        .first()
+    )
+    if terminate_case_entity:
+        lease_termination_case_no = terminate_case_entity.case_no
+
+    shift_type = ""
+    if lease.lease_type == "shift-lease":
+        if lease.is_day_shift and lease.is_night_shift:
+            shift_type = "Full"
+        elif lease.is_day_shift:
+            shift_type = "Day"
+        elif lease.is_night_shift:
+            shift_type = "Night"
+
+    lease_details = {
+        "lease_id": lease.lease_id,
+        "lease_id_pk": lease.id,
+        "medallion_number": lease.medallion.medallion_number if lease.medallion else None,
+        "vehicle_vin_number": lease.vehicle.vin if lease.vehicle else None,
+        "vehicle_plate_number": lease.vehicle.registrations[0].plate_number
+        if lease.vehicle and lease.vehicle.registrations
+        else "",
+        "lease_date": lease.lease_start_date.strftime("%Y-%m-%d") if lease.lease_start_date else None,
+        "lease_type": lease.lease_type,
+        "lease_status": lease.lease_status,
+        "lease_end_date": lease.lease_end_date.strftime("%Y-%m-%d") if lease.lease_end_date else None,
+        "last_renewed_date": lease.last_renewed_date.strftime("%Y-%m-%d")
+        if lease.last_renewed_date
+        else None,
+        "current_segment": lease.current_segment,
+        "total_segments": lease.total_segments,
+        "lease_amount": f"{lease_amount:,.2f}",
+        "case_detail": case_detail,
+        "lease_termination_case_no": lease_termination_case_no,
+        "shift_type": shift_type,
+        "driver": [],
+        "removed_drivers": [],
+        "has_documents": False,
+    }
+
+    medallion = format_medallion_response(lease.medallion) if lease.medallion else None
+    lease_details["medallion_owner"] = medallion["medallion_owner"] if medallion else None
+
+    for lease_driver in lease.lease_driver:
+        if not lease_driver.is_active:
+            continue
+        if len(lease_driver.documents) > 0:
+            lease_details["has_documents"] = True
+
+        driver = lease_driver.driver
+        driver_documents = []
+        for lease_driver_doc in lease_driver.documents:
+            if lease_driver_doc.document_id:
+                document = db.query(Document).filter(Document.id == lease_driver_doc.document_id).first()
+                if document:
+                    driver_documents.append({
+                        "document_id": document.id,
+                        "document_name": document.document_name,
+                        "document_type": document.document_type,
+                        "document_format": document.document_format,
+                        "document_date": document.document_date.strftime("%Y-%m-%d")
+                        if document.document_date
+                        else None,
+                        "document_size": document.document_actual_size,
+                        "document_note": document.document_note,
+                        "presigned_url": document.presigned_url,
+                        "object_type": document.object_type,
+                        "created_on": document.created_on.strftime("%Y-%m-%d %H:%M:%S")
+                        if document.created_on
+                        else None,
+                        "has_frontend_signed": lease_driver_doc.has_frontend_signed,
+                        "has_driver_signed": lease_driver_doc.has_driver_signed,
+                        "document_envelope_id": lease_driver_doc.document_envelope_id,
+                        "signing_type": lease_driver_doc.signing_type,
+                    })
+
+        case_detail = None
+        if lease_driver.is_additional_driver:
+            case_entity = (
+                db.query(CaseEntity)
+                .filter(
+                    CaseEntity.entity_name == "lease_drivers",
+                    CaseEntity.identifier == "driver_id",
+                    CaseEntity.identifier_value == driver.driver_id,
+                )
+                .order_by(CaseEntity.created_on.desc())
+                .first()
+            )
+            if case_entity:
+                case = (
+                    db.query(Case)
+                    .filter(Case.case_no == case_entity.case_no)
+                    .order_by(Case.created_on.desc())
+                    .first()
+                )
+                if case:
+                    case_detail = {
+                        "case_no": case.case_no,
+                        "case_status": case.case_status.name if case.case_status else None,
+                    }
+        if not driver:
+            continue
+
+        lease_details["driver"].append({
+            "driver_id_pk": driver.id,
+            "tlc_license_no": driver.tlc_license.tlc_license_number if driver.tlc_license else None,
+            "dmv_license_no": driver.dmv_license.dmv_license_number if driver.dmv_license else None,
+            "ssn": driver.ssn,
+            "phone_number": format_us_phone_number(driver.phone_number_1),
+            "driver_id": driver.driver_id,
+            "driver_name": f"{driver.first_name} {driver.last_name}",
+            "driver_status": driver.driver_status,
+            "is_driver_manager": bool(lease_driver.documents),
+            "driver_lease_id": lease_driver.id,
+            "is_additional_driver": True if lease_driver.is_additional_driver else False,
+            "joined_date": lease_driver.date_added.strftime(settings.common_date_format)
+            if lease_driver.date_added and settings.common_date_format
+            else None,
+            "case_detail": case_detail,
+            "documents": driver_documents,
+        })
+
+    for lease_driver in lease.lease_driver:
+        if lease_driver.is_active or not lease_driver.is_additional_driver:
+            continue
+
+        driver = lease_driver.driver
+        case_entity = (
+            db.query(CaseEntity)
+            .filter(
+                CaseEntity.entity_name == "lease_drivers",
+                CaseEntity.identifier == "driver_id",
+                CaseEntity.identifier_value == driver.driver_id,
+            )
+            .first()
+        )
+        case_detail = None
+        if case_entity:
+            case = db.query(Case).filter(Case.case_no == case_entity.case_no).first()
+            if case:
+                case_detail = {
+                    "case_no": case.case_no,
+                    "case_status": case.case_status.name if case.case_status else None,
+                }
+
+        lease_details["removed_drivers"].append({
+            "driver_id_pk": driver.id,
+            "tlc_license_no": driver.tlc_license.tlc_license_number if driver.tlc_license else None,
+            "dmv_license_no": driver.dmv_license.dmv_license_number if driver.dmv_license else None,
+            "ssn": driver.ssn,
+            "phone_number": format_us_phone_number(driver.phone_number_1),
+            "driver_id": driver.driver_id,
+            "driver_name": f"{driver.first_name} {driver.last_name}",
+            "driver_status": driver.driver_status,
+            "driver_lease_id": lease_driver.id,
+            "is_additional_driver": True,
+            "joined_date": lease_driver.date_added.strftime(settings.common_date_format)
+            if lease_driver.date_added and settings.common_date_format
+            else None,
+            "removed_date": lease_driver.date_terminated.strftime(settings.common_date_format)
+            if lease_driver.date_terminated and settings.common_date_format
+            else None,
+            "case_detail": case_detail,
+        })
+
+    return lease_details
+
+
+def test_format_lease_responses_matches_per_lease_formatter(db, leases):
+    first, second = leases["LS-0001"], leases["LS-0002"]
+
+    owner_person = Individual(first_name="Ann", last_name="Owner")
+    db.add(owner_person)
+    db.flush()
+    owner = MedallionOwner(medallion_owner_type="I", individual_id=owner_person.id)
+    db.add(owner)
+    db.flush()
+    first.medallion.owner_id = owner.id
+    second.lease_type = "shift-lease"
+    second.is_day_shift = True
+    second.lease_start_date = date(2025, 3, 1)
+
+    open_status, closed_status = CaseStatus(name="OPEN"), CaseStatus(name="CLOSED")
+    driver_lease, termination = (
+        CaseType(name="Driver Lease", prefix="DRVLEA"), CaseType(name="Terminate Lease", prefix="TERMLEA"),
+    )
+    db.add_all([open_status, closed_status, driver_lease, termination])
+    db.flush()
+    cases = [
+        ("DRVLEA001", driver_lease, open_status, "lease", "id", str(first.id)),
+        ("TERMLEA001", termination, open_status, "lease", "id", str(first.id)),
+        ("TERMLEA002", termination, closed_status, "lease", "id", str(second.id)),
+        ("DRVLEA002", driver_lease, closed_status, "lease_drivers", "driver_id", "DRV201"),
+    ]
+    for case_no, case_type, status, entity_name, identifier, value in cases:
+        db.add(Case(case_no=case_no, case_type_id=case_type.id, case_status_id=status.id))
+        db.add(CaseEntity(
+            case_no=case_no, entity_name=entity_name, identifier=identifier, identifier_value=value,
+        ))
+
+    # A signed document on the primary driver and a removed additional driver
+    document = Document(
+        document_name="lease.pdf", document_type="lease", document_format="PDF",
+        document_date=datetime(2025, 3, 1), object_type="lease",
+    )
+    db.add(document)
+    db.flush()
+    primary = db.query(LeaseDriver).filter_by(driver_id="DRV100").one()
+    db.add(LeaseDriverDocument(
+        lease_driver_id=primary.id, document_id=document.id, has_driver_signed=True, signing_type="wet",
+    ))
+    removed = db.query(LeaseDriver).filter_by(driver_id="DRV201").one()
+    removed.is_active = False
+    removed.date_added = date(2025, 1, 5)
+    removed.date_terminated = date(2025, 2, 5)
+    db.commit()
+
+    db.expire_all()
+    page, _ = lease_service.get_lease(db, multiple=True, page=1, per_page=10)
+    expected = [reference_format_lease_response(db, lease) for lease in page]
+
+    db.expire_all()
+    page, _ = lease_service.get_lease(db, multiple=True, page=1, per_page=10)
+    assert format_lease_responses(db, page) == expected
+
+    by_lease = {lease["lease_id"]: lease for lease in expected}
+    assert by_lease["LS-0001"]["case_detail"]["case_no"] == "DRVLEA001"
+    assert by_lease["LS-0001"]["lease_termination_case_no"] == "TERMLEA001"
+    assert by_lease["LS-0001"]["has_documents"]
+    assert by_lease["LS-0002"]["removed_drivers"][0]["case_detail"]["case_no"] == "DRVLEA002"
@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from sqlalchemy import func
+
+from app.ledger.models import BalanceStatus, EntryType, LedgerBalance, LedgerPosting, PostingCategory
+from app.ledger.repository import LedgerRepository
+from app.ledger.services import LedgerService, ObligationRequest
+
+
+def obligation(key, amount, reference_id, entry_type=EntryType.DEBIT):
+    return ObligationRequest(
+        key=key, category=PostingCategory.EZPASS, amount=Decimal(amount),
+        reference_id=reference_id, driver_id=1, entry_type=entry_type,
+    )
+
+
+def balances(db):
+    db.expire_all()
+    return {balance.reference_id: balance.balance for balance in db.query(LedgerBalance)}
+
+
+def posting_count(db):
+    return db.query(func.count(LedgerPosting.id)).scalar()
+
+
+def test_batch_posts_every_obligation(savepoint_db):
+    db = savepoint_db
+    result = LedgerService(LedgerRepository(db)).create_obligations([
+        obligation("a", "10.00", "REF-A"),
+        obligation("b", "2.50", "REF-B"),
+        obligation("zero", "0", "REF-Z"),
+    ])
+    db.commit()
+
+    assert set(result.posted) == {"a", "b"}
+    assert result.failed == {"zero": "Obligation amount must be positive."}
+    assert result.balances["a"].reference_id == "REF-A"
+    assert balances(db) == {"REF-A": Decimal("10.00"), "REF-B": Decimal("2.50")}
+    assert posting_count(db) == 2
+
+
+def test_batch_updates_existing_balance(savepoint_db):
+    db = savepoint_db
+    service = LedgerService(LedgerRepository(db))
+    service.create_obligations([obligation("first", "10.00", "REF-A")])
+    db.commit()
+
+    result = service.create_obligations([
+        obligation("debit", "5.25", "REF-A"),
+        obligation("credit", "3.00", "REF-A", entry_type=EntryType.CREDIT),
+    ])
+    db.commit()
+
+    assert result.balances["debit"] is result.balances["credit"]
+    assert balances(db) == {"REF-A": Decimal("12.25")}
+    assert db.query(LedgerBalance).one().status == BalanceStatus.OPEN
+    assert posting_count(db) == 3
+
+
+def test_failed_flush_is_replayed_one_by_one(savepoint_db):
+    db = savepoint_db
+    service = LedgerService(LedgerRepository(db))
+    service.create_obligations([obligation("first", "10.00", "REF-A")])
+    db.commit()
+
+    # A missing reference_id violates NOT NULL and fails the batch flush
+    result = service.create_obligations([
+        obligation("existing", "5.00", "REF-A"),
+        obligation("bad", "1.00", None),
+        obligation("new", "7.00", "REF-B"),
+    ])
+    db.commit()
+
+    assert set(result.posted) == {"existing", "new"}
+    assert set(result.failed) == {"bad"}
+    assert result.failed["bad"].startswith("Failed to create obligation")
+    # The rolled back batch must not apply REF-A's amount twice
+    assert balances(db) == {"REF-A": Decimal("15.00"), "REF-B": Decimal("7.00")}
+    assert posting_count(db) == 3
@@ -0,0 +1,68 @@
+import io
+from datetime import date
+from types import SimpleNamespace
+
+from app.driver_payments.nacha_builder import (
+    RECORD_SIZE, NACHABatch, NACHAEntry, NACHAFileBuilder, to_nacha_text,
+    validate_account_number,
+)
+
+
+def _config():
+    return SimpleNamespace(
+        bank_routing_number="021000021",
+        immediate_origin="P963014763",
+        bank_name="Test Bank",
+        company_name="Big Apple Taxi",
+        company_tax_id="0103214763",
+        company_entry_description="DRIVER PAY",
+    )
+
+
+def test_to_nacha_text():
+    assert to_nacha_text("Muñoz") == "Munoz"
+    assert to_nacha_text("Zoë Ångström") == "Zoe Angstrom"
+    assert to_nacha_text("李 Wei") == " Wei"
+    assert to_nacha_text(None) == ""
+
+
+def test_validate_account_number():
+    assert validate_account_number("123456789") is None
+    assert validate_account_number("AB12345") is None
+    assert validate_account_number("") == "Missing bank account number"
+    assert validate_account_number("1" * 18) is not None
+    assert validate_account_number("1234-5678") is not None
+    assert validate_account_number("1234 5678") is not None
+    assert validate_account_number("１２３４") is not None
+
+
+def test_non_ascii_text_is_written_as_ascii():
+    config = _config()
+    config.bank_name = "Banco Económico"
+    config.company_name = "Señor Taxi"
+    config.company_entry_description = "PAGO AÑO"
+    batch = NACHABatch(
+        company_config=config, sec_code="PPD", effective_date=date(2025, 11, 3), batch_number=1,
+        entries=[
+            NACHAEntry(
+                txn_code="22", routing="021000021", account="123456789", amount_cents=12345,
+                driver_id="42", receipt_number="R1", driver_name="José Muñoz",
+            )
+        ],
+    )
+
+    raw = io.BytesIO()
+    stream = io.TextIOWrapper(raw, encoding="ascii", newline="")
+    NACHAFileBuilder(stream, config).build([batch])
+    stream.flush()
+
+    records = raw.getvalue().decode("ascii").split("\r\n")[:-1]
+    assert all(len(record) == RECORD_SIZE for record in records)
+    header = records[0]
+    assert header[40:63] == "Banco Economico".ljust(23)
+    assert header[63:86] == "Senor Taxi".ljust(23)
+    batch_header = next(record for record in records if record.startswith("5"))
+    assert batch_header[4:20] == "Senor Taxi".ljust(16)
+    assert batch_header[53:63] == "PAGO ANO".ljust(10)
+    entry = next(record for record in records if record.startswith("6"))
+    assert entry[54:76] == "JOSE MUNOZ".ljust(22)
@@ -0,0 +1,62 @@
+from datetime import date
+from decimal import Decimal
+
+from app.driver_payments.models import ACHPayableQueue
+from app.drivers.models import Driver
+from app.dtr.models import DTR, DTRStatus, PaymentMethod
+from app.entities.models import BankAccount
+
+
+def add_bank(db, account_number="123456789"):
+    bank = BankAccount(bank_routing_number="021000021", bank_account_number=account_number)
+    db.add(bank)
+    db.flush()
+    return bank
+
+
+def add_payable_dtr(db, driver):
+    dtr = DTR(
+        dtr_number="DTR1", receipt_number="R1", lease_id=1, primary_driver_id=driver.id,
+        week_start_date=date(2025, 11, 2), week_end_date=date(2025, 11, 8),
+        status=DTRStatus.FINALIZED, payment_method=PaymentMethod.ACH,
+        total_due_to_driver=Decimal("100.00"),
+    )
+    db.add(dtr)
+    db.commit()
+    return dtr
+
+
+def has_bank_info(db):
+    db.expire_all()
+    return db.query(ACHPayableQueue).one().has_bank_info
+
+
+def test_switching_bank_account_by_id_refreshes_queue(db):
+    blank = add_bank(db, account_number=" ")
+    usable = add_bank(db)
+    driver = Driver(driver_id="DRV1", driver_status="Active", bank_account_id=blank.id)
+    db.add(driver)
+    db.flush()
+    add_payable_dtr(db, driver)
+    assert not has_bank_info(db)
+
+    # Load the relationship so it is stale once the id changes
+    assert driver.driver_bank_account is blank
+    driver.bank_account_id = usable.id
+    db.commit()
+
+    assert has_bank_info(db)
+
+
+def test_deleting_bank_account_clears_bank_info(db):
+    bank = add_bank(db)
+    driver = Driver(driver_id="DRV1", driver_status="Active", bank_account_id=bank.id)
+    db.add(driver)
+    db.flush()
+    add_payable_dtr(db, driver)
+    assert has_bank_info(db)
+
+    db.delete(bank)
+    db.commit()
+
+    assert not has_bank_info(db)
@@ -0,0 +1,47 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+
+from app.vehicles.plate_index import (
+    PlateResolver, normalize_plate, normalize_state, split_tag_or_plate,
+)
+
+
+def _history(vehicle_id, effective_from, effective_to=None, state="NY"):
+    return SimpleNamespace(
+        plate_key="T123456C", plate_state=state, vehicle_id=vehicle_id,
+        effective_from=effective_from, effective_to=effective_to,
+    )
+
+
+def _registration(vehicle_id, status, state="NY"):
+    return SimpleNamespace(
+        plate_key="T123456C", registration_state=state, vehicle_id=vehicle_id, status=status
+    )
+
+
+def test_normalization():
+    assert normalize_plate(" t 123-456.c ") == "T123456C"
+    assert normalize_plate(None) == ""
+    assert normalize_state(" ny ") == "NY"
+    assert normalize_state("New York") is None
+    assert split_tag_or_plate("NY T123456C") == ("NY", "T123456C")
+    assert split_tag_or_plate("ny T123 456C") == ("NY", "T123456C")
+    assert split_tag_or_plate("00123456789") == (None, "00123456789")
+    assert split_tag_or_plate(None) == (None, "")
+
+
+def test_resolver_uses_plate_active_on_the_day():
+    resolver = PlateResolver(db=None)
+    resolver.history["T123456C"] = [
+        _history(1, date(2025, 1, 1), date(2025, 6, 1)),
+        _history(2, date(2025, 6, 1)),
+    ]
+    resolver.current["T123456C"] = [_registration(1, "Inactive"), _registration(2, "Active")]
+
+    assert resolver.vehicle_for("t123456c", "NY", datetime(2025, 3, 1, 10)) == 1
+    assert resolver.vehicle_for("T123456C", "NY", datetime(2025, 6, 1, 0, 5)) == 2
+    assert resolver.vehicle_for("T123456C", None, datetime(2025, 7, 1)) == 2
+    assert resolver.vehicle_for("T123456C", "NJ", datetime(2025, 7, 1)) is None
+    # Before the plate history starts: fall back to the active registration
+    assert resolver.vehicle_for("T123456C", "NY", datetime(2024, 7, 1)) == 2
+    assert resolver.vehicle_for("UNKNOWN", "NY", datetime(2025, 7, 1)) is None
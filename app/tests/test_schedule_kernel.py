@@ -0,0 +1,139 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.core.config import settings
+from app.leases.utils import calculate_weekly_lease_schedule
+from app.utils.money import to_cents
+from app.utils.schedule_kernel import (
+    WeeklyLeaseTerm, loan_installments, weekly_lease_installments,
+    weekly_principal_installments,
+)
+
+DAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def _reference_lease_schedule(start, duration_weeks, day_num, weekly, end=None):
+    """The per-row loop calculate_weekly_lease_schedule used before the kernel"""
+    daily_rate = weekly / 7
+    if end is None:
+        end = start + timedelta(weeks=duration_weeks)
+    week_start_day = (day_num - 1) % 7
+    first_week = start + timedelta(days=(week_start_day - start.weekday() + 7) % 7)
+
+    rows = []
+    if first_week > start:
+        days = (first_week - start).days
+        to_pay_day = (day_num - start.weekday() + 7) % 7 or 7
+        rows.append((start + timedelta(days=to_pay_day), start, first_week - timedelta(days=1),
+                     round(daily_rate * days, 2), True, days))
+    week = first_week
+    while week + timedelta(days=6) < end:
+        rows.append((week + timedelta(days=(day_num - week.weekday() + 7) % 7), week,
+                     week + timedelta(days=6), round(weekly, 2), False, 7))
+        week += timedelta(days=7)
+    if week < end:
+        days = (end - week).days + 1
+        rows.append((week + timedelta(days=(day_num - week.weekday() + 7) % 7), week, end,
+                     round(daily_rate * days, 2), True, days))
+    return rows
+
+
+def _reference_principal_schedule(total, weekly, start_week, loan_date=None, rate=None):
+    """The per-row loop of Loan/RepairService.generate_payment_schedule"""
+    rows = []
+    remaining, current_start, last_date = total, start_week, loan_date
+    while remaining > 0:
+        principal_due = min(weekly, remaining)
+        due_date = current_start + timedelta(days=6)
+        interest = None
+        if rate is not None:
+            accrual_days = (due_date - last_date).days
+            interest = (remaining * (rate / Decimal("100")) * Decimal(accrual_days)) / Decimal("365")
+            interest = interest.quantize(Decimal("0.01"))
+        rows.append((current_start, due_date, principal_due, interest))
+        remaining -= principal_due
+        last_date = due_date
+        current_start += timedelta(weeks=1)
+    return rows
+
+
+def _random_lease_terms(count, seed):
+    rng = random.Random(seed)
+    terms = []
+    for _ in range(count):
+        start = date(2024, 1, 1) + timedelta(days=rng.randint(0, 900))
+        end = None if rng.random() < 0.3 else start + timedelta(days=rng.randint(-3, 400))
+        weekly = rng.randint(1, 250000) / 100
+        terms.append((start, rng.randint(0, 60), rng.randint(0, 6), weekly, end))
+    return terms
+
+
+def test_weekly_lease_installments_match_reference():
+    terms = _random_lease_terms(2000, seed=7)
+    schedule = weekly_lease_installments([
+        WeeklyLeaseTerm(start, end, weeks, day_num, to_cents(weekly))
+        for start, weeks, day_num, weekly, end in terms
+    ])
+    actual = [[] for _ in terms]
+    for row in schedule.records():
+        actual[row["term"]].append((
+            row["due_date"], row["period_start"], row["period_end"],
+            row["amount_cents"] / 100, row["is_prorated"], row["active_days"],
+        ))
+
+    for index, (start, weeks, day_num, weekly, end) in enumerate(terms):
+        assert actual[index] == _reference_lease_schedule(start, weeks, day_num, weekly, end), terms[index]
+
+
+def test_calculate_weekly_lease_schedule_format(monkeypatch):
+    monkeypatch.setattr(settings, "day_name_to_num", {name: i for i, name in enumerate(DAY_NAMES)})
+    schedule = calculate_weekly_lease_schedule(date(2025, 1, 1), 2, "Sunday", 1234.56)
+
+    assert schedule[0] == {
+        "installment_no": 1,
+        "due_date": "Sun, January 05, 2025",
+        "start_date": "Wed, January 01, 2025",
+        "amount_due": "$ 529.10",
+        "is_prorated": True,
+        "active_days": 3,
+        "period_start": "Wed, January 01, 2025",
+        "period_end": "Fri, January 03, 2025",
+    }
+    assert [entry["amount_due"] for entry in schedule] == ["$ 529.10", "$ 1,234.56", "$ 881.83"]
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_loan_and_repair_installments_match_reference(seed):
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(500):
+        total = Decimal(rng.randint(1, 1500000)).scaleb(-2)
+        weekly = total if total <= 200 else Decimal(rng.choice([100, 200, 250, 300]))
+        start_week = date(2025, 1, 5) + timedelta(weeks=rng.randint(0, 50))
+        loan_date = start_week - timedelta(days=rng.randint(0, 20))
+        rate = Decimal(rng.randint(0, 3000)).scaleb(-2)
+        cases.append((total, weekly, start_week, loan_date, rate))
+
+    loans = loan_installments(
+        [to_cents(c[0]) for c in cases], [to_cents(c[1]) for c in cases],
+        [c[2] for c in cases], [c[3] for c in cases], [c[4] for c in cases],
+    ).records()
+    repairs = weekly_principal_installments(
+        [to_cents(c[0]) for c in cases], [to_cents(c[1]) for c in cases], [c[2] for c in cases],
+    ).records()
+    assert len(loans) == len(repairs)
+
+    by_term = {}
+    for loan, repair in zip(loans, repairs):
+        assert (loan["term"], loan["installment_no"]) == (repair["term"], repair["installment_no"])
+        by_term.setdefault(loan["term"], []).append((
+            loan["week_start_date"], loan["week_end_date"],
+            Decimal(loan["principal_cents"]).scaleb(-2), Decimal(loan["interest_cents"]).scaleb(-2),
+        ))
+        assert repair["principal_cents"] == loan["principal_cents"]
+
+    for index, (total, weekly, start_week, loan_date, rate) in enumerate(cases):
+        assert by_term[index] == _reference_principal_schedule(total, weekly, start_week, loan_date, rate), cases[index]
@@ -0,0 +1,77 @@
+import io
+import threading
+
+from botocore.exceptions import ClientError
+
+from app.utils.template_store import TemplateStore, compile_template
+
+
+class _FakeS3:
+    def __init__(self):
+        self.body = b"<p>Hi {{driver_name}}</p>"
+        self.etag = '"v1"'
+        self.calls = []
+
+    def get_object(self, **params):
+        self.calls.append(params)
+        if params.get("IfNoneMatch") == self.etag:
+            raise ClientError({"Error": {"Code": "304", "Message": "Not Modified"}}, "GetObject")
+        return {"Body": io.BytesIO(self.body), "ETag": self.etag, "ContentType": "text/html; charset=utf-8"}
+
+
+def test_compile_template_matches_placeholder_replace():
+    template = compile_template("{{a}} and {{b}} and {{unknown}} {{a}}")
+    assert template.render({"a": "x", "b": 0}) == "x and  and {{unknown}} x"
+    assert compile_template("{{a}} and {{b}} and {{unknown}} {{a}}") is template
+
+
+def test_s3_templates_are_cached_and_revalidated():
+    s3 = _FakeS3()
+    store = TemplateStore(ttl_seconds=60, s3_client=s3)
+
+    assert store.get_s3_template("bucket", "key") == "<p>Hi {{driver_name}}</p>"
+    assert store.get_s3_template("bucket", "key") == "<p>Hi {{driver_name}}</p>"
+    assert len(s3.calls) == 1
+
+    # Past the TTL: conditional GET, unchanged object keeps the cached copy
+    store.ttl_seconds = 0
+    assert store.get_s3_template("bucket", "key") == "<p>Hi {{driver_name}}</p>"
+    assert s3.calls[-1]["IfNoneMatch"] == '"v1"'
+
+    s3.body, s3.etag = b"<p>Hello {{driver_name}}</p>", '"v2"'
+    assert store.get_s3_template("bucket", "key") == "<p>Hello {{driver_name}}</p>"
+
+    # S3 unreachable: the last fetched copy is served
+    s3.get_object = lambda **params: (_ for _ in ()).throw(RuntimeError("down"))
+    assert store.get_s3_template("bucket", "key") == "<p>Hello {{driver_name}}</p>"
+    assert store.get_s3_template("bucket", "other") is None
+
+
+def test_slow_s3_fetch_does_not_block_other_templates():
+    s3 = _FakeS3()
+    store = TemplateStore(ttl_seconds=60, s3_client=s3)
+    assert store.get_s3_template("bucket", "cached") is not None
+
+    fetching, release = threading.Event(), threading.Event()
+    fetch = s3.get_object
+
+    def slow_get_object(**params):
+        fetching.set()
+        release.wait(5)
+        return fetch(**params)
+
+    s3.get_object = slow_get_object
+    slow = threading.Thread(target=store.get_s3_template, args=("bucket", "slow"))
+    slow.start()
+    assert fetching.wait(5)
+
+    texts = []
+    reader = threading.Thread(target=lambda: texts.append(store.get_s3_template("bucket", "cached")))
+    reader.start()
+    reader.join(1)
+    read_during_fetch = list(texts)
+    release.set()
+    slow.join(5)
+    reader.join(5)
+
+    assert read_during_fetch == ["<p>Hi {{driver_name}}</p>"]
@@ -6,6 +6,7 @@ from typing import List, Optional, Tuple
 from sqlalchemy import func, update
 from sqlalchemy.orm import Session, joinedload
 
+from app.current_balances.balance_grid import mark_leases_changed
 from app.drivers.models import Driver
 from app.medallions.models import Medallion
 from app.leases.models import Lease
@@ -44,6 +45,12 @@ class TLCRepository:
 
     def update_violation(self, violation_id: int, updates: dict):
         """Updates specific fields of a single violation record."""
+        lease_ids = {updates.get("lease_id")}
+        lease_ids.update(
+            lease_id for (lease_id,) in
+            self.db.query(TLCViolation.lease_id).filter(TLCViolation.id == violation_id)
+        )
+        mark_leases_changed(self.db, lease_ids)
         stmt = (
             update(TLCViolation)
             .where(TLCViolation.id == violation_id)
@@ -8,7 +8,7 @@ from sqlalchemy.orm import Session
 
 from app.bpm.services import bpm_service
 from app.ledger.models import PostingCategory
-from app.ledger.services import LedgerService
+from app.ledger.services import LedgerService, ObligationRequest
 from app.ledger.repository import LedgerRepository
 from app.tlc.exceptions import (
     InvalidTLCActionError,
@@ -151,25 +151,26 @@ class TLCService:
         Internal method to create an obligation in the ledger for a violation.
         """
         try:
-            # create_obligation handles commit on its own, so we don't commit here
-            # to allow the caller to manage the transaction.
-            balance = self.ledger_service.create_obligation(
-                category=PostingCategory.TLC,
-                amount=violation.total_payable,
-                reference_id=violation.summons_no,
-                driver_id=violation.driver_id,
-                lease_id=violation.lease_id,
-                medallion_id=violation.medallion_id,
-                vehicle_id=violation.lease.vehicle_id if violation.lease else None,
-            )
-            
-            # The balance object has a corresponding posting via its reference_id.
-            # We need to find that posting to get its ID.
-            posting = self.ledger_service.repo.get_posting_by_reference_id(violation.summons_no)
+            # Written in the caller's transaction; the caller commits
+            result = self.ledger_service.create_obligations([
+                ObligationRequest(
+                    key=violation.summons_no,
+                    category=PostingCategory.TLC,
+                    amount=violation.total_payable,
+                    reference_id=violation.summons_no,
+                    driver_id=violation.driver_id,
+                    lease_id=violation.lease_id,
+                    medallion_id=violation.medallion_id,
+                    vehicle_id=violation.lease.vehicle_id if violation.lease else None,
+                )
+            ])
+            if violation.summons_no in result.failed:
+                raise TLCLedgerPostingError(violation.summons_no, result.failed[violation.summons_no])
+            posting = result.posted[violation.summons_no]
 
             violation.status = TLCViolationStatus.POSTED
             violation.posting_date = datetime.now(timezone.utc)
-            violation.original_posting_id = posting.id if posting else None
+            violation.original_posting_id = posting.id
 
             if is_update:
                 violation.reversal_posting_id = None # Clear reversal ID on successful reposting
@@ -179,5 +180,7 @@ class TLCService:
 
             logger.info(f"Posted summons {violation.summons_no} to ledger. Posting ID: {violation.original_posting_id}")
 
+        except TLCLedgerPostingError:
+            raise
         except Exception as e:
             raise TLCLedgerPostingError(violation.summons_no, str(e)) from e
\ No newline at end of file
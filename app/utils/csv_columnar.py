@@ -0,0 +1,155 @@
+### app/utils/csv_columnar.py
+
+"""
+Columnar parsing helpers for CSV imports.
+
+A chunk of raw rows (see `app.utils.csv_import.iter_csv_chunks`) becomes a
+2-D NumPy array of stripped strings, one column per CSV field. Each field
+is then converted for the whole chunk at once (NumPy string ufuncs,
+`pd.to_numeric`, `pd.to_datetime`), and a failed conversion yields a
+boolean mask instead of an exception. `RowErrors` folds those masks into
+one error per row (the first failing check wins), like the per-row parsers
+report.
+
+Money is parsed to exact int64 cents. Digits past the cent are rounded half
+away from zero, which is what MySQL does when a longer Decimal is stored in
+a NUMERIC(10, 2) column, so the stored values match the per-row path.
+Cents are turned back into Decimals with `app.utils.money`.
+"""
+
+from decimal import InvalidOperation
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.csv_import import DateFormatCache
+from app.utils.money import to_cents
+
+_TRUE_VALUES = ["true", "1", "y", "yes"]
+
+
+def rows_to_cells(chunk: List[Tuple[int, list]], width: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Build a stripped string array from (row_number, row) pairs.
+
+    Args:
+        chunk: Rows with their file row numbers
+        width: Number of columns to keep; short rows are padded with ""
+
+    Returns:
+        (row_numbers, cells, widths) where cells has shape (rows, width) and
+        widths holds each row's original cell count.
+    """
+    row_numbers = np.fromiter((row_number for row_number, _ in chunk), dtype=np.int64, count=len(chunk))
+    widths = np.fromiter((len(row) for _, row in chunk), dtype=np.int64, count=len(chunk))
+    padding = [""] * width
+    cells = np.array([(row + padding)[:width] for _, row in chunk], dtype=str).reshape(len(chunk), width)
+    return row_numbers, np.char.strip(cells), widths
+
+
+def text_values(values: np.ndarray) -> List[Optional[str]]:
+    """Strings with blanks as None (see utils.general.clean_value)"""
+    return [value or None for value in values.tolist()]
+
+
+def bool_values(values: np.ndarray) -> List[bool]:
+    """Boolean flags as read by clean_value(value, is_bool=True)"""
+    return np.isin(np.char.lower(values), _TRUE_VALUES).tolist()
+
+
+def parse_cents(values: np.ndarray, blank_as_zero: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse decimal strings to int64 cents.
+
+    Values with at most two decimals are converted in bulk; the few with
+    more decimals or an exponent go through Decimal so rounding is exact.
+
+    Args:
+        values: Stripped strings
+        blank_as_zero: Treat "" as 0 instead of invalid
+
+    Returns:
+        (cents, invalid) where invalid marks values that are not numbers.
+    """
+    blank = values == ""
+    numbers = pd.to_numeric(values, errors="coerce")
+    invalid = ~np.isfinite(numbers)
+    if blank_as_zero:
+        invalid &= ~blank
+
+    cents = np.rint(np.where(invalid | blank, 0.0, numbers) * 100).astype(np.int64)
+
+    dot = np.char.find(values, ".")
+    decimals = np.where(dot >= 0, np.char.str_len(values) - dot - 1, 0)
+    exponent = (np.char.find(np.char.lower(values), "e") >= 0)
+    for position in np.flatnonzero(~invalid & ((decimals > 2) | exponent)):
+        try:
+            cents[position] = to_cents(str(values[position]))
+        except InvalidOperation:
+            invalid[position] = True
+
+    return cents, invalid
+
+
+def parse_datetimes(values: np.ndarray, formats: DateFormatCache) -> pd.DatetimeIndex:
+    """
+    Parse a string column against the cached formats.
+
+    Formats are tried on the whole column in DateFormatCache order (the
+    last winner early, but never ahead of a format that can match the same
+    strings); only values a format cannot parse go on to the next one. The
+    format that parsed the most values becomes the winner for the next
+    chunk. Unparsed values are NaT.
+    """
+    result = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[ns]")
+    pending = values != ""
+
+    best_format, best_count = formats.winner, 0
+    for fmt in formats.ordered():
+        positions = np.flatnonzero(pending)
+        if not len(positions):
+            break
+        parsed = pd.to_datetime(values[positions], format=fmt, errors="coerce")
+        matched = ~parsed.isna()
+        count = int(matched.sum())
+        if count:
+            result[positions[matched]] = parsed[matched].to_numpy(dtype="datetime64[ns]")
+            pending[positions[matched]] = False
+            if count > best_count:
+                best_format, best_count = fmt, count
+
+    formats.winner = best_format
+    return pd.DatetimeIndex(result)
+
+
+def datetime_values(parsed: pd.DatetimeIndex) -> list:
+    """Python datetimes (None for NaT)"""
+    missing = parsed.isna()
+    return [None if gap else value for value, gap in zip(parsed.to_pydatetime().tolist(), missing)]
+
+
+class RowErrors:
+    """First failing check per row of a chunk"""
+
+    def __init__(self, row_numbers: np.ndarray):
+        self.row_numbers = row_numbers
+        self.messages: Dict[int, str] = {}
+        self.failed = np.zeros(len(row_numbers), dtype=bool)
+
+    def add(self, mask: np.ndarray, message: Callable[[int], str]) -> None:
+        """
+        Record an error for rows in mask that have not failed yet.
+
+        Args:
+            mask: Boolean array aligned with the chunk
+            message: Builds the message from the row's position in the chunk
+        """
+        new = np.asarray(mask, dtype=bool) & ~self.failed
+        for position in np.flatnonzero(new):
+            self.messages[int(self.row_numbers[position])] = message(int(position))
+        self.failed |= new
+
+    def items(self) -> Sequence[Tuple[int, str]]:
+        """(row_number, message) pairs in file order"""
+        return sorted(self.messages.items())
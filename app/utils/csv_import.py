@@ -0,0 +1,155 @@
+### app/utils/csv_import.py
+
+"""
+Helpers for streaming CSV uploads into the database in bounded chunks.
+
+The upload is decoded incrementally and handed out a chunk of rows at a
+time, so memory stays proportional to the chunk size rather than the file.
+"""
+
+import csv
+import io
+from datetime import datetime
+from itertools import islice
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def open_csv_reader(file_stream: BinaryIO, encoding: str = "utf-8"):
+    """Wrap a binary upload in a csv reader that decodes as it reads"""
+    text_stream = io.TextIOWrapper(file_stream, encoding=encoding, newline="")
+    return csv.reader(text_stream)
+
+
+def iter_csv_chunks(
+    csv_reader, chunk_size: int, first_row_number: int = 2
+) -> Iterator[List[Tuple[int, list]]]:
+    """
+    Yield lists of (row_number, row) with at most chunk_size entries.
+
+    Row numbers are 1-based file lines, so the first data row after the
+    header is row 2.
+    """
+    numbered = enumerate(csv_reader, start=first_row_number)
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def insert_chunk(db: Session, model, rows: List[dict]) -> List[Tuple[dict, str]]:
+    """
+    Insert a chunk with one bulk INSERT inside a savepoint. When the database
+    rejects it (constraint or bad value), insert the rows one by one in
+    their own savepoints so a single bad row only loses itself.
+
+    Returns:
+        (row, error) for every row the database rejected.
+    """
+    if not rows:
+        return []
+
+    try:
+        with db.begin_nested():
+            db.execute(insert(model), rows)
+        return []
+    except (IntegrityError, DataError) as e:
+        logger.warning(
+            "Bulk insert rejected, retrying row by row",
+            table=model.__tablename__, rows=len(rows), error=str(e.orig)
+        )
+
+    failures = []
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(model), [row])
+        except (IntegrityError, DataError) as e:
+            failures.append((row, str(e.orig)))
+    return failures
+
+
+# Directives whose matches may contain punctuation (locale names, offsets)
+_PUNCTUATED_DIRECTIVES = set("aAbBcxXzZ")
+
+
+def _punctuation(fmt: str) -> Optional[str]:
+    """
+    The punctuation a format puts in every string it matches, or None when
+    one of its directives can match punctuation itself.
+    """
+    literals = []
+    chars = iter(fmt)
+    for char in chars:
+        if char == "%":
+            directive = next(chars, "")
+            if directive in _PUNCTUATED_DIRECTIVES:
+                return None
+            if directive == "%":
+                literals.append("%")
+        elif not (char.isalnum() or char.isspace()):
+            literals.append(char)
+    return "".join(literals)
+
+
+def formats_can_collide(first: str, second: str) -> bool:
+    """
+    Whether one string can match both formats. Other directives only match
+    digits, letters and spaces, so formats with different punctuation never
+    match the same string.
+    """
+    first_punctuation, second_punctuation = _punctuation(first), _punctuation(second)
+    return (
+        first_punctuation is None or second_punctuation is None
+        or first_punctuation == second_punctuation
+    )
+
+
+class DateFormatCache:
+    """
+    Parse date strings against a list of formats, trying the format that
+    matched last time first.
+
+    A file is written with one format throughout, so after the first row
+    nearly every value parses on the first attempt. The winner only moves
+    ahead of formats it cannot collide with: a value that several formats
+    accept (10/11/2025 for %m/%d/%Y and %d/%m/%Y) always gets the first
+    declared one.
+    """
+
+    def __init__(self, formats: Sequence[str]):
+        self.formats = list(formats)
+        self.winner: Optional[str] = None
+        self._orders = {fmt: self._try_order(fmt) for fmt in self.formats}
+
+    def _try_order(self, winner: str) -> List[str]:
+        position = 0
+        for index, fmt in enumerate(self.formats[:self.formats.index(winner)]):
+            if formats_can_collide(fmt, winner):
+                position = index + 1
+        order = [fmt for fmt in self.formats if fmt != winner]
+        order.insert(position, winner)
+        return order
+
+    def ordered(self) -> List[str]:
+        """The formats in the order to try them"""
+        return self._orders[self.winner] if self.winner is not None else self.formats
+
+    def parse(self, value: str) -> Optional[datetime]:
+        """Return the parsed datetime, or None when no format matches"""
+        for fmt in self.ordered():
+            try:
+                parsed = datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+            self.winner = fmt
+            return parsed
+        return None
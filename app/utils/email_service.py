@@ -4,15 +4,14 @@ import asyncio
 from email.mime.application import MIMEApplication
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import boto3
 from botocore.exceptions import ClientError
-from jinja2 import Environment, FileSystemLoader
 
 from app.core.config import settings
 from app.utils.logger import get_logger
+from app.utils.template_store import template_store
 
 logger = get_logger(__name__)
 
@@ -31,14 +30,13 @@ class EmailService:
         )
         self.sender = settings.aws_ses_sender_email
 
-        # Initialize Jinja2 environment for email templates
-        template_path = Path(__file__).parent.parent / "templates" / "emails"
-        self.jinja_env = Environment(loader=FileSystemLoader(template_path), autoescape=True)
+        # Jinja2 environment for email templates, shared with the template store
+        self.jinja_env = template_store.jinja_env
 
     def _render_template(self, template_name: str, context: Dict[str, Any]) -> str:
         """Render an HTML email template using Jinja2."""
         try:
-            template = self.jinja_env.get_template(template_name)
+            template = template_store.get_email_template(template_name)
             return template.render(context)
         except Exception as e:
             logger.error("Error rendering email template", template=template_name, error_message=str(e))
@@ -0,0 +1,48 @@
+### app/utils/flush_tracking.py
+
+"""
+Helpers for the flush listeners that keep derived tables in step with the
+records they are built from (lease availability, lease search, plate index,
+ACH payable queue, balance grid).
+
+`has_changes` tells whether a flushed object was added, deleted or had one
+of the given attributes changed. `attribute_values` returns the current and
+previous values of an attribute, so a listener can refresh both the record
+an object points to and the one it pointed to before. `track_previous_values`
+makes sure that previous value is known: without it, setting an attribute
+on an expired instance (e.g. after a commit) records no previous value.
+"""
+
+from itertools import chain
+from typing import Iterable, Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+
+def has_changes(session: Session, obj, fields: Iterable[str]) -> bool:
+    """Whether obj is new or deleted in this flush, or any of fields changed"""
+    if obj in session.new or obj in session.deleted:
+        return True
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in fields)
+
+
+def attribute_values(obj, name: str) -> Set:
+    """Current and previous non-null values of an attribute in this flush"""
+    history = inspect(obj).attrs[name].history
+    return {
+        value for value in chain(history.added, history.unchanged, history.deleted)
+        if value is not None
+    }
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    """No-op; registered with active_history so history keeps the old value"""
+
+
+def track_previous_values(*attributes) -> None:
+    """Load the previous value of each attribute when it is set"""
+    for attribute in attributes:
+        if not event.contains(attribute, "set", _load_previous_value):
+            event.listen(attribute, "set", _load_previous_value, active_history=True)
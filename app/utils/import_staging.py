@@ -0,0 +1,86 @@
+### app/utils/import_staging.py
+
+"""
+Staging area for uploaded import files that are processed by a background job.
+
+Uploads are copied to S3 under `imports/<source>/` when a bucket is
+configured, otherwise to the local document storage directory (a stand-in
+for development, where the API and worker share a filesystem). The returned
+location string is what gets passed to the Celery job.
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+from uuid import uuid4
+
+from app.core.config import settings
+from app.utils.logger import get_logger
+from app.utils.s3_utils import s3_utils
+
+logger = get_logger(__name__)
+
+STAGING_PREFIX = "imports"
+S3_SCHEME = "s3://"
+LOCAL_SCHEME = "file://"
+
+
+def _local_root() -> str:
+    return settings.document_storage_dir or tempfile.gettempdir()
+
+
+def stage_upload(file_obj: BinaryIO, source: str, file_name: str) -> str:
+    """
+    Copy an uploaded file to the staging area without reading it into memory.
+
+    Returns:
+        Location of the staged file ("s3://<key>" or "file://<path>")
+    """
+    key = f"{STAGING_PREFIX}/{source}/{uuid4().hex}/{os.path.basename(file_name)}"
+    file_obj.seek(0)
+
+    if settings.s3_bucket_name:
+        if not s3_utils.upload_file(file_obj, key, content_type="text/csv"):
+            raise RuntimeError(f"Failed to stage {file_name} to S3")
+        location = f"{S3_SCHEME}{key}"
+    else:
+        path = os.path.join(_local_root(), key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as staged:
+            shutil.copyfileobj(file_obj, staged)
+        location = f"{LOCAL_SCHEME}{path}"
+
+    logger.info("Staged import file", source=source, file_name=file_name, location=location)
+    return location
+
+
+@contextmanager
+def open_staged_upload(location: str) -> Iterator[BinaryIO]:
+    """Open a staged file for binary reading; S3 objects are spooled to disk"""
+    if location.startswith(S3_SCHEME):
+        with tempfile.TemporaryFile() as spool:
+            s3_utils.s3_client.download_fileobj(
+                s3_utils.bucket_name, location[len(S3_SCHEME):], spool
+            )
+            spool.seek(0)
+            yield spool
+    elif location.startswith(LOCAL_SCHEME):
+        with open(location[len(LOCAL_SCHEME):], "rb") as staged:
+            yield staged
+    else:
+        raise ValueError(f"Unknown staging location: {location}")
+
+
+def discard_staged_upload(location: str) -> None:
+    """Remove a staged file once its import has finished"""
+    try:
+        if location.startswith(S3_SCHEME):
+            s3_utils.delete_file(location[len(S3_SCHEME):])
+        elif location.startswith(LOCAL_SCHEME):
+            path = location[len(LOCAL_SCHEME):]
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+    except OSError as e:
+        logger.warning(f"Could not remove staged import file {location}: {e}")
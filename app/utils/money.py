@@ -0,0 +1,64 @@
+### app/utils/money.py
+
+"""
+Helpers for money held as integer cents.
+
+Used by the columnar CSV parsers, the vectorized installment schedules and
+the vectorized DTR calculator, which keep amounts as exact integer cents
+(int64 in NumPy arrays) and only build Decimals when the values are written.
+
+Rounding rules:
+
+- `to_cents` rounds an amount to the cent half away from zero
+  (ROUND_HALF_UP), the rounding MySQL applies when a DECIMAL(…, 2) column
+  stores a longer value. Amounts with at most two decimals are exact.
+  Floats are taken at their shortest repr, so 0.1 + 0.2 is 30 cents.
+- Divisions of cents use `round_half_away` where the result is compared
+  with values stored by MySQL, and `round_half_even` where it reproduces a
+  Decimal.quantize with the default context (DTR proration, loan interest).
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, List, Union
+
+import numpy as np
+
+_CENT = Decimal("0.01")
+
+Denominator = Union[int, np.ndarray]
+
+
+def to_cents(amount: Any) -> int:
+    """Amount (Decimal/float/int/str) in whole cents; None and NaN are 0"""
+    if amount is None or (isinstance(amount, float) and np.isnan(amount)):
+        return 0
+    return int(Decimal(str(amount)).quantize(_CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def cents_to_decimal(cents: int) -> Decimal:
+    """Integer cents as a 2-place Decimal"""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def cents_to_decimals(cents: np.ndarray) -> List[Decimal]:
+    """Convert int64 cents to 2-place Decimals for the insert statement"""
+    return [Decimal(value).scaleb(-2) for value in cents.tolist()]
+
+
+def round_half_away(numerator: np.ndarray, denominator: Denominator) -> np.ndarray:
+    """Integer division rounded half away from zero (MySQL DECIMAL rounding)"""
+    numerator = np.asarray(numerator, dtype=np.int64)
+    magnitude = (np.abs(numerator) * 2 + denominator) // (denominator * 2)
+    return np.sign(numerator) * magnitude
+
+
+def round_half_even(numerator: np.ndarray, denominator: Denominator) -> np.ndarray:
+    """
+    Integer division rounded half to even, matching Decimal.quantize.
+    Object arrays of Python ints are divided exactly.
+    """
+    numerator = np.asarray(numerator)
+    quotient, remainder = numerator // denominator, numerator % denominator
+    twice = remainder * 2
+    round_up = (twice > denominator) | ((twice == denominator) & (quotient % 2 == 1))
+    return quotient + round_up.astype(np.int64)
@@ -0,0 +1,217 @@
+### app/utils/template_store.py
+
+"""
+Shared store for email and SMS templates.
+
+Lease renewal, reminder and expiry runs render templates kept in S3; a
+reminder run renders the same two templates for every driver it notifies.
+`template_store` keeps each S3 template in memory with its ETag:
+
+- within `settings.email_template_cache_ttl_seconds` of the last check the
+  cached copy is used without calling S3;
+- after that the object is revalidated with a conditional GET
+  (If-None-Match), which costs a 304 and no body while it is unchanged;
+- if S3 cannot be reached, a copy fetched earlier keeps being served.
+
+S3 templates use `{{name}}` placeholders; `compile_template` splits a
+template into text and placeholders once per version, so rendering it for
+each driver is a single join. Packaged Jinja2 email templates
+(app/templates/emails) come from one Environment that compiles each file
+once per process.
+"""
+
+import re
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+from jinja2 import Environment, FileSystemLoader, Template
+
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+EMAIL_TEMPLATE_PATH = Path(__file__).parent.parent / "templates" / "emails"
+
+_PLACEHOLDER = re.compile(r"\{\{([^{}]+)\}\}")
+
+
+class PlaceholderTemplate:
+    """
+    A `{{name}}` template split into literal text and placeholders once.
+
+    `render` substitutes names present in the data (falsy values render as
+    an empty string) and leaves unknown placeholders as they are.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self._parts: List[str] = _PLACEHOLDER.split(source)
+
+    def render(self, data: Dict[str, Any]) -> str:
+        parts = self._parts
+        out = []
+        for index, part in enumerate(parts):
+            if index % 2 == 0:
+                out.append(part)
+            elif part in data:
+                value = data[part]
+                out.append(str(value) if value else "")
+            else:
+                out.append("{{" + part + "}}")
+        return "".join(out)
+
+
+@lru_cache(maxsize=64)
+def compile_template(source: str) -> PlaceholderTemplate:
+    """Compiled form of a `{{name}}` template; cached per source text"""
+    return PlaceholderTemplate(source)
+
+
+@dataclass
+class _CachedTemplate:
+    text: str
+    etag: Optional[str]
+    checked_at: float
+
+
+def _decode(response: Dict[str, Any]) -> str:
+    body = response["Body"].read()
+
+    # Try to honor charset from ContentType; default to utf-8
+    content_type = response.get("ContentType", "") or ""
+    charset = "utf-8"
+    if "charset=" in content_type.lower():
+        # e.g. "text/html; charset=utf-8"
+        try:
+            charset = (
+                content_type.lower()
+                .split("charset=", 1)[1]
+                .split(";", 1)[0]
+                .strip()
+            ) or "utf-8"
+        except Exception:
+            charset = "utf-8"
+
+    return body.decode(charset, errors="replace")
+
+
+def _not_modified(error: ClientError) -> bool:
+    error_code = str(error.response.get("Error", {}).get("Code", ""))
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return error_code in ("304", "NotModified") or status == 304
+
+
+class TemplateStore:
+    """In-process cache of S3 templates and the packaged Jinja2 email templates"""
+
+    def __init__(self, ttl_seconds: Optional[int] = None, s3_client=None):
+        self.ttl_seconds = ttl_seconds
+        self._s3_client = s3_client
+        self._cache: Dict[Tuple[str, str], _CachedTemplate] = {}
+        # Guards _cache and _key_locks only; S3 is called under the key's lock
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self.jinja_env = Environment(
+            loader=FileSystemLoader(EMAIL_TEMPLATE_PATH),
+            autoescape=True,
+            auto_reload=False,
+        )
+
+    @property
+    def s3_client(self):
+        if self._s3_client is None:
+            self._s3_client = boto3.client(
+                "s3",
+                aws_access_key_id=settings.aws_access_key_id,
+                aws_secret_access_key=settings.aws_secret_access_key,
+                region_name=settings.aws_region,
+            )
+        return self._s3_client
+
+    def _ttl(self) -> int:
+        if self.ttl_seconds is not None:
+            return self.ttl_seconds
+        return settings.email_template_cache_ttl_seconds
+
+    def _fresh(self, cache_key: Tuple[str, str]) -> Tuple[Optional[_CachedTemplate], bool]:
+        """Cached entry of a key and whether it is within the TTL"""
+        with self._lock:
+            cached = self._cache.get(cache_key)
+        return cached, bool(cached and time.monotonic() - cached.checked_at < self._ttl())
+
+    def _key_lock(self, cache_key: Tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(cache_key, threading.Lock())
+
+    def _load(self, bucket_name: str, template_key: str) -> Optional[_CachedTemplate]:
+        cache_key = (bucket_name, template_key)
+        cached, fresh = self._fresh(cache_key)
+        if fresh:
+            return cached
+
+        # One S3 request per key at a time; other keys are not held up
+        with self._key_lock(cache_key):
+            cached, fresh = self._fresh(cache_key)
+            if fresh:
+                return cached
+
+            params = {"Bucket": bucket_name, "Key": template_key}
+            if cached and cached.etag:
+                params["IfNoneMatch"] = cached.etag
+
+            now = time.monotonic()
+            try:
+                response = self.s3_client.get_object(**params)
+            except ClientError as e:
+                if cached and _not_modified(e):
+                    entry = _CachedTemplate(text=cached.text, etag=cached.etag, checked_at=now)
+                    with self._lock:
+                        self._cache[cache_key] = entry
+                    return entry
+                return self._fetch_failed(cached, bucket_name, template_key, e)
+            except Exception as e:
+                return self._fetch_failed(cached, bucket_name, template_key, e)
+
+            entry = _CachedTemplate(
+                text=_decode(response), etag=response.get("ETag"), checked_at=now
+            )
+            with self._lock:
+                self._cache[cache_key] = entry
+            logger.info(f"Fetched template from S3: {template_key}")
+            return entry
+
+    def _fetch_failed(self, cached, bucket_name, template_key, error) -> Optional[_CachedTemplate]:
+        logger.error(
+            f"Error fetching template from S3 bucket '{bucket_name}' with key '{template_key}': {str(error)}"
+        )
+        if cached:
+            logger.warning(f"Using previously fetched copy of template: {template_key}")
+        return cached
+
+    def get_s3_template(self, bucket_name: str, template_key: str) -> Optional[str]:
+        """
+        Template text from S3, or None when it cannot be fetched and no
+        earlier copy is cached.
+        """
+        entry = self._load(bucket_name, template_key)
+        return entry.text if entry else None
+
+    def get_email_template(self, template_name: str) -> Template:
+        """Compiled Jinja2 template from app/templates/emails"""
+        return self.jinja_env.get_template(template_name)
+
+    def clear(self) -> None:
+        """Drop cached S3 templates, e.g. after publishing new versions"""
+        with self._lock:
+            self._cache.clear()
+
+
+# Create a single, reusable instance of the store
+template_store = TemplateStore()
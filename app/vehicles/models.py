@@ -1,5 +1,8 @@
 ### app/vehicles/models.py
 
+# Standard library imports
+from datetime import datetime
+
 # Third party imports
 from sqlalchemy import (
     Boolean,
@@ -8,10 +11,12 @@ from sqlalchemy import (
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
-    DateTime
+    DateTime,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
 
@@ -207,10 +212,19 @@ class VehicleRegistration(Base, AuditMixin):
     registration_state = Column(String(2), nullable=True, comment="Registration State")
     registration_class = Column(String(2), nullable=True, comment="Registration Class")
     plate_number = Column(String(255), nullable=True, comment="Vehicle plate number")
+    plate_key = Column(
+        String(32),
+        nullable=True,
+        comment="Plate number uppercased with separators removed, set on flush (see app.vehicles.plate_index)",
+    )
     status = Column(String(50), nullable=False, comment="Registration Status")
     # Back-populates the relationship with Vehicle
     vehicle = relationship("Vehicle", back_populates="registrations")
 
+    __table_args__ = (
+        Index("ix_vehicle_registration_plate_key_state", "plate_key", "registration_state"),
+    )
+
     def to_dict(self):
         """Convert VehicleRegistration object to a dictionary"""
         return {
@@ -226,6 +240,39 @@ class VehicleRegistration(Base, AuditMixin):
         }
 
 
+class VehiclePlateHistory(Base):
+    """
+    Which vehicle carried a plate from which date
+
+    A row is opened when a registration is added or its plate changes and
+    closed (effective_to) when the plate moves to another registration. Rows
+    are written on flush by app.vehicles.plate_index, so tolls and violations
+    resolve to the vehicle that had the plate on the day they happened.
+    """
+
+    __tablename__ = "vehicle_plate_history"
+
+    id = Column(Integer, primary_key=True, index=True)
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=False, index=True)
+    registration_id = Column(
+        Integer, ForeignKey("vehicle_registration.id", ondelete="SET NULL"), nullable=True
+    )
+    plate_number = Column(String(255), nullable=False, comment="Plate number as registered")
+    plate_key = Column(String(32), nullable=False, comment="Normalized plate number")
+    plate_state = Column(String(2), nullable=True, comment="Registration state, if known")
+    effective_from = Column(Date, nullable=False, comment="First day the vehicle carried the plate")
+    effective_to = Column(Date, nullable=True, comment="Day the plate moved on; NULL while current")
+    recorded_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    vehicle = relationship("Vehicle")
+    registration = relationship("VehicleRegistration")
+
+    __table_args__ = (
+        Index("ix_vehicle_plate_history_key_from", "plate_key", "effective_from"),
+        UniqueConstraint("registration_id", "effective_from", name="uq_vehicle_plate_history_registration_from"),
+    )
+
+
 class VehicleHackUp(Base, AuditMixin):
     """
     Vehicle HackUp model
@@ -0,0 +1,263 @@
+### app/vehicles/plate_index.py
+
+"""
+Normalized plate index.
+
+Plates arrive in many shapes ("T123456C", "t 123456-c", "NY T123456C" in the
+EZPass tag column). `vehicle_registration.plate_key` holds the plate
+uppercased with separators removed, and `vehicle_plate_history` records
+which vehicle carried each plate from which date. Both are maintained by a
+`before_flush` listener, so lookups are index seeks on the key:
+
+- `PlateResolver` maps (plate, state, time) to the vehicle that carried the
+  plate at that time for a whole batch in two queries (EZPass and PVB
+  association).
+- `plate_key_matches` is the condition behind the plate search filters: a
+  prefix match on the key instead of a leading-wildcard ILIKE.
+"""
+
+import re
+from collections import defaultdict
+from datetime import date, datetime
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, false, or_
+from sqlalchemy.orm import Session
+
+from app.utils.flush_tracking import has_changes
+from app.utils.logger import get_logger
+from app.vehicles.models import VehiclePlateHistory, VehicleRegistration
+
+logger = get_logger(__name__)
+
+PLATE_KEY_LENGTH = 32
+
+# Registration attributes that open a new plate history row
+REGISTRATION_PLATE_FIELDS = ("plate_number", "registration_state", "vehicle_id")
+
+_PLATE_STRIP = re.compile(r"[^A-Z0-9]")
+_STATE_CODE = re.compile(r"^[A-Z]{2}$")
+
+
+def normalize_plate(value: Optional[str]) -> str:
+    """Uppercase a plate and drop spaces, dashes and other separators"""
+    if not value:
+        return ""
+    return _PLATE_STRIP.sub("", value.upper())[:PLATE_KEY_LENGTH]
+
+
+def normalize_state(value: Optional[str]) -> Optional[str]:
+    """Two-letter state code, or None when missing or not a code"""
+    value = (value or "").strip().upper()
+    return value if _STATE_CODE.match(value) else None
+
+
+def split_tag_or_plate(value: Optional[str]) -> Tuple[Optional[str], str]:
+    """
+    Split an EZPass 'Tag/Plate #' value into (state, plate).
+
+    Plates are sent as 'STATE PLATE' ("NY T123456C"); tag numbers carry no
+    state and are returned whole.
+    """
+    parts = (value or "").split()
+    if len(parts) >= 2 and normalize_state(parts[0]):
+        return parts[0].upper(), "".join(parts[1:])
+    return None, value or ""
+
+
+def plate_key_matches(term: str, column=VehicleRegistration.plate_key):
+    """
+    Search condition for a plate filter term.
+
+    Matches keys starting with the normalized term, which the plate key
+    index serves as a range seek.
+    """
+    key = normalize_plate(term)
+    if not key:
+        return false()
+    return column.like(f"{key}%")
+
+
+class PlateResolver:
+    """
+    Resolve plates to vehicles for a batch of records.
+
+    `load` reads the plate history and the current registrations of the
+    requested keys; `vehicle_for` then answers from memory. A record is
+    matched to the history row covering its date; when the history has no
+    row for that date it falls back to the current registration, with an
+    active registration winning over older ones carrying the same plate.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.history: Dict[str, List[tuple]] = defaultdict(list)
+        self.current: Dict[str, List[tuple]] = defaultdict(list)
+
+    def load(self, plates: Iterable[str]) -> "PlateResolver":
+        """Load the index for the given plates (raw or normalized)"""
+        keys = {normalize_plate(plate) for plate in plates} - {"", *self.history, *self.current}
+        if not keys:
+            return self
+
+        history_rows = (
+            self.db.query(
+                VehiclePlateHistory.plate_key,
+                VehiclePlateHistory.plate_state,
+                VehiclePlateHistory.vehicle_id,
+                VehiclePlateHistory.effective_from,
+                VehiclePlateHistory.effective_to,
+            )
+            .filter(VehiclePlateHistory.plate_key.in_(keys))
+            .order_by(VehiclePlateHistory.effective_from.asc(), VehiclePlateHistory.id.asc())
+            .all()
+        )
+        for row in history_rows:
+            self.history[row.plate_key].append(row)
+
+        registration_rows = (
+            self.db.query(
+                VehicleRegistration.plate_key,
+                VehicleRegistration.registration_state,
+                VehicleRegistration.vehicle_id,
+                VehicleRegistration.status,
+            )
+            .filter(VehicleRegistration.plate_key.in_(keys))
+            .order_by(VehicleRegistration.id.asc())
+            .all()
+        )
+        for row in registration_rows:
+            self.current[row.plate_key].append(row)
+
+        logger.info(
+            "Loaded plate index", plates=len(keys),
+            history_rows=len(history_rows), registrations=len(registration_rows)
+        )
+        return self
+
+    def vehicle_for(
+        self,
+        plate: str,
+        state: Optional[str] = None,
+        at: Optional[datetime] = None,
+    ) -> Optional[int]:
+        """
+        Vehicle that carried the plate at the given time.
+
+        Args:
+            plate: Plate as received (normalized here)
+            state: State the plate was issued in, if known; rows registered
+                in another state are ignored
+            at: Time of the event; None means now
+        """
+        key = normalize_plate(plate)
+        if not key:
+            return None
+        state = normalize_state(state)
+        day = at.date() if isinstance(at, datetime) else (at or date.today())
+
+        holder = None
+        for row in self.history.get(key, ()):
+            if not self._same_state(row.plate_state, state):
+                continue
+            if row.effective_from <= day and (row.effective_to is None or day < row.effective_to):
+                holder = row.vehicle_id  # rows are in effective_from order; latest wins
+        if holder is not None:
+            return holder
+
+        for row in self.current.get(key, ()):
+            if self._same_state(normalize_state(row.registration_state), state) and row.status == "Active":
+                return row.vehicle_id
+        for row in self.current.get(key, ()):
+            if self._same_state(normalize_state(row.registration_state), state):
+                return row.vehicle_id
+        return None
+
+    @staticmethod
+    def _same_state(registered: Optional[str], requested: Optional[str]) -> bool:
+        return registered is None or requested is None or registered == requested
+
+
+def _record_plate(session: Session, registration: VehicleRegistration, is_new: bool) -> None:
+    """Set the registration's plate key and open/close plate history rows"""
+    key = normalize_plate(registration.plate_number) or None
+    state = normalize_state(registration.registration_state)
+    registration.plate_key = key
+
+    effective_from = (registration.registration_date if is_new else None) or date.today()
+
+    current = None
+    if not is_new:
+        current = (
+            session.query(VehiclePlateHistory)
+            .filter(
+                VehiclePlateHistory.registration_id == registration.id,
+                VehiclePlateHistory.effective_to.is_(None),
+            )
+            .first()
+        )
+        if (
+            current is not None
+            and current.plate_key == key
+            and current.plate_state == state
+            and current.vehicle_id == registration.vehicle_id
+        ):
+            return
+
+    # Corrected on the day it was opened: the old value never applied
+    rewrite = current is not None and current.effective_from >= effective_from
+    if current is not None and not rewrite:
+        current.effective_to = effective_from
+
+    if key is None:
+        if rewrite:
+            session.delete(current)
+        return
+
+    # The plate moves to this registration; end other open holdings of it
+    holders = (
+        session.query(VehiclePlateHistory)
+        .filter(
+            VehiclePlateHistory.plate_key == key,
+            VehiclePlateHistory.effective_to.is_(None),
+            VehiclePlateHistory.effective_from <= effective_from,
+        )
+    )
+    if state:
+        holders = holders.filter(
+            or_(VehiclePlateHistory.plate_state == state, VehiclePlateHistory.plate_state.is_(None))
+        )
+    for holder in holders.all():
+        if holder is not current:
+            holder.effective_to = effective_from
+
+    entry = current if rewrite else VehiclePlateHistory(registration=registration, effective_from=effective_from)
+    entry.plate_number = registration.plate_number.strip()
+    entry.plate_key = key
+    entry.plate_state = state
+    if registration.vehicle_id is not None:
+        entry.vehicle_id = registration.vehicle_id
+    else:
+        entry.vehicle = registration.vehicle
+    if not rewrite:
+        session.add(entry)
+
+
+@event.listens_for(Session, "before_flush")
+def maintain_plate_index(session, flush_context, instances):
+    """
+    Keep plate keys and the plate history in step with registrations that
+    are about to be flushed.
+    """
+    changed = [
+        (obj, obj in session.new) for obj in chain(session.new, session.dirty)
+        if isinstance(obj, VehicleRegistration)
+        and has_changes(session, obj, REGISTRATION_PLATE_FIELDS)
+    ]
+    if not changed:
+        return
+
+    with session.no_autoflush:
+        for registration, is_new in changed:
+            _record_plate(session, registration, is_new)
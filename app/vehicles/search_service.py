@@ -27,6 +27,7 @@ from app.vehicles.models import (
     VehicleRegistration,
     VehicleExpensesAndCompliance
 )
+from app.vehicles.plate_index import plate_key_matches
 from app.vehicles.schemas import VehicleStatus , ExpensesAndComplianceCategory , ExpensesAndComplianceSubType
 from app.uploads.services import upload_service
 
@@ -183,7 +184,7 @@ def build_plate_number_query(db: Session, filters: dict, sort_by: str, sort_orde
     if plate := filters.get("plate_number"):
         values = [p.strip() for p in plate.split(",")]
         query = query.filter(
-            or_(*[Registration.plate_number.ilike(f"%{p}%") for p in values])
+            or_(*[plate_key_matches(p, Registration.plate_key) for p in values])
         )
 
     if vin := filters.get("vin"):
@@ -346,7 +347,7 @@ def get_vehicles_list(
         if plate_number:
             plate_numbers = [p.strip() for p in plate_number.split(",")]
             query = query.filter(
-                or_(*[VehicleRegistration.plate_number.ilike(f"%{p}%") for p in plate_numbers])
+                or_(*[plate_key_matches(p) for p in plate_numbers])
             )
 
         # Apply filters
@@ -14,10 +14,15 @@ from celery import Celery
 # This must happen before any database operations in tasks
 import app.drivers.models
 import app.leases.models
+import app.leases.availability  # registers lease availability flush listener
+import app.leases.lease_search  # registers lease search flush listener
 import app.vehicles.models
 import app.medallions.models
 import app.curb.models
 import app.driver_payments.models
+import app.driver_payments.payable_queue  # registers payable queue flush listener
+import app.current_balances.balance_grid  # registers balance grid change listener
+import app.vehicles.plate_index  # registers plate index flush listener
 import app.dtr.models
 import app.users.models
 import app.audit_trail.models
@@ -41,6 +46,7 @@ app.autodiscover_tasks([
     "app.ledger",
     "app.driver_payments",
     "app.leases",
+    "app.current_balances",
 ])
 
 if __name__ == "__main__":
@@ -80,6 +80,27 @@ beat_schedule = {
         "schedule": 10800,  # Runs every 3 hours (10800 seconds)
         "options": {"timezone": "America/New_York"},
     },
+    # --- Retry failed EZPass / PVB associations after CURB trips are mapped ---
+    # Only failures whose plate or vehicle trips changed since the last attempt
+    # are re-run, so an idle pass costs a few indexed queries.
+    "ezpass-retry-failed-associations": {
+        "task": "ezpass.retry_failed_associations",
+        "schedule": 10800,  # Every 3 hours, in step with the CURB sync
+        "options": {"timezone": "America/New_York"},
+    },
+    "pvb-retry-failed-associations": {
+        "task": "pvb.retry_failed_associations",
+        "schedule": 10800,  # Every 3 hours, in step with the CURB sync
+        "options": {"timezone": "America/New_York"},
+    },
+    # --- Lease notification outbox sweep ---
+    # Runs are dispatched right after they commit; this picks up retries and
+    # anything whose dispatch could not be enqueued.
+    "dispatch-lease-notifications": {
+        "task": "leases.dispatch_notifications",
+        "schedule": 300,  # Every 5 minutes
+        "options": {"timezone": "America/New_York", "expires": 300},
+    },
     # ========================================================================
     # SUNDAY MORNING FINANCIAL PROCESSING CHAIN (REPLACES 5 INDIVIDUAL TASKS)
     # ========================================================================
@@ -113,6 +134,37 @@ beat_schedule = {
     # - generate-weekly-dtrs (was 6:00 AM)
     # ========================================================================
     
+    # --- ACH Payable Queue Reconciliation (Daily) ---
+    "rebuild-ach-payable-queue": {
+        "task": "driver_payments.rebuild_ach_payable_queue",
+        "schedule": crontab(hour=2, minute=0),  # Runs daily at 2:00 AM
+        "options": {"timezone": "America/New_York"},
+    },
+
+    # --- Lease Availability Index Reconciliation (Daily) ---
+    "rebuild-lease-availability": {
+        "task": "leases.rebuild_lease_availability",
+        "schedule": crontab(hour=2, minute=15),  # Runs daily at 2:15 AM
+        "options": {"timezone": "America/New_York"},
+    },
+    "rebuild-lease-search": {
+        "task": "leases.rebuild_lease_search",
+        "schedule": crontab(hour=2, minute=30),  # Runs daily at 2:30 AM
+        "options": {"timezone": "America/New_York"},
+    },
+
+    # --- Weekly Balance Grid (new week + nightly reconciliation) ---
+    "rebuild-balance-grid-new-week": {
+        "task": "current_balances.rebuild_balance_grid",
+        "schedule": crontab(hour=0, minute=5, day_of_week="sun"),  # Sunday 12:05 AM
+        "options": {"timezone": "America/New_York"},
+    },
+    "rebuild-balance-grid": {
+        "task": "current_balances.rebuild_balance_grid",
+        "schedule": crontab(hour=2, minute=30),  # Runs daily at 2:30 AM
+        "options": {"timezone": "America/New_York"},
+    },
+
     # --- BPM SLA Processing Task (Daily) ---
     "process-case-sla": {
         "task": "bpm.sla.process_case_sla",
@@ -0,0 +1,313 @@
+"""
+Benchmark of the columnar parsers used by the EZPass and PVB CSV imports
+against the per-row parsers they replaced, on synthetic files. Only parsing
+is timed, not the inserts.
+
+The per-row parsers here are the reference the columnar ones are checked
+against (app/tests/test_csv_columnar_parsing.py).
+
+    PYTHONPATH=. python scripts/bench/csv_parsing.py --rows 100000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from app.ezpass.services import (
+    IMPORT_CHUNK_SIZE as EZPASS_CHUNK_SIZE, POSTING_DATE_FORMATS,
+    TRANSACTION_DATETIME_FORMATS, EZPassService,
+)
+from app.pvb.models import PVBSource
+from app.pvb.services import (
+    CSV_COLUMN_COUNT, IMPORT_CHUNK_SIZE as PVB_CHUNK_SIZE, ISSUE_DATE_FORMATS, PVBService,
+)
+from app.utils.csv_import import DateFormatCache
+from app.utils.general import clean_value, parse_custom_time
+
+EZPASS_HEADER = [
+    "Lane Txn ID", "Tag/Plate #", "Agency", "Entry Plaza", "Exit Plaza", "Class",
+    "Date", "Time", "Amount", "MED", "Posted Date", "Balance",
+]
+
+
+def synthetic_ezpass_rows(count: int, seed: int = 42) -> List[list]:
+    """EZPass rows with a sprinkling of CRZ, negative and malformed values"""
+    rng = random.Random(seed)
+    start = datetime(2025, 10, 1)
+    rows = []
+    for index in range(count):
+        moment = start + timedelta(seconds=rng.randint(0, 30 * 24 * 3600))
+        amount = f"${rng.randint(100, 2000) / 100:.2f}"
+        if rng.random() < 0.05:
+            amount = f"({amount})"
+        row = [
+            f"T{index:09d}",
+            f"NY T{rng.randint(100000, 999999)}C",
+            rng.choice(["MTAB&T", "NYSTA", "PANYNJ"]),
+            rng.choice(["", "GWB", "VNB"]),
+            "CRZ" if rng.random() < 0.03 else rng.choice(["BB", "QMT", "RFK"]),
+            str(rng.randint(1, 3)),
+            moment.strftime("%m/%d/%Y"),
+            moment.strftime("%I:%M:%S %p"),
+            amount,
+            rng.choice(["", f"{rng.randint(1, 9)}A{rng.randint(10, 99)}"]),
+            (moment + timedelta(days=2)).strftime("%m/%d/%Y"),
+            "100.00",
+        ]
+        if rng.random() < 0.01:
+            row[7] = "25:99"
+        if rng.random() < 0.01:
+            row[8] = "n/a"
+        if rng.random() < 0.005:
+            row = row[:5]
+        rows.append(row)
+    return rows
+
+
+def synthetic_pvb_rows(count: int, seed: int = 42) -> List[list]:
+    """PVB rows with a sprinkling of blank and malformed values"""
+    rng = random.Random(seed)
+    start = datetime(2025, 10, 1)
+    rows = []
+    for index in range(count):
+        moment = start + timedelta(minutes=rng.randint(0, 30 * 24 * 60))
+        fine = f"{rng.choice([35, 50, 65, 115, 65.5])}"
+        row = [""] * CSV_COLUMN_COUNT
+        row[0] = f"T{rng.randint(100000, 999999)}C"
+        row[1] = "NY"
+        row[2] = "OMT"
+        row[3] = rng.choice(["", "Y", "N"])
+        row[4] = f"{4000000000 + index}"
+        row[5] = rng.choice(["", "yes"])
+        row[6] = moment.strftime("%m/%d/%Y" if rng.random() < 0.9 else "%m/%d/%y")
+        row[7] = moment.strftime("%I%M") + ("A" if moment.hour < 12 else "P")
+        row[8] = rng.choice(["", (moment + timedelta(days=1)).strftime("%m/%d/%Y")])
+        row[10] = str(rng.randint(1, 99))
+        row[14] = fine
+        row[15] = rng.choice(["", "10", "0"])
+        row[16] = rng.choice(["", "1.25"])
+        row[17] = ""
+        row[18] = rng.choice(["", "5"])
+        row[20] = fine
+        row[24] = "BROADWAY"
+        if rng.random() < 0.01:
+            row[7] = "0930X"
+        if rng.random() < 0.01:
+            row[6] = "13/45/2025"
+        if rng.random() < 0.01:
+            row[14] = "abc"
+        if rng.random() < 0.005:
+            row = row[:20]
+        rows.append(row)
+    return rows
+
+
+def chunked(rows: List[list], chunk_size: int) -> List[List[Tuple[int, list]]]:
+    numbered = list(enumerate(rows, start=2))
+    return [numbered[i:i + chunk_size] for i in range(0, len(numbered), chunk_size)]
+
+
+def parse_ezpass_row(
+    row: list,
+    column_indices: dict,
+    datetime_formats: DateFormatCache,
+    posting_date_formats: DateFormatCache,
+) -> Optional[dict]:
+    """
+    Validates and converts one CSV row into transaction column values.
+    Returns None for rows that are intentionally skipped (CRZ charges).
+
+    Per-row reference for EZPassService._parse_csv_chunk: the importer's
+    former row-at-a-time parser.
+    """
+    # Validate row has enough columns
+    max_index = max(column_indices.values())
+    if len(row) <= max_index:
+        raise ValueError(f"Row has {len(row)} columns but needs at least {max_index + 1}")
+
+    exit_plaza = row[column_indices['exit_plaza']].strip()
+    if exit_plaza.upper() == "CRZ":
+        return None
+
+    # Process amount (handle parentheses for negative values, remove $ signs)
+    amount_str = row[column_indices['amount']].strip()
+    amount_str = amount_str.replace("(", "-").replace(")", "").replace("$", "")
+
+    # Process datetime - combine date and time
+    date_str = row[column_indices['date']].strip()
+    time_str = row[column_indices['time']].strip()
+    transaction_datetime_str = f"{date_str} {time_str}"
+    transaction_datetime = datetime_formats.parse(transaction_datetime_str)
+    if transaction_datetime is None:
+        raise ValueError(f"Unable to parse datetime '{transaction_datetime_str}' with any known format")
+
+    # Get medallion if present (optional field)
+    medallion = None
+    if 'medallion' in column_indices:
+        medallion = row[column_indices['medallion']].strip() or None
+
+    # Get posting date if present (optional field, usually just a date)
+    posting_date = None
+    if 'posted_date' in column_indices:
+        posted_date_str = row[column_indices['posted_date']].strip()
+        if posted_date_str:
+            posting_date = posting_date_formats.parse(posted_date_str)
+
+    return {
+        "transaction_id": row[column_indices['transaction_id']].strip(),
+        "tag_or_plate": row[column_indices['tag_or_plate']].strip(),
+        "agency": row[column_indices['agency']].strip(),
+        "entry_plaza": row[column_indices['entry_plaza']].strip(),
+        "exit_plaza": exit_plaza,
+        "ezpass_class": row[column_indices['ezpass_class']].strip(),
+        "transaction_datetime": transaction_datetime,
+        "amount": Decimal(amount_str),
+        "med_from_csv": medallion,
+        "posting_date": posting_date,
+    }
+
+
+def parse_pvb_row(row: list, issue_date_formats: DateFormatCache) -> dict:
+    """
+    Validates and converts one CSV row into violation column values.
+
+    Per-row reference for PVBService._parse_csv_chunk: the importer's
+    former row-at-a-time parser.
+    """
+    if len(row) < CSV_COLUMN_COUNT:
+        raise ValueError(f"Expected at least {CSV_COLUMN_COUNT} columns, but got {len(row)}")
+
+    issue_date_str = row[6].strip() if row[6] else None
+    issue_time_str = row[7].strip() if row[7] else None
+
+    issue_time = parse_custom_time(issue_time_str)
+
+    issue_date = issue_date_formats.parse(issue_date_str) if issue_date_str else None
+    if issue_date is None:
+        raise ValueError(f"Unable to parse issue date '{issue_date_str}'")
+
+    fine = Decimal(row[14] or "0")
+    processing_fee = fine * Decimal("0.025")
+    amount_due = Decimal(row[20] or "0") + processing_fee
+
+    return {
+        "source": PVBSource.CSV_IMPORT,
+        "plate": clean_value(row[0]),
+        "state": clean_value(row[1]),
+        "type": clean_value(row[2]),
+        "is_terminated": clean_value(row[3] , True),
+        "summons": clean_value(row[4]),
+        "non_program": clean_value(row[5] , True),
+        "issue_date": issue_date.date(),
+        "issue_time": issue_time,
+        "fine": fine,
+        "system_entry_date": datetime.strptime(clean_value(row[8]), "%m/%d/%Y").date() if clean_value(row[8]) else None,
+        "new_issue": clean_value(row[9] , True),
+        "violation_code": clean_value(row[10]),
+        "hearing_ind": clean_value(row[11]),
+        "penalty_warning": clean_value(row[12]),
+        "judgement": clean_value(row[13] , True),
+        "penalty": Decimal(row[15] or "0"),
+        "interest": Decimal(row[16] or "0"),
+        "reduction": Decimal(row[17] or "0"),
+        "payment": Decimal(row[18] or "0"),
+        "ng_pmt": clean_value(row[19] , True),
+        "processing_fee": processing_fee,
+        "amount_due": amount_due,
+        "violation_country": clean_value(row[21]),
+        "front_or_opp": clean_value(row[22]),
+        "house_number": clean_value(row[23]),
+        "street_name": clean_value(row[24]),
+        "intersect_street": clean_value(row[25]),
+        "geo_location": clean_value(row[26]),
+        "street_code_1": clean_value(row[27]),
+        "street_code_2": clean_value(row[28]),
+        "street_code_3": clean_value(row[29]),
+    }
+
+
+def parse_ezpass_per_row(chunks, column_indices) -> Tuple[dict, dict]:
+    """Returns (row_number -> values) for parsed rows and (row_number -> error)"""
+    datetime_formats = DateFormatCache(TRANSACTION_DATETIME_FORMATS)
+    posting_formats = DateFormatCache(POSTING_DATE_FORMATS)
+    parsed, errors = {}, {}
+    for chunk in chunks:
+        for row_number, row in chunk:
+            try:
+                values = parse_ezpass_row(
+                    row, column_indices, datetime_formats, posting_formats
+                )
+            except (ValueError, IndexError, KeyError, ArithmeticError) as e:
+                errors[row_number] = str(e)
+                continue
+            if values is not None:
+                parsed[row_number] = values
+    return parsed, errors
+
+
+def parse_ezpass_columnar(chunks, column_indices) -> Tuple[dict, dict]:
+    datetime_formats = DateFormatCache(TRANSACTION_DATETIME_FORMATS)
+    posting_formats = DateFormatCache(POSTING_DATE_FORMATS)
+    parsed, errors = {}, {}
+    for chunk in chunks:
+        rows, row_errors = EZPassService._parse_csv_chunk(
+            chunk, column_indices, datetime_formats, posting_formats
+        )
+        parsed.update(rows)
+        errors.update(row_errors)
+    return parsed, errors
+
+
+def parse_pvb_per_row(chunks) -> Tuple[dict, dict]:
+    issue_date_formats = DateFormatCache(ISSUE_DATE_FORMATS)
+    parsed, errors = {}, {}
+    for chunk in chunks:
+        for row_number, row in chunk:
+            try:
+                parsed[row_number] = parse_pvb_row(row, issue_date_formats)
+            except (ValueError, IndexError, ArithmeticError) as e:
+                errors[row_number] = str(e)
+    return parsed, errors
+
+
+def parse_pvb_columnar(chunks) -> Tuple[dict, dict]:
+    """Columnar results keyed by summons (unique in the synthetic file)"""
+    issue_date_formats = DateFormatCache(ISSUE_DATE_FORMATS)
+    parsed, errors = {}, {}
+    for chunk in chunks:
+        rows, row_errors = PVBService._parse_csv_chunk(chunk, issue_date_formats)
+        parsed.update((values["summons"], values) for values in rows)
+        errors.update(row_errors)
+    return parsed, errors
+
+
+def _timed(label: str, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {elapsed:8.2f}s  parsed={len(result[0]):>7}  errors={len(result[1]):>6}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    ezpass_chunks = chunked(synthetic_ezpass_rows(args.rows), EZPASS_CHUNK_SIZE)
+    column_indices = EZPassService(None)._map_csv_columns(EZPASS_HEADER)
+    per_row = _timed("EZPass per-row", parse_ezpass_per_row, ezpass_chunks, column_indices)
+    columnar = _timed("EZPass columnar", parse_ezpass_columnar, ezpass_chunks, column_indices)
+    print(f"EZPass speed-up: {per_row / columnar:.1f}x")
+
+    pvb_chunks = chunked(synthetic_pvb_rows(args.rows), PVB_CHUNK_SIZE)
+    per_row = _timed("PVB per-row", parse_pvb_per_row, pvb_chunks)
+    columnar = _timed("PVB columnar", parse_pvb_columnar, pvb_chunks)
+    print(f"PVB speed-up: {per_row / columnar:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Load test for sync-session endpoints: concurrent throughput of
+GET /current-balances, and latency of the health check while those requests
+are running, with the endpoint run in FastAPI's threadpool (a plain `def`
+route, as shipped) versus inline on the event loop (how the former
+`async def` route ran).
+
+The database is a SQLite file whose every statement blocks for --latency ms,
+standing in for MySQL round trips on the synchronous driver.
+
+    PYTHONPATH=. python scripts/bench/event_loop_throughput.py --requests 40
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import List, Tuple
+
+import fastapi.routing
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core.db import Base, get_db
+from app.main import bat_app
+from app.users.utils import get_current_user
+
+BALANCES_PATH = "/current-balances"
+HEALTH_PATH = "/"
+
+
+async def asgi_get(path: str, query: str = "") -> int:
+    """Send one GET through the ASGI app and return the status code"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    received = False
+    status_code = 0
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await bat_app(scope, receive, send)
+    return status_code
+
+
+@contextmanager
+def endpoints_inline():
+    """Run sync endpoints on the event loop, as `async def` routes do"""
+    original = fastapi.routing.run_endpoint_function
+
+    async def run_inline(*, dependant, values, is_coroutine):
+        if is_coroutine:
+            return await dependant.call(**values)
+        return dependant.call(**values)
+
+    fastapi.routing.run_endpoint_function = run_inline
+    try:
+        yield
+    finally:
+        fastapi.routing.run_endpoint_function = original
+
+
+def use_slow_database(path: str, latency: float) -> None:
+    """Point get_db at a SQLite file whose statements block for `latency` seconds"""
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}, poolclass=NullPool
+    )
+    Base.metadata.create_all(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def block(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(latency)
+
+    session_factory = sessionmaker(bind=engine)
+
+    def bench_db():
+        db = session_factory()
+        try:
+            yield db
+            db.commit()
+        finally:
+            db.close()
+
+    bat_app.dependency_overrides[get_db] = bench_db
+    bat_app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1, is_active=True)
+
+
+async def run_load(requests: int, probe_interval: float) -> Tuple[float, List[float]]:
+    """
+    Fire `requests` concurrent balances calls while probing the health check.
+
+    Returns:
+        Wall time of the balances calls and the health check latencies.
+    """
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asgi_get(HEALTH_PATH)
+            probe_latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(probe_interval)
+
+    async def balances(index: int):
+        # A distinct search per request keeps the live-balance cache cold
+        status_code = await asgi_get(BALANCES_PATH, f"search=bench{index}")
+        if status_code != 200:
+            raise RuntimeError(f"{BALANCES_PATH} returned {status_code}")
+
+    prober = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(balances(index) for index in range(requests)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await prober
+    return elapsed, probe_latencies
+
+
+def report(label: str, requests: int, elapsed: float, probe_latencies: List[float]) -> None:
+    print(
+        f"{label:<11} {requests / elapsed:8.1f} req/s  "
+        f"health p50 {statistics.median(probe_latencies) * 1000:7.1f} ms  "
+        f"max {max(probe_latencies) * 1000:7.1f} ms  ({len(probe_latencies)} probes)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=40, help="Concurrent balances requests")
+    parser.add_argument("--latency", type=float, default=5.0, help="Blocking ms per SQL statement")
+    parser.add_argument("--probe-interval", type=float, default=10.0, help="ms between health checks")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        use_slow_database(os.path.join(directory, "bench.db"), args.latency / 1000)
+        probe_interval = args.probe_interval / 1000
+        asyncio.run(asgi_get(BALANCES_PATH, "search=warmup"))
+
+        with endpoints_inline():
+            elapsed, probes = asyncio.run(run_load(args.requests, probe_interval))
+        report("inline", args.requests, elapsed, probes)
+
+        elapsed, probes = asyncio.run(run_load(args.requests, probe_interval))
+        report("threadpool", args.requests, elapsed, probes)
+
+
+if __name__ == "__main__":
+    main()